@@ -75,6 +75,15 @@ def parse_args(args):
         default=environ.get("FOLIO_MIGRATION_TOOLS_REPORT_LANGUAGE", "en"),
         prompt=False,
     )
+    parser.add_argument(
+        "--refresh",
+        help=(
+            "Fetch the schemas, mapping rules and reference data again, replacing the snapshots "
+            "kept when useSnapshotCache is set in the library configuration"
+        ),
+        action="store_true",
+        prompt=False,
+    )
     parser.add_argument(
         "--version",
         "-V",
@@ -97,6 +106,8 @@ def prep_library_config(args):
         config_file_humped["libraryInformation"]["folioPassword"] = args.folio_password
 
     config_file_humped["libraryInformation"]["baseFolder"] = args.base_folder_path
+    if args.refresh:
+        config_file_humped["libraryInformation"]["refreshSnapshotCache"] = True
     config_file = humps.decamelize(config_file_humped)
     library_config = LibraryConfiguration(**config_file["library_information"])
     if library_config.ecs_tenant_id:
@@ -26,6 +26,7 @@ from folioclient import (
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.migration_report import MigrationReport
+from folio_migration_tools.record_writer import open_records
 from folio_migration_tools.transaction_migration.legacy_loan import LegacyLoan
 from folio_migration_tools.transaction_migration.legacy_request import LegacyRequest
 from folio_migration_tools.transaction_migration.transaction_result import (
@@ -354,7 +355,7 @@ class CirculationHelper:
         if any(patron_files):
             for filedef in patron_files:
                 my_path = folder_structure.results_folder / filedef.file_name
-                with open(my_path) as patron_file:
+                with open_records(my_path) as patron_file:
                     for row in patron_file:
                         rec = json.loads(row)
                         user_barcodes.add(rec.get("barcode", "None"))
@@ -364,7 +365,7 @@ class CirculationHelper:
         if any(item_files):
             for filedef in item_files:
                 my_path = folder_structure.results_folder / filedef.file_name
-                with open(my_path) as item_file:
+                with open_records(my_path) as item_file:
                     for row in item_file:
                         rec = json.loads(row)
                         item_barcodes.add(rec.get("barcode", "None"))
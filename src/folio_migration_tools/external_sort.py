@@ -0,0 +1,80 @@
+"""Sorting of more items than fit in memory.
+
+external_sort sorts the items in chunks of a fixed size, writes each sorted chunk to
+a temporary file as JSON lines, and merges the files while reading them back. Only one
+chunk, and one item from each file, is held in memory at a time.
+"""
+
+import heapq
+import json
+import logging
+import tempfile
+from pathlib import Path
+from typing import IO, Any, Callable, Iterable, Iterator, List, Optional
+
+from folio_migration_tools import json_serializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CHUNK_SIZE = 100_000
+
+
+def external_sort(
+    items: Iterable[Any],
+    key: Callable[[Any], Any],
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    temp_folder: Optional[Path] = None,
+) -> Iterator[Any]:
+    """Sort items with bounded memory.
+
+    The sort is stable. If all items fit in one chunk, nothing is written to disk.
+    Otherwise the items are written to disk as JSON, so they must be JSON serializable
+    and are yielded as they are read back: tuples come back as lists, for example.
+    The key function must give the same result for both.
+
+    Args:
+        items (Iterable[Any]): The items to sort.
+        key (Callable[[Any], Any]): The sort key of an item.
+        chunk_size (int): The number of items to sort in memory at a time.
+        temp_folder (Optional[Path]): The folder to write the sorted chunks to. The
+            system temporary folder by default.
+
+    Yields:
+        Any: The items, in sorted order.
+    """
+    chunk: List[Any] = []
+    chunk_files: List[IO[str]] = []
+    try:
+        for item in items:
+            chunk.append(item)
+            if len(chunk) >= chunk_size:
+                chunk_files.append(write_sorted_chunk(chunk, key, temp_folder))
+                chunk = []
+        chunk.sort(key=key)
+        if not chunk_files:
+            yield from chunk
+            return
+        if chunk:
+            chunk_files.append(write_sorted_chunk(chunk, key, temp_folder))
+            chunk = []
+        logger.info("Merging %s sorted chunks", len(chunk_files))
+        yield from heapq.merge(*(read_chunk(f) for f in chunk_files), key=key)
+    finally:
+        for chunk_file in chunk_files:
+            chunk_file.close()
+
+
+def write_sorted_chunk(
+    chunk: List[Any], key: Callable[[Any], Any], temp_folder: Optional[Path]
+) -> IO[str]:
+    chunk.sort(key=key)
+    chunk_file = tempfile.TemporaryFile("w+", encoding="utf-8", dir=temp_folder)
+    for item in chunk:
+        chunk_file.write(json_serializer.dumps(item) + "\n")
+    chunk_file.seek(0)
+    return chunk_file
+
+
+def read_chunk(chunk_file: IO[str]) -> Iterator[Any]:
+    for line in chunk_file:
+        yield json.loads(line)
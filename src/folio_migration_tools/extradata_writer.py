@@ -5,13 +5,15 @@ Provides the ExtradataWriter class for buffering and writing extradata objects
 migration. Handles buffering, flushing, and file management.
 """
 
-import json
 import logging
 import os
 from pathlib import Path
 from typing import List
 
+from folio_migration_tools import json_serializer
 from folio_migration_tools.custom_exceptions import TransformationProcessError
+from folio_migration_tools.library_configuration import OutputCompression
+from folio_migration_tools.record_writer import open_binary_output
 
 logger = logging.getLogger(__name__)
 
@@ -34,7 +36,9 @@ class ExtradataWriter:
         if type(self).__inited:
             return
         self.cache: List[str] = []
+        self.records_written: int = 0
         self.path_to_file: Path = path_to_file
+        self.compression: OutputCompression = OutputCompression.none
         if self.path_to_file.is_file():
             os.remove(self.path_to_file)
         type(self).__inited = True
@@ -42,9 +46,18 @@ class ExtradataWriter:
     def write(self, record_type: str, data_to_write: dict, flush=False):
         try:
             if data_to_write:
-                self.cache.append(f"{record_type}\t{json.dumps(data_to_write)}\n")
-            if len(self.cache) > 1000 or flush:
-                with open(self.path_to_file, "a") as extradata_file:
+                self.cache.append(f"{record_type}\t{json_serializer.dumps(data_to_write)}\n")
+                self.records_written += 1
+            if self.compression != OutputCompression.none and (len(self.cache) > 1000 or flush):
+                if self.cache:
+                    with open_binary_output(
+                        self.path_to_file, "ab", self.compression
+                    ) as extradata_file:
+                        extradata_file.write("".join(self.cache).encode("utf-8"))
+                    self.cache = []
+                    logger.debug("Extradata writer flushing the cache")
+            elif len(self.cache) > 1000 or flush:
+                with open(self.path_to_file, "a", encoding="utf-8") as extradata_file:
                     extradata_file.writelines(self.cache)
                     self.cache = []
                     logger.debug("Extradata writer flushing the cache")
@@ -0,0 +1,527 @@
+"""Sharded, multi-process transformation of source files.
+
+Provides the building blocks the transformers use to spread the mapping of one
+source file over a pool of worker processes:
+
+- DelimitedFileSharder scans a CSV/TSV source file once and splits it into
+  byte-range shards that always start and end on record boundaries (quoted
+  fields with embedded newlines are never split).
+- MarcFileSharder does the same for MARC21 (ISO 2709) files, using the record
+  lengths in the leaders.
+- run_sharded runs a shard function in forked worker processes and yields the
+  results back in shard order, so the parent can stitch the outputs together in
+  the order a sequential run would have written them.
+- transform_in_shards wraps run_sharded for the transformers, and moves the
+  mapper statistics (migration report, mapped FOLIO and legacy fields) and the
+  extradata produced in each worker back into the parent process.
+
+Workers are forked from the parent after the task and its mapper have been set
+up, so they inherit reference data, mapping files and the FOLIO client instead
+of fetching them again.
+"""
+
+import csv
+import json
+import logging
+import multiprocessing
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from pathlib import Path
+from typing import BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.mapper_base import MapperBase
+from folio_migration_tools.record_writer import (
+    file_compression,
+    open_binary_output,
+    open_records,
+)
+
+logger = logging.getLogger(__name__)
+
+SHARDS_PER_PROCESS = 4
+MARC_LEADER_LENGTH = 24
+MARC_DIRECTORY_ENTRY_LENGTH = 12
+MARC_END_OF_RECORD = b"\x1d"
+MARC_FIELD_TERMINATOR = b"\x1e"
+
+_shard_function: Callable | None = None
+
+
+class FileShard:
+    """A byte range of a source file that starts and ends on record boundaries."""
+
+    def __init__(self, index: int, start: int, end: int, first_record_index: int):
+        """Initialize a shard.
+
+        Args:
+            index (int): Position of the shard in the file.
+            start (int): Byte offset of the first record in the shard.
+            end (int): Byte offset just after the last record in the shard.
+            first_record_index (int): Index of the first record in the shard, counted
+                the same way a csv.DictReader over the whole file would count it.
+        """
+        self.index = index
+        self.start = start
+        self.end = end
+        self.first_record_index = first_record_index
+
+
+class DelimitedFileSharder:
+    """Splits a CSV or TSV file into shards and reads records back from them."""
+
+    def __init__(self, path: Path, encoding: str = "utf-8-sig"):
+        """Initialize the sharder.
+
+        Args:
+            path (Path): The delimited source file.
+            encoding (str): Encoding of the source file.
+        """
+        self.path = path
+        self.encoding = encoding
+        self.delimiter = "\t" if str(path).endswith("tsv") else ","
+        self.fieldnames: List[str] = []
+        self.total_rows = 0
+        self.empty_rows = 0
+        self.num_records = 0
+
+    def scan(self, num_shards: int) -> List[FileShard]:
+        """Scan the file once and split it into at most num_shards shards.
+
+        Also counts the rows and empty rows the same way the sequential readers do,
+        so the numbers in the migration report stay the same.
+
+        Args:
+            num_shards (int): The maximum number of shards to create.
+
+        Returns:
+            List[FileShard]: The shards, in file order.
+        """
+        shards: List[FileShard] = []
+        self.total_rows = -1  # Do not count header row
+        self.empty_rows = 0
+        self.num_records = 0
+        with open(self.path, "rb") as source_file:
+            position = [0]
+            lines = self._count_lines(self._read_lines(source_file, position))
+            reader = csv.reader(lines, delimiter=self.delimiter)
+            self.fieldnames = next(reader, [])
+            shard_start = position[0]
+            shard_size = max(1, (os.path.getsize(self.path) - shard_start) // max(num_shards, 1))
+            first_record_index = 0
+            for row in reader:
+                if row:
+                    self.num_records += 1
+                if position[0] - shard_start >= shard_size and len(shards) < num_shards - 1:
+                    shards.append(
+                        FileShard(len(shards), shard_start, position[0], first_record_index)
+                    )
+                    shard_start = position[0]
+                    first_record_index = self.num_records
+            if position[0] > shard_start:
+                shards.append(FileShard(len(shards), shard_start, position[0], first_record_index))
+        return shards
+
+    def read(self, shard: FileShard) -> Iterator[dict]:
+        """Read the records of one shard as dicts keyed by the header of the file.
+
+        Args:
+            shard (FileShard): The shard to read.
+
+        Yields:
+            dict: One legacy record per row, blank rows skipped.
+        """
+        with open(self.path, "rb") as source_file:
+            source_file.seek(shard.start)
+            position = [shard.start]
+            yield from csv.DictReader(
+                self._read_lines(source_file, position, shard.end),
+                fieldnames=self.fieldnames,
+                delimiter=self.delimiter,
+            )
+
+    def _read_lines(self, source_file, position: list, end: int = -1) -> Iterator[str]:
+        for line in source_file:
+            position[0] += len(line)
+            if line.endswith(b"\r\n"):
+                line = line[:-2] + b"\n"
+            yield line.decode(self.encoding)
+            if end >= 0 and position[0] >= end:
+                return
+
+    def _count_lines(self, lines: Iterator[str]) -> Iterator[str]:
+        for line in lines:
+            if not "".join(line.strip().split(self.delimiter)):  # check for empty rows
+                self.empty_rows += 1
+            self.total_rows += 1
+            yield line
+
+
+class MarcFileSharder:
+    """Splits a MARC21 (ISO 2709) file into shards on record boundaries.
+
+    Record boundaries are found from the record length in the first five bytes of
+    every leader, so records do not have to be parsed. At the first record pymarc
+    could not read past (invalid length, truncated, or no end of record mark), no
+    more shards are cut: the rest of the file goes into the last shard, where the
+    MARC reader stops the same way it does in a sequential run.
+    """
+
+    def __init__(self, path: Path):
+        """Initialize the sharder.
+
+        Args:
+            path (Path): The MARC21 source file.
+        """
+        self.path = path
+        self.num_records = 0
+        self.hrids_needed: List[int] = []
+        self.first_shards_of_001s: Dict[str, int] = {}
+
+    def scan(self, num_shards: int, previous_001s: Optional[Set[str]] = None) -> List[FileShard]:
+        """Scan the file once and split it into at most num_shards shards.
+
+        Also counts how many HRIDs each shard may generate at most, in hrids_needed.
+        Without previous_001s, that is one per record. With previous_001s, the 001
+        of every record is read from its directory and a shard needs one HRID for
+        each record without a 001 and two for each record with a 001 seen before,
+        since HRIDHandler.preserve_001_as_hrid advances the counter twice for those.
+
+        Args:
+            num_shards (int): The maximum number of shards to create.
+            previous_001s (Optional[Set[str]]): The 001s of records from earlier
+                files, when the 001s are preserved as HRIDs.
+
+        Returns:
+            List[FileShard]: The shards, in file order.
+        """
+        shards: List[FileShard] = []
+        self.num_records = 0
+        self.hrids_needed = []
+        self.first_shards_of_001s = {}
+        file_size = os.path.getsize(self.path)
+        shard_size = max(1, file_size // max(num_shards, 1))
+        shard_start = 0
+        first_record_index = 0
+        hrids_needed = 0
+        with open(self.path, "rb") as marc_file:
+            position = 0
+            while record_length := self._read_record_length(marc_file, position, file_size):
+                if previous_001s is None:
+                    marc_file.seek(position + record_length - 1)
+                    hrids_needed += 1
+                else:
+                    record = marc_file.read(record_length - 6)
+                    hrids_needed += self._count_hrids(record, previous_001s, len(shards))
+                if marc_file.read(1) != MARC_END_OF_RECORD:
+                    break
+                position += record_length
+                self.num_records += 1
+                if position - shard_start >= shard_size and len(shards) < num_shards - 1:
+                    shards.append(
+                        FileShard(len(shards), shard_start, position, first_record_index)
+                    )
+                    self.hrids_needed.append(hrids_needed)
+                    shard_start = position
+                    first_record_index = self.num_records
+                    hrids_needed = 0
+        if file_size > shard_start:
+            # The record pymarc stops at may still be recovered and get an HRID
+            shards.append(FileShard(len(shards), shard_start, file_size, first_record_index))
+            self.hrids_needed.append(hrids_needed + (2 if position < file_size else 0))
+        return shards
+
+    @contextmanager
+    def open(self, shard: FileShard) -> Iterator["MarcShardFile"]:
+        """Open one shard for reading, e.g. by a pymarc MARCReader.
+
+        Args:
+            shard (FileShard): The shard to open.
+
+        Yields:
+            MarcShardFile: A binary file object that ends where the shard ends.
+        """
+        with open(self.path, "rb") as marc_file:
+            marc_file.seek(shard.start)
+            yield MarcShardFile(marc_file, shard.end)
+
+    @staticmethod
+    def _read_record_length(marc_file: BinaryIO, position: int, file_size: int) -> int:
+        try:
+            record_length = int(marc_file.read(5))
+        except ValueError:
+            return 0
+        if record_length < MARC_LEADER_LENGTH or position + record_length > file_size:
+            return 0
+        return record_length
+
+    def _count_hrids(self, record: bytes, previous_001s: Set[str], shard_index: int) -> int:
+        try:
+            value = self._get_001(record)
+        except ValueError:
+            return 2
+        if value is None:
+            return 1
+        if value in previous_001s or value in self.first_shards_of_001s:
+            return 2
+        self.first_shards_of_001s[value] = shard_index
+        return 0
+
+    @staticmethod
+    def _get_001(record: bytes) -> Optional[str]:
+        # record is the record without its first five bytes and the end of record mark
+        base_address = int(record[7:12]) - 5
+        directory = record[MARC_LEADER_LENGTH - 5 : base_address - 1]
+        for entry_start in range(0, len(directory), MARC_DIRECTORY_ENTRY_LENGTH):
+            entry = directory[entry_start : entry_start + MARC_DIRECTORY_ENTRY_LENGTH]
+            if entry[:3] == b"001":
+                field_start = base_address + int(entry[7:12])
+                field = record[field_start : field_start + int(entry[3:7])]
+                return field.rstrip(MARC_FIELD_TERMINATOR).decode("utf-8", errors="replace")
+        return None
+
+
+class MarcShardFile:
+    """A binary file object over an open MARC file that ends where a shard ends."""
+
+    def __init__(self, marc_file: BinaryIO, end: int):
+        """Initialize the shard file.
+
+        Args:
+            marc_file (BinaryIO): The MARC file, positioned at the start of the shard.
+            end (int): Byte offset of the end of the shard.
+        """
+        self.marc_file = marc_file
+        self.end = end
+
+    def read(self, size: int = -1) -> bytes:
+        remaining = max(self.end - self.marc_file.tell(), 0)
+        return self.marc_file.read(remaining if size < 0 else min(size, remaining))
+
+
+class EarlierShardValues:
+    """Set of the values seen before a shard, as seen from the worker handling it.
+
+    Made up of the values from earlier files, the values whose first occurrence is
+    in an earlier shard of the file, and the values added by the worker itself.
+    Used for the 001s the HRIDHandler checks for duplicates when preserving them.
+    """
+
+    def __init__(
+        self, previous_values: Set[str], first_shards_of_values: Dict[str, int], shard_index: int
+    ):
+        """Initialize the set.
+
+        Args:
+            previous_values (Set[str]): Values from earlier files.
+            first_shards_of_values (Dict[str, int]): The shard index of the first
+                occurrence of each value in the file.
+            shard_index (int): Index of the shard handled by the worker.
+        """
+        self.previous_values = previous_values
+        self.first_shards_of_values = first_shards_of_values
+        self.shard_index = shard_index
+        self.added_values: Set[str] = set()
+
+    def __contains__(self, value: object) -> bool:
+        """Whether the value was seen before, in this shard or an earlier one."""
+        return (
+            value in self.added_values
+            or value in self.previous_values
+            or self.first_shards_of_values.get(value, self.shard_index) < self.shard_index
+        )
+
+    def add(self, value: str):
+        self.added_values.add(value)
+
+
+def use_sharding(worker_processes: int) -> bool:
+    """Whether source files should be transformed by a pool of worker processes.
+
+    Args:
+        worker_processes (int): The number of worker processes configured for the task.
+
+    Returns:
+        bool: True if more than one worker is configured and processes can be forked.
+    """
+    if worker_processes <= 1:
+        return False
+    if "fork" not in multiprocessing.get_all_start_methods():
+        logger.warning(
+            "Worker processes can not be forked on this platform. "
+            "Transforming the files in the main process."
+        )
+        return False
+    return True
+
+
+def transform_in_shards(
+    shards: List[FileShard],
+    processes: int,
+    mapper: MapperBase,
+    extradata_writer: ExtradataWriter,
+    transform_shard: Callable[[FileShard], dict],
+) -> Iterator[Tuple[FileShard, dict]]:
+    """Transform shards in forked worker processes and merge their statistics.
+
+    Every worker starts from a copy of the parent mapper with its statistics cleared
+    and its extradata redirected to a part file of its own. When a shard is done, its
+    migration report and mapped field counts are merged into the parent. Its extradata
+    is appended when the caller asks for the next shard, so that the caller can first
+    remove the extradata of records it leaves out, using remove_part_lines.
+
+    Args:
+        shards (List[FileShard]): The shards to transform.
+        processes (int): Number of worker processes.
+        mapper (MapperBase): The mapper of the task.
+        extradata_writer (ExtradataWriter): The extradata writer of the task.
+        transform_shard (Callable[[FileShard], dict]): Transforms one shard in a worker
+            and returns a picklable dict with whatever the parent needs to finish it.
+
+    Yields:
+        Tuple[FileShard, dict]: Each shard with the result of transform_shard, in shard
+            order, after its statistics have been merged.
+    """
+    extradata_writer.write("", {}, flush=True)
+    extradata_path = extradata_writer.path_to_file
+
+    def work(shard: FileShard) -> dict:
+        mapper.migration_report.clear()
+        mapper.mapped_folio_fields.clear()
+        mapper.mapped_legacy_fields.clear()
+        extradata_writer.cache = []
+        extradata_writer.records_written = 0
+        extradata_writer.path_to_file = shard_part_path(extradata_path, shard)
+        result = transform_shard(shard)
+        extradata_writer.write("", {}, flush=True)
+        result["statistics"] = (
+            mapper.migration_report.counters,
+            mapper.mapped_folio_fields,
+            mapper.mapped_legacy_fields,
+        )
+        return result
+
+    for shard, result in zip(shards, run_sharded(work, shards, processes), strict=True):
+        report, mapped_folio_fields, mapped_legacy_fields = result.pop("statistics")
+        mapper.migration_report.merge(report)
+        merge_field_counts(mapper.mapped_folio_fields, mapped_folio_fields)
+        merge_field_counts(mapper.mapped_legacy_fields, mapped_legacy_fields)
+        yield shard, result
+        extradata_part_path = shard_part_path(extradata_path, shard)
+        if extradata_part_path.is_file():
+            # Compressed parts are appended as they are, as extra gzip members or zstd frames
+            with open(extradata_path, "ab") as extradata_file:
+                append_part(extradata_file, extradata_part_path, binary=True)
+
+
+def run_sharded(
+    shard_function: Callable[[FileShard], dict], shards: List[FileShard], processes: int
+) -> Iterator[dict]:
+    """Run shard_function for every shard in a pool of forked worker processes.
+
+    The worker processes are forked, so shard_function may be a closure or a bound
+    method of a fully initialized migration task.
+
+    Args:
+        shard_function (Callable[[FileShard], dict]): Transforms one shard and
+            returns a picklable result.
+        shards (List[FileShard]): The shards to transform.
+        processes (int): Number of worker processes.
+
+    Yields:
+        dict: The results, in shard order.
+    """
+    executor = ProcessPoolExecutor(
+        max_workers=processes,
+        mp_context=multiprocessing.get_context("fork"),
+        initializer=_set_shard_function,
+        initargs=(shard_function,),
+    )
+    try:
+        yield from executor.map(_run_shard, shards)
+    except BaseException:
+        executor.shutdown(wait=True, cancel_futures=True)
+        raise
+    executor.shutdown(wait=True)
+
+
+def _set_shard_function(shard_function: Callable[[FileShard], dict]):
+    global _shard_function
+    _shard_function = shard_function
+
+
+def _run_shard(shard: FileShard) -> dict:
+    return _shard_function(shard)
+
+
+def shard_part_path(path: Path, shard: FileShard) -> Path:
+    """Path of the part of an output file written by the worker handling a shard."""
+    return path.with_name(f"{path.name}.shard{shard.index:05d}")
+
+
+def manifest_part_path(part_path: Path) -> Path:
+    """Path of the manifest a worker writes next to one of its part files."""
+    return part_path.with_name(f"{part_path.name}.manifest")
+
+
+def append_part(
+    target_file,
+    part_path: Path,
+    keep_record: Optional[Callable[[dict], bool]] = None,
+    binary: bool = False,
+):
+    """Append a part file written by a worker to an open file and remove the part.
+
+    Args:
+        target_file: The open file to append to.
+        part_path (Path): The part file.
+        keep_record (Optional[Callable[[dict], bool]]): For JSON lines parts, called
+            with every record before it is written. The record may be modified, and is
+            left out if the function returns False. Defaults to copying the part as is.
+        binary (bool): Whether the part, and the file to append to, are binary files.
+    """
+    if part_path.is_file():
+        with open(
+            part_path, "rb" if binary else "r", encoding=None if binary else "utf-8"
+        ) as part_file:
+            if keep_record is None:
+                shutil.copyfileobj(part_file, target_file)
+            else:
+                for line in part_file:
+                    record = json.loads(line)
+                    if keep_record(record):
+                        target_file.write(f"{json.dumps(record)}\n")
+        os.remove(part_path)
+
+
+def remove_part_lines(part_path: Path, line_numbers: Set[int]):
+    """Remove lines from a part file written by a worker, keeping its compression.
+
+    Args:
+        part_path (Path): The part file.
+        line_numbers (Set[int]): The zero-based numbers of the lines to remove.
+    """
+    if not line_numbers or not part_path.is_file():
+        return
+    temp_path = part_path.with_name(f"{part_path.name}.tmp")
+    with (
+        open_records(part_path, binary=True) as part_file,
+        open_binary_output(temp_path, "wb", file_compression(part_path)) as temp_file,
+    ):
+        for line_number, line in enumerate(part_file):
+            if line_number not in line_numbers:
+                temp_file.write(line)
+    os.replace(temp_path, part_path)
+
+
+def merge_field_counts(field_counts: dict, other_field_counts: dict):
+    """Add the per-field counters of a mapped fields report to another one."""
+    for field_name, counts in other_field_counts.items():
+        if field_name in field_counts:
+            field_counts[field_name] = [
+                a + b for a, b in zip(field_counts[field_name], counts, strict=True)
+            ]
+        else:
+            field_counts[field_name] = list(counts)
@@ -12,6 +12,8 @@ from pathlib import Path
 
 from folio_uuid.folio_namespaces import FOLIONamespaces
 
+from folio_migration_tools.snapshot_cache import SNAPSHOT_CACHE_FOLDER_NAME
+
 logger = logging.getLogger(__name__)
 
 
@@ -52,6 +54,7 @@ class FolderStructure:
         gitignore = self.base_folder / ".gitignore"
         verify_git_ignore(gitignore)
         self.verify_folder(self.base_folder / "iterations")
+        self.snapshot_cache_folder = self.base_folder / SNAPSHOT_CACHE_FOLDER_NAME
 
         # Iteration-specific folders
         self.iteration_folder = self.base_folder / "iterations" / self.iteration_identifier
@@ -185,4 +188,6 @@ def verify_git_ignore(gitignore: Path):
             f.write("source_data/\n")
         if "*.data" not in contents:
             f.write("*.data\n")
+        if f"{SNAPSHOT_CACHE_FOLDER_NAME}/" not in contents:
+            f.write(f"{SNAPSHOT_CACHE_FOLDER_NAME}/\n")
     logger.info("Made sure there was a valid .gitignore file at %s", gitignore)
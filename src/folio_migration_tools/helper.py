@@ -5,9 +5,9 @@ mapping report generation, and common transformation operations used across
 multiple migration tasks.
 """
 
-import json
 import logging
 
+from folio_migration_tools import json_serializer
 from folio_migration_tools.i18n_cache import i18n_t
 
 
@@ -77,4 +77,4 @@ class Helper:
             file (_type_): _description_
             folio_record (_type_): _description_
         """
-        file.write(f"{json.dumps(folio_record)}\n")
+        file.write(f"{json_serializer.dumps(folio_record)}\n")
@@ -7,6 +7,9 @@ holdings notes management.
 
 import json
 import logging
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Dict, Optional, Tuple
 from uuid import uuid4
 
 import i18n
@@ -14,6 +17,7 @@ import i18n
 from folio_migration_tools import custom_exceptions, helper
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.migration_report import MigrationReport
+from folio_migration_tools.record_writer import open_records
 
 logger = logging.getLogger(__name__)
 
@@ -76,7 +80,21 @@ class HoldingsHelper:
         fields_criteria,
         migration_report: MigrationReport,
         holdings_type_id_to_exclude_from_merging: str = "Not set",
+        prev_holdings: Optional[MutableMapping] = None,
     ):
+        """Load holdings created by an earlier run, keyed on the merge criteria.
+
+        Args:
+            holdings_file_path: The file with the previously created holdings.
+            fields_criteria: The merge criteria.
+            migration_report (MigrationReport): The migration report.
+            holdings_type_id_to_exclude_from_merging (str): Holdings type never merged.
+            prev_holdings (Optional[MutableMapping]): Mapping to add the holdings to,
+                replacing holdings with the same key. A new dict by default.
+
+        Returns:
+            MutableMapping: The holdings, keyed on the merge criteria.
+        """
         if not holdings_file_path.is_file():
             raise custom_exceptions.TransformationProcessError(
                 "", "File not found", holdings_file_path
@@ -85,8 +103,11 @@ class HoldingsHelper:
             "Holdings type id to exclude is set to %s",
             holdings_type_id_to_exclude_from_merging,
         )
-        with open(holdings_file_path) as holdings_file:
+        if prev_holdings is None:
             prev_holdings = {}
+        keys_in_file = set()
+        merger = HoldingsMerger()
+        with open_records(holdings_file_path) as holdings_file:
             for row in holdings_file:
                 stored_holding = json.loads(row.split("\t")[-1])
                 stored_key = HoldingsHelper.to_key(
@@ -95,7 +116,7 @@ class HoldingsHelper:
                     migration_report,
                     holdings_type_id_to_exclude_from_merging,
                 )
-                if stored_key in prev_holdings:
+                if stored_key in keys_in_file:
                     message = (
                         f"Previously stored holdings key already exists in the list of previously"
                         f" stored Holdings. You have likely not used the same matching criterias"
@@ -104,7 +125,7 @@ class HoldingsHelper:
                     helper.Helper.log_data_issue(stored_holding["formerIds"], message, stored_key)
                     logging.warn(message)
                     prev_holdings[stored_key] = HoldingsHelper.merge_holding(
-                        prev_holdings[stored_key], stored_holding
+                        prev_holdings[stored_key], stored_holding, merger
                     )
                     migration_report.add(
                         "HoldingsMerging",
@@ -115,21 +136,28 @@ class HoldingsHelper:
                         "HoldingsMerging",
                         i18n_t("Previously transformed holdings record loaded"),
                     )
+                    keys_in_file.add(stored_key)
                     prev_holdings[stored_key] = stored_holding
             return prev_holdings
 
     @staticmethod
-    def merge_holding(holdings_record: dict, incoming_holdings: dict) -> dict:
-        extend_list("holdingsStatementsForIndexes", holdings_record, incoming_holdings, True)
-        extend_list("holdingsStatements", holdings_record, incoming_holdings, True)
-        extend_list("holdingsStatementsForSupplements", holdings_record, incoming_holdings, True)
-        extend_list("notes", holdings_record, incoming_holdings)
-        holdings_record["notes"] = dedupe(holdings_record.get("notes", []))
-        extend_list("formerIds", holdings_record, incoming_holdings)
-        extend_list("electronicAccess", holdings_record, incoming_holdings)
-        HoldingsHelper.remove_empty_holdings_statements(holdings_record)
-        merge_boolean("discoverySuppress", holdings_record, incoming_holdings)
-        return holdings_record
+    def merge_holding(
+        holdings_record: dict,
+        incoming_holdings: dict,
+        merger: Optional["HoldingsMerger"] = None,
+    ) -> dict:
+        """Merge a holdings record into another one.
+
+        Args:
+            holdings_record (dict): The holdings record to merge into. It is changed.
+            incoming_holdings (dict): The holdings record to merge in.
+            merger (Optional[HoldingsMerger]): Keeps track of the contents of records that
+                are merged into many times. Without one, each merge is done from scratch.
+
+        Returns:
+            dict: The merged holdings record.
+        """
+        return (merger or HoldingsMerger(1)).merge(holdings_record, incoming_holdings)
 
     @staticmethod
     def remove_empty_holdings_statements(holdings_record: dict):
@@ -165,20 +193,108 @@ class HoldingsHelper:
                 del folio_object["notes"]
 
 
-def extend_list(
-    prop_name: str, holdings_record: dict, incoming_holdings: dict, accept_dupe_items: bool = False
-):
-    temp = holdings_record.get(prop_name, [])
-    all_already_in = all(i in temp for i in incoming_holdings.get(prop_name, []))
-    for f in incoming_holdings.get(prop_name, []):
-        if not all_already_in and (accept_dupe_items or f not in temp):
-            temp.append(f)
-    if temp:
-        holdings_record[prop_name] = temp
+HOLDINGS_STATEMENT_PROPERTIES = [
+    "holdingsStatementsForIndexes",
+    "holdingsStatements",
+    "holdingsStatementsForSupplements",
+]
+DEDUPED_LIST_PROPERTIES = ["notes", "formerIds", "electronicAccess"]
+
+
+class HoldingsMerger:
+    """Merges holdings records in time proportional to the size of the incoming record.
+
+    Checking whether the notes, former ids and statements of an incoming record are
+    already in a record means scanning the lists of the record. A record that many
+    items are merged into, like the holdings of a journal run, then takes quadratic
+    time. The merger keeps a set of the list members next to the lists of the records
+    it has merged into recently, and appends to the lists in place. The sets are
+    rebuilt from the lists when a record is merged into that is not among them.
+    """
+
+    def __init__(self, max_records: int = 10_000):
+        """Initialize the merger.
+
+        Args:
+            max_records (int): The number of records to keep list members for.
+        """
+        self.max_records = max_records
+        # id of the holdings record -> (the record, list property -> (list, members))
+        self.members: OrderedDict[int, Tuple[dict, Dict[str, Tuple[list, set]]]] = OrderedDict()
+
+    def merge(self, holdings_record: dict, incoming_holdings: dict) -> dict:
+        """Merge a holdings record into another one, like HoldingsHelper.merge_holding.
+
+        Args:
+            holdings_record (dict): The holdings record to merge into. It is changed.
+            incoming_holdings (dict): The holdings record to merge in.
+
+        Returns:
+            dict: The merged holdings record.
+        """
+        list_members = self.get_list_members(holdings_record)
+        for prop_name in HOLDINGS_STATEMENT_PROPERTIES:
+            self.extend_list(prop_name, holdings_record, incoming_holdings, list_members, True)
+        for prop_name in DEDUPED_LIST_PROPERTIES:
+            self.extend_list(prop_name, holdings_record, incoming_holdings, list_members)
+        merge_boolean("discoverySuppress", holdings_record, incoming_holdings)
+        return holdings_record
+
+    def get_list_members(self, holdings_record: dict) -> Dict[str, Tuple[list, set]]:
+        entry = self.members.get(id(holdings_record))
+        if entry and entry[0] is holdings_record:
+            self.members.move_to_end(id(holdings_record))
+            return entry[1]
+        HoldingsHelper.remove_empty_holdings_statements(holdings_record)
+        if "notes" in holdings_record:
+            holdings_record["notes"] = list(
+                {hashable(note): note for note in holdings_record["notes"]}.values()
+            )
+        list_members: Dict[str, Tuple[list, set]] = {}
+        self.members[id(holdings_record)] = (holdings_record, list_members)
+        if len(self.members) > self.max_records:
+            self.members.popitem(last=False)
+        return list_members
+
+    @staticmethod
+    def extend_list(
+        prop_name: str,
+        holdings_record: dict,
+        incoming_holdings: dict,
+        list_members: Dict[str, Tuple[list, set]],
+        accept_dupe_items: bool = False,
+    ):
+        """Append the incoming list items, unless all of them are in the list already.
+
+        Empty holdings statements are left out. Unless accept_dupe_items is set, items
+        already in the list are too.
+        """
+        incoming = incoming_holdings.get(prop_name, [])
+        if not incoming:
+            return
+        temp = holdings_record.get(prop_name, [])
+        if prop_name not in list_members or list_members[prop_name][0] is not temp:
+            list_members[prop_name] = (temp, {hashable(item) for item in temp})
+        members = list_members[prop_name][1]
+        incoming_keys = [hashable(item) for item in incoming]
+        if all(key in members for key in incoming_keys):
+            return
+        is_statement = prop_name in HOLDINGS_STATEMENT_PROPERTIES
+        for item, key in zip(incoming, incoming_keys, strict=True):
+            if is_statement and not any(item.values()):
+                continue
+            if accept_dupe_items or key not in members:
+                temp.append(item)
+                members.add(key)
+        if temp:
+            holdings_record[prop_name] = temp
 
 
-def dedupe(list_of_dicts):
-    return [dict(t) for t in {tuple(d.items()) for d in list_of_dicts}]
+def hashable(item):
+    """A hashable value that is equal for equal list items."""
+    if isinstance(item, (dict, list)):
+        return json.dumps(item, sort_keys=True)
+    return item
 
 
 def merge_boolean(prop_name: str, holdings_record: dict, incoming_holdings: dict):
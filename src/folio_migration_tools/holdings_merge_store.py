@@ -0,0 +1,147 @@
+"""Disk-backed store for holdings records that are being merged.
+
+HoldingsCsvTransformer keeps every holdings record it creates until the end of the
+run, since any later item can be merged into it. With many millions of items, keeping
+them all in a dict needs more memory than is available. DiskHoldingsStore is a mapping
+from merge key to holdings record that keeps the most recently used records in memory
+and the rest in an SQLite database file.
+"""
+
+import json
+import logging
+import sqlite3
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Iterator, Tuple
+
+from folio_migration_tools import json_serializer
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_SIZE = 100_000
+
+
+class DiskHoldingsStore(MutableMapping):
+    """A mapping of merge keys to holdings records, spilling to an SQLite file.
+
+    Records are kept in insertion order, like in a dict. The records in the cache are
+    written to the file when they are evicted, so changes made to a record returned
+    from the store are kept as long as they are made before it is evicted. Records
+    returned by values() and items() are read from the file and are not tracked.
+    """
+
+    def __init__(self, path: Path, cache_size: int = DEFAULT_CACHE_SIZE):
+        """Create the store, replacing any earlier file at path.
+
+        Args:
+            path (Path): The SQLite file to spill the holdings records into.
+            cache_size (int): The number of records to keep in memory.
+        """
+        self.path = Path(path)
+        self.cache_size = cache_size
+        # merge key -> (insertion number, holdings record), least recently used first
+        self.cache: OrderedDict[str, Tuple[int, dict]] = OrderedDict()
+        self.next_number = 0
+        self.path.unlink(missing_ok=True)
+        self.connection = sqlite3.connect(self.path)
+        self.connection.execute("PRAGMA journal_mode=OFF")
+        self.connection.execute("PRAGMA synchronous=OFF")
+        self.connection.execute(
+            "CREATE TABLE holdings "
+            "(merge_key TEXT PRIMARY KEY, number INTEGER NOT NULL, holding TEXT NOT NULL)"
+        )
+        logger.info("Spilling holdings to %s, keeping %s in memory", self.path, cache_size)
+
+    def __getitem__(self, key: str) -> dict:
+        """Get the holdings record with the merge key, reading it from the file if needed."""
+        return self._get_entry(key)[1]
+
+    def __setitem__(self, key: str, holding: dict):
+        """Add or replace the holdings record with the merge key."""
+        try:
+            number = self._get_entry(key)[0]
+        except KeyError:
+            number = self.next_number
+            self.next_number += 1
+        self.cache[key] = (number, holding)
+        self.cache.move_to_end(key)
+        self._evict()
+
+    def __delitem__(self, key: str):
+        """Remove the holdings record with the merge key."""
+        in_cache = self.cache.pop(key, None) is not None
+        deleted = self.connection.execute("DELETE FROM holdings WHERE merge_key = ?", (key,))
+        if not in_cache and not deleted.rowcount:
+            raise KeyError(key)
+
+    def __contains__(self, key: object) -> bool:
+        """Whether there is a holdings record with the merge key."""
+        return key in self.cache or self._select(key) is not None
+
+    def __iter__(self) -> Iterator[str]:
+        """Yield all merge keys, in insertion order."""
+        for (key,) in self._rows("SELECT merge_key FROM holdings ORDER BY number"):
+            yield key
+
+    def __len__(self) -> int:
+        """The number of holdings records."""
+        self.flush()
+        return self.connection.execute("SELECT COUNT(*) FROM holdings").fetchone()[0]
+
+    def values(self) -> Iterator[dict]:
+        """Yield all holdings records, in insertion order."""
+        for _, holding in self.items():
+            yield holding
+
+    def items(self) -> Iterator[Tuple[str, dict]]:
+        """Yield all merge keys and holdings records, in insertion order."""
+        for key, holding in self._rows("SELECT merge_key, holding FROM holdings ORDER BY number"):
+            yield key, json.loads(holding)
+
+    def flush(self):
+        """Write all records in the cache to the file, keeping them in the cache."""
+        self._write(self.cache.items())
+
+    def close(self):
+        """Close and delete the file."""
+        self.cache.clear()
+        self.connection.close()
+        self.path.unlink(missing_ok=True)
+
+    def _get_entry(self, key: str) -> Tuple[int, dict]:
+        if key in self.cache:
+            self.cache.move_to_end(key)
+            return self.cache[key]
+        row = self._select(key)
+        if row is None:
+            raise KeyError(key)
+        entry = (row[0], json.loads(row[1]))
+        self.cache[key] = entry
+        self._evict()
+        return entry
+
+    def _rows(self, query: str) -> Iterator[tuple]:
+        self.flush()
+        cursor = self.connection.cursor()
+        cursor.execute(query)
+        while rows := cursor.fetchmany(1000):
+            yield from rows
+
+    def _select(self, key):
+        return self.connection.execute(
+            "SELECT number, holding FROM holdings WHERE merge_key = ?", (key,)
+        ).fetchone()
+
+    def _evict(self):
+        if len(self.cache) <= self.cache_size:
+            return
+        # Evict a tenth of the cache at a time to write the records in batches
+        self._write([self.cache.popitem(last=False) for _ in range(max(1, self.cache_size // 10))])
+
+    def _write(self, entries):
+        self.connection.executemany(
+            "INSERT INTO holdings (merge_key, number, holding) VALUES (?, ?, ?) "
+            "ON CONFLICT(merge_key) DO UPDATE SET holding = excluded.holding",
+            ((key, number, json_serializer.dumps(holding)) for key, (number, holding) in entries),
+        )
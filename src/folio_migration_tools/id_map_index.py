@@ -0,0 +1,237 @@
+"""Memory-mapped, read-only access to legacy id maps.
+
+Legacy id maps are written as JSON lines files, one ``[legacy_id, folio_id, ...]``
+list per line, and are normally loaded into a dict by the tasks that need them.
+For large migrations, that dict takes many gigabytes of memory and minutes to load.
+
+IdMapIndex instead builds a compact binary index next to the JSON lines file, and
+memory-maps both files. The index is a sorted array of fixed-width entries, each a
+64-bit hash of a legacy id and the offset of its line in the id map. Lookups are a
+binary search in the index followed by parsing the single line the entry points to,
+so opening a map takes seconds and the operating system pages in only what is used.
+
+The JSON lines file stays the interchange format. The index is rebuilt whenever the
+id map file has changed since the index was written. Maps can also be indexed on
+another column, like the FOLIO ids, with an index file of its own for every column.
+"""
+
+import hashlib
+import json
+import logging
+import mmap
+import os
+from array import array
+from collections import ChainMap
+from collections.abc import Mapping
+from pathlib import Path
+from typing import Any, Iterator, List, Optional
+
+from folio_migration_tools.custom_exceptions import TransformationProcessError
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_SUFFIX = ".idx"
+INDEX_FORMAT = b"FMTIDX01"
+# Format, number of entries, size and modification time of the id map file
+INDEX_HEADER_LENGTH = 4
+
+
+class IdMapIndex(Mapping):
+    """Read-only, dict-like view of a legacy id map backed by a memory-mapped index.
+
+    Values are the lists stored in the id map, as returned by
+    MigrationTaskBase.load_id_map. When a legacy id occurs more than once in the map,
+    the last occurrence wins, as it does when the map is loaded into a dict.
+    """
+
+    def __init__(self, map_path: Path, key_column: int = 0, value_column: Optional[int] = None):
+        """Open the id map, building or rebuilding its index if needed.
+
+        Args:
+            map_path (Path): The JSON lines id map file.
+            key_column (int): The column of the entries to look them up by. Defaults to
+                the legacy ids.
+            value_column (Optional[int]): The column of the entries to return instead of
+                the whole entries.
+
+        Raises:
+            TransformationProcessError: If the id map file does not exist.
+        """
+        self.map_path = Path(map_path)
+        if not self.map_path.is_file():
+            raise TransformationProcessError("", "Legacy id map not found", str(map_path))
+        self.key_column = key_column
+        self.value_column = value_column
+        self.index_path = index_path(self.map_path, key_column)
+        if not self.index_is_current():
+            build_index(self.map_path, self.index_path, key_column)
+        self._map_file = open(self.map_path, "rb")
+        self._index_file = open(self.index_path, "rb")
+        self._map = (
+            mmap.mmap(self._map_file.fileno(), 0, access=mmap.ACCESS_READ)
+            if os.path.getsize(self.map_path)
+            else b""
+        )
+        self._index = mmap.mmap(self._index_file.fileno(), 0, access=mmap.ACCESS_READ)
+        self._entries = memoryview(self._index)[INDEX_HEADER_LENGTH * 8 :].cast("Q")
+        self._len = len(self._entries) // 2
+        logger.info("Opened index of %s migrated IDs in %s", self._len, self.map_path)
+
+    def index_is_current(self) -> bool:
+        """Whether an index exists that was built from the current id map file."""
+        if not self.index_path.is_file():
+            return False
+        header = array("Q")
+        with open(self.index_path, "rb") as index_file:
+            try:
+                header.fromfile(index_file, INDEX_HEADER_LENGTH)
+            except EOFError:
+                return False
+        stat = os.stat(self.map_path)
+        return list(header) == index_header(header[1], stat.st_size, stat.st_mtime_ns)
+
+    def __getitem__(self, key: str) -> Any:
+        """Look up the id map entry of a legacy id, or of a value in the key column."""
+        if not isinstance(key, str):
+            raise KeyError(key)
+        key_hash = hash_legacy_id(key)
+        position = self._find(key_hash)
+        while position < self._len and self._entries[2 * position] == key_hash:
+            entry = self._read_entry(self._entries[2 * position + 1])
+            if entry[self.key_column] == key:
+                return entry if self.value_column is None else entry[self.value_column]
+            position += 1
+        raise KeyError(key)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the legacy ids, or key column values, in the map, in index order."""
+        for position in range(self._len):
+            yield self._read_entry(self._entries[2 * position + 1])[self.key_column]
+
+    def __len__(self) -> int:
+        """Number of legacy ids in the map."""
+        return self._len
+
+    def close(self):
+        """Release the memory maps and close the files."""
+        self._entries.release()
+        self._index.close()
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+        self._index_file.close()
+        self._map_file.close()
+
+    def _find(self, key_hash: int) -> int:
+        low, high = 0, self._len
+        while low < high:
+            middle = (low + high) // 2
+            if self._entries[2 * middle] < key_hash:
+                low = middle + 1
+            else:
+                high = middle
+        return low
+
+    def _read_entry(self, offset: int) -> List:
+        end = self._map.find(b"\n", offset)
+        return json.loads(self._map[offset : end if end >= 0 else len(self._map)])
+
+
+def index_path(map_path: Path, key_column: int = 0) -> Path:
+    """Path of the index of an id map file on one of the columns of its entries."""
+    column_suffix = f".col{key_column}" if key_column else ""
+    return map_path.with_name(f"{map_path.name}{column_suffix}{INDEX_FILE_SUFFIX}")
+
+
+def index_header(num_entries: int, map_size: int, map_mtime_ns: int) -> List[int]:
+    return [int.from_bytes(INDEX_FORMAT, "little"), num_entries, map_size, map_mtime_ns]
+
+
+def hash_legacy_id(legacy_id: str) -> int:
+    return int.from_bytes(
+        hashlib.blake2b(legacy_id.encode("utf-8"), digest_size=8).digest(), "little"
+    )
+
+
+def build_index(map_path: Path, target_path: Path, key_column: int = 0):
+    """Build the index of an id map file.
+
+    The index is written to a temporary file first and then moved in place, so
+    readers never see a partly written index.
+
+    Args:
+        map_path (Path): The JSON lines id map file.
+        target_path (Path): Where to write the index.
+        key_column (int): The column of the entries to index. Defaults to the legacy ids.
+    """
+    logger.info("Building index of legacy id map %s", map_path)
+    stat = os.stat(map_path)
+    hashes_and_offsets = []
+    offset = 0
+    with open(map_path, "rb") as map_file:
+        for line in map_file:
+            if line.strip():
+                key_hash = hash_legacy_id(json.loads(line)[key_column])
+                hashes_and_offsets.append((key_hash << 64) | offset)
+            offset += len(line)
+        hashes_and_offsets.sort()
+        entries = array("Q")
+        for key_hash, offsets in _group_by_hash(hashes_and_offsets):
+            for entry_offset in _last_offset_per_key(map_file, offsets, key_column):
+                entries.extend((key_hash, entry_offset))
+    temporary_path = target_path.with_name(f"{target_path.name}.tmp")
+    with open(temporary_path, "wb") as index_file:
+        header = array("Q", index_header(len(entries) // 2, stat.st_size, stat.st_mtime_ns))
+        header.tofile(index_file)
+        entries.tofile(index_file)
+    os.replace(temporary_path, target_path)
+    logger.info("Indexed %s legacy ids in %s", len(entries) // 2, target_path)
+
+
+def _group_by_hash(hashes_and_offsets: List[int]) -> Iterator[tuple]:
+    offsets: List[int] = []
+    previous_hash = None
+    offset_mask = (1 << 64) - 1
+    for hash_and_offset in hashes_and_offsets:
+        key_hash = hash_and_offset >> 64
+        if key_hash != previous_hash and offsets:
+            yield previous_hash, offsets
+            offsets = []
+        previous_hash = key_hash
+        offsets.append(hash_and_offset & offset_mask)
+    if offsets:
+        yield previous_hash, offsets
+
+
+def _last_offset_per_key(map_file, offsets: List[int], key_column: int) -> List[int]:
+    if len(offsets) == 1:
+        return offsets
+    last_offsets = {}
+    for offset in offsets:
+        map_file.seek(offset)
+        last_offsets[json.loads(map_file.readline())[key_column]] = offset
+    return sorted(last_offsets.values())
+
+
+def map_column(id_map: Mapping, key_column: int, value_column: int) -> Mapping:
+    """Map one column of the entries of a legacy id map to another, like FOLIO ids to HRIDs.
+
+    The entries of the IdMapIndex maps in id_map are looked up through an index on the
+    key column, so they are never all read. Other maps are read into a dict.
+
+    Args:
+        id_map (Mapping): The legacy id map, as opened by MigrationTaskBase.open_id_map.
+        key_column (int): The column to look up by.
+        value_column (int): The column to return.
+
+    Returns:
+        Mapping: The values in the value column by the values in the key column.
+    """
+    maps = id_map.maps if isinstance(id_map, ChainMap) else [id_map]
+    return ChainMap(
+        *(
+            IdMapIndex(m.map_path, key_column, value_column)
+            if isinstance(m, IdMapIndex)
+            else {entry[key_column]: entry[value_column] for entry in m.values()}
+            for m in maps
+        )
+    )
@@ -0,0 +1,81 @@
+"""JSON serialization for the records the tools write and post.
+
+Serializing the FOLIO records is a large part of the time spent writing result files,
+extradata and batches posted to FOLIO. If the optional orjson package is installed it
+is used for this, otherwise the standard library json module is. orjson writes compact
+JSON without escaping non-ASCII characters, so the output is not byte for byte the
+same as with the json module, but it holds the same data.
+
+Install the fast backend with ``pip install folio_migration_tools[fast-json]``.
+"""
+
+import json
+import logging
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+try:
+    import orjson
+
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS if ORJSON_AVAILABLE else 0
+
+backend = "orjson" if ORJSON_AVAILABLE else "json"
+
+
+def set_backend(name: str):
+    """Choose the backend used for serializing.
+
+    Args:
+        name (str): "orjson" or "json".
+
+    Raises:
+        ValueError: If the backend is unknown or orjson is not installed.
+    """
+    global backend
+    if name not in ("orjson", "json"):
+        raise ValueError(f"Unknown JSON backend {name}")
+    if name == "orjson" and not ORJSON_AVAILABLE:
+        raise ValueError("The orjson JSON backend requires the orjson package")
+    backend = name
+
+
+def dumps_bytes(obj: Any) -> bytes:
+    """Serialize an object to UTF-8 encoded JSON.
+
+    Objects orjson can not serialize, like integers larger than 64 bits, are
+    serialized with the json module instead.
+
+    Args:
+        obj (Any): The object to serialize.
+
+    Returns:
+        bytes: The JSON document.
+    """
+    if backend == "orjson":
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTIONS)
+        except TypeError:
+            pass
+    return json.dumps(obj).encode("utf-8")
+
+
+def dumps(obj: Any) -> str:
+    """Serialize an object to a JSON string.
+
+    Args:
+        obj (Any): The object to serialize.
+
+    Returns:
+        str: The JSON document.
+    """
+    if backend == "orjson":
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTIONS).decode("utf-8")
+        except TypeError:
+            pass
+    return json.dumps(obj)
@@ -100,6 +100,14 @@ class IlsFlavour(str, Enum):
     none = "none"
 
 
+class OutputCompression(str, Enum):
+    """Enum representing the compression of the files written by the transformers."""
+
+    none = "none"
+    gzip = "gzip"
+    zstd = "zstd"
+
+
 class FolioRelease(str, Enum):
     """Enum representing different FOLIO releases."""
 
@@ -223,6 +231,55 @@ class LibraryConfiguration(BaseModel):
             ),
         ),
     ] = False
+    memory_mapped_id_maps: Annotated[
+        bool,
+        Field(
+            title="Memory-mapped legacy id maps",
+            description=(
+                "If set to true, tasks that only look up records in the legacy id maps of "
+                "earlier tasks (instances and holdings) use a memory-mapped index built next "
+                "to the id map file, instead of loading the whole map into memory. If set to "
+                "false (default), the id maps are loaded into memory."
+            ),
+        ),
+    ] = False
+    output_compression: Annotated[
+        OutputCompression,
+        Field(
+            title="Output compression",
+            description=(
+                "Compression of the FOLIO records, SRS records and extradata written by the "
+                "transformers: none (default), gzip or zstd. zstd requires the zstandard "
+                "package (folio_migration_tools[zstd]). The files keep their usual names, and "
+                "the BatchPoster reads compressed files as they are. The InventoryBatchPoster "
+                "and UserImportTask can only read uncompressed files."
+            ),
+        ),
+    ] = OutputCompression.none
+    use_snapshot_cache: Annotated[
+        bool,
+        Field(
+            title="Use snapshot cache",
+            description=(
+                "If set to true, the JSON schemas fetched from GitHub and the mapping rules and "
+                "reference data fetched from FOLIO are kept in base_folder/.snapshot_cache/ and "
+                "reused by all tasks in the folder. Schemas and mapping rules are fetched again "
+                "when the module versions in the tenant change. Run a task with --refresh to "
+                "fetch everything again, for example after changing reference data in FOLIO. "
+                "If set to false (default), everything is fetched when a task starts."
+            ),
+        ),
+    ] = False
+    refresh_snapshot_cache: Annotated[
+        bool,
+        Field(
+            title="Refresh snapshot cache",
+            description=(
+                "If set to true, the snapshots of schemas, mapping rules and reference data "
+                "are fetched again and replaced. Set by the --refresh command line switch."
+            ),
+        ),
+    ] = False
     is_ecs: Annotated[
         bool,
         Field(
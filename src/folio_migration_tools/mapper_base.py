@@ -81,19 +81,17 @@ class MapperBase:
 
     def report_folio_mapping(self, folio_record, schema):
         try:
-            for field_name in set(flatten(folio_record)):
+            for field_name in get_field_paths(folio_record):
                 try:
                     self.mapped_folio_fields[field_name][0] += 1
                 except KeyError:
                     self.mapped_folio_fields[field_name] = [1]
             if not self.schema_properties:
-                self.schema_properties = schema["properties"].keys()
+                self.schema_properties = frozenset(schema["properties"])
 
-            unmatched_properties = (
-                p for p in self.schema_properties if p not in folio_record.keys()
-            )
-            for prop in unmatched_properties:
-                if prop not in self.mapped_folio_fields:
+            # Only schema properties that have never been reported need to be looked at
+            for prop in self.schema_properties.difference(self.mapped_folio_fields):
+                if prop not in folio_record:
                     self.mapped_folio_fields[prop] = [0]
         except Exception as ee:
             logger.exception(ee, stack_info=True)
@@ -109,7 +107,7 @@ class MapperBase:
                 self.mapped_legacy_fields[field_name][1] += v
 
     def report_folio_mapping_no_schema(self, folio_object):
-        for field_name in set(flatten(folio_object)):
+        for field_name in get_field_paths(folio_object):
             if field_name not in self.mapped_folio_fields:
                 self.mapped_folio_fields[field_name] = [1, 1]
             else:
@@ -460,7 +458,7 @@ class MapperBase:
                 )
                 if bound_with_holding.get("hrid", ""):
                     bound_with_holding["hrid"] = f"{bound_with_holding['hrid']}_bw_{bwidx}"
-            self.migration_report.add_general_statistics(i18n.t("Bound-with holdings created"))
+            self.migration_report.add_general_statistics(i18n_t("Bound-with holdings created"))
             yield bound_with_holding
 
     def generate_boundwith_holding_uuid(self, holding_uuid, instance_uuid):
@@ -601,5 +599,46 @@ def flatten(my_dict: dict, path=""):
                 yield f"{path}.{k}".strip(".")
 
 
+def get_field_paths(folio_record: dict) -> set:
+    """Get the set of dotted field paths in a record, as set(flatten(folio_record)).
+
+    Walks the record with an explicit stack instead of nested generators, since this
+    is done for every record that is transformed.
+
+    Args:
+        folio_record (dict): The FOLIO record.
+
+    Returns:
+        set: The top-level keys, and the dotted paths of all nested values.
+    """
+    paths = set(folio_record)
+    stack = []
+    for k, v in folio_record.items():
+        if v:
+            if isinstance(v, list):
+                stack.extend((f".{k}", e) for e in v if isinstance(e, dict))
+            elif isinstance(v, dict):
+                stack.append((f".{k}", v))
+    while stack:
+        path, nested_dict = stack.pop()
+        for k, v in nested_dict.items():
+            if not v:
+                continue
+            sub_path = f"{path}.{k}"
+            if isinstance(v, list):
+                if all(isinstance(x, dict) for x in v):
+                    paths.add(sub_path.strip("."))
+                for e in v:
+                    if isinstance(e, dict):
+                        stack.append((sub_path, e))
+                    elif isinstance(e, str):
+                        paths.add(sub_path.strip("."))
+            else:
+                paths.add(sub_path.strip("."))
+                if isinstance(v, dict):
+                    stack.append((sub_path, v))
+    return paths
+
+
 def check_if_list_with_dict_keys(data):
     return isinstance(data, list) and all(isinstance(x, dict) for x in data)
@@ -306,9 +306,7 @@ class ItemMapper(MappingFileMapperBase):
             barcode = mapped_value
             normalized_barcode = barcode.strip().lower()
             if normalized_barcode and normalized_barcode in self.unique_barcodes:
-                Helper.log_data_issue(index_or_id, "Duplicate barcode", mapped_value)
-                self.migration_report.add_general_statistics(i18n_t("Duplicate barcodes"))
-                return f"{barcode}-{uuid4()}"
+                return self.make_barcode_unique(index_or_id, barcode)
             else:
                 if normalized_barcode:
                     self.unique_barcodes.add(normalized_barcode)
@@ -343,6 +341,11 @@ class ItemMapper(MappingFileMapperBase):
         )
         return ""
 
+    def make_barcode_unique(self, index_or_id, barcode: str) -> str:
+        Helper.log_data_issue(index_or_id, "Duplicate barcode", barcode)
+        self.migration_report.add_general_statistics(i18n_t("Duplicate barcodes"))
+        return f"{barcode}-{uuid4()}"
+
     def transform_status(self, legacy_value):
         status = self.status_mapping.get(legacy_value, "Available")
         self.migration_report.add("StatusMapping", f"'{legacy_value}' -> {status}")
@@ -16,6 +16,7 @@ from dateutil import tz
 from folio_uuid.folio_uuid import FOLIONamespaces
 from folioclient import FolioClient
 
+from folio_migration_tools import snapshot_cache
 from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
@@ -171,15 +172,20 @@ class ManualFeeFinesMapper(MappingFileMapperBase):
     def get_composite_feefine_schema(self) -> Dict[str, Any]:
         return {
             "properties": {
-                "account": FolioClient.get_latest_from_github(
-                    "folio-org", "mod-feesfines", "/ramls/accountdata.json"
-                ),
-                "feefineaction": FolioClient.get_latest_from_github(
-                    "folio-org", "mod-feesfines", "/ramls/feefineactiondata.json"
-                ),
+                "account": self.get_latest_schema("/ramls/accountdata.json"),
+                "feefineaction": self.get_latest_schema("/ramls/feefineactiondata.json"),
             }
         }
 
+    def get_latest_schema(self, filepath: str) -> Dict[str, Any]:
+        return snapshot_cache.cached(
+            self.folio_client,
+            "schemas",
+            None,
+            ["folio-org", "mod-feesfines", filepath],
+            lambda: FolioClient.get_latest_from_github("folio-org", "mod-feesfines", filepath),
+        )
+
     def get_tenant_timezone(self):
         config_path = (
             "/configurations/entries?query=(module==ORG%20and%20configName==localeSettings)"
@@ -13,10 +13,9 @@ import re
 import uuid
 from functools import reduce
 from pathlib import Path
-from typing import Any, Dict, List, Set
+from typing import Any, Callable, Dict, List, Optional, Set
 from uuid import UUID
 
-import i18n
 from folio_uuid.folio_uuid import FOLIONamespaces, FolioUUID
 from folioclient import FolioClient
 
@@ -36,6 +35,9 @@ logger = logging.getLogger(__name__)
 
 empty_vals = ["Not mapped", None, ""]
 
+# A step of a compiled mapping plan. Called with (legacy_object, folio_object, index_or_id)
+MappingOperation = Callable[[dict, dict, str], None]
+
 
 class MappingFileMapperBase(MapperBase):
     def __init__(
@@ -70,6 +72,8 @@ class MappingFileMapperBase(MapperBase):
         self.total_records = 0
         self.record_map = record_map
         self.ref_data_dicts: Dict = {}
+        self.map_entries_by_folio_prop_name: Dict[str, list] = {}
+        self._mapping_plan: Optional[List[tuple[str, MappingOperation]]] = None
         self.empty_vals = empty_vals
         self.folio_keys = self.get_mapped_folio_properties_from_map(self.record_map)
         self.field_map = self.setup_field_map(ignore_legacy_identifier)
@@ -258,18 +262,32 @@ class MappingFileMapperBase(MapperBase):
         )
         return ""
 
+    def get_map_entries(self, folio_prop_name: str) -> list:
+        """Returns the mapping file entries for a FOLIO property, looking them up only once.
+
+        Args:
+            folio_prop_name (str): The FOLIO property path
+
+        Returns:
+            list: The mapping file entries that map to the property
+        """
+        if (map_entries := self.map_entries_by_folio_prop_name.get(folio_prop_name)) is None:
+            map_entries = list(
+                MappingFileMapperBase.get_map_entries_by_folio_prop_name(
+                    folio_prop_name, self.record_map["data"]
+                )
+            )
+            self.map_entries_by_folio_prop_name[folio_prop_name] = map_entries
+        return map_entries
+
     def get_prop(self, legacy_object, folio_prop_name, index_or_id, schema_default_value):
         legacy_item_keys = self.mapped_from_legacy_data.get(folio_prop_name, [])
-        map_entries = list(
-            MappingFileMapperBase.get_map_entries_by_folio_prop_name(
-                folio_prop_name, self.record_map["data"]
-            )
-        )
+        map_entries = self.get_map_entries(folio_prop_name)
         if not any(map_entries):
             return ""
         elif len(map_entries) > 1:
-            self.migration_report.add(
-                "Details", i18n.t("%{props} were concatenated", props=legacy_item_keys)
+            self.migration_report.add_translated(
+                "Details", "%{props} were concatenated", props=legacy_item_keys
             )
             return " ".join(
                 MappingFileMapperBase.get_legacy_value(
@@ -292,13 +310,11 @@ class MappingFileMapperBase(MapperBase):
             if legacy_value or isinstance(legacy_value, bool):
                 return legacy_value
             else:
-                self.migration_report.add(
+                self.migration_report.add_translated(
                     "FolioDefaultValuesAdded",
-                    i18n.t(
-                        "%{schema_value} added to %{prop_name}",
-                        schema_value=schema_default_value,
-                        prop_name=folio_prop_name,
-                    ),
+                    "%{schema_value} added to %{prop_name}",
+                    schema_value=schema_default_value,
+                    prop_name=folio_prop_name,
                 )
                 return schema_default_value
 
@@ -312,9 +328,9 @@ class MappingFileMapperBase(MapperBase):
         folio_object, legacy_id = self.instantiate_record(
             legacy_object, index_or_id, object_type, accept_duplicate_ids
         )
-        for property_name, property in self.schema["properties"].items():
+        for _, map_operation in self.mapping_plan:
             try:
-                self.map_property(property_name, property, folio_object, legacy_id, legacy_object)
+                map_operation(legacy_object, folio_object, legacy_id)
             except TransformationFieldMappingError as data_error:
                 self.handle_transformation_field_mapping_error(legacy_id, data_error)
         clean_folio_object = self.validate_required_properties(
@@ -322,62 +338,177 @@ class MappingFileMapperBase(MapperBase):
         )
         return (clean_folio_object, legacy_id)
 
+    @property
+    def mapping_plan(self) -> List[tuple[str, MappingOperation]]:
+        """The compiled mapping plan, compiled the first time a record is mapped.
+
+        Compiling on first use lets subclasses finish adjusting the schema in their
+        own __init__ before the plan is made.
+        """
+        if self._mapping_plan is None:
+            self._mapping_plan = self.compile_mapping_plan()
+        return self._mapping_plan
+
+    def compile_mapping_plan(self) -> List[tuple[str, MappingOperation]]:
+        """Turns the schema and the mapping file into a list of mapping operations.
+
+        The schema is walked once, and each top level property gets an operation that
+        maps it, with the property paths, defaults and mapping file lookups resolved
+        up front. Properties that are skipped, or that nothing in the mapping file can
+        produce a value for, get no operation.
+
+        Returns:
+            List[tuple[str, MappingOperation]]: The property names and their operations
+        """
+        mapping_plan = []
+        for property_name, schema_property in self.schema["properties"].items():
+            if map_operation := self.compile_property(property_name, schema_property):
+                mapping_plan.append((property_name, map_operation))
+        logger.info(
+            "Compiled mapping plan for %s of %s schema properties",
+            len(mapping_plan),
+            len(self.schema["properties"]),
+        )
+        return mapping_plan
+
     def map_property(
         self, schema_property_name: str, schema_property, folio_object, index_or_id, legacy_object
     ):
+        if map_operation := self.compile_property(schema_property_name, schema_property):
+            map_operation(legacy_object, folio_object, index_or_id)
+
+    def compile_property(
+        self, schema_property_name: str, schema_property
+    ) -> Optional[MappingOperation]:
         if skip_property(schema_property_name, schema_property):
-            pass
+            return None
         elif schema_property.get("type", "") == "object":
             if "properties" in schema_property:
-                self.map_object_props(
-                    legacy_object,
-                    schema_property_name,
-                    schema_property,
-                    folio_object,
-                    index_or_id,
-                    1,
-                )
+                return self.compile_object_props(schema_property_name, schema_property)
+            return None
         elif schema_property.get("type", "") == "array":
-            logger.debug("Mapping array property: %s.", schema_property_name)
             try:
                 if schema_property["items"].get("type", "") == "object":
-                    static_only_props = self.map_objects_array_props(
-                        legacy_object,
+                    map_operation = self.compile_objects_array_props(
                         schema_property_name,
                         schema_property["items"]["properties"],
-                        folio_object,
-                        index_or_id,
-                        schema_property["items"].get("required", []),
-                    )
-                    self.validate_object_items_in_array(
-                        folio_object,
-                        schema_property_name,
                         schema_property,
-                        index_or_id,
-                        static_only_props,
+                        schema_property["items"].get("required", []),
                     )
-
                 elif schema_property["items"].get("type", "") in ["string", "number", "integer"]:
-                    self.map_string_array_props(
-                        legacy_object,
-                        schema_property_name,
-                        folio_object,
-                        index_or_id,
-                    )
+                    map_operation = self.compile_string_array_props(schema_property_name)
                 else:
                     logger.info("Edge case %s", schema_property_name)
-
+                    return None
             except KeyError as schema_anomaly:
-                logger.exception(
-                    "Cannot create property '%s'. Unsupported schema format: %s",
-                    schema_property_name,
-                    schema_anomaly,
+                log_schema_anomaly(schema_property_name, schema_anomaly)
+                return None
+            return guard_schema_anomalies(schema_property_name, map_operation)
+        else:  # Basic property
+            return self.compile_basic_props(schema_property_name, schema_property)
+
+    def compile_basic_props(
+        self, property_name: str, schema_property
+    ) -> Optional[MappingOperation]:
+        if not self.has_basic_property({}, property_name):
+            return None
+        schema_default_value = schema_property.get("default", "")
+        required = self.schema.get("required", [])
+        legacy_field = self.legacy_basic_property(property_name)
+
+        def map_basic_prop(legacy_object, folio_object, index_or_id):
+            mapped_prop = self.get_prop(
+                legacy_object, property_name, index_or_id, schema_default_value
+            )
+            if mapped_prop or isinstance(mapped_prop, bool):
+                self.validate_enums(
+                    mapped_prop, schema_property, property_name, index_or_id, required
                 )
+                folio_object[property_name] = mapped_prop
+            self.report_legacy_mapping(legacy_field, True, True)
 
-        else:  # Basic property
-            self.map_basic_props(
-                legacy_object, schema_property_name, folio_object, index_or_id, schema_property
+        return map_basic_prop
+
+    def compile_string_array_props(self, prop: str) -> Optional[MappingOperation]:
+        keys_to_map = [k for k in self.folio_keys if k.startswith(prop)]
+        if not keys_to_map:
+            return None
+
+        def map_string_array_prop(legacy_object, folio_object, index_or_id):
+            self.map_string_array_props(
+                legacy_object, prop, folio_object, index_or_id, keys_to_map
+            )
+
+        return map_string_array_prop
+
+    def compile_objects_array_props(
+        self, prop_name: str, sub_properties, schema_property, required: list[str]
+    ) -> Optional[MappingOperation]:
+        if not any(k.startswith(f"{prop_name}[") for k in self.folio_keys):
+            return None
+        static_only_props = self.get_static_only_props(prop_name)
+
+        def map_objects_array_prop(legacy_object, folio_object, index_or_id):
+            self.map_objects_array_props(
+                legacy_object,
+                prop_name,
+                sub_properties,
+                folio_object,
+                index_or_id,
+                required,
+                static_only_props,
             )
+            self.validate_object_items_in_array(
+                folio_object, prop_name, schema_property, index_or_id, static_only_props
+            )
+
+        return map_objects_array_prop
+
+    def compile_object_props(
+        self, schema_property_name: str, schema_property
+    ) -> Optional[MappingOperation]:
+        map_operations: List[MappingOperation] = []
+        for child_property_name, child_property in schema_property["properties"].items():
+            sub_prop_path = f"{schema_property_name}.{child_property_name}"
+            if "properties" in child_property:
+                map_operation = self.compile_object_props(sub_prop_path, child_property)
+            elif (
+                child_property.get("type", "") == "array"
+                and child_property.get("items", {}).get("type", "") == "object"
+                and child_property.get("items", {}).get("properties", "")
+            ):
+                map_operation = self.compile_objects_array_props(
+                    sub_prop_path, child_property["items"]["properties"], child_property, []
+                )
+            elif child_property.get("type", "") == "array" and child_property.get("items", {}).get(
+                "type", ""
+            ) in ["string", "number", "integer"]:
+                map_operation = self.compile_string_array_props(sub_prop_path)
+            else:
+                map_operation = self.compile_object_leaf_prop(sub_prop_path, child_property)
+            if map_operation:
+                map_operations.append(map_operation)
+        if not map_operations:
+            return None
+
+        def map_object_prop(legacy_object, folio_object, index_or_id):
+            for map_operation in map_operations:
+                map_operation(legacy_object, folio_object, index_or_id)
+
+        return map_object_prop
+
+    def compile_object_leaf_prop(self, sub_prop_path: str, child_property) -> MappingOperation:
+        # When mapping nested object fields under an array item (for example,
+        # "poLines[0].cost.currency") into a temporary item object, keep only
+        # the local path segment ("cost.currency").
+        local_path = sub_prop_path.split("].", 1)[1] if "]." in sub_prop_path else sub_prop_path
+        schema_default_value = child_property.get("default", "")
+
+        def map_object_leaf_prop(legacy_object, folio_object, index_or_id):
+            if p := self.get_prop(legacy_object, sub_prop_path, index_or_id, schema_default_value):
+                set_at_path(folio_object, local_path, p)
+
+        return map_object_leaf_prop
 
     @staticmethod
     def get_legacy_value(
@@ -392,13 +523,11 @@ class MappingFileMapperBase(MapperBase):
             mapping_file_entry.get("value", ""), bool
         ):
             value_mapped_value = mapping_file_entry.get("value")
-            migration_report.add(
+            migration_report.add_translated(
                 "DefaultValuesAdded",
-                i18n.t(
-                    "%{value} added to %{entry}",
-                    value=value_mapped_value,
-                    entry=mapping_file_entry.get("folio_field", ""),
-                ),
+                "%{value} added to %{entry}",
+                value=value_mapped_value,
+                entry=mapping_file_entry.get("folio_field", ""),
             )
             return value_mapped_value
 
@@ -561,67 +690,8 @@ class MappingFileMapperBase(MapperBase):
         index_or_id,
         level: int,
     ):
-        def _normalize_local_object_path(path: str) -> str:
-            # When mapping nested object fields under an array item (for example,
-            # "poLines[0].cost.currency") into a temporary item object, keep only
-            # the local path segment ("cost.currency").
-            return path.split("].", 1)[1] if "]." in path else path
-
-        temp_object: dict = {}
-        for child_property_name, child_property in schema_property["properties"].items():
-            sub_prop_path = f"{schema_property_name}.{child_property_name}"
-            if "properties" in child_property:
-                self.map_object_props(
-                    legacy_object,
-                    sub_prop_path,
-                    child_property,
-                    folio_object,
-                    index_or_id,
-                    level + 1,
-                )
-            elif (
-                child_property.get("type", "") == "array"
-                and child_property.get("items", {}).get("type", "") == "object"
-                and child_property.get("items", {}).get("properties", "")
-            ):
-                static_only_props = self.map_objects_array_props(
-                    legacy_object,
-                    f"{schema_property_name}.{child_property_name}",
-                    child_property["items"]["properties"],
-                    folio_object,
-                    index_or_id,
-                    [],
-                )
-                self.validate_object_items_in_array(
-                    folio_object,
-                    f"{schema_property_name}.{child_property_name}",
-                    child_property,
-                    index_or_id,
-                    static_only_props,
-                )
-
-            elif child_property.get("type", "") == "array" and child_property.get("items", {}).get(
-                "type", ""
-            ) in ["string", "number", "integer"]:
-                self.map_string_array_props(
-                    legacy_object,
-                    f"{schema_property_name}.{child_property_name}",
-                    folio_object,
-                    index_or_id,
-                )
-            elif child_property.get("type", "") in ["string", "number", "integer"]:
-                if p := self.get_prop(
-                    legacy_object, sub_prop_path, index_or_id, child_property.get("default", "")
-                ):
-                    set_at_path(folio_object, _normalize_local_object_path(sub_prop_path), p)
-                # temp_object[child_property_name] = p
-            elif p := self.get_prop(
-                legacy_object, sub_prop_path, index_or_id, child_property.get("default", "")
-            ):
-                set_at_path(folio_object, _normalize_local_object_path(sub_prop_path), p)
-        if temp_object:
-            set_deep(folio_object, schema_property_name, temp_object)
-            # folio_object[schema_property_name] = temp_object
+        if map_operation := self.compile_object_props(schema_property_name, schema_property):
+            map_operation(legacy_object, folio_object, index_or_id)
 
     def map_objects_array_props(  # noqa: C901
         self,
@@ -631,19 +701,11 @@ class MappingFileMapperBase(MapperBase):
         folio_object: dict,
         index_or_id,
         required: list[str],
+        static_only_props: Optional[set] = None,
     ):
         resulting_array = []
-        static_props = set()
-        legacy_props = set()
-        for entry in self.record_map["data"]:
-            m = re.match(rf"{re.escape(prop_name)}\[\d+\]\.(.+)", entry["folio_field"])
-            if m:
-                sub_prop = m.group(1)
-                if entry.get("value") not in [None, ""] or isinstance(entry.get("value"), bool):
-                    static_props.add(sub_prop)
-                if entry["legacy_field"] not in empty_vals:
-                    legacy_props.add(sub_prop)
-        static_only_props = static_props - legacy_props
+        if static_only_props is None:
+            static_only_props = self.get_static_only_props(prop_name)
         i = 0
         while True:
             keys_to_map = {
@@ -756,6 +818,27 @@ class MappingFileMapperBase(MapperBase):
 
         return static_only_props
 
+    def get_static_only_props(self, prop_name: str) -> set:
+        """Returns the sub properties of an array of objects that are only mapped to values.
+
+        Args:
+            prop_name (str): The path of the array property
+
+        Returns:
+            set: Sub properties mapped to values, but not to legacy fields
+        """
+        static_props = set()
+        legacy_props = set()
+        for entry in self.record_map["data"]:
+            m = re.match(rf"{re.escape(prop_name)}\[\d+\]\.(.+)", entry["folio_field"])
+            if m:
+                sub_prop = m.group(1)
+                if entry.get("value") not in [None, ""] or isinstance(entry.get("value"), bool):
+                    static_props.add(sub_prop)
+                if entry["legacy_field"] not in empty_vals:
+                    legacy_props.add(sub_prop)
+        return static_props - legacy_props
+
     @staticmethod
     def split_obj_by_delim(delimiter: str, folio_obj: dict, delimited_props: List[str]):
         non_split_props = [(k, v) for k, v in folio_obj.items() if k not in delimited_props]
@@ -773,8 +856,11 @@ class MappingFileMapperBase(MapperBase):
             r.update(non_split_props)
         return res
 
-    def map_string_array_props(self, legacy_object, prop, folio_object, index_or_id):
-        keys_to_map = [k for k in self.folio_keys if k.startswith(prop)]
+    def map_string_array_props(
+        self, legacy_object, prop, folio_object, index_or_id, keys_to_map=None
+    ):
+        if keys_to_map is None:
+            keys_to_map = [k for k in self.folio_keys if k.startswith(prop)]
         for prop_name in keys_to_map:
             if prop_name in self.folio_keys and self.has_property(legacy_object, prop_name):
                 if mapped_prop := self.get_prop(legacy_object, prop_name, index_or_id, ""):
@@ -856,6 +942,14 @@ class MappingFileMapperBase(MapperBase):
 
     def get_objects(self, source_file, file_name: Path):
         total_rows, empty_rows, reader = self._get_delimited_file_reader(source_file, file_name)
+        self.report_source_file_rows(file_name, total_rows, empty_rows)
+        try:
+            yield from reader
+        except Exception as exception:
+            logger.exception("%s at row %s", exception, reader.line_num)
+            raise exception from exception
+
+    def report_source_file_rows(self, file_name: Path, total_rows: int, empty_rows: int):
         logger.info("Source data file contains %d rows", total_rows)
         logger.info("Source data file contains %d empty rows", empty_rows)
         self.migration_report.set(
@@ -866,11 +960,6 @@ class MappingFileMapperBase(MapperBase):
             "Number of empty rows in {}".format(file_name.name),
             empty_rows,
         )
-        try:
-            yield from reader
-        except Exception as exception:
-            logger.exception("%s at row %s", exception, reader.line_num)
-            raise exception from exception
 
     def has_property(self, legacy_object, folio_prop_name: str):
         legacy_keys = self.field_map.get(folio_prop_name, [])
@@ -1172,11 +1261,12 @@ class MappingFileMapperBase(MapperBase):
         static_only_props = static_only_props or set()
         required = schema_property.get("items", {}).get("required", [])
         array_items = get_from_path(folio_object, property_path, [])
-        logger.debug(
-            "Validating object items in array for property: %s. Objects being validated: %s",
-            property_path,
-            json.dumps(array_items, indent=2),
-        )
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(
+                "Validating object items in array for property: %s. Objects being validated: %s",
+                property_path,
+                json.dumps(array_items, indent=2),
+            )
         for item in array_items:
             try:
                 if not isinstance(item, dict):
@@ -1257,6 +1347,38 @@ class MappingFileMapperBase(MapperBase):
             ) from ke
 
 
+def log_schema_anomaly(schema_property_name: str, schema_anomaly: KeyError):
+    logger.exception(
+        "Cannot create property '%s'. Unsupported schema format: %s",
+        schema_property_name,
+        schema_anomaly,
+    )
+
+
+def guard_schema_anomalies(
+    schema_property_name: str, map_operation: Optional[MappingOperation]
+) -> Optional[MappingOperation]:
+    """Wraps the operation of an array property so that schema anomalies are only logged.
+
+    Args:
+        schema_property_name (str): The name of the array property
+        map_operation (Optional[MappingOperation]): The operation mapping the property
+
+    Returns:
+        Optional[MappingOperation]: The wrapped operation, or None if there is none
+    """
+    if map_operation is None:
+        return None
+
+    def map_array_prop(legacy_object, folio_object, index_or_id):
+        try:
+            map_operation(legacy_object, folio_object, index_or_id)
+        except KeyError as schema_anomaly:
+            log_schema_anomaly(schema_property_name, schema_anomaly)
+
+    return map_array_prop
+
+
 def skip_property(property_name: str, property: Dict[str, Any]) -> bool:
     return bool(
         property_name in ["metadata", "id", "lastCheckIn"]
@@ -20,6 +20,7 @@ from folio_uuid.folio_uuid import FOLIONamespaces
 from folioclient import FolioClient
 from httpx import HTTPError
 
+from folio_migration_tools import snapshot_cache
 from folio_migration_tools.custom_exceptions import TransformationRecordFailedError
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.library_configuration import LibraryConfiguration
@@ -79,8 +80,14 @@ class CompositeOrderMapper(MappingFileMapperBase):
         except Exception:
             logger.info("Could not determine mod-orders version, falling back to latest release")
 
-        self.composite_order_schema = CompositeOrderMapper.get_latest_acq_schemas_from_github(
-            "folio-org", "mod-orders", "mod-orders", "composite_purchase_order", release_tag
+        self.composite_order_schema = snapshot_cache.cached(
+            folio_client,
+            "schemas",
+            release_tag,
+            ["folio-org", "mod-orders", "mod-orders", "composite_purchase_order"],
+            lambda: CompositeOrderMapper.get_latest_acq_schemas_from_github(
+                "folio-org", "mod-orders", "mod-orders", "composite_purchase_order", release_tag
+            ),
         )
 
         # Detect PO lines property name from schema (compositePoLines or poLines)
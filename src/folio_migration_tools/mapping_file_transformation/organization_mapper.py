@@ -15,6 +15,7 @@ import httpx
 from folio_uuid.folio_uuid import FOLIONamespaces
 from folioclient import FolioClient
 
+from folio_migration_tools import snapshot_cache
 from folio_migration_tools.library_configuration import LibraryConfiguration
 from folio_migration_tools.mapping_file_transformation.mapping_file_mapper_base import (
     MappingFileMapperBase,
@@ -67,12 +68,18 @@ class OrganizationMapper(MappingFileMapperBase):
 
         if os.environ.get("GITHUB_TOKEN"):
             logger.info("Using GITHUB_TOKEN environment variable for GitHub API Access")
-        organization_schema = OrganizationMapper.get_latest_acq_schemas_from_github(
-            "folio-org",
-            "mod-organizations-storage",
-            "mod-orgs",
-            "organization",
+        organization_schema = snapshot_cache.cached(
+            folio_client,
+            "schemas",
             release_tag,
+            ["folio-org", "mod-organizations-storage", "mod-orgs", "organization"],
+            lambda: OrganizationMapper.get_latest_acq_schemas_from_github(
+                "folio-org",
+                "mod-organizations-storage",
+                "mod-orgs",
+                "organization",
+                release_tag,
+            ),
         )
 
         super().__init__(
@@ -8,6 +8,8 @@ for common reference data types like locations, material types, and patron group
 import json
 import logging
 import sys
+from collections import OrderedDict
+from typing import Dict, List, Tuple
 
 from folioclient import FolioClient
 
@@ -15,6 +17,8 @@ from folio_migration_tools.custom_exceptions import TransformationProcessError
 
 logger = logging.getLogger(__name__)
 
+HYBRID_MAPPING_CACHE_SIZE = 50000
+
 
 class RefDataMapping(object):
     def __init__(
@@ -37,7 +41,7 @@ class RefDataMapping(object):
             blurb_id: Identifier for blurbs related to this mapping.
         """
         self.name = array_name
-        self.cache: dict = {}
+        self.hybrid_mapping_cache: OrderedDict = OrderedDict()
         self.blurb_id = blurb_id
         logger.info("%s reference data mapping. Initializing", self.name)
         logger.info("Fetching %s reference data from FOLIO", self.name)
@@ -46,6 +50,8 @@ class RefDataMapping(object):
         self.regular_mappings: list = []
         self.key_type = key_type
         self.hybrid_mappings = []
+        self.regular_mappings_index: Dict[tuple, dict] = {}
+        self.hybrid_mappings_index: List[Tuple[tuple, Dict[tuple, Tuple[int, dict]]]] = []
         self.mapped_legacy_keys = []
         self.default_id = ""
         self.default_name = ""
@@ -54,11 +60,10 @@ class RefDataMapping(object):
         logger.info("%s reference data mapping. Done init", self.name)
 
     def get_ref_data_tuple(self, key_value):
-        if ref_object := self.cached_dict.get(key_value.lower().strip(), ()):
-            return ref_object
-        self.cached_dict = {
-            r[self.key_type].lower(): (r["id"], r[self.key_type]) for r in self.ref_data
-        }
+        if not self.cached_dict:
+            self.cached_dict = {
+                r[self.key_type].lower(): (r["id"], r[self.key_type]) for r in self.ref_data
+            }
         return self.cached_dict.get(key_value.lower().strip(), ())
 
     def setup_mappings(self):
@@ -108,6 +113,7 @@ class RefDataMapping(object):
                 ) from ee
 
         self.post_validate_map()
+        self.index_mappings()
         logger.info(
             f"Loaded {len(self.regular_mappings)} mappings for {len(self.ref_data)} {self.name} "
             "in FOLIO"
@@ -117,43 +123,69 @@ class RefDataMapping(object):
             f"{self.name} in FOLIO"
         )
 
+    def index_mappings(self):
+        """Index the regular and hybrid mappings by their legacy values.
+
+        Regular mappings are indexed by the tuple of their legacy values. Hybrid
+        mappings are grouped by their wildcard pattern, most specific pattern first,
+        and indexed by the values in their non-wildcard columns. When several rows
+        have the same legacy values, the first one in the map wins.
+        """
+        self.regular_mappings_index = {}
+        for mapping in self.regular_mappings:
+            self.regular_mappings_index.setdefault(
+                get_legacy_values(mapping, self.mapped_legacy_keys), mapping
+            )
+        patterns: Dict[tuple, Dict[tuple, Tuple[int, dict]]] = {}
+        for position, mapping in enumerate(self.hybrid_mappings):
+            legacy_values = get_legacy_values(mapping, self.mapped_legacy_keys)
+            pattern = tuple(value == "*" for value in legacy_values)
+            patterns.setdefault(pattern, {}).setdefault(
+                non_wildcard_values(legacy_values, pattern), (position, mapping)
+            )
+        self.hybrid_mappings_index = sorted(patterns.items(), key=lambda p: sum(p[0]))
+        self.hybrid_mapping_cache = OrderedDict()
+
     def get_hybrid_mapping(self, legacy_object):
-        obj_key = "_".join(legacy_object[k].strip() for k in self.mapped_legacy_keys)
-        if obj_key in self.cache:
-            return self.cache[obj_key]
-        highest_match = None
-        highest_match_number = 0
-
-        prepped_props = {k: legacy_object[k].strip() for k in self.mapped_legacy_keys}
-        for mapping in self.hybrid_mappings:
-            mismatch = 0
-            match_numbers = []
-            for k in self.mapped_legacy_keys:
-                if mapping[k] == prepped_props[k]:
-                    match_numbers.append(10)
-                elif mapping[k] == "*":
-                    match_numbers.append(1)
-                else:
-                    mismatch += 1
-            summa = sum(match_numbers)
+        """Get the best matching hybrid (partly wildcard) mapping for a legacy object.
 
-            if mismatch < 1 and summa > highest_match_number and min(match_numbers) > 0:
-                highest_match_number = summa
+        Every legacy value that matches exactly scores 10, every wildcard scores 1.
+        The mapping with the highest score wins, and the first one in the map wins
+        ties. Only one candidate per wildcard pattern needs to be looked at.
+
+        Args:
+            legacy_object (dict): The legacy record.
+
+        Returns:
+            dict: The matching mapping, or None.
+        """
+        legacy_values = tuple(legacy_object[k].strip() for k in self.mapped_legacy_keys)
+        if legacy_values in self.hybrid_mapping_cache:
+            self.hybrid_mapping_cache.move_to_end(legacy_values)
+            return self.hybrid_mapping_cache[legacy_values]
+        highest_match = None
+        highest_match_rank = (0, 0)
+        for pattern, mappings in self.hybrid_mappings_index:
+            match = mappings.get(non_wildcard_values(legacy_values, pattern))
+            if match is None:
+                continue
+            position, mapping = match
+            score = sum(
+                1 if wildcard and value != "*" else 10
+                for value, wildcard in zip(legacy_values, pattern, strict=True)
+            )
+            if (score, -position) > highest_match_rank:
+                highest_match_rank = (score, -position)
                 highest_match = mapping
-        self.cache[obj_key] = highest_match
+        self.hybrid_mapping_cache[legacy_values] = highest_match
+        if len(self.hybrid_mapping_cache) > HYBRID_MAPPING_CACHE_SIZE:
+            self.hybrid_mapping_cache.popitem(last=False)
         return highest_match
 
     def get_ref_data_mapping(self, legacy_object):
-        obj_key = "_".join(legacy_object[k].strip() for k in self.mapped_legacy_keys)
-        if obj_key in self.cache:
-            return self.cache[obj_key]
-        prepped_props = {k: legacy_object[k].strip() for k in self.mapped_legacy_keys}
-        for mapping in self.regular_mappings:
-            match_number = sum(prepped_props[k] == mapping[k] for k in self.mapped_legacy_keys)
-            if match_number == len(self.mapped_legacy_keys):
-                self.cache[obj_key] = mapping
-                return mapping
-        return None
+        return self.regular_mappings_index.get(
+            tuple(legacy_object[k].strip() for k in self.mapped_legacy_keys)
+        )
 
     def is_hybrid_default_mapping(self, mapping):
         legacy_values = [value for key, value in mapping.items() if key in self.mapped_legacy_keys]
@@ -225,6 +257,16 @@ class RefDataMapping(object):
                 sys.exit(1)
 
 
+def get_legacy_values(mapping: dict, mapped_legacy_keys: list) -> tuple:
+    return tuple(mapping.get(k) for k in mapped_legacy_keys)
+
+
+def non_wildcard_values(legacy_values: tuple, pattern: tuple) -> tuple:
+    return tuple(
+        value for value, wildcard in zip(legacy_values, pattern, strict=True) if not wildcard
+    )
+
+
 def get_mapped_legacy_keys(mapping):
     return [
         k.strip()
@@ -149,7 +149,11 @@ class UserMapper(MappingFileMapperBase):
             reader = csv.DictReader(source_file, dialect="tsv")
         else:  # Assume csv
             reader = csv.DictReader(source_file)
-        for idx, row in enumerate(reader):
+        yield from UserMapper.verify_user_rows(reader)
+
+    @staticmethod
+    def verify_user_rows(rows, start: int = 0):
+        for idx, row in enumerate(rows, start=start):
             if len(row.keys()) < 3:
                 raise TransformationProcessError(
                     idx, "something is wrong source file row", json.dumps(row)
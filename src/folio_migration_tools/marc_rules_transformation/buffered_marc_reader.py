@@ -0,0 +1,148 @@
+"""Streaming reader for MARC21 files.
+
+Provides BufferedMARCReader, a replacement for pymarc's MARCReader when reading the
+source files. It reads the file in large blocks and cuts the records out of them
+using the record length in the first five bytes of the leader, instead of making two
+small reads per record.
+
+pymarc writes MARC-8 decoding warnings to stderr. Capturing them means swapping
+sys.stderr, which is only worth doing for the records that are actually decoded as
+MARC-8. All other records are decoded as they are.
+"""
+
+import logging
+from contextlib import redirect_stderr
+from io import StringIO
+from typing import BinaryIO, Union
+
+from pymarc import Record
+from pymarc.constants import END_OF_RECORD
+from pymarc.exceptions import (
+    EndOfRecordNotFound,
+    FatalReaderError,
+    RecordLengthInvalid,
+    TruncatedRecord,
+)
+
+logger = logging.getLogger(__name__)
+
+READ_BUFFER_SIZE = 4 << 20
+LEADER_LENGTH_BYTES = 5
+
+
+class BufferedMARCReader:
+    """Reads MARC21 records from a binary file, one record per iteration.
+
+    Behaves like a permissive pymarc MARCReader: records that can not be read or
+    decoded are returned as None, with the raw bytes in current_chunk and the reason
+    in current_exception. Warnings pymarc wrote while decoding the record are in
+    current_warnings.
+    """
+
+    def __init__(
+        self,
+        file_handle: BinaryIO,
+        force_utf8: bool = True,
+        hide_utf8_warnings: bool = False,
+        utf8_handling: str = "strict",
+        file_encoding: str = "iso8859-1",
+        buffer_size: int = READ_BUFFER_SIZE,
+    ):
+        """Set up the reader.
+
+        Args:
+            file_handle (BinaryIO): The file to read from.
+            force_utf8 (bool): Decode all records as UTF-8, whatever leader 09 says.
+            hide_utf8_warnings (bool): Passed on to pymarc.
+            utf8_handling (str): How to handle UTF-8 decoding errors.
+            file_encoding (str): Encoding of records that are not UTF-8.
+            buffer_size (int): Number of bytes to read from the file at a time.
+        """
+        self.file_handle = file_handle
+        self.force_utf8 = force_utf8
+        self.hide_utf8_warnings = hide_utf8_warnings
+        self.utf8_handling = utf8_handling
+        self.file_encoding = file_encoding
+        self.buffer_size = buffer_size
+        self.current_chunk: Union[bytes, None] = None
+        self.current_exception: Union[Exception, None] = None
+        self.current_warnings = ""
+        self._buffer = b""
+        self._position = 0
+
+    def __iter__(self) -> "BufferedMARCReader":
+        """Return the reader itself."""
+        return self
+
+    def __next__(self) -> Union[Record, None]:
+        """Read and decode the next record.
+
+        Raises:
+            StopIteration: At the end of the file, or after a record that makes it
+                impossible to find where the next record starts.
+
+        Returns:
+            Union[Record, None]: The record, or None if it could not be read.
+        """
+        if isinstance(self.current_exception, FatalReaderError):
+            raise StopIteration
+        self.current_exception = None
+        self.current_warnings = ""
+
+        self.current_chunk = first5 = self._read(LEADER_LENGTH_BYTES)
+        if not first5:
+            raise StopIteration
+        if len(first5) < LEADER_LENGTH_BYTES:
+            self.current_exception = TruncatedRecord()
+            return None
+        try:
+            length = int(first5)
+        except ValueError:
+            length = 0
+        if length < LEADER_LENGTH_BYTES:
+            self.current_exception = RecordLengthInvalid()
+            return None
+
+        self.current_chunk = chunk = first5 + self._read(length - LEADER_LENGTH_BYTES)
+        if len(chunk) < length:
+            self.current_exception = TruncatedRecord()
+            return None
+        if chunk[-1] != ord(END_OF_RECORD):
+            self.current_exception = EndOfRecordNotFound()
+            return None
+
+        try:
+            if self.force_utf8 or chunk[9:10] == b"a":
+                return self._decode(chunk)
+            stderr_buffer = StringIO()
+            with redirect_stderr(stderr_buffer):
+                record = self._decode(chunk)
+            self.current_warnings = stderr_buffer.getvalue()
+            return record
+        except Exception as ex:
+            self.current_exception = ex
+            return None
+
+    def _decode(self, chunk: bytes) -> Record:
+        return Record(
+            chunk,
+            to_unicode=True,
+            force_utf8=self.force_utf8,
+            hide_utf8_warnings=self.hide_utf8_warnings,
+            utf8_handling=self.utf8_handling,
+            file_encoding=self.file_encoding,
+        )
+
+    def _read(self, size: int) -> bytes:
+        """Take size bytes from the buffer, refilling it from the file when needed."""
+        end = self._position + size
+        while end > len(self._buffer):
+            data = self.file_handle.read(max(self.buffer_size, size))
+            if not data:
+                break
+            self._buffer = self._buffer[self._position :] + data
+            self._position = 0
+            end = size
+        data = self._buffer[self._position : end]
+        self._position = min(end, len(self._buffer))
+        return data
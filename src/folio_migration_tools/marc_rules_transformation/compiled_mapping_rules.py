@@ -0,0 +1,200 @@
+"""MARC-to-FOLIO mapping rules, compiled for repeated use.
+
+The mapping rules fetched from FOLIO are JSON objects. Interpreting them for every
+field of every record means splitting condition lists, looking up condition
+functions and walking the FOLIO schema by dotted path over and over again.
+
+CompiledMapping does that work once per mapping rule when the mapper is set up, and
+TargetPathStep holds the schema lookups for one level of a dotted target path. The
+rules mapper runs the compiled rules instead of the raw JSON.
+"""
+
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymarc import Field
+
+
+class CompiledMapping(object):
+    """A mapping rule for a MARC field, with its parts parsed and resolved in advance."""
+
+    __slots__ = [
+        "mapping",
+        "conditions",
+        "target",
+        "target_name",
+        "subfields",
+        "custom_delimiters",
+        "has_conditions",
+        "condition_functions",
+        "parameter",
+        "values_to_add",
+        "apply_rules_on_concatenated_data",
+        "split_subfields",
+        "ignore_subsequent_subfields",
+        "entity_mappings",
+        "entity_indicators",
+        "entity_parent",
+        "entity_per_repeated_subfield",
+    ]
+
+    def __init__(self, mapping: dict, conditions=None):
+        """Compile a mapping rule.
+
+        Args:
+            mapping (dict): The mapping rule, as it appears in the mapping rules.
+            conditions (Conditions): The conditions the rule's condition types are
+                resolved against.
+        """
+        self.mapping = mapping
+        self.conditions = conditions
+        self.target: str = mapping.get("target", "")
+        self.target_name: str = self.target.split(".")[-1]
+        self.subfields: List[str] = mapping.get("subfield") or []
+        self.custom_delimiters = compile_custom_delimiters(
+            self.subfields, mapping.get("subFieldDelimiter")
+        )
+        rule = next(iter(mapping.get("rules") or []), {})
+        condition = next(iter(rule.get("conditions") or []), None)
+        self.has_conditions = condition is not None
+        self.condition_functions: List[Tuple[str, Optional[Callable]]] = []
+        self.parameter: dict = {}
+        if condition is not None:
+            self.parameter = condition.get("parameter", {})
+            self.condition_functions = [
+                (condition_type, resolve_condition(conditions, condition_type))
+                for condition_type in map(str.strip, condition.get("type", "").split(","))
+            ]
+        self.values_to_add: Optional[list] = None
+        if value := rule.get("value", ""):
+            # Avoid bool("false") == True
+            if value == "true":
+                self.values_to_add = [True]
+            elif value == "false":
+                self.values_to_add = [False]
+            else:
+                self.values_to_add = [value]
+        self.apply_rules_on_concatenated_data = bool(
+            mapping.get("applyRulesOnConcatenatedData", "")
+        )
+        self.split_subfields = bool(mapping.get("subFieldSplit", ""))
+        self.ignore_subsequent_subfields = bool(mapping.get("ignoreSubsequentSubfields", False))
+        entity = mapping.get("entity") or []
+        indicators = next((x["indicators"] for x in entity if "indicators" in x), None)
+        self.entity_indicators: Optional[Tuple[str, str]] = (
+            (indicators["ind1"], indicators["ind2"]) if indicators else None
+        )
+        self.entity_mappings: List[dict] = [x for x in entity if "indicators" not in x]
+        self.entity_parent: str = (
+            self.entity_mappings[0]["target"].split(".")[0] if self.entity_mappings else ""
+        )
+        self.entity_per_repeated_subfield = bool(mapping.get("entityPerRepeatedSubfield", False))
+
+    def entity_indicators_match(self, marc_field: Field) -> bool:
+        """Check if the entity mapping indicators match the MARC field indicators.
+
+        Entity mappings can limit the fields they are applied to by specifying indicator
+        values that must match the MARC field's indicators. Entity mappings that do not
+        specify any indicator values match all MARC fields. Indicator values can be a
+        specific value or a wildcard "*".
+
+        Args:
+            marc_field (Field): The MARC field to map.
+
+        Returns:
+            bool: True if the indicators match, False otherwise.
+        """
+        if self.entity_indicators is None:
+            return True
+        ind1, ind2 = self.entity_indicators
+        return ind1 in ("*", marc_field.indicator1) and ind2 in ("*", marc_field.indicator2)
+
+
+class TargetPathStep(object):
+    """One level of a dotted target path, with the schema lookups done in advance."""
+
+    __slots__ = [
+        "name",
+        "schema_property",
+        "is_array_of_strings",
+        "is_array_of_objects",
+        "is_string",
+        "item_property_count",
+    ]
+
+    def __init__(self, name: str, schema_property: dict):
+        """Initialize a step of a target path.
+
+        Args:
+            name (str): The property name at this level of the path.
+            schema_property (dict): The schema of the property.
+        """
+        self.name = name
+        self.schema_property = schema_property
+        is_array = schema_property.get("type", "string") == "array"
+        items = schema_property.get("items", {}) if is_array else {}
+        self.is_array_of_strings = is_array and items.get("type") == "string"
+        self.is_array_of_objects = is_array and items.get("type") == "object"
+        self.is_string = schema_property.get("type", "string") == "string"
+        self.item_property_count = len(items.get("properties", {}))
+
+
+def compile_target_path(schema: dict, target_string: str) -> List[TargetPathStep]:
+    """Resolve each level of a dotted target path against the schema.
+
+    Args:
+        schema (dict): The JSON schema of the FOLIO record.
+        target_string (str): The dotted target path, for example "identifiers.value".
+
+    Returns:
+        List[TargetPathStep]: The levels of the path, outermost first.
+    """
+    steps: List[TargetPathStep] = []
+    schema_parent = None
+    schema_property = schema["properties"]
+    for name in target_string.split("."):
+        if name in schema_property:
+            schema_property = schema_property[name]
+        else:
+            schema_property = schema_parent["items"]["properties"][name]
+        steps.append(TargetPathStep(name, schema_property))
+        schema_parent = schema_property
+    return steps
+
+
+def compile_custom_delimiters(
+    subfields: List[str], custom_delimiters: Optional[List[Dict]]
+) -> List[Tuple[str, List[str]]]:
+    """Group the subfields of a mapping by the custom delimiter that joins them.
+
+    Args:
+        subfields (List[str]): The subfields of the mapping.
+        custom_delimiters (Optional[List[Dict]]): The subFieldDelimiter setting.
+
+    Returns:
+        List[Tuple[str, List[str]]]: The delimiter and subfields of each group, in the
+            order of the custom delimiters.
+    """
+    if not subfields or not custom_delimiters:
+        return []
+    delimiter_map = dict.fromkeys(subfields, " ")
+    for custom_delimiter in custom_delimiters:
+        delimiter_map.update(
+            dict.fromkeys(custom_delimiter["subfields"], custom_delimiter["value"])
+        )
+    return [
+        (
+            custom_delimiter["value"],
+            [
+                subfield
+                for subfield in subfields
+                if custom_delimiter["subfields"]
+                and delimiter_map[subfield] == custom_delimiter["value"]
+            ],
+        )
+        for custom_delimiter in custom_delimiters
+    ]
+
+
+def resolve_condition(conditions, condition_type: str) -> Optional[Callable]:
+    """Look up the function of a condition type, or None if there is none."""
+    return getattr(conditions, f"condition_{condition_type}", None)
@@ -9,6 +9,7 @@ when transformation rules should be applied.
 import logging
 import re
 import traceback
+from functools import lru_cache
 
 import i18n
 from folioclient import FolioClient
@@ -27,6 +28,26 @@ from folio_migration_tools.marc_rules_transformation.rules_mapper_base import (
 
 logger = logging.getLogger(__name__)
 
+# Bound on the memoized results of pure functions of a subfield value
+CONDITION_CACHE_SIZE = 8192
+NON_ALPHANUMERIC = re.compile(r"[^A-Za-z0-9 ]+")
+ENDS_WITH_INITIAL = re.compile(r"^(.*?)\s.[.]$")
+ENDS_WITH_INITIAL_AND_COMMA = re.compile(r"^(.*?)\s.,[.]$")
+INDEX_TITLE_TRAILING_CHARS = re.compile(r"[\s:\/]{0,3}$")
+NONFILING_CHARACTER_INDICATORS = frozenset(map(str, range(1, 9)))
+
+
+@lru_cache(maxsize=CONDITION_CACHE_SIZE)
+def normalize_term(term: str) -> str:
+    """Strip a relator term or code of whitespace and anything but letters and digits."""
+    return NON_ALPHANUMERIC.sub("", term.strip())
+
+
+@lru_cache(maxsize=256)
+def compile_pattern(pattern: str) -> re.Pattern:
+    """Compile a regular expression from the mapping rules once."""
+    return re.compile(pattern)
+
 
 class Conditions:
     holdings_type_map = {
@@ -35,6 +56,24 @@ class Conditions:
         "x": "Monograph",
         "y": "Serial",
     }
+    publisher_roles = {
+        "0": "Production",
+        "1": "Publication",
+        "2": "Distribution",
+        "3": "Manufacture",
+        "4": "Copyright notice date",
+    }
+    call_number_types_by_indicator = {
+        "0": "Library of Congress classification",
+        "1": "Dewey Decimal classification",
+        "2": "National Library of Medicine classification",
+        "3": "Superintendent of Documents classification",
+        "4": "Shelving control number",
+        "5": "Title",
+        "6": "Shelved separately",
+        "7": "Source specified in subfield $2",
+        "8": "Other scheme",
+    }
 
     def __init__(
         self,
@@ -61,6 +100,8 @@ class Conditions:
         self.default_contributor_type: dict = {}
         self.mapper: RulesMapperBase = mapper
         self.ref_data_dicts = {}
+        self.identifier_types_by_parameter: dict = {}
+        self.subject_sources: list | None = None
         if object_type == "bibs":
             self.setup_reference_data_for_all()
             self.setup_reference_data_for_bibs()
@@ -99,6 +140,27 @@ class Conditions:
             if ct["code"] == "ctb"  # type: ignore
         )
         logger.info("Contributor type:\t%s", self.default_contributor_type["id"])
+        self.contributor_type_names = self.index_contributor_type_names(
+            self.folio.contributor_types
+        )
+
+    @staticmethod
+    def index_contributor_type_names(contributor_types) -> dict:
+        """Index contributor type names by code and by name.
+
+        When a code or name occurs in more than one contributor type, the first wins.
+
+        Args:
+            contributor_types (list): The contributor types from FOLIO.
+
+        Returns:
+            dict: The name of the contributor type for each code and name.
+        """
+        contributor_type_names: dict = {}
+        for contributor_type in contributor_types:
+            contributor_type_names.setdefault(contributor_type["code"], contributor_type["name"])
+            contributor_type_names.setdefault(contributor_type["name"], contributor_type["name"])
+        return contributor_type_names
 
     def setup_reference_data_for_items_and_holdings(self, default_call_number_type_name):
         logger.info(f"{len(self.folio.locations)}\tlocations")  # type: ignore
@@ -168,14 +230,11 @@ class Conditions:
     def get_condition(
         self, name, legacy_id, value, parameter=None, marc_field: field.Field | None = None
     ):
-        try:
-            return self.condition_cache.get(name)(legacy_id, value, parameter, marc_field)  # type: ignore
-        # Exception should only handle the missing condition from the cache.
-        # All other exceptions should propagate up
-        except Exception:
-            attr = getattr(self, "condition_" + str(name))
-            self.condition_cache[name] = attr
-            return attr(legacy_id, value, parameter, marc_field)
+        condition = self.condition_cache.get(name)
+        if condition is None:
+            condition = getattr(self, "condition_" + str(name))
+            self.condition_cache[name] = condition
+        return condition(legacy_id, value, parameter, marc_field)
 
     def condition_trim_punctuation(self, legacy_id, value, parameter, marc_field: field.Field):
         """Strip whitespace and trailing punctuation, preserving initials and hyphens.
@@ -184,12 +243,10 @@ class Conditions:
         the period is preceded by a single alpha character (eg. "John D.").
         Also preserves any trailing "-" (eg. "1981-"). Introduced in Poppy.
         """
-        pattern1 = re.compile(r"^(.*?)\s.[.]$")
-        pattern2 = re.compile(r"^(.*?)\s.,[.]$")
         value = value.strip()
-        if pattern1.match(value) or value.endswith("-"):
+        if ENDS_WITH_INITIAL.match(value) or value.endswith("-"):
             return value
-        elif pattern2.match(value):
+        elif ENDS_WITH_INITIAL_AND_COMMA.match(value):
             return value.rstrip(",")
         elif value.endswith(".") or value.endswith(","):
             return value[:-1]
@@ -206,7 +263,7 @@ class Conditions:
     ):
         contributor_code_subfield = parameter.get("contributorCodeSubfield", "4")
         for subfield in marc_field.get_subfields(contributor_code_subfield):
-            normalized_subfield = re.sub(r"[^A-Za-z0-9 ]+", "", subfield.strip())
+            normalized_subfield = normalize_term(subfield)
             t = self.get_ref_data_tuple_by_code(
                 self.folio.contributor_types, "contrib_types_c", normalized_subfield
             )
@@ -239,7 +296,7 @@ class Conditions:
         fallback_name_field = "j" if marc_field.tag in ["111", "711"] else "e"
         contributor_name_subfield = parameter.get("contributorNameSubfield", fallback_name_field)
         for subfield in marc_field.get_subfields(contributor_name_subfield):
-            normalized_subfield = re.sub(r"[^A-Za-z0-9 ]+", "", subfield.strip())
+            normalized_subfield = normalize_term(subfield)
             t = self.get_ref_data_tuple_by_name(
                 self.folio.contributor_types, "contrib_types_n", normalized_subfield
             )
@@ -334,12 +391,11 @@ class Conditions:
     ):
         """Returns the index title according to the rules."""
         ind2 = marc_field.indicator2
-        reg_str = r"[\s:\/]{0,3}$"
-        if ind2 not in map(str, range(1, 9)):
-            return re.sub(reg_str, "", value)
+        if ind2 not in NONFILING_CHARACTER_INDICATORS:
+            return INDEX_TITLE_TRAILING_CHARS.sub("", value)
 
         num_take = int(ind2)
-        return re.sub(reg_str, "", value[num_take:])
+        return INDEX_TITLE_TRAILING_CHARS.sub("", value[num_take:])
 
     def condition_capitalize(self, legacy_id, value, parameter, marc_field: field.Field):
         return value.capitalize()
@@ -352,14 +408,7 @@ class Conditions:
         return ""
 
     def condition_set_publisher_role(self, legacy_id, value, parameter, marc_field: field.Field):
-        roles = {
-            "0": "Production",
-            "1": "Publication",
-            "2": "Distribution",
-            "3": "Manufacture",
-            "4": "Copyright notice date",
-        }
-        role = roles.get(marc_field.indicator2, "")
+        role = self.publisher_roles.get(marc_field.indicator2, "")
         self.mapper.migration_report.add(
             "MappedPublisherRoleFromIndicator2",
             f"{marc_field.tag} ind2 {marc_field.indicator2}->{role}",
@@ -370,7 +419,7 @@ class Conditions:
         self, legacy_id, value, parameter, marc_field: field.Field
     ):
         if "oclc_regex" in parameter:
-            if re.match(parameter["oclc_regex"], value):
+            if compile_pattern(parameter["oclc_regex"]).match(value):
                 t = self.get_ref_data_tuple_by_name(
                     self.folio.identifier_types,
                     "identifier_types",
@@ -386,17 +435,22 @@ class Conditions:
                 "MappedIdentifierTypes", f"{marc_field.tag} -> {t[1]}"
             )
             return t[0]
-        identifier_type: dict | None = next(
-            (
-                f
-                for f in self.folio.identifier_types  # type: ignore
-                if (
-                    f["name"] in parameter.get("names", "non existant")
-                    or f["name"] in parameter.get("name", "non existant")
-                )
-            ),
-            None,
+        names = parameter.get("names", "non existant")
+        name = parameter.get("name", "non existant")
+        parameter_key = (
+            tuple(names) if isinstance(names, list) else names,
+            tuple(name) if isinstance(name, list) else name,
         )
+        if parameter_key not in self.identifier_types_by_parameter:
+            self.identifier_types_by_parameter[parameter_key] = next(
+                (
+                    f
+                    for f in self.folio.identifier_types  # type: ignore
+                    if (f["name"] in names or f["name"] in name)
+                ),
+                None,
+            )
+        identifier_type: dict | None = self.identifier_types_by_parameter[parameter_key]
         if identifier_type is None:
             raise TransformationFieldMappingError(
                 legacy_id,
@@ -515,7 +569,7 @@ class Conditions:
         self, legacy_id, value, parameter, marc_field: field.Field
     ):
         for subfield in marc_field.get_subfields("4"):
-            normalized_subfield = re.sub(r"[^A-Za-z0-9 ]+", "", subfield.strip())
+            normalized_subfield = normalize_term(subfield)
             t = self.get_ref_data_tuple_by_code(
                 self.folio.contributor_types, "contrib_types_c", normalized_subfield
             )
@@ -548,7 +602,7 @@ class Conditions:
                 return t[0]
         subfield_code = "j" if marc_field.tag in ["111", "711"] else "e"
         for subfield in marc_field.get_subfields(subfield_code):
-            normalized_subfield = re.sub(r"[^A-Za-z0-9 ]+", "", subfield.strip())
+            normalized_subfield = normalize_term(subfield)
             t = self.get_ref_data_tuple_by_name(
                 self.folio.contributor_types, "contrib_types_n", normalized_subfield
             )
@@ -600,18 +654,6 @@ class Conditions:
     def condition_set_call_number_type_id(
         self, legacy_id, value, parameter, marc_field: field.Field
     ):
-        first_level_map = {
-            "0": "Library of Congress classification",
-            "1": "Dewey Decimal classification",
-            "2": "National Library of Medicine classification",
-            "3": "Superintendent of Documents classification",
-            "4": "Shelving control number",
-            "5": "Title",
-            "6": "Shelved separately",
-            "7": "Source specified in subfield $2",
-            "8": "Other scheme",
-        }
-
         # CallNumber type specified in $2. This needs further mapping
         if marc_field.indicator1 == "7" and "2" in marc_field:
             self.mapper.migration_report.add(
@@ -621,7 +663,9 @@ class Conditions:
             return self.default_call_number_type["id"]
 
         # Normal way. Type in ind1
-        call_number_type_name_temp = first_level_map.get(marc_field.indicator1, "")
+        call_number_type_name_temp = self.call_number_types_by_indicator.get(
+            marc_field.indicator1, ""
+        )
         if not call_number_type_name_temp:
             self.mapper.migration_report.add(
                 "CallNumberTypeMapping",
@@ -659,10 +703,8 @@ class Conditions:
         self, legacy_id, value, parameter, marc_field: field.Field
     ):
         for subfield in marc_field.get_subfields("4", "e"):
-            normalized_subfield = re.sub(r"[^A-Za-z0-9 ]+", "", subfield.strip())
-            for cont_type in self.folio.contributor_types:  # type: ignore
-                if normalized_subfield in [cont_type["code"], cont_type["name"]]:
-                    return cont_type["name"]
+            if name := self.contributor_type_names.get(normalize_term(subfield)):
+                return name
         try:
             return value
         except IndexError:
@@ -756,15 +798,21 @@ class Conditions:
 
     def get_ref_data_tuple(self, ref_data, ref_name, key_value, key_type):
         dict_key = f"{ref_name}{key_type}"
-        # Try get the object from the cache
-        ref_object = self.ref_data_dicts.get(dict_key, {}).get(key_value.lower(), ())
-        if ref_object:
-            return ref_object
-
-        # No cache, we need to add it to the cache.
-        d = {r[key_type].lower(): (r["id"], r["name"]) for r in ref_data}
-        self.ref_data_dicts[dict_key] = d
-        return self.ref_data_dicts.get(dict_key, {}).get(key_value.lower(), ())
+        # The index of each kind of reference data is built on first use,
+        # and misses are answered from it as well
+        index = self.ref_data_dicts.get(dict_key)
+        if index is None:
+            index = {r[key_type].lower(): (r["id"], r["name"]) for r in ref_data}
+            self.ref_data_dicts[dict_key] = index
+        return index.get(key_value.lower(), ())
+
+    def get_subject_sources(self) -> list:
+        """Fetch the subject sources from FOLIO the first time they are needed."""
+        if self.subject_sources is None:
+            self.subject_sources = list(
+                self.folio.folio_get_all("/subject-sources", "subjectSources")
+            )
+        return self.subject_sources
 
     def condition_remove_substring(self, legacy_id, value, parameter, marc_field: field.Field):
         return value.replace(parameter["substring"], "")
@@ -862,7 +910,7 @@ class Conditions:
     ):
         try:
             t = self.get_ref_data_tuple_by_name(
-                self.folio.folio_get_all("/subject-sources", "subjectSources"),
+                self.get_subject_sources(),
                 "subject_sources",
                 parameter["name"],
             )
@@ -879,7 +927,7 @@ class Conditions:
     ):
         try:
             t = self.get_ref_data_tuple_by_code(
-                self.folio.folio_get_all("/subject-sources", "subjectSources"),
+                self.get_subject_sources(),
                 "subject_sources",
                 value,
             )
@@ -0,0 +1,135 @@
+"""Reservation of HRID number ranges shared between tasks and processes.
+
+The HRID settings in FOLIO are only updated when a transformation is done. Tasks that
+run at the same time, or a task run after one that crashed, would therefore start
+from the same numbers. HridAllocator hands out blocks of numbers for each HRID
+namespace (instances, holdings, items) and records the end of the highest block
+given out in a small JSON file, before the numbers are used. Every task and worker
+process using the same file gets blocks of its own.
+
+The file lives in the results folder of the iteration. Delete it to start over from
+the HRID settings in FOLIO.
+"""
+
+import json
+import logging
+import os
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator
+
+logger = logging.getLogger(__name__)
+
+try:
+    import fcntl
+
+    def _lock(lock_file):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+
+    def _unlock(lock_file):
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+
+except ImportError:
+    import msvcrt
+
+    def _lock(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+
+    def _unlock(lock_file):
+        lock_file.seek(0)
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+HRID_RESERVATIONS_FILE_NAME = "hrid_reservations.json"
+
+
+class HridAllocator:
+    def __init__(self, path: Path):
+        """Initialize the allocator.
+
+        Args:
+            path (Path): The file recording the numbers given out so far.
+        """
+        self.path = Path(path)
+        self.lock_path = self.path.with_name(f"{self.path.name}.lock")
+
+    def reserve(self, namespace: str, count: int, start_number: int) -> int:
+        """Reserve a block of HRID numbers.
+
+        The block starts at start_number, or after the highest number reserved so far,
+        whichever is higher.
+
+        Args:
+            namespace (str): The HRID settings namespace, like "instances".
+            count (int): The number of HRIDs to reserve.
+            start_number (int): The lowest number the block may start at.
+
+        Returns:
+            int: The first number of the block.
+        """
+        with self.locked() as high_water_marks:
+            start = max(high_water_marks.get(namespace, 0), start_number)
+            high_water_marks[namespace] = start + count
+        logger.debug("Reserved %s %s HRIDs from %s", count, namespace, start)
+        return start
+
+    def release(self, namespace: str, start: int, end: int):
+        """Give back the unused end of a block, if no later block has been reserved.
+
+        Args:
+            namespace (str): The HRID settings namespace.
+            start (int): The first unused number of the block.
+            end (int): The number just after the block.
+        """
+        with self.locked() as high_water_marks:
+            if high_water_marks.get(namespace) == end:
+                high_water_marks[namespace] = start
+
+    def reset(self, namespace: str, number: int):
+        """Start handing out the HRIDs of a namespace from number again.
+
+        Args:
+            namespace (str): The HRID settings namespace.
+            number (int): The number to start from.
+        """
+        with self.locked() as high_water_marks:
+            high_water_marks[namespace] = number
+
+    def high_water_mark(self, namespace: str) -> int:
+        """The number just after the highest reserved HRID of a namespace, or 0.
+
+        Args:
+            namespace (str): The HRID settings namespace.
+        """
+        with self.locked() as high_water_marks:
+            return high_water_marks.get(namespace, 0)
+
+    @contextmanager
+    def locked(self) -> Iterator[Dict[str, int]]:
+        """Lock the reservations and yield them. Changes are written back atomically."""
+        with open(self.lock_path, "a+") as lock_file:
+            _lock(lock_file)
+            try:
+                high_water_marks = self._read()
+                original = dict(high_water_marks)
+                yield high_water_marks
+                if high_water_marks != original:
+                    self._write(high_water_marks)
+            finally:
+                _unlock(lock_file)
+
+    def _read(self) -> Dict[str, int]:
+        try:
+            with open(self.path) as reservations_file:
+                return json.load(reservations_file)
+        except FileNotFoundError:
+            return {}
+
+    def _write(self, high_water_marks: Dict[str, int]):
+        temp_path = self.path.with_name(f"{self.path.name}.tmp")
+        with open(temp_path, "w") as reservations_file:
+            json.dump(high_water_marks, reservations_file)
+            reservations_file.flush()
+            os.fsync(reservations_file.fileno())
+        os.replace(temp_path, self.path)
@@ -7,9 +7,8 @@ Handles creation of 035 fields from previous 001/003 combinations.
 
 import json
 import logging
-from typing import Set
+from typing import Dict, Optional, Set
 
-import httpx
 import i18n
 from folio_uuid import FOLIONamespaces
 from folioclient import FolioClient
@@ -18,10 +17,25 @@ from pymarc import Field, Record, Subfield
 from folio_migration_tools.custom_exceptions import TransformationProcessError
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.library_configuration import HridHandling
+from folio_migration_tools.marc_rules_transformation.hrid_allocator import HridAllocator
 from folio_migration_tools.migration_report import MigrationReport
 
 logger = logging.getLogger(__name__)
 
+# Number of HRIDs reserved at a time when an HridAllocator is used
+HRID_BLOCK_SIZE = 1000
+# The HRID settings namespaces and the handler attributes holding their counters
+HRID_COUNTERS = {
+    "instances": "instance_hrid_counter",
+    "holdings": "holdings_hrid_counter",
+    "items": "items_hrid_counter",
+}
+HRID_SETTINGS_NAMESPACES = {
+    FOLIONamespaces.instances: "instances",
+    FOLIONamespaces.holdings: "holdings",
+    FOLIONamespaces.items: "items",
+}
+
 
 class HRIDHandler:
     def __init__(
@@ -53,6 +67,9 @@ class HRIDHandler:
         self.items_hrid_prefix = self.hrid_settings["items"].get("prefix", "")
         self.items_hrid_counter = self.hrid_settings["items"]["startNumber"]
         self.common_retain_leading_zeroes: bool = self.hrid_settings["commonRetainLeadingZeroes"]
+        # Set to reserve the HRIDs in blocks, see reserve_hrids
+        self.allocator: Optional[HridAllocator] = None
+        self.hrid_block_ends: Dict[str, int] = {}
         logger.info(f"HRID handling is set to: '{self.handling}'")
 
     def handle_hrid(
@@ -99,6 +116,8 @@ class HRIDHandler:
         return self.handling == HridHandling.default or "001" not in marc_record
 
     def get_next_hrid(self, namespace: FOLIONamespaces):
+        if self.allocator is not None:
+            self.reserve_hrids(namespace, 1)
         hrid = ""
         if namespace == FOLIONamespaces.instances:
             hrid = (
@@ -116,6 +135,40 @@ class HRIDHandler:
             raise TransformationProcessError("", "Unimplemented namespace")
         return hrid
 
+    def reserve_hrids(self, namespace: FOLIONamespaces, count: int):
+        """Make sure the next count HRIDs of a namespace are reserved for this handler.
+
+        If they are not, a new block of at least HRID_BLOCK_SIZE HRIDs is reserved
+        from the allocator and the counter moves to its start. Does nothing when
+        no allocator is set.
+
+        Args:
+            namespace (FOLIONamespaces): The type of record the HRIDs are for.
+            count (int): The number of HRIDs that will be needed.
+        """
+        if self.allocator is None or count <= 0:
+            return
+        settings_namespace = HRID_SETTINGS_NAMESPACES[namespace]
+        counter_attribute = HRID_COUNTERS[settings_namespace]
+        counter = getattr(self, counter_attribute)
+        if counter + count <= self.hrid_block_ends.get(settings_namespace, 0):
+            return
+        block_size = max(count, HRID_BLOCK_SIZE)
+        start = self.allocator.reserve(settings_namespace, block_size, counter)
+        setattr(self, counter_attribute, start)
+        self.hrid_block_ends[settings_namespace] = start + block_size
+        logger.info("Reserved %s %s HRIDs starting at %s", block_size, settings_namespace, start)
+
+    def release_unused_hrids(self):
+        """Give the unused ends of the reserved HRID blocks back to the allocator."""
+        if self.allocator is None:
+            return
+        for settings_namespace, block_end in self.hrid_block_ends.items():
+            counter = getattr(self, HRID_COUNTERS[settings_namespace])
+            if counter < block_end:
+                self.allocator.release(settings_namespace, counter, block_end)
+        self.hrid_block_ends = {}
+
     def generate_numeric_part(self, counter):
         return str(counter).zfill(11) if self.common_retain_leading_zeroes else str(counter)
 
@@ -168,23 +221,33 @@ class HRIDHandler:
         )
 
     def store_hrid_settings(self):
+        """Update the HRID settings in FOLIO with the counters of this handler.
+
+        Only the namespaces whose counters this handler changed are updated, on top of
+        the current settings in FOLIO, so that tasks running at the same time do not
+        overwrite each other's counters. With an allocator, the start numbers are
+        set past every HRID reserved so far.
+        """
         logger.info("Setting HRID counter to current")
+        self.release_unused_hrids()
         try:
             if self.hrids_not_updated():
                 logger.info("NOT POSTing HRID settings, since did not change.")
                 return
 
-            self.hrid_settings["instances"]["startNumber"] = self.instance_hrid_counter
-            self.hrid_settings["holdings"]["startNumber"] = self.holdings_hrid_counter
-            self.hrid_settings["items"]["startNumber"] = self.items_hrid_counter
-            url = self.folio_client.gateway_url + self.hrid_path
-            resp = httpx.put(
-                url,
-                json=self.hrid_settings,
-                headers=self.folio_client.okapi_headers,
-            )
-            resp.raise_for_status()
-            logger.info("%s Successfully set HRID settings.", resp.status_code)
+            current_settings = self.folio_client.folio_get_single_object(self.hrid_path)
+            for settings_namespace, counter_attribute in HRID_COUNTERS.items():
+                start_number = getattr(self, counter_attribute)
+                if start_number == self.hrid_settings[settings_namespace]["startNumber"]:
+                    continue
+                if self.allocator is not None:
+                    start_number = max(
+                        start_number, self.allocator.high_water_mark(settings_namespace)
+                    )
+                current_settings[settings_namespace]["startNumber"] = start_number
+            self.hrid_settings = current_settings
+            self.folio_client.folio_put(self.hrid_path, self.hrid_settings)
+            logger.info("Successfully set HRID settings.")
             a = self.folio_client.folio_get_single_object(self.hrid_path)
             logger.info("Current hrid settings: %s", json.dumps(a, indent=4))
         except Exception:
@@ -193,9 +256,15 @@ class HRIDHandler:
                 f"Update them manually. {json.dumps(self.hrid_settings)}"
             )
 
+    def reset_allocator(self, settings_namespace: str):
+        if self.allocator is not None:
+            self.allocator.reset(settings_namespace, 1)
+            self.hrid_block_ends.pop(settings_namespace, None)
+
     def reset_instance_hrid_counter(self):
         logger.info("Resetting Instances HRID settings to 1")
         self.instance_hrid_counter = 1
+        self.reset_allocator("instances")
         self.migration_report.set(
             "GeneralStatistics",
             i18n.t("Instances HRID starting number"),
@@ -206,6 +275,7 @@ class HRIDHandler:
     def reset_holdings_hrid_counter(self):
         logger.info("Resetting Holdings HRID settings to 1")
         self.holdings_hrid_counter = 1
+        self.reset_allocator("holdings")
         self.migration_report.set(
             "GeneralStatistics", "Holdings HRID starting number", self.holdings_hrid_counter
         )
@@ -214,6 +284,7 @@ class HRIDHandler:
     def reset_item_hrid_counter(self):
         logger.info("Resetting Items HRID settings to 1")
         self.items_hrid_counter = 1
+        self.reset_allocator("items")
         self.migration_report.set(
             "GeneralStatistics", "Items HRID starting number", self.items_hrid_counter
         )
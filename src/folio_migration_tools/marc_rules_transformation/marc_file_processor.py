@@ -5,11 +5,14 @@ Handles record reading, validation, transformation via rules mappers, and output
 writing. Manages error handling, progress reporting, and batch processing.
 """
 
+import json
 import logging
 import os
 import sys
 import time
 import traceback
+from contextlib import ExitStack
+from pathlib import Path
 from typing import BinaryIO, Dict, List, Set, TextIO
 
 import i18n
@@ -22,11 +25,13 @@ from folio_migration_tools.custom_exceptions import (
 )
 from folio_migration_tools.folder_structure import FolderStructure
 from folio_migration_tools.helper import Helper
+from folio_migration_tools.id_map_index import map_column
 from folio_migration_tools.library_configuration import FileDefinition, HridHandling
 from folio_migration_tools.marc_rules_transformation.rules_mapper_base import (
     RulesMapperBase,
 )
 from folio_migration_tools.migration_report import MigrationReport
+from folio_migration_tools.record_writer import RecordWriter
 
 logger = logging.getLogger(__name__)
 
@@ -55,7 +60,7 @@ class MarcFileProcessor:
         if mapper.create_source_records and any(
             x.create_source_records for x in mapper.task_configuration.files
         ):
-            self.srs_records_file: TextIO = open(self.folder_structure.srs_records_path, "w+")
+            self.srs_records_file: TextIO = self.open_srs_records_file()
         if getattr(mapper.task_configuration, "data_import_marc", False):
             self.data_import_marc_file: BinaryIO = open(
                 self.folder_structure.data_import_marc_path, "wb+"
@@ -67,9 +72,18 @@ class MarcFileProcessor:
         self.legacy_ids: Set[str] = set()
         if self.object_type == FOLIONamespaces.holdings and self.mapper.create_source_records:
             logger.info("Loading Parent HRID map for SRS creation")
-            self.parent_hrids = {entity[1]: entity[2] for entity in mapper.parent_id_map.values()}
+            self.parent_hrids = map_column(mapper.parent_id_map, 1, 2)
 
-    def process_record(self, idx: int, marc_record: Record, file_def: FileDefinition):
+    def open_srs_records_file(self) -> TextIO:
+        """Open the SRS records file, written like the created objects file."""
+        return RecordWriter(
+            self.folder_structure.srs_records_path,
+            self.mapper.library_configuration.output_compression,
+        )
+
+    def process_record(
+        self, idx: int, marc_record: Record, file_def: FileDefinition
+    ) -> List[Dict]:
         """Processes a marc holdings record and saves it.
 
         Args:
@@ -80,6 +94,9 @@ class MarcFileProcessor:
         Raises:
             TransformationProcessError: _description_
             TransformationRecordFailedError: _description_
+
+        Returns:
+            List[Dict]: The FOLIO records written
         """
         success = True
         folio_recs = []
@@ -146,6 +163,7 @@ class MarcFileProcessor:
                 remove_from_id_map = getattr(self.mapper, "remove_from_id_map", None)
                 if callable(remove_from_id_map) and ids_added_to_map:
                     self.mapper.remove_from_id_map(ids_added_to_map)
+        return folio_recs
 
     def save_marc_record(
         self,
@@ -292,10 +310,10 @@ class MarcFileProcessor:
                 self.mapper.mapped_legacy_fields,
             )
         if hasattr(self, "srs_records_file"):
-            self.srs_records_file.seek(0)
-            if not self.srs_records_file.seek(0):
-                os.remove(self.srs_records_file.name)
+            srs_records_written = self.srs_records_file.tell()
             self.srs_records_file.close()
+            if not srs_records_written:
+                os.remove(self.srs_records_file.name)
         if hasattr(self, "data_import_marc_file"):
             self.data_import_marc_file.seek(0)
             if not self.data_import_marc_file.read(1):
@@ -310,6 +328,100 @@ class MarcFileProcessor:
         logger.info("Transformation report written to %s", report_file.name)
         logger.info("Processor is done.")
 
+    def append_shard(
+        self,
+        manifest_path: Path,
+        created_objects_path: Path,
+        srs_records_path: Path,
+        data_import_marc_path: Path,
+    ):
+        """Append the records a worker transformed from a shard of a file to the outputs.
+
+        Goes through the manifest written by the MarcShardFileProcessor of the worker.
+        Legacy ids are only checked for duplicates within a shard by the workers, so a
+        record whose legacy ids were all used by an earlier shard is failed here, the
+        way a sequential run would have failed it. For the other records, the legacy
+        ids not seen before are added to the id map. The part files are removed.
+
+        Args:
+            manifest_path (Path): The manifest of the shard.
+            created_objects_path (Path): The FOLIO records written by the worker.
+            srs_records_path (Path): The SRS records written by the worker.
+            data_import_marc_path (Path): The Data Import MARC records written by the worker.
+        """
+        part_paths = [created_objects_path, srs_records_path, data_import_marc_path]
+        outputs = [
+            self.created_objects_file,
+            getattr(self, "srs_records_file", None),
+            getattr(self, "data_import_marc_file", None),
+        ]
+        with ExitStack() as stack:
+            manifest = stack.enter_context(open(manifest_path))
+            parts = [
+                stack.enter_context(open(part_path, "rb")) if part_path.is_file() else None
+                for part_path in part_paths
+            ]
+            for line in manifest:
+                id_map_entries, num_objects, *sizes = json.loads(line)
+                chunks = [
+                    part.read(size) if size else b""
+                    for part, size in zip(parts, sizes, strict=True)
+                ]
+                new_id_map_entries = [
+                    (legacy_id, entry)
+                    for legacy_id, entry in id_map_entries
+                    if legacy_id not in self.legacy_ids
+                ]
+                for _ in range(len(id_map_entries) - len(new_id_map_entries)):
+                    self.mapper.migration_report.add_general_statistics(
+                        i18n.t("Duplicate MARC record identifiers ")
+                    )
+                if not new_id_map_entries:
+                    self.fail_duplicate_shard_record(
+                        [legacy_id for legacy_id, _ in id_map_entries], num_objects, sizes[1]
+                    )
+                    continue
+                for legacy_id, entry in new_id_map_entries:
+                    self.legacy_ids.add(legacy_id)
+                    self.mapper.id_map[legacy_id] = tuple(entry)
+                for output, chunk in zip(outputs, chunks, strict=True):
+                    if chunk:
+                        output.write(
+                            chunk if "b" in output.mode else chunk.decode(output.encoding)
+                        )
+        for part_path in [manifest_path, *part_paths]:
+            if part_path.is_file():
+                os.remove(part_path)
+
+    def fail_duplicate_shard_record(
+        self, legacy_ids: List[str], num_objects: int, srs_records_size: int
+    ):
+        """Fail a record from a shard whose legacy ids were all used by an earlier shard.
+
+        Args:
+            legacy_ids (List[str]): The legacy ids of the record.
+            num_objects (int): Number of FOLIO records the worker wrote for the record.
+            srs_records_size (int): Size of the SRS record the worker wrote, if any.
+        """
+        migration_report = self.mapper.migration_report
+        migration_report.add_general_statistics(
+            i18n.t("Failed records. No unique record identifiers in legacy record")
+        )
+        migration_report.add_general_statistics(
+            i18n.t("Records that failed transformation. Check log for details")
+        )
+        migration_report.add(
+            "GeneralStatistics", i18n.t("Inventory records written to disk"), -num_objects
+        )
+        if srs_records_size:
+            migration_report.add("GeneralStatistics", i18n.t("SRS records written to disk"), -1)
+        self.failed_records_count += 1
+        TransformationRecordFailedError(
+            "-".join(legacy_ids),
+            "Duplicate recod identifier(s). See logs. Record Failed",
+            "-".join(legacy_ids),
+        ).log_it()
+
     def add_legacy_ids_to_map(self, folio_rec: Dict, filtered_legacy_ids: List[str]) -> List[str]:
         """Add legacy IDs to the mapper's ID map.
 
@@ -338,3 +450,79 @@ class MarcFileProcessor:
                     ",".join(filtered_legacy_ids),
                 )
         return added
+
+
+class MarcShardFileProcessor(MarcFileProcessor):
+    """Processes the records of one shard of a MARC file in a worker process.
+
+    Besides the outputs of a MarcFileProcessor, it writes a manifest with a line per
+    record written: the id map entries added for the record, and the number of FOLIO
+    records and bytes written to each output. The parent process merges the outputs
+    of the shards with MarcFileProcessor.append_shard.
+    """
+
+    def __init__(
+        self,
+        mapper: RulesMapperBase,
+        folder_structure: FolderStructure,
+        created_objects_file: TextIO,
+        manifest_file: TextIO,
+        legacy_ids: Set[str],
+    ):
+        """Initialize the processor.
+
+        Args:
+            mapper (RulesMapperBase): MARC rules mapper for transformations.
+            folder_structure (FolderStructure): Folder structure with the part file paths
+                of the shard.
+            created_objects_file (TextIO): File handle for writing created objects.
+            manifest_file (TextIO): File handle for writing the manifest.
+            legacy_ids (Set[str]): Legacy ids used by earlier files.
+        """
+        super().__init__(mapper, folder_structure, created_objects_file)
+        self.manifest_file: TextIO = manifest_file
+        self.legacy_ids = legacy_ids
+        self.added_legacy_ids: List[str] = []
+
+    def process_record(
+        self, idx: int, marc_record: Record, file_def: FileDefinition
+    ) -> List[Dict]:
+        self.added_legacy_ids = []
+        positions = self.get_output_positions()
+        folio_recs = super().process_record(idx, marc_record, file_def)
+        sizes = [
+            end - start for start, end in zip(positions, self.get_output_positions(), strict=True)
+        ]
+        id_map_entries = [
+            [legacy_id, self.mapper.id_map[legacy_id]] for legacy_id in self.added_legacy_ids
+        ]
+        self.manifest_file.write(json.dumps([id_map_entries, len(folio_recs), *sizes]) + "\n")
+        return folio_recs
+
+    def add_legacy_ids_to_map(self, folio_rec: Dict, filtered_legacy_ids: List[str]) -> List[str]:
+        self.added_legacy_ids = super().add_legacy_ids_to_map(folio_rec, filtered_legacy_ids)
+        return self.added_legacy_ids
+
+    def open_srs_records_file(self) -> TextIO:
+        # The parent copies the part by the sizes in the manifest, so it is not compressed
+        return open(self.folder_structure.srs_records_path, "w+", encoding="utf-8")
+
+    def get_output_positions(self) -> List[int]:
+        return [
+            output.tell() if output else 0
+            for output in (
+                self.created_objects_file,
+                getattr(self, "srs_records_file", None),
+                getattr(self, "data_import_marc_file", None),
+            )
+        ]
+
+    def close(self):
+        """Close the part files opened by the processor."""
+        for attribute in (
+            "failed_records_transformation_file",
+            "srs_records_file",
+            "data_import_marc_file",
+        ):
+            if hasattr(self, attribute):
+                getattr(self, attribute).close()
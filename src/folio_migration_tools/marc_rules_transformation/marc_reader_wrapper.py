@@ -10,21 +10,24 @@ import logging
 import sys
 from contextlib import redirect_stderr
 from io import IOBase, StringIO
-from itertools import count
 from pathlib import Path
 from typing import List
 
 import i18n
 from folio_data_import.marc_preprocessors import MARCPreprocessor
-from pymarc import Leader, MARCReader, Record
+from pymarc import Leader, Record
 
 from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
 )
+from folio_migration_tools.file_sharding import FileShard, MarcFileSharder
 from folio_migration_tools.folder_structure import FolderStructure
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.library_configuration import FileDefinition
+from folio_migration_tools.marc_rules_transformation.buffered_marc_reader import (
+    BufferedMARCReader,
+)
 from folio_migration_tools.marc_rules_transformation.marc_file_processor import (
     MarcFileProcessor,
 )
@@ -168,11 +171,7 @@ class MARCReaderWrapper:
                     folder_structure.legacy_records_folder / file_def.file_name,
                     "rb",
                 ) as marc_file:
-                    reader = MARCReader(
-                        marc_file, to_unicode=True, permissive=True, utf8_handling="strict"
-                    )
-                    reader.hide_utf8_warnings = False
-                    reader.force_utf8 = True
+                    reader = BufferedMARCReader(marc_file)
                     logger.info("Running %s", file_def.file_name)
                     MARCReaderWrapper.read_records(
                         reader, file_def, failed_marc_records_file, processor
@@ -183,88 +182,165 @@ class MARCReaderWrapper:
         except Exception:
             logger.exception("Failure in Main: %s", file_def.file_name, stack_info=True)
 
+    @staticmethod
+    def process_file_shard(
+        file_def: FileDefinition,
+        processor,
+        failed_records_path: Path,
+        sharder: MarcFileSharder,
+        shard: FileShard,
+    ):
+        """Read and process the records of one shard of a MARC file.
+
+        Works like process_single_file, for the worker process handling the shard.
+
+        Args:
+            file_def (FileDefinition): The file the shard is part of.
+            processor (MarcFileProcessor): The processor of the worker.
+            failed_records_path (Path): Where to write records that could not be decoded.
+            sharder (MarcFileSharder): The sharder that split the file.
+            shard (FileShard): The shard to process.
+        """
+        try:
+            with open(failed_records_path, "ab") as failed_marc_records_file:
+                with sharder.open(shard) as marc_file:
+                    reader = BufferedMARCReader(marc_file)
+                    MARCReaderWrapper.read_records(
+                        reader,
+                        file_def,
+                        failed_marc_records_file,
+                        processor,
+                        shard.first_record_index,
+                    )
+        except TransformationProcessError as tpe:
+            logger.critical(tpe)
+            sys.exit(1)
+        except Exception:
+            logger.exception("Failure in Main: %s", file_def.file_name, stack_info=True)
+
+    @staticmethod
+    def iter_records_with_warnings(reader):
+        """Iterate over the records of a reader with the warnings pymarc wrote for each.
+
+        Readers that collect the warnings themselves, like BufferedMARCReader, report
+        them in current_warnings. For other readers, each ``next(reader)`` call is made
+        with stderr redirected, so the warnings can be tied to the record.
+
+        Yields:
+            tuple: The record, or None if it could not be read, and the warnings.
+        """
+        if hasattr(reader, "current_warnings"):
+            for record in reader:
+                yield record, reader.current_warnings
+            return
+        while True:
+            stderr_buffer = StringIO()
+            with redirect_stderr(stderr_buffer):
+                try:
+                    record = next(reader)
+                except StopIteration:
+                    return
+            yield record, stderr_buffer.getvalue()
+
     @staticmethod
     def read_records(
         reader,
         source_file: FileDefinition,
         failed_records_file: IOBase,
         processor: MarcFileProcessor,
+        start: int = 0,
     ):
         """Read and process records while preserving per-record parser diagnostics.
 
-        We intentionally call ``next(reader)`` inside ``redirect_stderr`` so we can
-        capture pymarc MARC-8 decode warnings emitted to stderr and associate each
-        warning with the specific record index.
+        MARC-8 decoding warnings, which pymarc writes to stderr, are logged with the
+        index of the record they belong to. stderr is only redirected while recovering
+        records that could not be decoded, and for readers that do not collect the
+        warnings themselves.
+
+        Records are indexed from start, which is the index of the first record read
+        when the reader only covers a shard of a file. The per file record counts are
+        added to the migration report when the reading ends.
         """
         marc_record_preprocessor = MARCReaderWrapper.get_marc_record_preprocessor(processor)
-        for idx in count():
-            stderr_buffer = StringIO()
-            # Pull exactly one record per iteration so warning output stays scoped
-            # to this record index.
-            with redirect_stderr(stderr_buffer):
+        migration_report = processor.mapper.migration_report
+        records_read = 0
+        records_decoded = 0
+        try:
+            for idx, (record, decoding_warnings) in enumerate(
+                MARCReaderWrapper.iter_records_with_warnings(reader), start
+            ):
+                records_read += 1
                 try:
-                    record = next(reader)
-                except StopIteration:
-                    break
-            processor.mapper.migration_report.add_general_statistics(
-                i18n.t("Records in file before parsing")
-            )
-            try:
-                recovery_strategy = "none"
-                # A permissive MARCReader yields None when parsing fails.
-                if record is None:
-                    recovered_record, recovery_strategy = MARCReaderWrapper.recover_failed_record(
-                        reader
-                    )
-                    MARCReaderWrapper.log_parsing_issue(
-                        reader,
-                        source_file,
-                        idx,
-                        processor.mapper.migration_report,
-                        recovered=bool(recovered_record),
-                        recovery_strategy=recovery_strategy,
-                    )
-                    if recovered_record is None:
-                        report_failed_parsing(
+                    recovery_strategy = "none"
+                    # A permissive MARCReader yields None when parsing fails.
+                    if record is None:
+                        stderr_buffer = StringIO()
+                        with redirect_stderr(stderr_buffer):
+                            recovered_record, recovery_strategy = (
+                                MARCReaderWrapper.recover_failed_record(reader)
+                            )
+                        decoding_warnings += stderr_buffer.getvalue()
+                        MARCReaderWrapper.log_parsing_issue(
                             reader,
                             source_file,
-                            failed_records_file,
                             idx,
-                            processor.mapper.migration_report,
+                            migration_report,
+                            recovered=bool(recovered_record),
+                            recovery_strategy=recovery_strategy,
                         )
-                    record = recovered_record
-                # Normal successful decode path.
-                if record is not None:
-                    # Log MARC-8 truncation warnings, but do not alter decoding.
-                    MARCReaderWrapper.log_marc8_decoding_warnings(
-                        source_file,
-                        idx,
-                        stderr_buffer.getvalue(),
-                    )
-                    if recovery_strategy in TEXT_FIDELITY_CHECK_STRATEGIES:
-                        MARCReaderWrapper.log_record_text_fidelity_warnings(
-                            source_file,
-                            idx,
+                        if recovered_record is None:
+                            report_failed_parsing(
+                                reader,
+                                source_file,
+                                failed_records_file,
+                                idx,
+                                migration_report,
+                            )
+                        record = recovered_record
+                    # Normal successful decode path.
+                    if record is not None:
+                        # Log MARC-8 truncation warnings, but do not alter decoding.
+                        if decoding_warnings:
+                            MARCReaderWrapper.log_marc8_decoding_warnings(
+                                source_file,
+                                idx,
+                                decoding_warnings,
+                            )
+                        if recovery_strategy in TEXT_FIDELITY_CHECK_STRATEGIES:
+                            MARCReaderWrapper.log_record_text_fidelity_warnings(
+                                source_file,
+                                idx,
+                                record,
+                                migration_report,
+                                recovery_strategy,
+                            )
+                        record = MARCReaderWrapper.preprocess_record(
                             record,
-                            processor.mapper.migration_report,
-                            recovery_strategy,
+                            marc_record_preprocessor,
                         )
-                    record = MARCReaderWrapper.preprocess_record(
-                        record,
-                        marc_record_preprocessor,
-                    )
-                    processor.mapper.migration_report.add_general_statistics(
-                        i18n.t("Records successfully decoded from MARC21"),
+                        records_decoded += 1
+                        processor.process_record(idx, record, source_file)
+                except TransformationRecordFailedError as error:
+                    error.log_it()
+                    migration_report.add_general_statistics(
+                        i18n.t("Records that failed transformation. Check log for details"),
                     )
-                    processor.process_record(idx, record, source_file)
-            except TransformationRecordFailedError as error:
-                error.log_it()
-                processor.mapper.migration_report.add_general_statistics(
-                    i18n.t("Records that failed transformation. Check log for details"),
+                except ValueError as error:
+                    logger.exception(error)
+        finally:
+            if records_read:
+                migration_report.add(
+                    "GeneralStatistics",
+                    i18n.t("Records in file before parsing"),
+                    records_read,
+                )
+            if records_decoded:
+                migration_report.add(
+                    "GeneralStatistics",
+                    i18n.t("Records successfully decoded from MARC21"),
+                    records_decoded,
                 )
-            except ValueError as error:
-                logger.exception(error)
-        logger.info("Done reading %s records from file", idx + 1)
+        logger.info("Done reading %s records from file", records_read)
 
     @staticmethod
     def set_leader(marc_record: Record, migration_report: MigrationReport):
@@ -22,6 +22,7 @@ from folio_uuid.folio_uuid import FOLIONamespaces, FolioUUID
 from folioclient import FolioClient
 from pymarc import Field, Record, Subfield
 
+from folio_migration_tools import json_serializer
 from folio_migration_tools.custom_exceptions import (
     TransformationFieldMappingError,
     TransformationProcessError,
@@ -34,6 +35,11 @@ from folio_migration_tools.library_configuration import (
     LibraryConfiguration,
 )
 from folio_migration_tools.mapper_base import MapperBase
+from folio_migration_tools.marc_rules_transformation.compiled_mapping_rules import (
+    CompiledMapping,
+    TargetPathStep,
+    compile_target_path,
+)
 from folio_migration_tools.marc_rules_transformation.hrid_handler import HRIDHandler
 
 logger = logging.getLogger(__name__)
@@ -71,6 +77,9 @@ class RulesMapperBase(MapperBase):
         self.conditions = conditions
         self.item_json_schema = ""
         self.mappings: dict = {}
+        self.compiled_mappings: Dict[int, CompiledMapping] = {}
+        self.target_paths: Dict[str, List[TargetPathStep]] = {}
+        self.target_paths_schema: Optional[dict] = None
         self.schema_properties = None
         self.create_source_records = all(
             [
@@ -120,6 +129,46 @@ class RulesMapperBase(MapperBase):
                         res.append(v)
                 rec[key] = list(res)
 
+    def compile_mapping_rules(self):
+        """Compile all mapping rules in self.mappings, including nested entity mappings.
+
+        Rules that are added or replaced later are compiled the first time they are used.
+        """
+        self.compiled_mappings = {}
+        for tag_mappings in self.mappings.values():
+            for mapping in tag_mappings if isinstance(tag_mappings, list) else []:
+                self.compile_mapping(mapping)
+                for entity_mapping in mapping.get("entity", []):
+                    self.compile_mapping(entity_mapping)
+                    if "alternativeMapping" in entity_mapping:
+                        self.compile_mapping(entity_mapping["alternativeMapping"])
+        logger.info("Compiled %s mapping rules", len(self.compiled_mappings))
+
+    def compile_mapping(self, mapping: dict) -> CompiledMapping:
+        compiled_mapping = CompiledMapping(mapping, self.conditions)
+        self.compiled_mappings[id(mapping)] = compiled_mapping
+        return compiled_mapping
+
+    def compiled_mapping(self, mapping) -> CompiledMapping:
+        """Get the compiled form of a mapping rule, compiling it if needed.
+
+        Args:
+            mapping (dict | CompiledMapping): A mapping rule, or an already compiled one.
+
+        Returns:
+            CompiledMapping: The compiled mapping rule.
+        """
+        if isinstance(mapping, CompiledMapping):
+            return mapping
+        compiled_mapping = self.compiled_mappings.get(id(mapping))
+        if (
+            compiled_mapping is None
+            or compiled_mapping.mapping is not mapping
+            or compiled_mapping.conditions is not self.conditions
+        ):
+            compiled_mapping = self.compile_mapping(mapping)
+        return compiled_mapping
+
     def map_field_according_to_mapping(
         self, marc_field: pymarc.Field, mappings, folio_record, legacy_ids
     ):
@@ -138,29 +187,23 @@ class RulesMapperBase(MapperBase):
                 tre.log_it()
 
     def handle_normal_mapping(self, mapping, marc_field: pymarc.Field, folio_record, legacy_ids):
-        target = mapping["target"]
-        if mapping.get("ignoreSubsequentSubfields", False):
+        compiled_mapping = self.compiled_mapping(mapping)
+        target = compiled_mapping.target
+        if compiled_mapping.ignore_subsequent_subfields:
             marc_field = self.remove_repeated_subfields(marc_field)
-        if has_conditions(mapping):
-            values = self.apply_rules(marc_field, mapping, legacy_ids)
+        if compiled_mapping.has_conditions:
+            values = self.apply_rules(marc_field, compiled_mapping, legacy_ids)
             if marc_field.tag == "655":
                 values[0] = f"Genre: {values[0]}"
             self.add_value_to_target(folio_record, target, values)
-        elif has_value_to_add(mapping):
-            value = mapping["rules"][0]["value"]
-            # Stupid construct to avoid bool("false") == True
-            if value == "true":
-                self.add_value_to_target(folio_record, target, [True])
-            elif value == "false":
-                self.add_value_to_target(folio_record, target, [False])
-            else:
-                self.add_value_to_target(folio_record, target, [value])
+        elif compiled_mapping.values_to_add:
+            self.add_value_to_target(folio_record, target, list(compiled_mapping.values_to_add))
         else:
             # Adding stuff without rules/Conditions.
             # Might need more complex mapping for arrays etc
-            if any(mapping["subfield"]):
+            if any(compiled_mapping.mapping["subfield"]):
                 values = self.handle_sub_field_delimiters(
-                    ",".join(legacy_ids), mapping, marc_field
+                    ",".join(legacy_ids), compiled_mapping, marc_field
                 )
                 value = " ".join(values)
             else:
@@ -209,49 +252,29 @@ class RulesMapperBase(MapperBase):
         legacy_id: str,
         mapping,
         marc_field: pymarc.Field,
-        condition_types: List[str] = None,
-        parameter: dict = None,
     ):
+        compiled_mapping = self.compiled_mapping(mapping)
         values: List[str] = []
-        if mapping.get("subfield") and (custom_delimiters := mapping.get("subFieldDelimiter")):
-            delimiter_map = dict.fromkeys(mapping.get("subfield"), " ")
-            for custom_delimiter in custom_delimiters:
-                delimiter_map.update(
-                    dict.fromkeys(custom_delimiter["subfields"], custom_delimiter["value"])
-                )
-            custom_delimited_strings: List[Tuple[str, List[str]]] = []
-            subfields = mapping.get("subfield")
-            for custom_delimiter in custom_delimiters:
-                subfields_for_delimiter = [
-                    sub_f
-                    for sub_f in subfields
-                    if custom_delimiter["subfields"]
-                    and delimiter_map[sub_f] == custom_delimiter["value"]
-                ]
-                subfield_collection: Tuple[str, List[str]] = (custom_delimiter["value"], [])
-                subfield_collection[1].extend(marc_field.get_subfields(*subfields_for_delimiter))
-                custom_delimited_strings.append(subfield_collection)
+        if compiled_mapping.custom_delimiters:
+            custom_delimited_strings: List[Tuple[str, List[str]]] = [
+                (delimiter, marc_field.get_subfields(*subfields_for_delimiter))
+                for delimiter, subfields_for_delimiter in compiled_mapping.custom_delimiters
+            ]
             for custom_delimited_string in custom_delimited_strings:
-                if mapping.get("applyRulesOnConcatenatedData", ""):
+                if compiled_mapping.apply_rules_on_concatenated_data:
                     values.extend(custom_delimited_string[1])
                 else:
                     values.extend(
                         dict.fromkeys(
                             [
-                                self.apply_rule(
-                                    legacy_id,
-                                    x,
-                                    condition_types or [],
-                                    marc_field,
-                                    parameter or {},
-                                )
+                                self.apply_conditions(legacy_id, x, compiled_mapping, marc_field)
                                 for x in custom_delimited_string[1]
                             ]
                         )
                     )
                 values = [custom_delimited_string[0].join(values)]
-        elif mapping.get("subfield", []):
-            values.extend(marc_field.get_subfields(*mapping["subfield"]))
+        elif compiled_mapping.subfields:
+            values.extend(marc_field.get_subfields(*compiled_mapping.subfields))
         return values
 
     def get_value_from_condition(
@@ -260,32 +283,26 @@ class RulesMapperBase(MapperBase):
         mapping,
         marc_field,
     ):
-        stripped_conds = mapping["rules"][0]["conditions"][0]["type"].split(",")
-        condition_types = list(map(str.strip, stripped_conds))
-        parameter = mapping["rules"][0]["conditions"][0].get("parameter", {})
+        compiled_mapping = self.compiled_mapping(mapping)
         values: List[str] = []
-        if mapping.get("subfield"):
+        if compiled_mapping.subfields:
             values.extend(
-                self.handle_sub_field_delimiters(
-                    legacy_id, mapping, marc_field, condition_types, parameter
-                )
+                self.handle_sub_field_delimiters(legacy_id, compiled_mapping, marc_field)
             )
         else:
             values.append(marc_field.format_field() if marc_field else "")
 
-        if not mapping.get("applyRulesOnConcatenatedData", "") and mapping.get("subfield", []):
+        if not compiled_mapping.apply_rules_on_concatenated_data and compiled_mapping.subfields:
             return " ".join(
                 dict.fromkeys(
                     [
-                        self.apply_rule(legacy_id, x, condition_types, marc_field, parameter)
+                        self.apply_conditions(legacy_id, x, compiled_mapping, marc_field)
                         for x in values
                     ]
                 )
             )
         else:
-            return self.apply_rule(
-                legacy_id, " ".join(values), condition_types, marc_field, parameter
-            )
+            return self.apply_conditions(legacy_id, " ".join(values), compiled_mapping, marc_field)
 
     def process_marc_field(
         self,
@@ -388,25 +405,23 @@ class RulesMapperBase(MapperBase):
                 )
 
     def apply_rules(self, marc_field: pymarc.Field, mapping, legacy_ids):
+        compiled_mapping = self.compiled_mapping(mapping)
+        mapping = compiled_mapping.mapping
         try:
             values = []
             value = ""
-            if has_conditions(mapping):
-                value = self.get_value_from_condition(",".join(legacy_ids), mapping, marc_field)
-            elif has_value_to_add(mapping):
-                value = mapping["rules"][0]["value"]
-                if value == "false":
-                    return [False]
-                elif value == "true":
-                    return [True]
-                else:
-                    return [value]
-            elif not mapping.get("rules", []) or not mapping["rules"][0].get("conditions", []):
+            if compiled_mapping.has_conditions:
+                value = self.get_value_from_condition(
+                    ",".join(legacy_ids), compiled_mapping, marc_field
+                )
+            elif compiled_mapping.values_to_add:
+                return list(compiled_mapping.values_to_add)
+            else:
                 values = self.handle_sub_field_delimiters(
-                    ",".join(legacy_ids), mapping, marc_field
+                    ",".join(legacy_ids), compiled_mapping, marc_field
                 )
                 value = " ".join(values)
-            values = wrap(value, 3) if mapping.get("subFieldSplit", "") else [value]
+            values = wrap(value, 3) if compiled_mapping.split_subfields else [value]
             return values
         except TransformationProcessError as trpe:
             self.handle_transformation_process_error(self.parsed_records, trpe)
@@ -442,32 +457,28 @@ class RulesMapperBase(MapperBase):
     def add_value_to_target(self, rec, target_string, value):
         if not value:
             return
-        targets = target_string.split(".")
-        if len(targets) == 1:
+        if "." not in target_string:
             self.add_value_to_first_level_target(rec, target_string, value)
         else:
             schema_parent = None
+            parent_step = None
             parent = None
             schema_properties = self.schema["properties"]
-            sc_prop = schema_properties
-            for target in targets:  # Iterate over names in hierarcy
-                if target in sc_prop:  # property is on this level
-                    sc_prop = sc_prop[target]  # set current property
-                else:  # next level. take the properties from the items
-                    sc_prop = schema_parent["items"]["properties"][target]
+            for step in self.target_path(target_string):  # Iterate over names in hierarcy
+                target = step.name
+                sc_prop = step.schema_property
+                string_in_array_of_objects = (
+                    parent_step is not None and parent_step.is_array_of_objects and step.is_string
+                )
                 if target not in rec and not schema_parent:  # have we added this already?
-                    if is_array_of_strings(sc_prop):
+                    if step.is_array_of_strings:
                         rec[target] = []
                         # break
                         # prop[target].append({})
-                    elif is_array_of_objects(sc_prop):
+                    elif step.is_array_of_objects:
                         rec[target] = [{}]
                         # break
-                    elif (
-                        schema_parent
-                        and is_array_of_objects(schema_parent)
-                        and sc_prop.get("type", "string") == "string"
-                    ):
+                    elif schema_parent and string_in_array_of_objects:
                         s = "This should be unreachable code. Check schema for changes"
                         logger.error(s)
                         logger.error(parent)
@@ -483,9 +494,7 @@ class RulesMapperBase(MapperBase):
                                 "The mapping of this needs to be investigated "
                                 f"{target_string} {schema_properties[target_string]}",
                             )
-                elif is_array_of_objects(sc_prop) and len(rec[target][-1]) == len(
-                    sc_prop["items"]["properties"]
-                ):
+                elif step.is_array_of_objects and len(rec[target][-1]) == step.item_property_count:
                     rec[target].append({})
                 elif schema_parent and target in rec[parent][-1]:
                     rec[parent].append({})
@@ -493,11 +502,7 @@ class RulesMapperBase(MapperBase):
                         rec[parent][-1][target] = value[0]
                     else:
                         rec[parent][-1] = {target: value[0]}
-                elif (
-                    schema_parent
-                    and is_array_of_objects(schema_parent)
-                    and sc_prop.get("type", "string") == "string"
-                ):
+                elif schema_parent and string_in_array_of_objects:
                     if len(rec[parent][-1]) > 0:
                         rec[parent][-1][target] = value[0]
                     else:
@@ -506,8 +511,27 @@ class RulesMapperBase(MapperBase):
                 # prop[target] = value[0]
                 # prop = rec[target]
                 schema_parent = sc_prop
+                parent_step = step
                 parent = target
 
+    def target_path(self, target_string: str) -> List[TargetPathStep]:
+        """Get the schema lookups of a dotted target path, resolving them once per schema.
+
+        Args:
+            target_string (str): The dotted target path.
+
+        Returns:
+            List[TargetPathStep]: The levels of the path, outermost first.
+        """
+        if self.target_paths_schema is not self.schema:
+            self.target_paths = {}
+            self.target_paths_schema = self.schema
+        if (path := self.target_paths.get(target_string)) is None:
+            path = self.target_paths[target_string] = compile_target_path(
+                self.schema, target_string
+            )
+        return path
+
     def add_value_to_first_level_target(self, rec, target_string, value):
         sch = self.schema["properties"]
         if (
@@ -579,11 +603,12 @@ class RulesMapperBase(MapperBase):
         else:
             req_entity_props = []
         for entity_mapping in entity_mappings:
-            k = entity_mapping["target"].split(".")[-1]
+            compiled_mapping = self.compiled_mapping(entity_mapping)
+            k = compiled_mapping.target_name
             if k == "authorityId" and (legacy_subfield_9 := marc_field.get("9")):
                 marc_field.add_subfield("0", legacy_subfield_9)
                 marc_field.delete_subfield("9")
-            if k == "authorityId" and (entity_subfields := entity_mapping.get("subfield", [])):
+            if k == "authorityId" and (entity_subfields := compiled_mapping.subfields):
                 for subfield in entity_subfields:
                     if subfield != "9":
                         Helper.log_data_issue(
@@ -593,10 +618,12 @@ class RulesMapperBase(MapperBase):
                             "mapping rules.",
                             marc_field,
                         )
-                        entity_mapping["subfield"] = ["9"]
+                        compiled_mapping.mapping["subfield"] = ["9"]
+                if compiled_mapping.mapping.get("subfield") is not entity_subfields:
+                    compiled_mapping = self.compile_mapping(compiled_mapping.mapping)
             if my_values := [
                 v
-                for v in self.apply_rules(marc_field, entity_mapping, index_or_legacy_id)
+                for v in self.apply_rules(marc_field, compiled_mapping, index_or_legacy_id)
                 if v != ""
             ]:
                 if entity_parent_key != k:
@@ -604,8 +631,8 @@ class RulesMapperBase(MapperBase):
                 else:
                     entity = my_values[0]
             elif "alternativeMapping" in entity_mapping:
-                alt_mapping = entity_mapping["alternativeMapping"]
-                alt_k = alt_mapping["target"].split(".")[-1]
+                alt_mapping = self.compiled_mapping(entity_mapping["alternativeMapping"])
+                alt_k = alt_mapping.target_name
                 if alt_values := [
                     v
                     for v in self.apply_rules(marc_field, alt_mapping, index_or_legacy_id)
@@ -637,11 +664,11 @@ class RulesMapperBase(MapperBase):
         folio_record,
         legacy_ids,
     ):
-        entity_mapping = mapping["entity"]
-        if entity_indicators_match(entity_mapping, marc_field):
-            entity_mapping = [x for x in entity_mapping if "indicators" not in x]
-            e_parent = entity_mapping[0]["target"].split(".")[0]
-            if mapping.get("entityPerRepeatedSubfield", False):
+        compiled_mapping = self.compiled_mapping(mapping)
+        if compiled_mapping.entity_indicators_match(marc_field):
+            entity_mapping = compiled_mapping.entity_mappings
+            e_parent = compiled_mapping.entity_parent
+            if compiled_mapping.entity_per_repeated_subfield:
                 for temp_field in self.grouped(marc_field):
                     entity = self.create_entity(entity_mapping, temp_field, e_parent, legacy_ids)
                     if entity and (
@@ -650,7 +677,7 @@ class RulesMapperBase(MapperBase):
                     ):
                         self.add_entity_to_record(entity, e_parent, folio_record, self.schema)
             else:
-                if mapping.get("ignoreSubsequentSubfields", False):
+                if compiled_mapping.ignore_subsequent_subfields:
                     marc_field = self.remove_repeated_subfields(marc_field)
                 entity = self.create_entity(entity_mapping, marc_field, e_parent, legacy_ids)
                 if e_parent in ["precedingTitles", "succeedingTitles"]:
@@ -733,13 +760,14 @@ class RulesMapperBase(MapperBase):
                 identifier, f"Unable to create {e_parent} entity. Missing title.", marc_field
             )
 
-    def apply_rule(self, legacy_id, value, condition_types, marc_field, parameter):
+    def apply_conditions(self, legacy_id, value, mapping, marc_field):
+        compiled_mapping = self.compiled_mapping(mapping)
         v = value
-        for condition_type in iter(condition_types):
+        for condition_type, condition in compiled_mapping.condition_functions:
             try:
-                v = self.conditions.get_condition(
-                    condition_type, legacy_id, v, parameter, marc_field
-                )
+                if condition is None:
+                    condition = getattr(self.conditions, f"condition_{condition_type}")
+                v = condition(legacy_id, v, compiled_mapping.parameter, marc_field)
             except AttributeError as attr_error:
                 raise TransformationProcessError(
                     legacy_id, attr_error, condition_type
@@ -1049,9 +1077,9 @@ class RulesMapperBase(MapperBase):
             FOLIONamespaces.edifact: {},
         }
 
-        my_tuple_json = marc_record.as_json()
-        raw_record = {"id": srs_id, "content": my_tuple_json}
-        parsed_record = {"id": srs_id, "content": json.loads(my_tuple_json)}
+        content = marc_record.as_dict()
+        raw_record = {"id": srs_id, "content": json_serializer.dumps(content)}
+        parsed_record = {"id": srs_id, "content": content}
         record = {
             "id": srs_id,
             "deleted": False,
@@ -1063,63 +1091,13 @@ class RulesMapperBase(MapperBase):
             "additionalInfo": {"suppressDiscovery": discovery_suppress},
             "externalIdsHolder": id_holders.get(record_type),
             "state": "ACTUAL",
-            "leaderRecordStatus": parsed_record["content"]["leader"][5]
-            if parsed_record["content"]["leader"][5] in [*"acdnposx"]
+            "leaderRecordStatus": content["leader"][5]
+            if content["leader"][5] in [*"acdnposx"]
             else "d",
         }
-        return json.dumps(record)
+        return json_serializer.dumps(record)
 
     def wrap_up(self):
         raise NotImplementedError(
             "This method should be implemented in the child class if needed."
         )
-
-
-def has_conditions(mapping):
-    return mapping.get("rules", []) and mapping["rules"][0].get("conditions", [])
-
-
-def has_value_to_add(mapping):
-    return mapping.get("rules", []) and mapping["rules"][0].get("value", "")
-
-
-def is_array_of_strings(schema_property):
-    sc_prop_type = schema_property.get("type", "string")
-    return sc_prop_type == "array" and schema_property["items"]["type"] == "string"
-
-
-def is_array_of_objects(schema_property):
-    sc_prop_type = schema_property.get("type", "string")
-    return sc_prop_type == "array" and schema_property["items"]["type"] == "object"
-
-
-def entity_indicators_match(entity_mapping, marc_field):
-    """Check if entity mapping indicators match the MARC field indicators.
-
-    Entity mappings can limit the fields they are applied to by specifying indicator
-    values that must match the provided MARC field's indicators. If the entity mapping
-    does not specify any indicator values, it is assumed to match all MARC fields.
-    Entity indicator values can be a specific value or a wildcard "*".
-
-    Args:
-        entity_mapping (dict): _description_
-        marc_field (pymarc.Field): _description_
-
-    Returns:
-        bool: True if the indicators match, False otherwise.
-    """
-    if indicator_rule := [x["indicators"] for x in entity_mapping if "indicators" in x]:
-        return all(
-            [
-                (
-                    marc_field.indicator1 == indicator_rule[0]["ind1"]
-                    or indicator_rule[0]["ind1"] == "*"
-                ),
-                (
-                    marc_field.indicator2 == indicator_rule[0]["ind2"]
-                    or indicator_rule[0]["ind2"] == "*"
-                ),
-            ]
-        )
-    else:
-        return True
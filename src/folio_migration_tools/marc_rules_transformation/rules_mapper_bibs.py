@@ -66,6 +66,7 @@ class BibsRulesMapper(RulesMapperBase):
         logger.info("Fetching mapping rules from the tenant")
         rules_endpoint = "/mapping-rules/marc-bib"
         self.mappings = self.folio_client.folio_get_single_object(rules_endpoint) or {}
+        self.compile_mapping_rules()
         logger.info("Fetching valid language codes...")
         self.language_codes = list(self.fetch_language_codes())
         self.instance_relationships: dict = {}
@@ -286,6 +287,7 @@ class BibsRulesMapper(RulesMapperBase):
 
     def wrap_up(self):
         logger.info("Mapper wrapping up")
+        self.hrid_handler.release_unused_hrids()
         if self.create_source_records:
             if getattr(self.task_configuration, "update_hrid_settings", False):
                 self.hrid_handler.store_hrid_settings()
@@ -95,6 +95,7 @@ class RulesMapperHoldings(RulesMapperBase):
         logger.info("Fetching mapping rules from the tenant")
         rules_endpoint = "/mapping-rules/marc-holdings"
         self.mappings = self.folio_client.folio_get_single_object(rules_endpoint)
+        self.compile_mapping_rules()
 
     def fix_853_bug_in_rules(self):
         f852_mappings = self.mappings["852"]
@@ -119,6 +120,7 @@ class RulesMapperHoldings(RulesMapperBase):
         try:
             self.mappings.update(new_rules or {})
             self.fix_853_bug_in_rules()
+            self.compile_mapping_rules()
         except Exception as e:
             raise TransformationProcessError(
                 "",
@@ -555,6 +557,7 @@ class RulesMapperHoldings(RulesMapperBase):
 
     def wrap_up(self):
         logger.info("Mapper wrapping up")
+        self.hrid_handler.release_unused_hrids()
         source_file_create_source_records = [
             x.create_source_records for x in self.task_configuration.files
         ]
@@ -3,11 +3,17 @@
 Provides the MigrationReport class for tracking migration statistics, errors,
 and warnings during transformation and loading tasks. Generates markdown and
 JSON formatted reports with categorized statistics.
+
+Measures are counted as they are added, but measures added with add_translated are
+only translated and formatted when the report is read or written. Translating a
+parameterized measure is much slower than counting it, and the same measure is
+usually counted for many records.
 """
 
 import json
 import logging
 from datetime import datetime, timezone
+from typing import Dict, NamedTuple, Tuple
 
 import i18n
 
@@ -16,14 +22,46 @@ from folio_migration_tools.i18n_cache import i18n_t
 logger = logging.getLogger(__name__)
 
 
+class TranslatedMeasure(NamedTuple):
+    """A measure that is translated when the report is read or written."""
+
+    key: str
+    params: Tuple[Tuple[str, object], ...]
+
+    def translate(self) -> str:
+        return i18n.t(self.key, **dict(self.params))
+
+
 class MigrationReport:
     """Class responsible for handling the migration report."""
 
     def __init__(self):
         """Initialize a new migration report for tracking statistics and issues."""
-        self.report = {}
+        self.counters: Dict[str, dict] = {}
         self.stats = {}
 
+    @property
+    def report(self) -> Dict[str, dict]:
+        """The report sections, with all measures translated.
+
+        Measures that translate to the same text are added together.
+        """
+        report: Dict[str, dict] = {}
+        for blurb_id, section in self.counters.items():
+            report[blurb_id] = translated_section = {}
+            for measure, number in section.items():
+                if isinstance(measure, TranslatedMeasure):
+                    measure = measure.translate()
+                if measure in translated_section:
+                    translated_section[measure] += number
+                else:
+                    translated_section[measure] = number
+        return report
+
+    @report.setter
+    def report(self, report: Dict[str, dict]):
+        self.counters = report
+
     def add(self, blurb_id, measure_to_add, number=1):
         """Add section header and values to migration report.
 
@@ -33,12 +71,33 @@ class MigrationReport:
             number (int, optional): _description_. Defaults to 1.
         """
         try:
-            self.report[blurb_id][measure_to_add] += number
+            self.counters[blurb_id][measure_to_add] += number
         except KeyError:
-            if blurb_id not in self.report:
-                self.report[blurb_id] = {"blurb_id": blurb_id}
-            if measure_to_add not in self.report[blurb_id]:
-                self.report[blurb_id][measure_to_add] = number
+            if blurb_id not in self.counters:
+                self.counters[blurb_id] = {"blurb_id": blurb_id}
+            if measure_to_add not in self.counters[blurb_id]:
+                self.counters[blurb_id][measure_to_add] = number
+
+    def add_translated(self, blurb_id, translation_key: str, number=1, **params):
+        """Add to a measure that is translated when the report is read or written.
+
+        Use this instead of add(blurb_id, i18n.t(translation_key, **params)) in code
+        that runs for every record.
+
+        Args:
+            blurb_id (string): ID of Blurb in translations file
+            translation_key (str): The translation key of the measure
+            number (int, optional): The number to add. Defaults to 1.
+            **params: The placeholder values of the translation
+        """
+        self.add(
+            blurb_id,
+            TranslatedMeasure(
+                translation_key,
+                tuple((name, hashable(value)) for name, value in params.items()),
+            ),
+            number,
+        )
 
     def set(self, blurb_id, measure_to_add: str, number: int):
         """Set a section value to a specific number.
@@ -48,9 +107,24 @@ class MigrationReport:
             measure_to_add (str): The measure name to set.
             number (int): The value to set.
         """
-        if blurb_id not in self.report:
-            self.report[blurb_id] = {}
-        self.report[blurb_id][measure_to_add] = number
+        if blurb_id not in self.counters:
+            self.counters[blurb_id] = {}
+        self.counters[blurb_id][measure_to_add] = number
+
+    def clear(self):
+        """Remove all sections and measures from the report."""
+        self.counters.clear()
+
+    def merge(self, other_report: dict):
+        """Add the counters of another report, e.g. from a worker process, to this one.
+
+        Args:
+            other_report (dict): The counters, or the report, of another MigrationReport.
+        """
+        for blurb_id, section in other_report.items():
+            for measure, number in section.items():
+                if measure != "blurb_id":
+                    self.add(blurb_id, measure, number)
 
     def add_general_statistics(self, measure_to_add: str):
         """Shortcut for adding to the first breakdown.
@@ -98,8 +172,9 @@ class MigrationReport:
             )
         )
         logger.info(f"Elapsed time: {time_finished - time_started}")
-        for a in self.report:
-            blurb_id = self.report[a].get("blurb_id") or ""
+        report = self.report
+        for a in report:
+            blurb_id = report[a].get("blurb_id") or ""
             report_file.write(
                 "\n".join(
                     [
@@ -107,15 +182,15 @@ class MigrationReport:
                         "## " + i18n.t(f"blurbs.{blurb_id}.title"),
                         i18n.t(f"blurbs.{blurb_id}.description"),
                         "<details><summary>"
-                        + i18n.t("Click to expand all %{count} things", count=len(self.report[a]))
+                        + i18n.t("Click to expand all %{count} things", count=len(report[a]))
                         + "</summary>",
                         "",
                         i18n_t("Measure") + " | " + i18n_t("Count"),
                         "--- | ---:",
                     ]
                     + [
-                        f"{k or 'EMPTY'} | {self.report[a][k]:,}"
-                        for k in sorted(self.report[a], key=as_str)
+                        f"{k or 'EMPTY'} | {report[a][k]:,}"
+                        for k in sorted(report[a], key=as_str)
                         if k != "blurb_id"
                     ]
                     + ["</details>", ""]
@@ -123,16 +198,29 @@ class MigrationReport:
             )
 
     def log_me(self):
-        for a in self.report:
-            blurb_id = self.report[a].get("blurb_id") or ""
+        report = self.report
+        for a in report:
+            blurb_id = report[a].get("blurb_id") or ""
             logger.info(f"{blurb_id}    ")
             logger.info("_______________")
-            b = self.report[a]
+            b = report[a]
             sortedlist = [(k, b[k]) for k in sorted(b, key=as_str) if k != "blurb_id"]
             for b in sortedlist:
                 logger.info(f"{b[0] or 'EMPTY'} \t\t{b[1]:,}   ")
 
 
+def hashable(value):
+    """Return a value as is if it can be a dict key, otherwise as a string.
+
+    Translation placeholders are formatted with str(), so the translation is the same.
+    """
+    try:
+        hash(value)
+    except TypeError:
+        return str(value)
+    return value
+
+
 def as_str(s):
     try:
         return str(s), ""
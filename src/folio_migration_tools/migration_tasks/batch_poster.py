@@ -10,23 +10,28 @@ InventoryBatchPoster or other specialized batch posters instead.
 
 import asyncio
 import copy
+import io
 import json
 import logging
 import os
 import re
 import sys
+import time
 import traceback
 from datetime import datetime, timezone
 from typing import TYPE_CHECKING, Annotated, List, Optional
 from uuid import uuid4
 
 import folioclient
+import httpx
+from folioclient.exceptions import folio_errors
 
 if TYPE_CHECKING:
     from httpx import Response
 from folio_uuid.folio_namespaces import FOLIONamespaces
 from pydantic import Field
 
+from folio_migration_tools import json_serializer
 from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
@@ -38,16 +43,154 @@ from folio_migration_tools.library_configuration import (
 )
 from folio_migration_tools.migration_report import MigrationReport
 from folio_migration_tools.migration_tasks.migration_task_base import MigrationTaskBase
+from folio_migration_tools.record_writer import open_records, seek_records
 from folio_migration_tools.task_configuration import AbstractTaskConfiguration
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401
+
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+
+# Longest CQL query sent as a GET parameter before switching to a retrieve endpoint
+MAX_GET_QUERY_LENGTH = 4000
+
 
 def write_failed_batch_to_file(batch, file):
     for record in batch:
         file.write(f"{json.dumps(record)}\n")
 
 
+class CheckpointJournal:
+    """Keeps track of how far each results file has been posted.
+
+    The journal is a small JSON file holding, for each file, the byte offset just after
+    the last row whose outcome has been recorded, the number of rows read so far and
+    the ids of the last batch. Each commit replaces the file atomically, so that a
+    crash leaves either the previous or the new checkpoint behind.
+
+    The journal is only synced to disk when resuming is enabled. Other runs can still
+    be resumed after the task itself crashes, without paying for a disk sync per batch.
+    """
+
+    def __init__(self, path, resume: bool):
+        self.path = path
+        self.files: dict = {}
+        self.sync = resume
+        if resume:
+            try:
+                with open(path) as journal_file:
+                    self.files = json.load(journal_file).get("files", {})
+                logger.info("Resuming from checkpoint journal %s", path)
+            except FileNotFoundError:
+                logger.warning("No checkpoint journal found at %s. Starting from the top", path)
+
+    def get_position(self, file_name: str) -> tuple:
+        """Returns the byte offset and the number of rows read for a file.
+
+        Args:
+            file_name (str): The name of the results file
+
+        Returns:
+            tuple: (offset, rows), both 0 if the file has no checkpoint
+        """
+        entry = self.files.get(file_name, {})
+        return entry.get("offset", 0), entry.get("rows", 0)
+
+    def commit(self, file_name: str, offset: int, rows: int, last_batch_ids: list):
+        """Records the position of a file and writes the journal to disk.
+
+        Args:
+            file_name (str): The name of the results file
+            offset (int): The byte offset just after the last recorded row
+            rows (int): The number of rows read so far
+            last_batch_ids (list): The ids of the last recorded batch
+        """
+        self.files[file_name] = {
+            "offset": offset,
+            "rows": rows,
+            "last_batch_ids": last_batch_ids,
+        }
+        temp_path = f"{self.path}.tmp"
+        with open(temp_path, "w") as journal_file:
+            json.dump({"files": self.files}, journal_file)
+            if self.sync:
+                journal_file.flush()
+                os.fsync(journal_file.fileno())
+        os.replace(temp_path, self.path)
+
+
+class AdaptiveBatchSizer:
+    """Chooses the batch size from the response times and request sizes observed so far.
+
+    After each posted batch, the size is set to the number of records that would be
+    expected to take target_seconds to post, or to fill most of max_request_bytes,
+    whichever is smaller. The size can at most double from one batch to the next, and
+    is halved when a batch is rejected as too large or times out.
+    """
+
+    # Share of max_request_bytes a batch is sized to fill, to leave room for variation
+    REQUEST_SIZE_HEADROOM = 0.8
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        target_seconds: float,
+        max_request_bytes: int,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.target_seconds = target_seconds
+        self.max_request_bytes = max_request_bytes
+        self.size = self.clamp(initial)
+        self.smallest = self.size
+        self.largest = self.size
+        self.reductions = 0
+
+    def clamp(self, size: float) -> int:
+        return int(min(max(size, self.minimum), self.maximum))
+
+    def record_response(self, num_records: int, elapsed_seconds: float, request_bytes: int):
+        """Adjusts the batch size after a batch has been posted.
+
+        Args:
+            num_records (int): The number of records in the batch
+            elapsed_seconds (float): The time it took FOLIO to respond
+            request_bytes (int): The size of the request body
+        """
+        if not num_records:
+            return
+        ideal = self.size * 2.0
+        if elapsed_seconds > 0:
+            ideal = min(ideal, self.target_seconds * num_records / elapsed_seconds)
+        if request_bytes > 0:
+            ideal = min(
+                ideal,
+                self.REQUEST_SIZE_HEADROOM * self.max_request_bytes * num_records / request_bytes,
+            )
+        self.set_size(ideal)
+
+    def record_rejection(self, num_records: int):
+        """Halves the batch size after a batch was too large or timed out.
+
+        Args:
+            num_records (int): The number of records in the rejected batch
+        """
+        self.reductions += 1
+        self.set_size(min(self.size, num_records) // 2)
+
+    def set_size(self, size: float):
+        self.size = self.clamp(size)
+        self.smallest = min(self.smallest, self.size)
+        self.largest = max(self.largest, self.size)
+
+
 class BatchPoster(MigrationTaskBase):
     """BatchPoster.
 
@@ -108,6 +251,57 @@ class BatchPoster(MigrationTaskBase):
                 description="The batch size for processing files",
             ),
         ]
+        adaptive_batch_size: Annotated[
+            bool,
+            Field(
+                title="Adaptive batch size",
+                description=(
+                    "Toggles whether or not BatchPoster should adjust the batch size while "
+                    "posting, based on the response times and request sizes of the batches "
+                    "posted so far. batchSize is used for the first batch. Batches rejected "
+                    "with HTTP 413 or timing out are posted in halves, and the batch size "
+                    "is reduced. Defaults to False"
+                ),
+            ),
+        ] = False
+        min_batch_size: Annotated[
+            int,
+            Field(
+                title="Minimum batch size",
+                description="The smallest batch size the adaptive batch size can choose",
+                ge=1,
+            ),
+        ] = 1
+        max_batch_size: Annotated[
+            int,
+            Field(
+                title="Maximum batch size",
+                description="The largest batch size the adaptive batch size can choose",
+                ge=1,
+            ),
+        ] = 1000
+        target_response_time: Annotated[
+            float,
+            Field(
+                title="Target response time",
+                description=(
+                    "The number of seconds the adaptive batch size aims for a batch to take "
+                    "to post. Defaults to 10"
+                ),
+                gt=0,
+            ),
+        ] = 10.0
+        max_request_size: Annotated[
+            int,
+            Field(
+                title="Maximum request size",
+                description=(
+                    "The request body size, in bytes, the adaptive batch size keeps batches "
+                    "below. Defaults to 5000000"
+                ),
+                ge=1,
+            ),
+        ] = 5_000_000
         rerun_failed_records: Annotated[
             bool,
             Field(
@@ -149,6 +343,19 @@ class BatchPoster(MigrationTaskBase):
                 ),
             ),
         ] = False
+        version_lookup_batch_size: Annotated[
+            int,
+            Field(
+                title="Version lookup batch size",
+                description=(
+                    "Number of record IDs to look up per request when fetching the existing "
+                    "records for an upsert. Lookups that would make the query string too "
+                    "long are sent to the POST-based retrieve endpoint of the record type, "
+                    "where one exists. Defaults to 90"
+                ),
+                ge=1,
+            ),
+        ] = 90
         preserve_statistical_codes: Annotated[
             bool,
             Field(
@@ -220,6 +427,92 @@ class BatchPoster(MigrationTaskBase):
                 ),
             ),
         ] = []
+        bisect_failed_batches: Annotated[
+            bool,
+            Field(
+                title="Bisect failed batches",
+                description=(
+                    "Toggles whether or not batches rejected with HTTP 422 should be split "
+                    "in halves and re-posted until the failing records are isolated. The "
+                    "halves that succeed are posted right away, and only the records that "
+                    "fail on their own end up in the failed records file. When enabled, "
+                    "failed records are not rerun after the main run. Defaults to False"
+                ),
+            ),
+        ] = False
+        resume: Annotated[
+            bool,
+            Field(
+                title="Resume",
+                description=(
+                    "Toggles whether or not to resume an interrupted run from the checkpoint "
+                    "journal in the results folder, instead of posting the files from the "
+                    "start. The journal records how far each file has been posted, and is "
+                    "updated after the outcome of each batch has been recorded. When "
+                    "enabled, the journal and the failed records file are also synced to "
+                    "disk after each batch, so that the run can be resumed even after the "
+                    "machine crashes. Defaults to False"
+                ),
+            ),
+        ] = False
+        concurrent_batches: Annotated[
+            int,
+            Field(
+                title="Concurrent batches",
+                description=(
+                    "Number of batches to post to FOLIO at the same time. Values above 1 "
+                    "enable pipelined posting, where batches are read ahead into a bounded "
+                    "queue and posted by a pool of workers, while the outcome of each batch "
+                    "is still recorded in file order. Capped by the "
+                    "FOLIO_MAX_CONCURRENT_REQUESTS environment variable. Defaults to 1"
+                ),
+                ge=1,
+            ),
+        ] = 1
+        http_pool_size: Annotated[
+            int,
+            Field(
+                title="HTTP connection pool size",
+                description=(
+                    "Maximum number of open connections to FOLIO in the HTTP connection pool "
+                    "shared by all requests in the task. Defaults to 20"
+                ),
+                ge=1,
+            ),
+        ] = 20
+        http_keepalive_connections: Annotated[
+            int,
+            Field(
+                title="HTTP keep-alive connections",
+                description=(
+                    "Maximum number of idle connections kept alive in the HTTP connection "
+                    "pool between requests. Defaults to 20"
+                ),
+                ge=0,
+            ),
+        ] = 20
+        http_keepalive_expiry: Annotated[
+            float,
+            Field(
+                title="HTTP keep-alive expiry",
+                description=(
+                    "Number of seconds an idle connection is kept alive in the HTTP "
+                    "connection pool. Defaults to 60"
+                ),
+                ge=0,
+            ),
+        ] = 60.0
+        use_http2: Annotated[
+            bool,
+            Field(
+                title="Use HTTP/2",
+                description=(
+                    "Toggles HTTP/2 for the connections to FOLIO. Only takes effect if the "
+                    "optional h2 package is installed (pip install "
+                    "folio_migration_tools[http2]). Defaults to True"
+                ),
+            ),
+        ] = True
 
     task_configuration: TaskConfiguration
 
@@ -262,91 +555,205 @@ class BatchPoster(MigrationTaskBase):
         self.failed_objects: list = []
         self.batch_size = self.task_configuration.batch_size
         logger.info("Batch size is %s", self.batch_size)
+        self.batch_sizer: Optional[AdaptiveBatchSizer] = None
+        if self.task_configuration.adaptive_batch_size:
+            self.batch_sizer = AdaptiveBatchSizer(
+                self.task_configuration.batch_size,
+                self.task_configuration.min_batch_size,
+                self.task_configuration.max_batch_size,
+                self.task_configuration.target_response_time,
+                self.task_configuration.max_request_size,
+            )
+            self.batch_size = self.batch_sizer.size
+            logger.info(
+                "Adaptive batch size is on. Batch sizes will be kept between %s and %s",
+                self.batch_sizer.minimum,
+                self.batch_sizer.maximum,
+            )
+        self.posting_seconds = 0.0
         self.processed = 0
         self.failed_batches = 0
         self.users_created = 0
         self.users_updated = 0
         self.users_per_group: dict = {}
         self.failed_fields: set = set()
+        self.batches_bisected = 0
+        self.records_isolated = 0
         self.num_failures = 0
         self.num_posted = 0
         self.starting_record_count_in_folio: Optional[int] = None
         self.finished_record_count_in_folio: Optional[int] = None
-        # Semaphore to limit concurrent async requests (lazily initialized)
+        # Semaphore to limit concurrent async requests (initialized in do_work)
         self._semaphore: Optional[asyncio.Semaphore] = None
         self._max_concurrent_requests = int(os.environ.get("FOLIO_MAX_CONCURRENT_REQUESTS", 10))
+        # Pooled HTTP client shared by all requests in the task (lazily initialized)
+        self.http_client: Optional[httpx.AsyncClient] = None
+        self.checkpoint = CheckpointJournal(
+            self.folder_structure.results_folder
+            / f"checkpoint_{self.task_configuration.name}.json",
+            self.task_configuration.resume,
+        )
+        self.prefetch_versions = bool(
+            self.query_params.get("upsert", False) and self.api_info.get("query_endpoint", "")
+        )
+        self.use_pipelined_posting = (
+            self.task_configuration.object_type != "Extradata"
+            and self.api_info.get("is_batch", False)
+            and (self.task_configuration.concurrent_batches > 1 or self.prefetch_versions)
+        )
 
-    async def do_work(self):  # noqa: C901
+    async def do_work(self):
         with open(
             self.folder_structure.failed_recs_path, "w", encoding="utf-8"
         ) as failed_recs_file:
             self.get_starting_record_count()
+            self._semaphore = asyncio.Semaphore(self._max_concurrent_requests)
+            posting_started = time.monotonic()
             try:
-                batch = []
-                for idx, file_def in enumerate(self.task_configuration.files):  # noqa: B007
-                    path = self.folder_structure.results_folder / file_def.file_name
-                    with open(path) as rows:
-                        logger.info("Running %s", path)
-                        last_row = ""
-                        for self.processed, row in enumerate(rows, start=1):
-                            last_row = row
-                            if row.strip():
-                                try:
-                                    if self.task_configuration.object_type == "Extradata":
-                                        self.post_extra_data(row, self.processed, failed_recs_file)
-                                    elif not self.api_info["is_batch"]:
-                                        self.post_single_records(
-                                            row, self.processed, failed_recs_file
-                                        )
-                                    else:
-                                        batch = await self.post_record_batch(
-                                            batch, failed_recs_file, row
-                                        )
-                                except UnicodeDecodeError as unicode_error:
-                                    self.handle_unicode_error(unicode_error, last_row)
-                                except TransformationProcessError as tpe:
-                                    self.handle_generic_exception(
-                                        tpe,
-                                        last_row,
-                                        batch,
-                                        self.processed,
-                                        failed_recs_file,
-                                    )
-                                    batch = []
-                                    raise
-                                except TransformationRecordFailedError as exception:
-                                    self.handle_generic_exception(
-                                        exception,
-                                        last_row,
-                                        batch,
-                                        self.processed,
-                                        failed_recs_file,
-                                    )
-                                    batch = []
-                                except (FileNotFoundError, PermissionError) as ose:
-                                    logger.exception("Error reading file: %s", ose)
-
-            except Exception as ee:
-                if "idx" in locals() and self.task_configuration.files[idx:]:
-                    for file_def in self.task_configuration.files[idx:]:
-                        path = self.folder_structure.results_folder / file_def.file_name
-                        try:
-                            with open(path, "r") as failed_file:
-                                failed_file.seek(self.processed)
-                                failed_recs_file.write(failed_file.read())
-                                self.processed = 0
-                        except (FileNotFoundError, PermissionError) as ose:
-                            logger.exception("Error reading file: %s", ose)
-                raise ee
+                if self.use_pipelined_posting:
+                    await self.post_batches_pipelined(failed_recs_file)
+                else:
+                    for file_def in self.task_configuration.files:
+                        await self.post_file(file_def, failed_recs_file)
+            except Exception:
+                self.write_unposted_rows_to_failed_file(failed_recs_file)
+                raise
             finally:
-                if self.task_configuration.object_type != "Extradata" and any(batch):
-                    try:
+                self.posting_seconds = time.monotonic() - posting_started
+                logger.info("Done posting %s records. ", self.processed)
+
+    async def post_file(self, file_def: FileDefinition, failed_recs_file):  # noqa: C901
+        """Posts the records in one results file, one row or one batch at a time.
+
+        Reading starts at the checkpointed position of the file, and the checkpoint
+        journal is updated each time the outcome of a batch has been recorded.
+
+        Args:
+            file_def (FileDefinition): The file to post
+            failed_recs_file: The open failed records file
+        """
+        path = self.folder_structure.results_folder / file_def.file_name
+        batch: list = []
+        with open_records(path, binary=True) as rows:
+            logger.info("Running %s", path)
+            offset = self.seek_to_checkpoint(rows, file_def.file_name)
+            last_row = ""
+            for raw_row in rows:
+                self.processed += 1
+                offset += len(raw_row)
+                try:
+                    last_row = raw_row.decode("utf-8")
+                    if not last_row.strip():
+                        continue
+                    if self.task_configuration.object_type == "Extradata":
+                        await self.post_extra_data(last_row, self.processed, failed_recs_file)
+                    elif not self.api_info["is_batch"]:
+                        await self.post_single_records(last_row, self.processed, failed_recs_file)
+                    else:
+                        batch.append(self.parse_record_row(last_row))
+                        if len(batch) < int(self.batch_size):
+                            continue
                         await self.post_batch(batch, failed_recs_file, self.processed)
-                    except Exception as exception:
-                        self.handle_generic_exception(
-                            exception, last_row, batch, self.processed, failed_recs_file
+                    if not batch and self.processed % int(self.batch_size):
+                        # Rows posted one by one are checkpointed once per batch_size rows
+                        continue
+                except UnicodeDecodeError as unicode_error:
+                    self.handle_unicode_error(unicode_error, raw_row)
+                    continue
+                except TransformationProcessError as tpe:
+                    self.handle_generic_exception(
+                        tpe, last_row, batch, self.processed, failed_recs_file
+                    )
+                    if batch:
+                        # The batch is in the failed records file, so the run can move past it
+                        self.commit_checkpoint(
+                            file_def.file_name, offset, self.processed, batch, failed_recs_file
                         )
-                logger.info("Done posting %s records. ", self.processed)
+                    raise
+                except TransformationRecordFailedError as exception:
+                    self.handle_generic_exception(
+                        exception, last_row, batch, self.processed, failed_recs_file
+                    )
+                self.commit_checkpoint(
+                    file_def.file_name, offset, self.processed, batch, failed_recs_file
+                )
+                batch = []
+            if batch:
+                try:
+                    await self.post_batch(batch, failed_recs_file, self.processed)
+                except TransformationRecordFailedError as exception:
+                    self.handle_generic_exception(
+                        exception, last_row, batch, self.processed, failed_recs_file
+                    )
+            self.commit_checkpoint(
+                file_def.file_name, offset, self.processed, batch, failed_recs_file
+            )
+
+    def seek_to_checkpoint(self, rows, file_name: str) -> int:
+        """Moves a results file to its checkpointed position when resuming a run.
+
+        Args:
+            rows: The results file, opened by open_records in binary mode
+            file_name (str): The name of the results file
+
+        Returns:
+            int: The byte offset reading starts at
+        """
+        offset, self.processed = self.checkpoint.get_position(file_name)
+        if offset:
+            seek_records(rows, offset)
+            logger.info(
+                "Resuming %s after row %s (byte offset %s)", file_name, self.processed, offset
+            )
+        return offset
+
+    def commit_checkpoint(
+        self, file_name: str, offset: int, num_records: int, batch: list, failed_recs_file
+    ):
+        """Records in the checkpoint journal that a file has been posted up to an offset.
+
+        The failed records file is flushed first, and synced to disk along with the
+        journal when resuming is enabled, so that records written to it are never
+        skipped when the run is resumed.
+
+        Args:
+            file_name (str): The name of the results file
+            offset (int): The byte offset just after the last recorded row
+            num_records (int): The row number of the last recorded row
+            batch (list): The last recorded batch
+            failed_recs_file: The open failed records file
+        """
+        failed_recs_file.flush()
+        if self.checkpoint.sync:
+            try:
+                os.fsync(failed_recs_file.fileno())
+            except io.UnsupportedOperation:
+                pass
+        self.checkpoint.commit(file_name, offset, num_records, [r.get("id") for r in batch])
+
+    def write_unposted_rows_to_failed_file(self, failed_recs_file):
+        """Writes every row after the checkpointed position of each file to the failed file.
+
+        Used when the run halts, so that the failed records file together with the
+        recorded outcomes covers all rows in the files.
+
+        Args:
+            failed_recs_file: The open failed records file
+        """
+        for file_def in self.task_configuration.files:
+            path = self.folder_structure.results_folder / file_def.file_name
+            try:
+                with open_records(path, binary=True) as unposted_file:
+                    seek_records(
+                        unposted_file, self.checkpoint.get_position(file_def.file_name)[0]
+                    )
+                    for raw_row in unposted_file:
+                        if raw_row.strip():
+                            self.num_failures += 1
+                            failed_recs_file.write(raw_row.decode("utf-8", errors="replace"))
+            except (FileNotFoundError, PermissionError) as ose:
+                logger.exception("Error reading file: %s", ose)
+        failed_recs_file.flush()
 
     @staticmethod
     def set_consortium_source(json_rec):
@@ -366,26 +773,22 @@ class BatchPoster(MigrationTaskBase):
         Returns:
             None
         """
-        fetch_batch_size = 90
+        fetch_batch_size = self.task_configuration.version_lookup_batch_size
         fetch_tasks = []
         existing_records = {}
 
-        # Initialize the semaphore for this batch of record retrievals
-        self._semaphore = asyncio.Semaphore(self._max_concurrent_requests)
-
         for i in range(0, len(batch), fetch_batch_size):
             batch_slice = batch[i : i + fetch_batch_size]
-            fetch_tasks.append(
-                self.get_with_retry(
-                    query_api,
-                    params={
-                        "query": (
-                            f"id==({' OR '.join([r['id'] for r in batch_slice if 'id' in r])})"
-                        ),
-                        "limit": fetch_batch_size,
-                    },
-                )
-            )
+            params = {
+                "query": f"id==({' OR '.join([r['id'] for r in batch_slice if 'id' in r])})",
+                "limit": fetch_batch_size,
+            }
+            if len(params["query"]) > MAX_GET_QUERY_LENGTH and (
+                retrieve_endpoint := self.api_info.get("retrieve_endpoint", "")
+            ):
+                fetch_tasks.append(self.retrieve_with_retry(retrieve_endpoint, params))
+            else:
+                fetch_tasks.append(self.get_with_retry(query_api, params=params))
 
         responses = await asyncio.gather(*fetch_tasks)
 
@@ -396,6 +799,23 @@ class BatchPoster(MigrationTaskBase):
             if record["id"] in existing_records:
                 self.prepare_record_for_upsert(record, existing_records[record["id"]])
 
+    def start_version_prefetch(self, batch) -> Optional[asyncio.Task]:
+        """Starts fetching the existing records for an upsert batch in the background.
+
+        This lets the lookups for the next batch run while the current batch is posted.
+
+        Args:
+            batch (list): List of records to fetch versions for
+
+        Returns:
+            Optional[asyncio.Task]: The running lookup, or None if the task is not an upsert
+        """
+        if not self.prefetch_versions:
+            return None
+        return asyncio.create_task(
+            self.set_version(batch, self.api_info["query_endpoint"], self.api_info["object_name"])
+        )
+
     def patch_record(self, new_record: dict, existing_record: dict, patch_paths: List[str]):
         """Updates new_record with values from existing_record according to patch_paths.
 
@@ -514,8 +934,73 @@ class BatchPoster(MigrationTaskBase):
             updates.update(keep_new)
             new_record.update(updates)
 
+    def get_http_client(self) -> httpx.AsyncClient:
+        """Returns the pooled HTTP client shared by all requests in the task.
+
+        The client is created on first use and kept open until wrap_up, so that
+        connections to FOLIO are reused between batches instead of being set up
+        for every request. HTTP/2 is used if enabled and the h2 package is installed.
+
+        Returns:
+            httpx.AsyncClient: The shared HTTP client
+        """
+        if self.http_client is None or self.http_client.is_closed:
+            self.http_client = httpx.AsyncClient(
+                timeout=self.folio_client.folio_parameters.timeout,
+                verify=self.folio_client.ssl_verify,
+                base_url=self.folio_client.gateway_url,
+                auth=self.folio_client.folio_auth,
+                headers=self.folio_client.base_headers,
+                limits=httpx.Limits(
+                    max_connections=self.task_configuration.http_pool_size,
+                    max_keepalive_connections=self.task_configuration.http_keepalive_connections,
+                    keepalive_expiry=self.task_configuration.http_keepalive_expiry,
+                ),
+                http2=self.task_configuration.use_http2 and HTTP2_AVAILABLE,
+            )
+        return self.http_client
+
+    async def close_http_client(self):
+        if self.http_client is not None and not self.http_client.is_closed:
+            await self.http_client.aclose()
+        self.http_client = None
+
+    @folio_errors
+    async def get_json(self, url: str, params: dict):
+        response = await self.get_http_client().get(url, params=params)
+        response.raise_for_status()
+        return response.json()
+
+    @folio_errors
+    async def retrieve_json(self, url: str, payload: dict):
+        response = await self.get_http_client().post(url, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    @folio_errors
+    async def post_json(self, url: str, payload: str) -> "Response":
+        response = await self.get_http_client().post(url, content=payload)
+        response.raise_for_status()
+        return response
+
     async def get_with_retry(self, url: str, params=None):
-        """Wrapper around folio_get_async with selective retry logic.
+        """Wrapper around get_json with selective retry logic.
+
+        See request_with_retry for the retry rules.
+        """
+        if params is None:
+            params = {}
+        return await self.request_with_retry(self.get_json, url, params)
+
+    async def retrieve_with_retry(self, url: str, payload: dict):
+        """Wrapper around retrieve_json with selective retry logic.
+
+        See request_with_retry for the retry rules.
+        """
+        return await self.request_with_retry(self.retrieve_json, url, payload)
+
+    async def request_with_retry(self, request, url: str, payload: dict):
+        """Sends a lookup request with selective retry logic.
 
         Retries on:
         - Connection errors (FolioConnectionError): Always retry
@@ -524,15 +1009,21 @@ class BatchPoster(MigrationTaskBase):
 
         Does NOT retry on:
         - Client errors (4xx except 429): Bad request, won't succeed on retry
+
+        Args:
+            request: The coroutine function sending the request (get_json or retrieve_json)
+            url (str): The API path
+            payload (dict): The query parameters or request body
+
+        Returns:
+            dict: The parsed JSON response
         """
-        if params is None:
-            params = {}
         retries = 3
 
         for attempt in range(retries):
             try:
                 async with self._semaphore:
-                    return await self.folio_client.folio_get_async(url, query_params=params)
+                    return await request(url, payload)
 
             except folioclient.FolioConnectionError as e:
                 # Network/connection errors - always retry
@@ -570,24 +1061,186 @@ class BatchPoster(MigrationTaskBase):
                         logger.exception(f"HTTP {status_code} error (not retryable): {e}")
                     raise
 
-    async def post_record_batch(self, batch, failed_recs_file, row):
+    def parse_record_row(self, row: str) -> dict:
         json_rec = json.loads(row.split("\t")[-1])
         if self.task_configuration.object_type == "ShadowInstances":
             self.set_consortium_source(json_rec)
         if self.processed == 1:
             logger.info(json.dumps(json_rec, indent=True))
-        batch.append(json_rec)
-        if len(batch) == int(self.batch_size):
-            await self.post_batch(batch, failed_recs_file, self.processed)
-            batch = []
-        return batch
+        return json_rec
+
+    async def post_batches_pipelined(self, failed_recs_file):
+        """Posts all batches using a reader, a pool of workers and an ordered writer.
+
+        The reader fills a bounded queue with batches, the workers post them concurrently
+        and the writer records successes and failures in the order the batches were read,
+        committing the checkpoint journal after each batch.
+
+        Args:
+            failed_recs_file: The open failed records file
+        """
+        num_workers = min(
+            self.task_configuration.concurrent_batches, self._max_concurrent_requests
+        )
+        logger.info("Posting up to %s batches concurrently", num_workers)
+        batch_queue: asyncio.Queue = asyncio.Queue(maxsize=num_workers * 2)
+        result_queue: asyncio.Queue = asyncio.Queue()
+        tasks = [
+            asyncio.create_task(self.read_batches(batch_queue, num_workers)),
+            asyncio.create_task(
+                self.record_batch_results(result_queue, failed_recs_file, num_workers)
+            ),
+        ]
+        tasks.extend(
+            asyncio.create_task(self.post_batch_worker(batch_queue, result_queue))
+            for _ in range(num_workers)
+        )
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            while not batch_queue.empty():
+                if (item := batch_queue.get_nowait()) is not None and item[-1] is not None:
+                    item[-1].cancel()
+                    tasks.append(item[-1])
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def read_batches(self, batch_queue: asyncio.Queue, num_workers: int):
+        """Reads the result files into batches and puts them on the batch queue.
+
+        Each file is read from its checkpointed position, and each batch carries the
+        byte offset just after its last row so that the writer can commit it. For
+        upserts, the lookup of the existing records starts as soon as a batch is read,
+        so it runs while the batches ahead of it in the queue are posted.
+
+        Args:
+            batch_queue (asyncio.Queue): Bounded queue consumed by the workers
+            num_workers (int): Number of workers to send a stop signal to when done
+        """
+        sequence = 0
+        for file_def in self.task_configuration.files:
+            path = self.folder_structure.results_folder / file_def.file_name
+            batch: list = []
+            with open_records(path, binary=True) as rows:
+                logger.info("Running %s", path)
+                offset = self.seek_to_checkpoint(rows, file_def.file_name)
+                for raw_row in rows:
+                    self.processed += 1
+                    offset += len(raw_row)
+                    try:
+                        row = raw_row.decode("utf-8")
+                    except UnicodeDecodeError as unicode_error:
+                        self.handle_unicode_error(unicode_error, raw_row)
+                        continue
+                    if not row.strip():
+                        continue
+                    batch.append(self.parse_record_row(row))
+                    if len(batch) == int(self.batch_size):
+                        await batch_queue.put(
+                            (
+                                sequence,
+                                batch,
+                                self.processed,
+                                file_def.file_name,
+                                offset,
+                                self.start_version_prefetch(batch),
+                            )
+                        )
+                        sequence += 1
+                        batch = []
+            await batch_queue.put(
+                (
+                    sequence,
+                    batch,
+                    self.processed,
+                    file_def.file_name,
+                    offset,
+                    self.start_version_prefetch(batch) if batch else None,
+                )
+            )
+            sequence += 1
+        for _ in range(num_workers):
+            await batch_queue.put(None)
+
+    async def post_batch_worker(self, batch_queue: asyncio.Queue, result_queue: asyncio.Queue):
+        """Posts batches from the batch queue until it receives a stop signal.
 
-    def post_extra_data(self, row: str, num_records: int, failed_recs_file):
+        Failed rows reported by the server and exceptions are handed to the writer
+        instead of being recorded here, so that the outcome is recorded in order.
+
+        Args:
+            batch_queue (asyncio.Queue): Queue of batches and their positions in the files
+            result_queue (asyncio.Queue): Queue the outcome of each batch is put on
+        """
+        while (item := await batch_queue.get()) is not None:
+            sequence, batch, num_records, file_name, offset, prefetch = item
+            failed_rows = io.StringIO()
+            outcome = None
+            try:
+                if prefetch is not None:
+                    await prefetch
+                    await self.post_batch(batch, failed_rows, num_records, set_versions=False)
+                elif batch:
+                    await self.post_batch(batch, failed_rows, num_records)
+            except Exception as exception:
+                outcome = exception
+            await result_queue.put(
+                (sequence, batch, num_records, file_name, offset, failed_rows.getvalue(), outcome)
+            )
+        await result_queue.put(None)
+
+    async def record_batch_results(
+        self,
+        result_queue: asyncio.Queue,
+        failed_recs_file,
+        num_workers: int,
+    ):
+        """Records the outcome of each posted batch in the order the batches were read.
+
+        Args:
+            result_queue (asyncio.Queue): Queue of batch outcomes from the workers
+            failed_recs_file: The open failed records file
+            num_workers (int): Number of workers that will send a stop signal
+
+        Raises:
+            Exception: Any exception other than TransformationRecordFailedError
+                raised while posting a batch halts the run
+        """
+        finished_workers = 0
+        next_sequence = 0
+        completed: dict = {}
+        while finished_workers < num_workers:
+            result = await result_queue.get()
+            if result is None:
+                finished_workers += 1
+                continue
+            completed[result[0]] = result
+            while next_sequence in completed:
+                _, batch, num_records, file_name, offset, failed_rows, outcome = completed.pop(
+                    next_sequence
+                )
+                next_sequence += 1
+                failed_recs_file.write(failed_rows)
+                if outcome is not None:
+                    self.handle_generic_exception(
+                        outcome, "", batch, num_records, failed_recs_file
+                    )
+                    if not isinstance(outcome, TransformationRecordFailedError):
+                        self.commit_checkpoint(
+                            file_name, offset, num_records, batch, failed_recs_file
+                        )
+                        raise outcome
+                self.commit_checkpoint(file_name, offset, num_records, batch, failed_recs_file)
+
+    async def post_extra_data(self, row: str, num_records: int, failed_recs_file):
         (object_name, data) = row.split("\t")
         url = self.get_extradata_endpoint(self.task_configuration, object_name, data)
         body = data
         try:
-            _ = self.folio_client.folio_post(url, payload=body)
+            _ = await self.post_json(url, body)
             self.num_posted += 1
         except folioclient.FolioHTTPError as fhe:
             if fhe.response.status_code == 422:
@@ -643,12 +1296,12 @@ class BatchPoster(MigrationTaskBase):
 
         return object_types[object_name]
 
-    def post_single_records(self, row: str, num_records: int, failed_recs_file):
+    async def post_single_records(self, row: str, num_records: int, failed_recs_file):
         if self.api_info["is_batch"]:
             raise TypeError("This record type supports batch processing, use post_batch method")
         url = self.api_info.get("api_endpoint")
         try:
-            _ = self.folio_client.folio_post(url, payload=row)
+            _ = await self.post_json(url, row)
             self.num_posted += 1
         except folioclient.FolioHTTPError as fhe:
             if fhe.response.status_code == 422:
@@ -699,25 +1352,25 @@ class BatchPoster(MigrationTaskBase):
             "%s Posting failed. Encoding error reading file",
             unicode_error,
         )
-        logger.info(
-            "Failing row, either the one shown here or the next row in %s",
-            self.task_configuration.file.file_name,
-        )
+        logger.info("Failing row is row %s:", self.processed)
         logger.info(last_row)
         logger.info("=========Stack trace==============")
         traceback.print_exc()  # type: ignore
         logger.info("=======================")
 
-    async def post_batch(self, batch, failed_recs_file, num_records):
-        if self.query_params.get("upsert", False) and self.api_info.get("query_endpoint", ""):
+    async def post_batch(self, batch, failed_recs_file, num_records, set_versions=True):
+        if (
+            set_versions
+            and self.query_params.get("upsert", False)
+            and self.api_info.get("query_endpoint", "")
+        ):
             await self.set_version(
                 batch, self.api_info["query_endpoint"], self.api_info["object_name"]
             )
-        response = self.do_post(batch)
-        if response.status_code == 401:
-            logger.error("Authorization failed (%s). Fetching new auth token...", response.text)
-            self.folio_client.login()
-            response = self.do_post(batch)
+        response = await self.do_post_with_login(batch, failed_recs_file, num_records)
+        if response is None:
+            return
+        self.adjust_batch_size(batch, response)
         if response.status_code == 201:
             logger.info(
                 (
@@ -771,6 +1424,13 @@ class BatchPoster(MigrationTaskBase):
             )
         elif response.status_code == 422:
             resp = json.loads(response.text)
+            if self.task_configuration.bisect_failed_batches and len(batch) > 1:
+                logger.info(
+                    "Batch of %s records rejected (HTTP 422). Bisecting to isolate failures",
+                    len(batch),
+                )
+                await self.bisect_failed_batch(batch, failed_recs_file, num_records)
+                return
             raise TransformationRecordFailedError(
                 "",
                 f"HTTP {response.status_code}\t"
@@ -787,7 +1447,13 @@ class BatchPoster(MigrationTaskBase):
         ):
             logger.error(response.text)
             raise TransformationProcessError("", response.text, "")
-
+        elif response.status_code == 413 and self.batch_sizer and len(batch) > 1:
+            logger.warning(
+                "Batch of %s records (%s) too large (HTTP 413). Posting it in halves",
+                len(batch),
+                get_req_size(response),
+            )
+            await self.split_rejected_batch(batch, failed_recs_file, num_records)
         else:
             try:
                 logger.info(response.text)
@@ -805,20 +1471,104 @@ class BatchPoster(MigrationTaskBase):
                 resp,
             )
 
-    def do_post(self, batch):
-        with self.folio_client.get_folio_http_client() as http_client:
-            url = self.api_info["api_endpoint"]
-            if self.api_info["object_name"] == "users":
-                payload = {self.api_info["object_name"]: list(batch), "totalRecords": len(batch)}
-            elif self.api_info["total_records"]:
-                payload = {"records": list(batch), "totalRecords": len(batch)}
-            else:
-                payload = {self.api_info["object_name"]: batch}
-            return http_client.post(
-                url,
-                json=payload,
-                params=self.query_params,
+    async def bisect_failed_batch(self, batch, failed_recs_file, num_records):
+        """Isolates the failing records of a rejected batch by posting it in halves.
+
+        Halves that are rejected with HTTP 422 are split again by post_batch, until the
+        failing records are isolated. Halves that succeed are posted right away. Records
+        that fail on their own, and halves failing for other reasons, are handled as
+        failed batches.
+
+        Args:
+            batch (list): The rejected batch
+            failed_recs_file: The open failed records file
+            num_records (int): The row number of the last record in the batch
+        """
+        self.batches_bisected += 1
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                await self.post_batch(half, failed_recs_file, num_records, set_versions=False)
+            except TransformationRecordFailedError as error:
+                if len(half) == 1:
+                    self.records_isolated += 1
+                self.handle_generic_exception(error, "", half, num_records, failed_recs_file)
+
+    async def do_post_with_login(
+        self, batch, failed_recs_file, num_records
+    ) -> Optional["Response"]:
+        """Posts a batch, logging in again if the token has expired.
+
+        With adaptive batch size, a batch that times out is posted in halves instead.
+
+        Args:
+            batch (list): The batch to post
+            failed_recs_file: The open failed records file
+            num_records (int): The row number of the last record in the batch
+
+        Returns:
+            Optional[Response]: The response from FOLIO, or None if the batch was split
+        """
+        try:
+            response = await self.do_post(batch)
+            if response.status_code == 401:
+                logger.error(
+                    "Authorization failed (%s). Fetching new auth token...", response.text
+                )
+                self.folio_client.login()
+                response = await self.do_post(batch)
+        except httpx.TimeoutException:
+            if not (self.batch_sizer and len(batch) > 1):
+                raise
+            logger.warning("Batch of %s records timed out. Posting it in halves", len(batch))
+            await self.split_rejected_batch(batch, failed_recs_file, num_records)
+            return None
+        return response
+
+    def adjust_batch_size(self, batch, response: "Response"):
+        """Lets the adaptive batch size learn from a successfully posted batch.
+
+        Args:
+            batch (list): The posted batch
+            response (Response): The response from FOLIO
+        """
+        if self.batch_sizer and response.status_code in (200, 201):
+            self.batch_sizer.record_response(
+                len(batch), response.elapsed.total_seconds(), len(response.request.content)
             )
+            self.batch_size = self.batch_sizer.size
+
+    async def split_rejected_batch(self, batch, failed_recs_file, num_records):
+        """Reduces the batch size and posts a batch that was too large in halves.
+
+        Args:
+            batch (list): The rejected batch
+            failed_recs_file: The open failed records file
+            num_records (int): The row number of the last record in the batch
+        """
+        self.batch_sizer.record_rejection(len(batch))
+        self.batch_size = self.batch_sizer.size
+        middle = len(batch) // 2
+        for half in (batch[:middle], batch[middle:]):
+            try:
+                await self.post_batch(half, failed_recs_file, num_records, set_versions=False)
+            except TransformationRecordFailedError as error:
+                self.handle_generic_exception(error, "", half, num_records, failed_recs_file)
+
+    async def do_post(self, batch):
+        url = self.api_info["api_endpoint"]
+        if self.api_info["object_name"] == "users":
+            payload = {self.api_info["object_name"]: list(batch), "totalRecords": len(batch)}
+        elif self.api_info["total_records"]:
+            payload = {"records": list(batch), "totalRecords": len(batch)}
+        else:
+            payload = {self.api_info["object_name"]: batch}
+        return await self.get_http_client().post(
+            url,
+            content=json_serializer.dumps_bytes(payload),
+            headers={"content-type": "application/json"},
+            params=self.query_params,
+        )
 
     def get_current_record_count_in_folio(self):
         if "query_endpoint" in self.api_info:
@@ -909,7 +1659,19 @@ class BatchPoster(MigrationTaskBase):
                 f"Discrepancy in record count {run}",
                 discrepancy,
             )
+        if self.batches_bisected:
+            self.migration_report.set(
+                "GeneralStatistics", f"Batches bisected {run}", self.batches_bisected
+            )
+            self.migration_report.set(
+                "GeneralStatistics",
+                f"Failed records isolated by bisection {run}",
+                self.records_isolated,
+            )
+        if self.batch_sizer:
+            self.report_batch_sizes(run)
         await self.rerun_run()
+        await self.close_http_client()
         with open(self.folder_structure.migration_reports_file, "w+") as report_file:
             self.migration_report.write_migration_report(
                 f"{self.task_configuration.object_type} loading report",
@@ -920,19 +1682,50 @@ class BatchPoster(MigrationTaskBase):
             self.migration_report.write_json_report(raw_report_file)
         self.clean_out_empty_logs()
 
+    def report_batch_sizes(self, run: str):
+        """Adds the batch sizes chosen by the adaptive batch size to the migration report.
+
+        Args:
+            run (str): Which run the figures belong to
+        """
+        for measure, value in [
+            ("Smallest batch size", self.batch_sizer.smallest),
+            ("Largest batch size", self.batch_sizer.largest),
+            ("Final batch size", self.batch_sizer.size),
+            ("Batch size reductions after HTTP 413 or timeouts", self.batch_sizer.reductions),
+        ]:
+            self.migration_report.set("GeneralStatistics", f"{measure} {run}", value)
+        if self.posting_seconds > 0:
+            self.migration_report.set(
+                "GeneralStatistics",
+                f"Records posted per second {run}",
+                round(self.num_posted / self.posting_seconds),
+            )
+
     async def rerun_run(self):
-        if self.task_configuration.rerun_failed_records and (self.num_failures > 0):
+        if self.task_configuration.bisect_failed_batches and (self.num_failures > 0):
+            logger.info(
+                (
+                    "Failing records were isolated by bisection during the run, "
+                    "so they will not be rerun. File with failed records is located at %s"
+                ),
+                str(self.folder_structure.failed_recs_path),
+            )
+        elif self.task_configuration.rerun_failed_records and (self.num_failures > 0):
             logger.info(
                 "Rerunning the %s failed records from the load with a batchsize of 1",
                 self.num_failures,
             )
             try:
                 self.task_configuration.batch_size = 1
+                self.task_configuration.adaptive_batch_size = False
                 self.task_configuration.files = [
                     FileDefinition(file_name=str(self.folder_structure.failed_recs_path.name))
                 ]
                 temp_report = copy.deepcopy(self.migration_report)
                 temp_start = self.start_datetime
+                temp_http_client = self.http_client
+                temp_checkpoint = self.checkpoint
                 self.task_configuration.rerun_failed_records = False
                 self.__init__(
                     self.task_configuration,
@@ -943,6 +1736,8 @@ class BatchPoster(MigrationTaskBase):
                 self.performing_rerun = True
                 self.migration_report = temp_report
                 self.start_datetime = temp_start
+                self.http_client = temp_http_client
+                self.checkpoint = temp_checkpoint
                 await self.do_work()
                 await self.wrap_up()
                 logger.info("Done rerunning the posting")
@@ -976,6 +1771,7 @@ def get_api_info(object_type: str, use_safe: bool = True):
                 else "/item-storage/batch/synchronous-unsafe"
             ),
             "query_endpoint": "/item-storage/items",
+            "retrieve_endpoint": "/item-storage/items/retrieve",
             "is_batch": True,
             "total_records": False,
             "addSnapshotId": False,
@@ -989,6 +1785,7 @@ def get_api_info(object_type: str, use_safe: bool = True):
                 else "/holdings-storage/batch/synchronous-unsafe"
             ),
             "query_endpoint": "/holdings-storage/holdings",
+            "retrieve_endpoint": "/holdings-storage/holdings/retrieve",
             "is_batch": True,
             "total_records": False,
             "addSnapshotId": False,
@@ -1002,6 +1799,7 @@ def get_api_info(object_type: str, use_safe: bool = True):
                 else "/instance-storage/batch/synchronous-unsafe"
             ),
             "query_endpoint": "/instance-storage/instances",
+            "retrieve_endpoint": "/instance-storage/instances/retrieve",
             "is_batch": True,
             "total_records": False,
             "addSnapshotId": False,
@@ -155,6 +155,7 @@ class BibsTransformer(MigrationTaskBase):
             self.folio_client, library_config, self.task_configuration, statcode_mapping
         )
         self.bib_ids: set = set()
+        self.setup_hrid_allocator()
         if (
             self.task_configuration.reset_hrid_settings
             and self.task_configuration.update_hrid_settings
@@ -9,10 +9,13 @@ import csv
 import ctypes
 import json
 import logging
+import os
 import sys
 import time
 import traceback
-from typing import Annotated, List, Optional
+from collections.abc import MutableMapping
+from pathlib import Path
+from typing import Annotated, List, Optional, Tuple
 
 from folio_uuid.folio_namespaces import FOLIONamespaces
 from httpx import HTTPError
@@ -22,8 +25,17 @@ from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
 )
+from folio_migration_tools.file_sharding import (
+    SHARDS_PER_PROCESS,
+    DelimitedFileSharder,
+    FileShard,
+    shard_part_path,
+    transform_in_shards,
+    use_sharding,
+)
 from folio_migration_tools.helper import Helper
-from folio_migration_tools.holdings_helper import HoldingsHelper
+from folio_migration_tools.holdings_helper import HoldingsHelper, HoldingsMerger
+from folio_migration_tools.holdings_merge_store import DEFAULT_CACHE_SIZE, DiskHoldingsStore
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.library_configuration import (
     FileDefinition,
@@ -188,6 +200,41 @@ class HoldingsCsvTransformer(MigrationTaskBase):
                 ),
             ),
         ] = ""
+        worker_processes: Annotated[
+            int,
+            Field(
+                title="Worker processes",
+                description=(
+                    "Number of worker processes to map the rows of each source file with. "
+                    "With more than one, the file is split into shards on record boundaries "
+                    "that are mapped in parallel. The holdings are merged in the main process, "
+                    "in file order. Default is 1, transforming the files in the main process."
+                ),
+                ge=1,
+            ),
+        ] = 1
+        spill_holdings_to_disk: Annotated[
+            bool,
+            Field(
+                title="Spill holdings to disk",
+                description=(
+                    "Keep the holdings being merged in a file in the results folder instead "
+                    "of in memory, with only the most recently used ones in memory. Use this "
+                    "when the holdings do not fit in memory. Default is false."
+                ),
+            ),
+        ] = False
+        holdings_cache_size: Annotated[
+            int,
+            Field(
+                title="Holdings cache size",
+                description=(
+                    "The number of holdings to keep in memory when spilling holdings to "
+                    f"disk. Default is {DEFAULT_CACHE_SIZE}."
+                ),
+                ge=1,
+            ),
+        ] = DEFAULT_CACHE_SIZE
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -242,7 +289,8 @@ class HoldingsCsvTransformer(MigrationTaskBase):
                 if self.task_configuration.holdings_note_type_map_file_name
                 else None,
             )
-            self.holdings = {}
+            self.holdings = self.create_holdings_store()
+            self.holdings_merger = HoldingsMerger()
             self.total_records = 0
             self.holdings_id_map = self.load_id_map(self.folder_structure.holdings_id_map_path)
             self.results_path = self.folder_structure.created_objects_path
@@ -275,13 +323,12 @@ class HoldingsCsvTransformer(MigrationTaskBase):
             if any(self.task_configuration.previously_generated_holdings_files):
                 for file_name in self.task_configuration.previously_generated_holdings_files:
                     logger.info("Processing %s", file_name)
-                    self.holdings.update(
-                        HoldingsHelper.load_previously_generated_holdings(
-                            self.folder_structure.results_folder / file_name,
-                            self.task_configuration.holdings_merge_criteria,
-                            self.mapper.migration_report,
-                            self.task_configuration.holdings_type_uuid_for_boundwiths,
-                        )
+                    HoldingsHelper.load_previously_generated_holdings(
+                        self.folder_structure.results_folder / file_name,
+                        self.task_configuration.holdings_merge_criteria,
+                        self.mapper.migration_report,
+                        self.task_configuration.holdings_type_uuid_for_boundwiths,
+                        self.holdings,
                     )
 
             else:
@@ -313,6 +360,20 @@ class HoldingsCsvTransformer(MigrationTaskBase):
             sys.exit(1)
         logger.info("Init done")
 
+    def create_holdings_store(self) -> MutableMapping:
+        """Create the mapping from merge key to holdings the created holdings are kept in.
+
+        Returns:
+            MutableMapping: A dict, or a DiskHoldingsStore if holdings spill to disk.
+        """
+        if not self.task_configuration.spill_holdings_to_disk:
+            return {}
+        return DiskHoldingsStore(
+            self.folder_structure.results_folder
+            / f"holdings_merge_store{self.folder_structure.file_template}.sqlite",
+            self.task_configuration.holdings_cache_size,
+        )
+
     def load_call_number_type_map(self):
         with open(
             self.folder_structure.mapping_files_folder
@@ -376,12 +437,12 @@ class HoldingsCsvTransformer(MigrationTaskBase):
     async def wrap_up(self):
         logger.info("Done. Transformer wrapping up...")
         self.extradata_writer.flush()
-        if any(self.holdings):
+        if self.holdings:
             logger.info(
                 "Saving holdings created to %s",
                 self.folder_structure.created_objects_path,
             )
-            with open(self.folder_structure.created_objects_path, "w+") as holdings_file:
+            with self.open_created_objects_file() as holdings_file:
                 for holding in self.holdings.values():
                     for legacy_id in holding["formerIds"]:
                         # Prevent the first item in a boundwith to be overwritten
@@ -397,6 +458,8 @@ class HoldingsCsvTransformer(MigrationTaskBase):
             self.mapper.save_id_map_file(
                 self.folder_structure.holdings_id_map_path, self.holdings_id_map
             )
+        if isinstance(self.holdings, DiskHoldingsStore):
+            self.holdings.close()
         with open(self.folder_structure.migration_reports_file, "w") as migration_report_file:
             self.mapper.migration_report.write_migration_report(
                 i18n_t("Holdings transformation report"),
@@ -434,6 +497,9 @@ class HoldingsCsvTransformer(MigrationTaskBase):
 
     def process_single_file(self, file_def: FileDefinition):
         full_path = self.folder_structure.data_folder / "items" / file_def.file_name
+        if use_sharding(self.task_configuration.worker_processes):
+            self.process_single_file_in_shards(file_def, full_path)
+            return
         with open(full_path, encoding="utf-8-sig") as records_file:
             self.mapper.migration_report.add_general_statistics(
                 i18n_t("Number of files processed")
@@ -467,7 +533,141 @@ class HoldingsCsvTransformer(MigrationTaskBase):
                 f"Total records processed: {self.total_records:,}"
             )
 
+    def process_single_file_in_shards(self, file_def: FileDefinition, full_path: Path):
+        """Map the rows of a source file in worker processes and merge the holdings here.
+
+        The workers map the rows of their shard into holdings, ready to be merged, and
+        write them to a part file. The parent merges the parts in file order, so the
+        merged holdings and bound-with parts are the same as in a sequential run.
+
+        Args:
+            file_def (FileDefinition): The file to transform.
+            full_path (Path): Path to the source file.
+        """
+        sharder = DelimitedFileSharder(full_path)
+        shards = sharder.scan(self.task_configuration.worker_processes * SHARDS_PER_PROCESS)
+        self.mapper.report_source_file_rows(full_path, sharder.total_rows, sharder.empty_rows)
+        self.mapper.migration_report.add_general_statistics(i18n_t("Number of files processed"))
+        logger.info(
+            "Mapping %s records in %s shards using %s worker processes",
+            sharder.num_records,
+            len(shards),
+            self.task_configuration.worker_processes,
+        )
+        records_processed = 0
+        for shard, result in transform_in_shards(
+            shards,
+            self.task_configuration.worker_processes,
+            self.mapper,
+            self.extradata_writer,
+            lambda shard: self.transform_shard(file_def, sharder, shard),
+        ):
+            part_path = shard_part_path(self.folder_structure.created_objects_path, shard)
+            with open(part_path, encoding="utf-8") as part_file:
+                for line in part_file:
+                    self.merge_mapped_row(*json.loads(line))
+            os.remove(part_path)
+            records_processed = shard.first_record_index + result["records"]
+            logger.info(f"{records_processed:,} records processed.")
+        self.total_records = records_processed
+        logger.info(
+            f"Done processing {file_def.file_name} containing {self.total_records:,} records. "
+            f"Total records processed: {self.total_records:,}"
+        )
+
+    def transform_shard(
+        self, file_def: FileDefinition, sharder: DelimitedFileSharder, shard: FileShard
+    ) -> dict:
+        """Map the rows of one shard in a worker process.
+
+        Args:
+            file_def (FileDefinition): The file the shard belongs to.
+            sharder (DelimitedFileSharder): The sharder that created the shard.
+            shard (FileShard): The shard to map.
+
+        Returns:
+            dict: The number of rows read from the shard.
+        """
+        records = 0
+        part_path = shard_part_path(self.folder_structure.created_objects_path, shard)
+        with open(part_path, "w", encoding="utf-8") as part_file:
+            for records, legacy_record in enumerate(sharder.read(shard), start=1):
+                idx = shard.first_record_index + records - 1
+                try:
+                    self.mapper.verify_legacy_record(legacy_record, idx)
+                    folio_rec, legacy_id = self.mapper.do_map(
+                        legacy_record, f"row # {idx}", FOLIONamespaces.holdings
+                    )
+                    generated_id = folio_rec["id"]
+                    holdings_from_row, all_instance_ids = self.prepare_holdings(
+                        folio_rec, legacy_id, file_def
+                    )
+                    part_file.write(
+                        json.dumps(
+                            [idx, generated_id, legacy_id, all_instance_ids, holdings_from_row]
+                        )
+                        + "\n"
+                    )
+                except TransformationProcessError as process_error:
+                    self.mapper.handle_transformation_process_error(idx, process_error)
+                except TransformationRecordFailedError as error:
+                    self.mapper.handle_transformation_record_failed_error(idx, error)
+                except Exception as excepion:
+                    self.mapper.handle_generic_exception(idx, excepion)
+                self.mapper.migration_report.add_general_statistics(
+                    i18n_t("Number of Legacy items in file")
+                )
+        return {"records": records}
+
+    def merge_mapped_row(
+        self,
+        idx: int,
+        generated_id: str,
+        legacy_id: str,
+        all_instance_ids: list,
+        holdings_from_row: List[dict],
+    ):
+        """Merge the holdings mapped from one row by a worker process.
+
+        Workers only detect duplicate legacy ids within their shard, so the id
+        generated for the row is checked against all rows merged so far.
+        """
+        try:
+            if generated_id in self.mapper.unique_record_ids:
+                raise TransformationRecordFailedError(
+                    f"row # {idx}",
+                    "Legacy id already generated.",
+                    f"UUID: {generated_id}, seed: {legacy_id}",
+                )
+            self.mapper.unique_record_ids.add(generated_id)
+            for folio_holding in holdings_from_row:
+                self.merge_holding_in(folio_holding, all_instance_ids, legacy_id)
+        except TransformationProcessError as process_error:
+            self.mapper.handle_transformation_process_error(idx, process_error)
+        except TransformationRecordFailedError as error:
+            self.mapper.handle_transformation_record_failed_error(idx, error)
+        except Exception as excepion:
+            self.mapper.handle_generic_exception(idx, excepion)
+
     def post_process_holding(self, folio_rec: dict, legacy_id: str, file_def: FileDefinition):
+        holdings_from_row, all_instance_ids = self.prepare_holdings(folio_rec, legacy_id, file_def)
+        for folio_holding in holdings_from_row:
+            self.merge_holding_in(folio_holding, all_instance_ids, legacy_id)
+
+    def prepare_holdings(
+        self, folio_rec: dict, legacy_id: str, file_def: FileDefinition
+    ) -> Tuple[List[dict], list]:
+        """Turn a mapped record into the holdings to merge, before any merging is done.
+
+        Args:
+            folio_rec (dict): The holdings record mapped from a legacy row.
+            legacy_id (str): The legacy id of the row.
+            file_def (FileDefinition): The file the row comes from.
+
+        Returns:
+            Tuple[List[dict], list]: The holdings created from the row, and the
+                instance ids of the row.
+        """
         HoldingsHelper.handle_notes(folio_rec)
         HoldingsHelper.remove_empty_holdings_statements(folio_rec)
 
@@ -488,8 +688,8 @@ class HoldingsCsvTransformer(MigrationTaskBase):
 
         for folio_holding in holdings_from_row:
             self.mapper.perform_additional_mappings(legacy_id, folio_holding, file_def)
-            self.merge_holding_in(folio_holding, all_instance_ids, legacy_id)
         self.mapper.report_folio_mapping(folio_holding, self.mapper.schema)
+        return holdings_from_row, all_instance_ids
 
     def create_bound_with_holdings(self, folio_holding, legacy_id: str):
         folio_holding["formerIds"] = explode_former_ids(folio_holding)
@@ -556,7 +756,7 @@ class HoldingsCsvTransformer(MigrationTaskBase):
 
     def merge_holding(self, holdings_key: str, new_holdings_record: dict):
         self.holdings[holdings_key] = HoldingsHelper.merge_holding(
-            self.holdings[holdings_key], new_holdings_record
+            self.holdings[holdings_key], new_holdings_record, self.holdings_merger
         )
 
 
@@ -314,6 +314,7 @@ class HoldingsMarcTransformer(MigrationTaskBase):
             statcode_mapping,
         )
         self.add_supplemental_mfhd_mappings()
+        self.setup_hrid_allocator()
         if (
             self.task_configuration.reset_hrid_settings
             and self.task_configuration.update_hrid_settings
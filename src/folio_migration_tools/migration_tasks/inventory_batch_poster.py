@@ -23,6 +23,7 @@ from folio_migration_tools.library_configuration import (
 )
 from folio_migration_tools.migration_report import MigrationReport
 from folio_migration_tools.migration_tasks.migration_task_base import MigrationTaskBase
+from folio_migration_tools.record_writer import raise_if_compressed
 from folio_migration_tools.task_configuration import AbstractTaskConfiguration
 
 logger = logging.getLogger(__name__)
@@ -271,6 +272,7 @@ class InventoryBatchPoster(MigrationTaskBase):
                 if not path.exists():
                     logger.error("File not found: %s", path)
                     raise FileNotFoundError(f"File not found: {path}")
+                raise_if_compressed(path)
                 file_paths.append(path)
                 logger.info("Will process file: %s", path)
 
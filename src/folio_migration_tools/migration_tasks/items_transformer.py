@@ -12,9 +12,9 @@ import sys
 import time
 import traceback
 import uuid
+from functools import partial
 from typing import Annotated, List, Optional
 
-import i18n
 from folio_uuid.folio_namespaces import FOLIONamespaces
 from pydantic import Field
 
@@ -22,6 +22,16 @@ from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
 )
+from folio_migration_tools.file_sharding import (
+    SHARDS_PER_PROCESS,
+    DelimitedFileSharder,
+    FileShard,
+    append_part,
+    remove_part_lines,
+    shard_part_path,
+    transform_in_shards,
+    use_sharding,
+)
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.library_configuration import (
@@ -221,6 +231,19 @@ class ItemsTransformer(MigrationTaskBase):
                 ),
             ),
         ] = False
+        worker_processes: Annotated[
+            int,
+            Field(
+                title="Worker processes",
+                description=(
+                    "Number of worker processes to transform each source file with. "
+                    "With more than one, the file is split into shards on record boundaries "
+                    "that are transformed in parallel, and the results are merged in file "
+                    "order. Default is 1, transforming the files in the main process."
+                ),
+                ge=1,
+            ),
+        ] = 1
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -333,7 +356,7 @@ class ItemsTransformer(MigrationTaskBase):
                 self.folio_keys,
                 False,
             ),
-            self.load_id_map(self.folder_structure.holdings_id_map_path),
+            self.open_id_map(self.folder_structure.holdings_id_map_path),
             statcode_mapping,
             self.load_ref_data_mapping_file(
                 "status.name",
@@ -369,7 +392,7 @@ class ItemsTransformer(MigrationTaskBase):
 
     async def do_work(self):
         logger.info("Starting....")
-        with open(self.folder_structure.created_objects_path, "w+") as results_file:
+        with self.open_created_objects_file() as results_file:
             for file_def in self.task_config.files:
                 try:
                     self.process_single_file(file_def, results_file)
@@ -421,6 +444,9 @@ class ItemsTransformer(MigrationTaskBase):
     def process_single_file(self, file_def: FileDefinition, results_file):
         full_path = self.folder_structure.legacy_records_folder / file_def.file_name
         logger.info("Processing %s", full_path)
+        if use_sharding(self.task_config.worker_processes):
+            self.process_single_file_in_shards(file_def, full_path, results_file)
+            return
         records_in_file = 0
         with open(full_path, encoding="utf-8-sig") as records_file:
             self.mapper.migration_report.add_general_statistics(
@@ -428,50 +454,7 @@ class ItemsTransformer(MigrationTaskBase):
             )
             start = time.time()
             for idx, record in enumerate(self.mapper.get_objects(records_file, full_path)):
-                try:
-                    if idx == 0:
-                        logger.info("First legacy record:")
-                        logger.info(json.dumps(record, indent=4))
-                        self.mapper.verify_legacy_record(record, idx)
-                    folio_rec, legacy_id = self.mapper.do_map(
-                        record, f"row {idx}", FOLIONamespaces.items
-                    )
-
-                    self.mapper.perform_additional_mappings(legacy_id, folio_rec, file_def)
-                    self.handle_circulation_notes(folio_rec, self.folio_client.current_user)
-                    self.handle_notes(folio_rec)
-                    self.handle_boundwith_parts(folio_rec, legacy_id)
-
-                    if idx == 0:
-                        logger.info("First FOLIO record:")
-                        logger.info(json.dumps(folio_rec, indent=4))
-                    # TODO: turn this into a asynchronous task
-                    Helper.write_to_file(results_file, folio_rec)
-                    self.mapper.migration_report.add_general_statistics(
-                        i18n_t("Number of records written to disk")
-                    )
-                    self.mapper.report_folio_mapping(folio_rec, self.mapper.schema)
-                except TransformationProcessError as process_error:
-                    self.mapper.handle_transformation_process_error(idx, process_error)
-                except TransformationRecordFailedError as data_error:
-                    self.mapper.handle_transformation_record_failed_error(idx, data_error)
-                except AttributeError as attribute_error:
-                    traceback.print_exc()
-                    logger.fatal(attribute_error)
-                    logger.info("Quitting...")
-                    sys.exit(1)
-                except Exception as exception:
-                    self.mapper.handle_generic_exception(idx, exception)
-                self.mapper.migration_report.add(
-                    "GeneralStatistics",
-                    i18n.t(
-                        "Number of Legacy items in %{container}",
-                        container=file_def.file_name,
-                    ),
-                )
-                self.mapper.migration_report.add_general_statistics(
-                    i18n_t("Number of Legacy items in total")
-                )
+                self.process_record(idx, record, file_def, results_file)
                 self.print_progress(idx, start)
                 records_in_file = idx + 1
 
@@ -481,6 +464,201 @@ class ItemsTransformer(MigrationTaskBase):
             )
         self.total_records += records_in_file
 
+    def process_record(self, idx: int, record: dict, file_def: FileDefinition, results_file):
+        """Transform one legacy item and write it to the results file.
+
+        Args:
+            idx (int): Index of the record in the source file.
+            record (dict): The legacy item.
+            file_def (FileDefinition): The file the record comes from.
+            results_file: The open file to write the FOLIO item to.
+
+        Returns:
+            dict: The FOLIO item if it was written, otherwise None.
+        """
+        written_record = None
+        try:
+            if idx == 0:
+                logger.info("First legacy record:")
+                logger.info(json.dumps(record, indent=4))
+                self.mapper.verify_legacy_record(record, idx)
+            folio_rec, legacy_id = self.mapper.do_map(record, f"row {idx}", FOLIONamespaces.items)
+
+            self.mapper.perform_additional_mappings(legacy_id, folio_rec, file_def)
+            self.handle_circulation_notes(folio_rec, self.folio_client.current_user)
+            self.handle_notes(folio_rec)
+            self.handle_boundwith_parts(folio_rec, legacy_id)
+
+            if idx == 0:
+                logger.info("First FOLIO record:")
+                logger.info(json.dumps(folio_rec, indent=4))
+            Helper.write_to_file(results_file, folio_rec)
+            written_record = folio_rec
+            self.mapper.migration_report.add_general_statistics(
+                i18n_t("Number of records written to disk")
+            )
+            self.mapper.report_folio_mapping(folio_rec, self.mapper.schema)
+        except TransformationProcessError as process_error:
+            self.mapper.handle_transformation_process_error(idx, process_error)
+        except TransformationRecordFailedError as data_error:
+            self.mapper.handle_transformation_record_failed_error(idx, data_error)
+        except AttributeError as attribute_error:
+            traceback.print_exc()
+            logger.fatal(attribute_error)
+            logger.info("Quitting...")
+            sys.exit(1)
+        except Exception as exception:
+            self.mapper.handle_generic_exception(idx, exception)
+        self.mapper.migration_report.add_translated(
+            "GeneralStatistics",
+            "Number of Legacy items in %{container}",
+            container=file_def.file_name,
+        )
+        self.mapper.migration_report.add_general_statistics(
+            i18n_t("Number of Legacy items in total")
+        )
+        return written_record
+
+    def process_single_file_in_shards(self, file_def: FileDefinition, full_path, results_file):
+        """Transform a source file in worker processes, one shard at a time per worker.
+
+        The shards are appended to the results file in file order. Item ids and
+        barcodes are only checked for duplicates within a shard by the workers, so
+        records duplicating ones from earlier shards are failed, along with their
+        extradata, or given a unique barcode here, the same way a sequential run would
+        have done.
+
+        Args:
+            file_def (FileDefinition): The file to transform.
+            full_path (Path): Path to the source file.
+            results_file: The open file to write the FOLIO items to.
+        """
+        sharder = DelimitedFileSharder(full_path)
+        shards = sharder.scan(self.task_config.worker_processes * SHARDS_PER_PROCESS)
+        self.mapper.report_source_file_rows(full_path, sharder.total_rows, sharder.empty_rows)
+        self.mapper.migration_report.add_general_statistics(i18n_t("Number of files processed"))
+        logger.info(
+            "Transforming %s records in %s shards using %s worker processes",
+            sharder.num_records,
+            len(shards),
+            self.task_config.worker_processes,
+        )
+        records_in_file = 0
+        for shard, result in transform_in_shards(
+            shards,
+            self.task_config.worker_processes,
+            self.mapper,
+            self.extradata_writer,
+            lambda shard: self.transform_shard(file_def, sharder, shard),
+        ):
+            records_in_file += result["records"]
+            duplicate_ids = self.mapper.unique_record_ids.intersection(result["ids"])
+            self.mapper.unique_record_ids.update(result["ids"])
+            duplicate_barcodes = self.mapper.unique_barcodes.intersection(result["barcodes"])
+            self.mapper.unique_barcodes.update(result["barcodes"])
+
+            append_part(
+                results_file,
+                shard_part_path(self.folder_structure.created_objects_path, shard),
+                (
+                    partial(
+                        self.keep_unique_item, duplicate_ids, duplicate_barcodes, result["ids"]
+                    )
+                    if duplicate_ids or duplicate_barcodes
+                    else None
+                ),
+            )
+            # Leave out the extradata, like bound-with parts, of the items left out
+            remove_part_lines(
+                shard_part_path(self.extradata_writer.path_to_file, shard),
+                {
+                    line_number
+                    for item_id in duplicate_ids.intersection(result["extradata"])
+                    for line_number in range(*result["extradata"][item_id])
+                },
+            )
+            logger.info(
+                "Shard %s of %s done. %s records processed",
+                shard.index + 1,
+                len(shards),
+                f"{shard.first_record_index + result['records']:,}",
+            )
+        logger.info(
+            f"Done processing {file_def.file_name} containing {records_in_file:,} records. "
+            f"Total records processed: {records_in_file:,}"
+        )
+        self.total_records += records_in_file
+
+    def keep_unique_item(
+        self,
+        duplicate_ids: set,
+        duplicate_barcodes: set,
+        rows: dict,
+        folio_rec: dict,
+    ) -> bool:
+        """Fail or fix an item from a shard that duplicates one from an earlier shard.
+
+        Args:
+            duplicate_ids (set): Item ids already written by earlier shards.
+            duplicate_barcodes (set): Normalized barcodes already used by earlier shards.
+            rows (dict): The index in the file of the row of every item in the shard.
+            folio_rec (dict): The FOLIO item written by the worker.
+
+        Returns:
+            bool: False if the item should be left out of the results.
+        """
+        if folio_rec["id"] in duplicate_ids:
+            self.mapper.migration_report.add(
+                "GeneralStatistics", i18n_t("Number of records written to disk"), -1
+            )
+            self.mapper.handle_transformation_record_failed_error(
+                rows[folio_rec["id"]],
+                TransformationRecordFailedError(
+                    folio_rec["id"], "Legacy id already generated.", folio_rec["id"]
+                ),
+            )
+            return False
+        barcode = folio_rec.get("barcode", "")
+        if barcode.strip().lower() in duplicate_barcodes:
+            folio_rec["barcode"] = self.mapper.make_barcode_unique(folio_rec["id"], barcode)
+        return True
+
+    def transform_shard(
+        self, file_def: FileDefinition, sharder: DelimitedFileSharder, shard: FileShard
+    ) -> dict:
+        """Transform the records of one shard in a worker process.
+
+        Args:
+            file_def (FileDefinition): The file the shard belongs to.
+            sharder (DelimitedFileSharder): The sharder that created the shard.
+            shard (FileShard): The shard to transform.
+
+        Returns:
+            dict: The number of records read, the normalized barcodes of the items
+                written to the part file of the shard, the index of the row of every
+                item by its id, and the range of the lines in the extradata part file
+                written for every item with extradata.
+        """
+        ids = {}
+        extradata = {}
+        barcodes = []
+        records = 0
+        part_path = shard_part_path(self.folder_structure.created_objects_path, shard)
+        with open(part_path, "w", encoding="utf-8") as part_file:
+            for records, record in enumerate(sharder.read(shard), start=1):
+                idx = shard.first_record_index + records - 1
+                extradata_start = self.extradata_writer.records_written
+                if folio_rec := self.process_record(idx, record, file_def, part_file):
+                    ids[folio_rec["id"]] = idx
+                    if self.extradata_writer.records_written > extradata_start:
+                        extradata[folio_rec["id"]] = (
+                            extradata_start,
+                            self.extradata_writer.records_written,
+                        )
+                    if barcode := folio_rec.get("barcode", "").strip().lower():
+                        barcodes.append(barcode)
+        return {"records": records, "ids": ids, "extradata": extradata, "barcodes": barcodes}
+
     @staticmethod
     def handle_notes(folio_object):
         if folio_object.get("notes", []):
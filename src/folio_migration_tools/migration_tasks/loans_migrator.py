@@ -14,7 +14,7 @@ import time
 import traceback
 from datetime import datetime, timedelta
 from collections.abc import AsyncGenerator
-from typing import Annotated, List, Literal
+from typing import Annotated, Dict, List, Literal, Optional, Set, Tuple
 from urllib.error import HTTPError
 from zoneinfo import ZoneInfo
 
@@ -110,6 +110,18 @@ class LoansMigrator(MigrationTaskBase):
                 ),
             ),
         ] = False
+        max_concurrent_checkouts: Annotated[
+            int,
+            Field(
+                title="Maximum concurrent checkouts",
+                description=(
+                    "The number of loans to check out at the same time. Loans for the same "
+                    "item, patron or proxy patron are never checked out at the same time, "
+                    "and are handled in the order of the loans file. By default is 1."
+                ),
+                ge=1,
+            ),
+        ] = 1
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -269,29 +281,114 @@ class LoansMigrator(MigrationTaskBase):
             )
             if self.task_configuration.starting_row > 1:
                 logger.info(f"Skipping {(starting_index)} records")
-            for num_loans, legacy_loan in enumerate(
-                self.valid_legacy_loans[starting_index:], start=1
-            ):
-                t0_migration = time.time()
-                self.migration_report.add_general_statistics(
-                    i18n_t("Processed pre-validated loans")
-                )
-                try:
-                    self.checkout_single_loan(legacy_loan)
-                except TransformationRecordFailedError as ee:
-                    logger.exception(
-                        f"Transformation failed in row {num_loans}  "
-                        f"Item barcode: {legacy_loan.item_barcode} "
-                        f"Patron barcode: {legacy_loan.patron_barcode}"
+            await self.checkout_loans(self.valid_legacy_loans[starting_index:])
+
+    async def checkout_loans(self, legacy_loans: List[LegacyLoan]):
+        """Checks the legacy loans out, max_concurrent_checkouts at a time.
+
+        A loan is only started when no loan in flight has the same item, patron or proxy
+        patron, so that two checkouts never activate and deactivate the same patron, or
+        handle failures of the same item, at the same time. Loans sharing any of these
+        are checked out in file order. The outcome of each loan is added to the migration
+        report in file order, whatever order the checkouts finish in.
+
+        Args:
+            legacy_loans (List[LegacyLoan]): The loans to check out.
+        """
+        max_concurrent = self.task_configuration.max_concurrent_checkouts
+        loans = enumerate(legacy_loans, start=1)
+        pending: List[Tuple[int, LegacyLoan]] = []
+        in_flight: Dict[asyncio.Task, Tuple[int, LegacyLoan, Set[str]]] = {}
+        busy_keys: Set[str] = set()
+        done_loans: Dict[int, Tuple[LegacyLoan, MigrationReport, Optional[Exception]]] = {}
+        next_to_report = 1
+        all_loans_read = False
+        t0_migration = time.time()
+        while pending or in_flight or not all_loans_read:
+            while not all_loans_read and len(pending) < max_concurrent * 10:
+                if (next_loan := next(loans, None)) is None:
+                    all_loans_read = True
+                else:
+                    pending.append(next_loan)
+            # A loan can not overtake an earlier waiting loan it shares a key with
+            blocked_keys = set(busy_keys)
+            for num_loans, legacy_loan in list(pending):
+                if len(in_flight) >= max_concurrent:
+                    break
+                keys = checkout_keys(legacy_loan)
+                if blocked_keys.isdisjoint(keys):
+                    pending.remove((num_loans, legacy_loan))
+                    busy_keys.update(keys)
+                    task = asyncio.create_task(
+                        asyncio.to_thread(self.checkout_loan_separately, legacy_loan)
                     )
-                    ee.log_it()
-                except Exception as ee:
-                    logger.exception(
-                        f"Error in row {num_loans}  Item barcode: {legacy_loan.item_barcode} "
-                        f"Patron barcode: {legacy_loan.patron_barcode} {ee}"
+                    in_flight[task] = (num_loans, legacy_loan, keys)
+                blocked_keys.update(keys)
+            if not in_flight:
+                continue
+            finished, _ = await asyncio.wait(in_flight, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                num_loans, legacy_loan, keys = in_flight.pop(task)
+                busy_keys.difference_update(keys)
+                done_loans[num_loans] = (legacy_loan, *task.result())
+            while next_to_report in done_loans:
+                legacy_loan, loan_report, error = done_loans.pop(next_to_report)
+                self.report_checkout(next_to_report, legacy_loan, loan_report, error)
+                if next_to_report % 25 == 0:
+                    logger.info(
+                        f"{timings(self.t0, t0_migration, next_to_report)} {next_to_report}"
                     )
-                if num_loans % 25 == 0:
-                    logger.info(f"{timings(self.t0, t0_migration, num_loans)} {num_loans}")
+                    t0_migration = time.time()
+                next_to_report += 1
+
+    def checkout_loan_separately(
+        self, legacy_loan: LegacyLoan
+    ) -> Tuple[MigrationReport, Optional[Exception]]:
+        """Checks a legacy loan out, keeping its statistics in a migration report of its own.
+
+        Runs in a worker thread. The checkout is made on a shallow copy of the migrator,
+        so it shares the HTTP client and the failed loans, but not the migration report.
+
+        Args:
+            legacy_loan (LegacyLoan): The Legacy loan
+
+        Returns:
+            Tuple[MigrationReport, Optional[Exception]]: The statistics of the checkout,
+                and the error it failed with, if any.
+        """
+        worker = copy.copy(self)
+        worker.migration_report = MigrationReport()
+        worker.circulation_helper = copy.copy(self.circulation_helper)
+        worker.circulation_helper.migration_report = worker.migration_report
+        try:
+            worker.checkout_single_loan(legacy_loan)
+        except Exception as ee:
+            return worker.migration_report, ee
+        return worker.migration_report, None
+
+    def report_checkout(
+        self,
+        num_loans: int,
+        legacy_loan: LegacyLoan,
+        loan_report: MigrationReport,
+        error: Optional[Exception],
+    ):
+        self.migration_report.add_general_statistics(i18n_t("Processed pre-validated loans"))
+        self.migration_report.merge(loan_report.counters)
+        if isinstance(error, TransformationRecordFailedError):
+            logger.error(
+                f"Transformation failed in row {num_loans}  "
+                f"Item barcode: {legacy_loan.item_barcode} "
+                f"Patron barcode: {legacy_loan.patron_barcode}",
+                exc_info=error,
+            )
+            error.log_it()
+        elif error:
+            logger.error(
+                f"Error in row {num_loans}  Item barcode: {legacy_loan.item_barcode} "
+                f"Patron barcode: {legacy_loan.patron_barcode} {error}",
+                exc_info=error,
+            )
 
     def checkout_single_loan(self, legacy_loan: LegacyLoan):
         """Checks a legacy loan out. Retries once if it fails.
@@ -1063,6 +1160,14 @@ class LoansMigrator(MigrationTaskBase):
             return False, None, None
 
 
+def checkout_keys(legacy_loan: LegacyLoan) -> Set[str]:
+    """The item and patrons a checkout of the loan changes in FOLIO."""
+    keys = {f"item:{legacy_loan.item_barcode}", f"patron:{legacy_loan.patron_barcode}"}
+    if legacy_loan.proxy_patron_barcode:
+        keys.add(f"patron:{legacy_loan.proxy_patron_barcode}")
+    return keys
+
+
 def timings(t0, t0func, num_objects):
     avg = num_objects / (time.time() - t0)
     elapsed = time.time() - t0
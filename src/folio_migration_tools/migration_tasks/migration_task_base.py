@@ -9,6 +9,7 @@ must inherit from. It handles common functionality including:
 - Error tracking and reporting
 """
 
+import copy
 import csv
 import io
 import json
@@ -17,10 +18,13 @@ import os
 import sys
 import time
 from abc import abstractmethod
+from collections import ChainMap
 from datetime import datetime, timezone
+from functools import partial
 from genericpath import isfile
+from itertools import accumulate
 from pathlib import Path
-from typing import Annotated, Dict, List, Optional
+from typing import Annotated, Dict, List, Mapping, Optional
 
 import folioclient
 from folio_uuid.folio_namespaces import FOLIONamespaces
@@ -33,15 +37,34 @@ from folio_migration_tools.custom_exceptions import (
     TransformationRecordFailedError,
 )
 from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.file_sharding import (
+    SHARDS_PER_PROCESS,
+    EarlierShardValues,
+    FileShard,
+    MarcFileSharder,
+    append_part,
+    manifest_part_path,
+    shard_part_path,
+    transform_in_shards,
+    use_sharding,
+)
 from folio_migration_tools.folder_structure import FolderStructure
+from folio_migration_tools.id_map_index import IdMapIndex
 from folio_migration_tools.logging_config import setup_logging
+from folio_migration_tools.marc_rules_transformation.hrid_allocator import (
+    HRID_RESERVATIONS_FILE_NAME,
+    HridAllocator,
+)
 from folio_migration_tools.marc_rules_transformation.marc_file_processor import (
     MarcFileProcessor,
+    MarcShardFileProcessor,
 )
 from folio_migration_tools.marc_rules_transformation.marc_reader_wrapper import (
     DEFAULT_MARC_RECORD_PREPROCESSORS,
     MARCReaderWrapper,
 )
+from folio_migration_tools.record_writer import RecordWriter
+from folio_migration_tools.snapshot_cache import SnapshotCache
 
 logger = logging.getLogger(__name__)
 
@@ -106,10 +129,16 @@ class MigrationTaskBase:
             logger.critical(process_error)
             logger.critical("Halting...")
             sys.exit(1)
+        if self.library_configuration.use_snapshot_cache:
+            SnapshotCache(
+                self.folder_structure.snapshot_cache_folder,
+                self.library_configuration.refresh_snapshot_cache,
+            ).install(self.folio_client)
         self.num_exeptions: int = 0
         self.extradata_writer = ExtradataWriter(
             self.folder_structure.transformation_extra_data_path
         )
+        self.extradata_writer.compression = self.library_configuration.output_compression
 
         # Initialize handler reference (may be set by setup_logging if use_logging=True)
         self.data_issue_file_handler: logging.Handler | None = None
@@ -188,20 +217,20 @@ class MigrationTaskBase:
         for filename in files:
             logger.info("\t%s", filename)
 
-    def load_instance_id_map(self, raise_if_empty=True) -> dict:
+    def load_instance_id_map(self, raise_if_empty=True) -> Mapping:
         """Load instance ID maps for holdings and other transformations.
 
         Handles ECS environments where instances are transformed for central and
         data tenants separately, but data tenants need central tenant instance IDs.
         """
         map_files = []
-        instance_id_map = {}
+        instance_id_map: Mapping = {}
         if self.library_configuration.is_ecs and self.central_folder_structure:
             logger.info(
                 "Loading ECS central tenant instance id map from %s",
                 self.central_folder_structure.instance_id_map_path,
             )
-            instance_id_map = self.load_id_map(
+            instance_id_map = self.open_id_map(
                 self.central_folder_structure.instance_id_map_path,
                 raise_if_empty=False,
             )
@@ -210,17 +239,59 @@ class MigrationTaskBase:
                 "Loading member tenant isntance id map from %s",
                 self.folder_structure.instance_id_map_path,
             )
-        instance_id_map = self.load_id_map(
+        instance_id_map = self.open_id_map(
             self.folder_structure.instance_id_map_path,
             raise_if_empty=False,
             existing_id_map=instance_id_map,
         )
         map_files.append(str(self.folder_structure.instance_id_map_path))
-        if not any(instance_id_map) and raise_if_empty:
+        if not instance_id_map and raise_if_empty:
             map_file_paths = ", ".join(map_files)
             raise TransformationProcessError("", "Instance id map is empty", map_file_paths)
         return instance_id_map
 
+    def open_id_map(self, map_path, raise_if_empty=False, existing_id_map=None) -> Mapping:
+        """Open a legacy id map of an earlier task for lookups.
+
+        Loads the map into a dict like load_id_map, unless memory_mapped_id_maps is set
+        in the library configuration. Then the map is opened as an IdMapIndex, which
+        keeps the map on disk. Only use this for maps that are not added to.
+
+        Args:
+            map_path: Path to the id map file.
+            raise_if_empty (bool): Raise a TransformationProcessError if the map is empty.
+            existing_id_map (Mapping): Entries loaded from another id map, that the
+                entries of this map take precedence over.
+
+        Returns:
+            Mapping: The legacy id map.
+        """
+        if not self.library_configuration.memory_mapped_id_maps:
+            return self.load_id_map(map_path, raise_if_empty, existing_id_map)
+        if not isfile(map_path):
+            logger.warning("No legacy id map found at %s. Will build one from scratch", map_path)
+            return existing_id_map or {}
+        id_map = IdMapIndex(map_path)
+        if existing_id_map:
+            id_map = ChainMap(id_map, existing_id_map)
+        if not id_map and raise_if_empty:
+            raise TransformationProcessError("", "Legacy id map is empty", map_path)
+        return id_map
+
+    def open_created_objects_file(self) -> RecordWriter:
+        """Open the file for the FOLIO records created by the task.
+
+        The records are written on a background thread, compressed as set by
+        output_compression in the library configuration.
+
+        Returns:
+            RecordWriter: The open file.
+        """
+        return RecordWriter(
+            self.folder_structure.created_objects_path,
+            self.library_configuration.output_compression,
+        )
+
     @staticmethod
     def load_id_map(map_path, raise_if_empty=False, existing_id_map=None):
         if not isfile(map_path):
@@ -309,6 +380,13 @@ class MigrationTaskBase:
             elapsed_formatted = "{0:.4g}".format(elapsed)
             logger.info(f"{num_processed:,} records processed. Recs/sec: {elapsed_formatted} ")
 
+    def setup_hrid_allocator(self):
+        """Have the HRID handler of the mapper reserve its HRIDs, if configured to."""
+        if getattr(self.task_configuration, "reserve_hrids", False):
+            self.mapper.hrid_handler.allocator = HridAllocator(
+                self.folder_structure.results_folder / HRID_RESERVATIONS_FILE_NAME
+            )
+
     def do_work_marc_transformer(
         self,
     ):
@@ -319,11 +397,14 @@ class MigrationTaskBase:
         if self.folder_structure.failed_records_transformation_file.is_file():
             os.remove(self.folder_structure.failed_records_transformation_file)
             logger.info("Removed failed transformation records file to prevent duplicating data")
-        with open(self.folder_structure.created_objects_path, "w+") as created_records_file:
+        with self.open_created_objects_file() as created_records_file:
             self.processor = MarcFileProcessor(
                 self.mapper, self.folder_structure, created_records_file
             )
             for file_def in self.task_configuration.files:
+                if use_sharding(self.task_configuration.worker_processes):
+                    self.process_marc_file_in_shards(file_def)
+                    continue
                 MARCReaderWrapper.process_single_file(
                     file_def,
                     self.processor,
@@ -331,6 +412,185 @@ class MigrationTaskBase:
                     self.folder_structure,
                 )
 
+    def process_marc_file_in_shards(self, file_def: library_configuration.FileDefinition):
+        """Transform a MARC file in worker processes, one shard at a time per worker.
+
+        Every shard gets a range of HRIDs of its own, sized from the scan of the
+        file, so the workers never hand out the same HRID. When 001s are preserved
+        as HRIDs, the workers also know the 001s of the earlier shards. Legacy ids are
+        only deduplicated within a shard by the workers, and across shards when the
+        outputs are merged, see MarcFileProcessor.append_shard.
+
+        Args:
+            file_def (library_configuration.FileDefinition): The file to transform.
+        """
+        full_path = self.folder_structure.legacy_records_folder / file_def.file_name
+        hrid_handler = self.mapper.hrid_handler
+        preserve_001s = self.task_configuration.hrid_handling == (
+            library_configuration.HridHandling.preserve001
+        )
+        sharder = MarcFileSharder(full_path)
+        shards = sharder.scan(
+            self.task_configuration.worker_processes * SHARDS_PER_PROCESS,
+            hrid_handler.unique_001s if preserve_001s else None,
+        )
+        hrid_offsets = list(accumulate(sharder.hrids_needed, initial=0))
+        hrid_handler.reserve_hrids(self.get_object_type(), hrid_offsets[-1])
+        logger.info(
+            "Transforming %s records from %s in %s shards using %s worker processes",
+            sharder.num_records,
+            file_def.file_name,
+            len(shards),
+            self.task_configuration.worker_processes,
+        )
+        hrid_counters = (hrid_handler.instance_hrid_counter, hrid_handler.holdings_hrid_counter)
+        for shard, result in transform_in_shards(
+            shards,
+            self.task_configuration.worker_processes,
+            self.mapper,
+            self.extradata_writer,
+            partial(self.transform_marc_shard, file_def, sharder, hrid_offsets, preserve_001s),
+        ):
+            self.processor.records_count += result["records_count"]
+            self.processor.failed_records_count += result["failed_records_count"]
+            self.mapper.parsed_records += result["parsed_records"]
+            if result["instance_hrid_counter"] > hrid_counters[0] + hrid_offsets[shard.index]:
+                hrid_handler.instance_hrid_counter = result["instance_hrid_counter"]
+            if result["holdings_hrid_counter"] > hrid_counters[1] + hrid_offsets[shard.index]:
+                hrid_handler.holdings_hrid_counter = result["holdings_hrid_counter"]
+            with open(self.folder_structure.failed_records_decode_file, "ab") as failed_file:
+                append_part(
+                    failed_file,
+                    shard_part_path(self.folder_structure.failed_records_decode_file, shard),
+                    binary=True,
+                )
+            append_part(
+                self.processor.failed_records_transformation_file,
+                shard_part_path(self.folder_structure.failed_records_transformation_file, shard),
+                binary=True,
+            )
+            created_objects_part_path = shard_part_path(
+                self.folder_structure.created_objects_path, shard
+            )
+            self.processor.append_shard(
+                manifest_part_path(created_objects_part_path),
+                created_objects_part_path,
+                shard_part_path(self.folder_structure.srs_records_path, shard),
+                shard_part_path(self.folder_structure.data_import_marc_path, shard),
+            )
+            logger.info(
+                "Shard %s of %s done. %s records processed",
+                shard.index + 1,
+                len(shards),
+                f"{shard.first_record_index + result['records_count']:,}",
+            )
+        if preserve_001s:
+            hrid_handler.unique_001s.update(sharder.first_shards_of_001s)
+
+    def transform_marc_shard(
+        self,
+        file_def: library_configuration.FileDefinition,
+        sharder: MarcFileSharder,
+        hrid_offsets: List[int],
+        preserve_001s: bool,
+        shard: FileShard,
+    ) -> dict:
+        """Transform the records of one shard of a MARC file. Runs in a worker process.
+
+        Args:
+            file_def (library_configuration.FileDefinition): The file the shard is part of.
+            sharder (MarcFileSharder): The sharder that split the file.
+            hrid_offsets (List[int]): Where the HRID range of each shard starts,
+                relative to the HRID counters before the file.
+            preserve_001s (bool): Whether 001s are preserved as HRIDs.
+            shard (FileShard): The shard to transform.
+
+        Raises:
+            TransformationProcessError: If the shard used more HRIDs than it was given.
+
+        Returns:
+            dict: The record counts and HRID counters of the shard.
+        """
+        # Worker processes handle several shards, so whatever a shard adds to the
+        # state shared by the records is kept apart and dropped when it is done.
+        hrid_handler = self.mapper.hrid_handler
+        initial_state = (
+            self.mapper.id_map,
+            hrid_handler.unique_001s,
+            hrid_handler.instance_hrid_counter,
+            hrid_handler.holdings_hrid_counter,
+        )
+        self.mapper.id_map = ChainMap({}, self.mapper.id_map)
+        if preserve_001s:
+            hrid_handler.unique_001s = EarlierShardValues(
+                hrid_handler.unique_001s, sharder.first_shards_of_001s, shard.index
+            )
+        hrid_handler.instance_hrid_counter += hrid_offsets[shard.index]
+        hrid_handler.holdings_hrid_counter += hrid_offsets[shard.index]
+        hrid_limits = (
+            hrid_handler.instance_hrid_counter + sharder.hrids_needed[shard.index],
+            hrid_handler.holdings_hrid_counter + sharder.hrids_needed[shard.index],
+        )
+        part_structure = copy.copy(self.folder_structure)
+        for attribute in (
+            "failed_records_transformation_file",
+            "srs_records_path",
+            "data_import_marc_path",
+        ):
+            setattr(
+                part_structure,
+                attribute,
+                shard_part_path(getattr(self.folder_structure, attribute), shard),
+            )
+        created_objects_part_path = shard_part_path(
+            self.folder_structure.created_objects_path, shard
+        )
+        parsed_records = self.mapper.parsed_records
+        try:
+            with (
+                open(created_objects_part_path, "w", encoding="utf-8") as created_records_file,
+                open(manifest_part_path(created_objects_part_path), "w") as manifest_file,
+            ):
+                processor = MarcShardFileProcessor(
+                    self.mapper,
+                    part_structure,
+                    created_records_file,
+                    manifest_file,
+                    EarlierShardValues(self.processor.legacy_ids, {}, shard.index),
+                )
+                MARCReaderWrapper.process_file_shard(
+                    file_def,
+                    processor,
+                    shard_part_path(self.folder_structure.failed_records_decode_file, shard),
+                    sharder,
+                    shard,
+                )
+                processor.close()
+            hrid_counters = (
+                hrid_handler.instance_hrid_counter,
+                hrid_handler.holdings_hrid_counter,
+            )
+        finally:
+            (
+                self.mapper.id_map,
+                hrid_handler.unique_001s,
+                hrid_handler.instance_hrid_counter,
+                hrid_handler.holdings_hrid_counter,
+            ) = initial_state
+        if hrid_counters[0] > hrid_limits[0] or hrid_counters[1] > hrid_limits[1]:
+            raise TransformationProcessError(
+                "",
+                "Shard used more HRIDs than were reserved for it",
+                f"{file_def.file_name} shard {shard.index}",
+            )
+        return {
+            "records_count": processor.records_count,
+            "failed_records_count": processor.failed_records_count,
+            "parsed_records": self.mapper.parsed_records - parsed_records,
+            "instance_hrid_counter": hrid_counters[0],
+            "holdings_hrid_counter": hrid_counters[1],
+        }
+
     @staticmethod
     def validate_ref_data_mapping_lines(lines, num_of_columns):
         """Helper method to validate the structure of individual lines in a mapping file.
@@ -557,6 +817,32 @@ class MarcTaskConfigurationBase(task_configuration.AbstractTaskConfiguration):
             ),
         ),
     ] = {}
+    worker_processes: Annotated[
+        int,
+        Field(
+            title="Worker processes",
+            description=(
+                "Number of worker processes to transform each MARC file with. "
+                "With more than one, the file is split into shards on record boundaries "
+                "that are transformed in parallel, and the results are merged in file "
+                "order. Default is 1, transforming the files in the main process."
+            ),
+            ge=1,
+        ),
+    ] = 1
+    reserve_hrids: Annotated[
+        bool,
+        Field(
+            title="Reserve HRIDs",
+            description=(
+                "Reserve the HRIDs in blocks, recorded in hrid_reservations.json in the "
+                "results folder before they are used. Tasks running at the same time, like "
+                "the BibsTransformer and the HoldingsMarcTransformer, then never create "
+                "the same HRIDs, and a run after a crashed one does not reuse its HRIDs. "
+                "Delete the file to start over from the HRID settings in FOLIO."
+            ),
+        ),
+    ] = False
 
 
 class ExcludeLevelFilter(logging.Filter):
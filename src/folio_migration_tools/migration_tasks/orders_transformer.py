@@ -10,7 +10,7 @@ import json
 import logging
 import sys
 import time
-from typing import Annotated, List
+from typing import Annotated, Iterable, Iterator, List, Set, Tuple
 
 import i18n
 from deepdiff import DeepDiff
@@ -21,6 +21,7 @@ from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
 )
+from folio_migration_tools.external_sort import external_sort
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.library_configuration import (
@@ -42,6 +43,9 @@ logger = logging.getLogger(__name__)
 
 csv.field_size_limit(int(ctypes.c_ulong(-1).value // 2))
 
+# Compare every 100th merged row with the order it is merged into
+DIFF_SAMPLE_INTERVAL = 100
+
 
 # Read files and do some work
 class OrdersTransformer(MigrationTaskBase):
@@ -134,6 +138,20 @@ class OrdersTransformer(MigrationTaskBase):
                 ),
             ),
         ] = ""
+        group_rows_by_order: Annotated[
+            bool,
+            Field(
+                title="Group rows by order",
+                description=(
+                    "Sort the rows of each source file on the legacy identifier before "
+                    "mapping them, so that all rows of an order are merged into one "
+                    "Purchase Order with all its lines, even when they are not next to "
+                    "each other in the file. The orders are then created in the order of "
+                    "their legacy identifiers. Files larger than memory are sorted in "
+                    "chunks on disk. By default is false."
+                ),
+            ),
+        ] = False
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -163,6 +181,8 @@ class OrdersTransformer(MigrationTaskBase):
         self.files = self.list_source_files()
         self.total_records = 0
         self.current_folio_record: dict = {}
+        self.written_order_ids: Set[str] = set()
+        self.merged_rows = 0
         self.orders_map = self.setup_records_map(
             self.folder_structure.mapping_files_folder / self.task_config.orders_mapping_file_name
         )
@@ -254,7 +274,10 @@ class OrdersTransformer(MigrationTaskBase):
             )
             start = time.time()
             records_processed = 0
-            for idx, record in enumerate(self.mapper.get_objects(records_file, filename)):
+            rows = enumerate(self.mapper.get_objects(records_file, filename))
+            if self.task_configuration.group_rows_by_order:
+                rows = self.group_rows_by_order(rows)
+            for idx, record in rows:
                 records_processed += 1
 
                 try:
@@ -289,11 +312,12 @@ class OrdersTransformer(MigrationTaskBase):
                     self.mapper.handle_generic_exception(idx, excepion)
 
                 # TODO Rewrite to base % value on number of rows in file
-                if idx > 1 and idx % 50 == 0:
-                    elapsed = idx / (time.time() - start)
+                if records_processed > 2 and (records_processed - 1) % 50 == 0:
+                    elapsed = (records_processed - 1) / (time.time() - start)
                     elapsed_formatted = "{0:.4g}".format(elapsed)
                     logger.info(  # pylint: disable=logging-fstring-interpolation
-                        f"{idx:,} records processed. Recs/sec: {elapsed_formatted} "
+                        f"{records_processed - 1:,} records processed. "
+                        f"Recs/sec: {elapsed_formatted} "
                     )
 
             self.total_records += records_processed
@@ -303,15 +327,52 @@ class OrdersTransformer(MigrationTaskBase):
                 f"Total records processed: {self.total_records:,}"
             )
             logger.info("Storing last record to disk")
-            Helper.write_to_file(self.results_file, self.current_folio_record)
+            self.write_current_order()
+            self.current_folio_record = {}
+
+    def group_rows_by_order(self, rows: Iterable[Tuple[int, dict]]) -> Iterator[Tuple[int, dict]]:
+        """Sort the numbered rows of a file on their legacy identifier, then row number.
+
+        Args:
+            rows (Iterable[Tuple[int, dict]]): The rows, numbered from 0.
+
+        Yields:
+            Tuple[int, dict]: The rows of each order together, in file order.
+        """
+        logger.info("Grouping the rows by order")
+        legacy_id_property_names = self.mapper.legacy_id_property_names
+
+        def order_key(numbered_row):
+            idx, row = numbered_row
+            return (" ".join(row.get(name, "") for name in legacy_id_property_names), idx)
+
+        for idx, row in external_sort(
+            rows, order_key, temp_folder=self.folder_structure.results_folder
+        ):
+            yield idx, row
+
+    def write_current_order(self):
+        if not self.current_folio_record:
+            # The file was empty, or none of its rows could be mapped
+            return
+        if self.current_folio_record["id"] in self.written_order_ids:
+            logger.warning(
+                "Purchase Order %s has already been created from earlier rows. Set "
+                "groupRowsByOrder to merge all rows of an order",
+                self.current_folio_record.get("poNumber", self.current_folio_record["id"]),
+            )
             self.mapper.migration_report.add_general_statistics(
-                i18n.t("TOTAL Purchase Orders created")
+                i18n_t("Purchase Orders split over rows that are not next to each other")
             )
-            self.current_folio_record = {}
+        self.written_order_ids.add(self.current_folio_record["id"])
+        Helper.write_to_file(self.results_file, self.current_folio_record)
+        self.mapper.migration_report.add_general_statistics(
+            i18n.t("TOTAL Purchase Orders created")
+        )
 
     async def do_work(self):
         logger.info("Getting started!")
-        with open(self.folder_structure.created_objects_path, "w+") as results_file:
+        with self.open_created_objects_file() as results_file:
             self.results_file = results_file
             for file in self.files:
                 logger.info("Processing %s", file)
@@ -351,26 +412,39 @@ class OrdersTransformer(MigrationTaskBase):
         logger.info("All done!")
 
     def merge_into_orders_with_embedded_pols(self, folio_rec):
+        """Add the PO lines of a row to the order of the rows before, or start a new order.
+
+        Rows are merged into the order of the previous row when they have the same id.
+        The order fields of every DIFF_SAMPLE_INTERVAL:th merged row are compared with
+        the order they are merged into, and the differences added to the report.
+
+        Args:
+            folio_rec (dict): The composite order mapped from the row.
+        """
         # Handle merging and storage
         if not self.current_folio_record:
             self.current_folio_record = folio_rec
         if folio_rec["id"] != self.current_folio_record["id"]:
             # Writes record to file
-            Helper.write_to_file(self.results_file, self.current_folio_record)
-            self.mapper.migration_report.add_general_statistics(
-                i18n.t("TOTAL Purchase Orders created")
-            )
+            self.write_current_order()
             self.current_folio_record = folio_rec
 
-        else:
-            # Merge if possible
-            diff = DeepDiff(self.current_folio_record, folio_rec)
-            if self.mapper.po_lines_key in diff.affected_root_keys:
-                self.current_folio_record.get(self.mapper.po_lines_key, []).extend(
-                    folio_rec.get(self.mapper.po_lines_key, [])
+        elif folio_rec is not self.current_folio_record:
+            po_lines_key = self.mapper.po_lines_key
+            if self.merged_rows % DIFF_SAMPLE_INTERVAL == 0:
+                self.mapper.migration_report.add_general_statistics(
+                    i18n_t("Rows compared to the order they were merged into")
+                )
+                diff = DeepDiff(
+                    {k: v for k, v in self.current_folio_record.items() if k != po_lines_key},
+                    {k: v for k, v in folio_rec.items() if k != po_lines_key},
                 )
+                for key in diff.affected_paths:
+                    self.mapper.migration_report.add("DiffsBetweenOrders", key)
+            self.merged_rows += 1
+            po_lines = folio_rec.get(po_lines_key, [])
+            if po_lines and po_lines != self.current_folio_record.get(po_lines_key, []):
+                self.current_folio_record.setdefault(po_lines_key, []).extend(po_lines)
                 self.mapper.migration_report.add_general_statistics(
                     i18n.t("Rows merged to create Purchase Orders")
                 )
-            for key in diff.affected_paths:
-                self.mapper.migration_report.add("DiffsBetweenOrders", key)
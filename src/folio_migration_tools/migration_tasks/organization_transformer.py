@@ -13,7 +13,7 @@ import time
 import uuid
 from hashlib import sha1
 from os.path import isfile
-from typing import Annotated, List, Optional
+from typing import Annotated, Dict, List, Optional, Tuple
 
 import i18n
 from folio_uuid.folio_namespaces import FOLIONamespaces
@@ -109,6 +109,17 @@ class OrganizationTransformer(MigrationTaskBase):
                 description=("Path to the phone categories map file. By default is empty string"),
             ),
         ] = ""
+        reuse_identical_extradata_objects: Annotated[
+            bool,
+            Field(
+                title="Reuse identical extradata objects",
+                description=(
+                    "Link organizations with identical contacts, interfaces or interface "
+                    "credentials to the one that was created first, instead of creating a "
+                    "copy for each organization. By default is false."
+                ),
+            ),
+        ] = False
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -188,7 +199,8 @@ class OrganizationTransformer(MigrationTaskBase):
             ),
         )
 
-        self.embedded_extradata_object_cache: set = set()
+        # (extradata object type, hash of the object) -> UUID of the first object created
+        self.embedded_extradata_object_cache: Dict[Tuple[str, str], str] = {}
         self.interfaces_cache: dict = {}
 
     def list_source_files(self):
@@ -211,7 +223,7 @@ class OrganizationTransformer(MigrationTaskBase):
     def process_single_file(self, filename):
         with (
             open(filename, encoding="utf-8-sig") as records_file,
-            open(self.folder_structure.created_objects_path, "w+") as results_file,
+            self.open_created_objects_file() as results_file,
         ):
             self.mapper.migration_report.add_general_statistics(
                 i18n.t("Number of files processed")
@@ -384,13 +396,22 @@ class OrganizationTransformer(MigrationTaskBase):
 
             for embedded_interface in record[extradata_object_type]:
                 interface_credential = embedded_interface.pop("interfaceCredential", None)
+                has_credential = bool(interface_credential and "username" in interface_credential)
 
+                # An interface can only have one credential, so interfaces are only
+                # identical if their credentials are too
                 interface_id = self.create_referenced_extradata_object(
-                    embedded_interface, extradata_object_type
+                    embedded_interface,
+                    extradata_object_type,
+                    (
+                        {**embedded_interface, "interfaceCredential": interface_credential}
+                        if has_credential
+                        else embedded_interface
+                    ),
                 )
                 ids_of_external_objects.append(interface_id)
 
-                if interface_credential and "username" in interface_credential:
+                if has_credential:
                     interface_credential["interfaceId"] = interface_id
                     self.create_referenced_extradata_object(
                         interface_credential, "interfaceCredential"
@@ -418,27 +439,33 @@ class OrganizationTransformer(MigrationTaskBase):
 
         return record
 
-    def create_referenced_extradata_object(self, embedded_object, extradata_object_type):
+    def create_referenced_extradata_object(
+        self, embedded_object, extradata_object_type, compared_object=None
+    ):
         """Create an extradata object from an embedded object and return its UUID.
 
+        Identical objects are found by a hash of their contents. If
+        reuse_identical_extradata_objects is set, the UUID of the identical object
+        created first is returned, and no new object is created.
+
         Args:
-            embedded_object (_type_): _description_
-            extradata_object_type (_type_): _description_
+            embedded_object (dict): The contact, interface or interface credential.
+            extradata_object_type (str): The extradata object type, like "contacts".
+            compared_object (dict): What to hash to find identical objects, if it is not
+                only the embedded object. Defaults to the embedded object.
 
         Returns:
-            _type_: The organization record with linked extradata UUIDs.
+            str: The UUID of the extradata object.
         """
         embedded_object_hash = sha1(
-            json.dumps(embedded_object, sort_keys=True).encode("utf-8"), usedforsecurity=False
+            json.dumps(
+                embedded_object if compared_object is None else compared_object, sort_keys=True
+            ).encode("utf-8"),
+            usedforsecurity=False,
         ).hexdigest()
+        cache_key = (extradata_object_type, embedded_object_hash)
 
-        identical_objects = [
-            value
-            for value in self.embedded_extradata_object_cache
-            if value == embedded_object_hash
-        ]
-
-        if len(identical_objects) > 0:
+        if identical_object_uuid := self.embedded_extradata_object_cache.get(cache_key):
             self.mapper.migration_report.add_general_statistics(
                 i18n.t("Number of reoccurring identical %{type}", type=extradata_object_type)
             )
@@ -447,12 +474,18 @@ class OrganizationTransformer(MigrationTaskBase):
                 f"Identical {extradata_object_type} objects found in multiple organizations",
                 embedded_object,
             )
+            if self.task_configuration.reuse_identical_extradata_objects:
+                embedded_object["id"] = identical_object_uuid
+                self.mapper.migration_report.add_general_statistics(
+                    i18n.t("Number of linked %{type} reused", type=extradata_object_type)
+                )
+                return identical_object_uuid
 
         extradata_object_uuid = str(uuid.uuid4())
         embedded_object["id"] = extradata_object_uuid
 
         self.extradata_writer.write(extradata_object_type, embedded_object)
-        self.embedded_extradata_object_cache.add(embedded_object_hash)
+        self.embedded_extradata_object_cache.setdefault(cache_key, extradata_object_uuid)
 
         self.mapper.migration_report.add_general_statistics(
             i18n.t("Number of linked %{type} created", type=extradata_object_type)
@@ -25,6 +25,7 @@ from folio_migration_tools.library_configuration import (
 )
 from folio_migration_tools.migration_report import MigrationReport
 from folio_migration_tools.migration_tasks.migration_task_base import MigrationTaskBase
+from folio_migration_tools.record_writer import raise_if_compressed
 from folio_migration_tools.task_configuration import AbstractTaskConfiguration
 
 logger = logging.getLogger(__name__)
@@ -217,6 +218,7 @@ class UserImportTask(MigrationTaskBase):
                 if not path.exists():
                     logger.error("File not found: %s", path)
                     raise FileNotFoundError(f"File not found: {path}")
+                raise_if_compressed(path)
                 file_paths.append(path)
                 self.files_processed.append(file_def.file_name)
                 logger.info("Will process file: %s", path)
@@ -7,6 +7,8 @@ addresses, departments, and user permissions with validation and cleanup.
 import json
 import logging
 import sys
+from functools import partial
+from pathlib import Path
 from typing import Annotated, Optional
 
 from art import tprint
@@ -17,6 +19,15 @@ from folio_migration_tools.custom_exceptions import (
     TransformationProcessError,
     TransformationRecordFailedError,
 )
+from folio_migration_tools.file_sharding import (
+    SHARDS_PER_PROCESS,
+    DelimitedFileSharder,
+    FileShard,
+    append_part,
+    shard_part_path,
+    transform_in_shards,
+    use_sharding,
+)
 from folio_migration_tools.helper import Helper
 from folio_migration_tools.i18n_cache import i18n_t
 from folio_migration_tools.library_configuration import (
@@ -121,6 +132,19 @@ class UserTransformer(MigrationTaskBase):
                 ),
             ),
         ] = False
+        worker_processes: Annotated[
+            int,
+            Field(
+                title="Worker processes",
+                description=(
+                    "Number of worker processes to transform the user file with. "
+                    "With more than one, the file is split into shards on record boundaries "
+                    "that are transformed in parallel, and the results are merged in file "
+                    "order. Optional, by default is 1, transforming the file in the main process"
+                ),
+                ge=1,
+            ),
+        ] = 1
 
     @staticmethod
     def get_object_type() -> FOLIONamespaces:
@@ -206,69 +230,160 @@ class UserTransformer(MigrationTaskBase):
         )
 
         try:
-            with open(
-                self.folder_structure.created_objects_path,
-                "w+",
-                encoding="utf-8",
-            ) as results_file:
+            with self.open_created_objects_file() as results_file:
+                if use_sharding(self.task_config.worker_processes):
+                    self.process_users_in_shards(source_path, results_file)
+                    return
                 with open(source_path, encoding="utf8") as object_file:
                     logger.info(f"processing {source_path}")
                     file_format = "tsv" if str(source_path).endswith(".tsv") else "csv"
                     for num_users, legacy_user in enumerate(
                         self.mapper.get_users(object_file, file_format), start=1
                     ):
-                        try:
-                            if num_users == 1:
-                                logger.info("First Legacy  user")
-                                logger.info(json.dumps(legacy_user, indent=4))
-                                print_email_warning()
-                            folio_user, index_or_id = self.mapper.do_map(
-                                legacy_user,
-                                str(num_users),
-                                FOLIONamespaces.users,
-                            )
-                            folio_user = self.mapper.perform_additional_mapping(
-                                legacy_user, folio_user, index_or_id
-                            )
-                            self.clean_user(folio_user, index_or_id)
-                            results_file.write(f"{json.dumps(folio_user)}\n")
-                            if num_users == 1:
-                                logger.info("## First FOLIO  user")
-                                logger.info(json.dumps(folio_user, indent=4, sort_keys=True))
-                            self.mapper.migration_report.add_general_statistics(
-                                i18n_t("Successful user transformations")
-                            )
-                            if num_users % 1000 == 0:
-                                logger.info(f"{num_users} users processed.")
-                        except TransformationRecordFailedError as tre:
-                            self.mapper.migration_report.add_general_statistics(
-                                i18n_t("Records failed")
-                            )
-                            Helper.log_data_issue(tre.index_or_id, tre.message, tre.data_value)
-                            logger.exception(tre)
-                        except TransformationProcessError as tpe:
-                            logger.critical(tpe)
-                            print(f"\n{tpe.message}: {tpe.data_value}")
-                            print("\nHalting")
-                            sys.exit(1)
-                        except ValueError as ve:
-                            logger.exception(ve)
-                            raise ve
-                        except Exception as ee:
-                            logger.exception(ee)
-                            logger.exception(num_users)
-                            logger.exception(json.dumps(legacy_user))
-                            self.mapper.migration_report.add_general_statistics(
-                                i18n_t("Failed user transformations")
-                            )
-                            logger.exception(ee, exc_info=True)
-
+                        self.process_user(num_users, legacy_user, results_file)
                         self.total_records = num_users
         except FileNotFoundError as fn:
             logger.exception("File not found")
             print(f"\n{fn}")
             sys.exit(1)
 
+    def process_user(self, num_users: int, legacy_user: dict, results_file):
+        """Transform one legacy user and write it to the results file.
+
+        Args:
+            num_users (int): Position of the user in the source file, starting at 1.
+            legacy_user (dict): The legacy user.
+            results_file: The open file to write the FOLIO user to.
+
+        Returns:
+            dict: The FOLIO user if it was written, otherwise None.
+        """
+        try:
+            if num_users == 1:
+                logger.info("First Legacy  user")
+                logger.info(json.dumps(legacy_user, indent=4))
+                print_email_warning()
+            folio_user, index_or_id = self.mapper.do_map(
+                legacy_user,
+                str(num_users),
+                FOLIONamespaces.users,
+            )
+            folio_user = self.mapper.perform_additional_mapping(
+                legacy_user, folio_user, index_or_id
+            )
+            self.clean_user(folio_user, index_or_id)
+            Helper.write_to_file(results_file, folio_user)
+            if num_users == 1:
+                logger.info("## First FOLIO  user")
+                logger.info(json.dumps(folio_user, indent=4, sort_keys=True))
+            self.mapper.migration_report.add_general_statistics(
+                i18n_t("Successful user transformations")
+            )
+            if num_users % 1000 == 0:
+                logger.info(f"{num_users} users processed.")
+            return folio_user
+        except TransformationRecordFailedError as tre:
+            self.mapper.migration_report.add_general_statistics(i18n_t("Records failed"))
+            Helper.log_data_issue(tre.index_or_id, tre.message, tre.data_value)
+            logger.exception(tre)
+        except TransformationProcessError as tpe:
+            logger.critical(tpe)
+            print(f"\n{tpe.message}: {tpe.data_value}")
+            print("\nHalting")
+            sys.exit(1)
+        except ValueError as ve:
+            logger.exception(ve)
+            raise ve
+        except Exception as ee:
+            logger.exception(ee)
+            logger.exception(num_users)
+            logger.exception(json.dumps(legacy_user))
+            self.mapper.migration_report.add_general_statistics(
+                i18n_t("Failed user transformations")
+            )
+            logger.exception(ee, exc_info=True)
+        return None
+
+    def process_users_in_shards(self, source_path: Path, results_file):
+        """Transform the user file in worker processes, one shard at a time per worker.
+
+        The shards are appended to the results file in file order. The workers only
+        check user ids for duplicates within their shard, so users duplicating ones
+        from earlier shards are failed here, as a sequential run would have done.
+
+        Args:
+            source_path (Path): Path to the user file.
+            results_file: The open file to write the FOLIO users to.
+        """
+        sharder = DelimitedFileSharder(source_path, encoding="utf8")
+        shards = sharder.scan(self.task_config.worker_processes * SHARDS_PER_PROCESS)
+        logger.info(
+            "processing %s in %s shards using %s worker processes",
+            source_path,
+            len(shards),
+            self.task_config.worker_processes,
+        )
+        for shard, result in transform_in_shards(
+            shards,
+            self.task_config.worker_processes,
+            self.mapper,
+            self.extradata_writer,
+            lambda shard: self.transform_shard(sharder, shard),
+        ):
+            duplicate_ids = self.mapper.unique_record_ids.intersection(result["ids"])
+            self.mapper.unique_record_ids.update(result["ids"])
+
+            append_part(
+                results_file,
+                shard_part_path(self.folder_structure.created_objects_path, shard),
+                partial(self.keep_unique_user, duplicate_ids) if duplicate_ids else None,
+            )
+            self.total_records = shard.first_record_index + result["records"]
+            logger.info(f"{self.total_records} users processed.")
+
+    def keep_unique_user(self, duplicate_ids: set, folio_user: dict) -> bool:
+        """Fail a user from a shard that duplicates one from an earlier shard.
+
+        Args:
+            duplicate_ids (set): User ids already written by earlier shards.
+            folio_user (dict): The FOLIO user written by the worker.
+
+        Returns:
+            bool: False if the user should be left out of the results.
+        """
+        if folio_user["id"] not in duplicate_ids:
+            return True
+        self.mapper.migration_report.add(
+            "GeneralStatistics", i18n_t("Successful user transformations"), -1
+        )
+        self.mapper.migration_report.add_general_statistics(i18n_t("Records failed"))
+        Helper.log_data_issue(folio_user["id"], "Legacy id already generated.", folio_user["id"])
+        return False
+
+    def transform_shard(self, sharder: DelimitedFileSharder, shard: FileShard) -> dict:
+        """Transform the users of one shard in a worker process.
+
+        Args:
+            sharder (DelimitedFileSharder): The sharder that created the shard.
+            shard (FileShard): The shard to transform.
+
+        Returns:
+            dict: The number of users read, and the ids of the users written to the
+                part file of the shard.
+        """
+        ids = []
+        records = 0
+        part_path = shard_part_path(self.folder_structure.created_objects_path, shard)
+        with open(part_path, "w", encoding="utf-8") as part_file:
+            legacy_users = self.mapper.verify_user_rows(
+                sharder.read(shard), shard.first_record_index
+            )
+            for records, legacy_user in enumerate(legacy_users, start=1):
+                num_users = shard.first_record_index + records
+                if folio_user := self.process_user(num_users, legacy_user, part_file):
+                    ids.append(folio_user["id"])
+        return {"records": records, "ids": ids}
+
     async def wrap_up(self):
         self.extradata_writer.flush()
         with open(self.folder_structure.migration_reports_file, "w") as migration_report_file:
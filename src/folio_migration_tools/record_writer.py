@@ -0,0 +1,271 @@
+"""Buffered, background writing of JSON lines result files.
+
+The transformation tasks write one JSON document per line for every FOLIO record they
+create. Writing each line straight to the file means many small, synchronous writes,
+which stall the transformation loop on slow or network file systems.
+
+RecordWriter collects the lines in memory and hands them over in large chunks to a
+background thread, which does the actual writing, optionally through gzip or zstd
+compression. Compressed files keep their usual names. open_records recognizes
+compressed files by their first bytes, so readers like the BatchPoster do not need
+to know how a file was written.
+
+zstd compression needs the optional zstandard package.
+"""
+
+import gzip
+import io
+import logging
+import queue
+import threading
+from pathlib import Path
+from typing import BinaryIO, Iterable, Union
+
+from folio_migration_tools.custom_exceptions import TransformationProcessError
+from folio_migration_tools.library_configuration import OutputCompression
+
+logger = logging.getLogger(__name__)
+
+try:
+    import zstandard
+
+    ZSTD_AVAILABLE = True
+except ImportError:
+    ZSTD_AVAILABLE = False
+
+WRITE_BUFFER_SIZE = 1 << 20
+# Chunks handed over to the writer thread but not yet written
+WRITE_QUEUE_SIZE = 8
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+class RecordWriter:
+    """Text file-like writer that writes in large chunks on a background thread.
+
+    Only writing is supported. Errors from the writer thread are raised by the next
+    call to write, flush or close.
+    """
+
+    mode = "w"
+    encoding = "utf-8"
+
+    def __init__(
+        self,
+        path: Path,
+        compression: OutputCompression = OutputCompression.none,
+        append: bool = False,
+        buffer_size: int = WRITE_BUFFER_SIZE,
+    ):
+        """Open the file and start the writer thread.
+
+        Args:
+            path (Path): The file to write.
+            compression (OutputCompression): How to compress the file.
+            append (bool): Whether to append to the file instead of truncating it.
+            buffer_size (int): Number of characters to collect before handing them
+                over to the writer thread.
+        """
+        self.name = str(path)
+        self.buffer_size = buffer_size
+        self._file = open_binary_output(path, "ab" if append else "wb", compression)
+        self._chunks: list = []
+        self._buffered = 0
+        self._position = 0
+        self._error: Union[Exception, None] = None
+        self._queue: queue.Queue = queue.Queue(maxsize=WRITE_QUEUE_SIZE)
+        self._thread = threading.Thread(
+            target=self._write_chunks, name=f"RecordWriter {path}", daemon=True
+        )
+        self._thread.start()
+        self.closed = False
+
+    def write(self, text: str) -> int:
+        self._chunks.append(text)
+        self._buffered += len(text)
+        if self._buffered >= self.buffer_size:
+            self._hand_over()
+        return len(text)
+
+    def writelines(self, lines: Iterable[str]):
+        for line in lines:
+            self.write(line)
+
+    def tell(self) -> int:
+        """Number of uncompressed bytes written so far."""
+        self._hand_over()
+        return self._position
+
+    def flush(self):
+        """Wait until everything written so far has been written to the file."""
+        self._hand_over()
+        self._queue.join()
+        self._raise_error()
+        self._file.flush()
+
+    def close(self):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            self._hand_over()
+        finally:
+            self._queue.put(None)
+            self._thread.join()
+            self._file.close()
+        self._raise_error()
+
+    def __enter__(self) -> "RecordWriter":
+        """Return the writer itself."""
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Write what is left and close the file."""
+        self.close()
+
+    def _hand_over(self):
+        self._raise_error()
+        if self._chunks:
+            data = "".join(self._chunks).encode("utf-8")
+            self._chunks = []
+            self._buffered = 0
+            self._position += len(data)
+            self._queue.put(data)
+
+    def _raise_error(self):
+        if self._error is not None:
+            raise TransformationProcessError(
+                "", f"Writing to {self.name} failed", str(self._error)
+            ) from self._error
+
+    def _write_chunks(self):
+        while True:
+            data = self._queue.get()
+            try:
+                if data is None:
+                    return
+                if self._error is None:
+                    self._file.write(data)
+            except Exception as error:
+                logger.exception("Writing to %s failed", self.name)
+                self._error = error
+            finally:
+                self._queue.task_done()
+
+
+def open_binary_output(path: Path, mode: str, compression: OutputCompression) -> BinaryIO:
+    """Open a file for writing, or appending, bytes with the given compression.
+
+    Appending to a compressed file adds a new gzip member or zstd frame, which
+    readers decompress as one continuous stream.
+
+    Args:
+        path (Path): The file to open.
+        mode (str): "wb" or "ab".
+        compression (OutputCompression): How to compress the file.
+
+    Raises:
+        TransformationProcessError: If zstd compression is requested but the zstandard
+            package is not installed.
+
+    Returns:
+        BinaryIO: The open file.
+    """
+    if compression == OutputCompression.gzip:
+        return gzip.open(path, mode, compresslevel=6)
+    if compression == OutputCompression.zstd:
+        if not ZSTD_AVAILABLE:
+            raise TransformationProcessError(
+                "",
+                "zstd output compression requires the zstandard package",
+                "pip install folio_migration_tools[zstd]",
+            )
+        return zstandard.ZstdCompressor().stream_writer(open(path, mode))
+    return open(path, mode, buffering=WRITE_BUFFER_SIZE)
+
+
+def open_records(path: Path, binary: bool = False):
+    """Open a result file for reading, decompressing it if it is compressed.
+
+    Args:
+        path (Path): The file to open.
+        binary (bool): Whether to return bytes instead of text.
+
+    Raises:
+        TransformationProcessError: If the file is zstd compressed but the zstandard
+            package is not installed.
+
+    Returns:
+        The open file. Iterating over it gives the lines of the uncompressed file.
+    """
+    compression = file_compression(path)
+    if compression == OutputCompression.gzip:
+        return gzip.open(path, "rb") if binary else gzip.open(path, "rt", encoding="utf-8")
+    if compression == OutputCompression.zstd:
+        if not ZSTD_AVAILABLE:
+            raise TransformationProcessError(
+                "", "Reading zstd compressed files requires the zstandard package", str(path)
+            )
+        reader = io.BufferedReader(
+            zstandard.ZstdDecompressor().stream_reader(open(path, "rb"), read_across_frames=True)
+        )
+        return reader if binary else io.TextIOWrapper(reader, encoding="utf-8")
+    return open(path, "rb" if binary else "r", encoding=None if binary else "utf-8")
+
+
+def file_compression(path: Path) -> OutputCompression:
+    """Recognize a compressed file by its magic bytes.
+
+    Args:
+        path (Path): The file to check.
+
+    Returns:
+        OutputCompression: The compression of the file, or none.
+    """
+    with open(path, "rb") as peek_file:
+        magic = peek_file.read(len(ZSTD_MAGIC))
+    if magic.startswith(GZIP_MAGIC):
+        return OutputCompression.gzip
+    if magic == ZSTD_MAGIC:
+        return OutputCompression.zstd
+    return OutputCompression.none
+
+
+def raise_if_compressed(path: Path):
+    """Stop tasks that pass result files on to readers of plain files only.
+
+    Args:
+        path (Path): The result file.
+
+    Raises:
+        TransformationProcessError: If the file is gzip or zstd compressed.
+    """
+    compression = file_compression(path)
+    if compression != OutputCompression.none:
+        raise TransformationProcessError(
+            "",
+            f"The file is {compression.value} compressed and this task can only read "
+            "uncompressed files. Decompress it first (gunzip or zstd -d, keeping the file "
+            "name), or transform the records again with outputCompression set to none",
+            str(path),
+        )
+
+
+def seek_records(records_file, offset: int):
+    """Move a file opened with open_records to an offset in the uncompressed file.
+
+    Compressed streams that can not seek are read forward to the offset instead. The
+    file must be at its start in that case.
+
+    Args:
+        records_file: The file opened by open_records.
+        offset (int): The offset in the uncompressed file.
+    """
+    if records_file.seekable():
+        records_file.seek(offset)
+        return
+    while offset > 0:
+        skipped = records_file.read(min(offset, WRITE_BUFFER_SIZE))
+        if not skipped:
+            return
+        offset -= len(skipped)
@@ -0,0 +1,252 @@
+"""On-disk snapshots of the schemas, mapping rules and reference data tasks fetch.
+
+Every task fetches JSON schemas from GitHub and reference data and mapping rules from
+the tenant when it starts. The schema builders for acquisitions follow the references
+between schemas with one request per file, so for small tasks most of the start-up
+time is spent fetching, and repeated runs hit the GitHub rate limits.
+
+SnapshotCache keeps what was fetched in JSON files under the base folder of the
+migration, so that all tasks and iterations in the folder share them:
+
+    .snapshot_cache/<tenant id>/schemas/<module version or release tag>/
+    .snapshot_cache/<tenant id>/mapping_rules/<mod-source-record-manager version>/
+    .snapshot_cache/<tenant id>/reference_data/
+
+Schemas and mapping rules are versioned by the module they come from, so they are
+fetched again after the tenant is upgraded. Schemas fetched from the latest release
+on GitHub, and the reference data, are kept until they are refreshed.
+"""
+
+import hashlib
+import json
+import logging
+import os
+import re
+import tempfile
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Callable, Iterator, Optional, Set
+
+from folioclient import FolioClient
+
+from folio_migration_tools import json_serializer
+
+logger = logging.getLogger(__name__)
+
+SNAPSHOT_CACHE_FOLDER_NAME = ".snapshot_cache"
+LATEST = "latest"
+
+# The reference data endpoints that are fetched in full when a task starts
+REFERENCE_DATA_PATHS = frozenset(
+    {
+        "/alternative-title-types",
+        "/call-number-types",
+        "/classification-types",
+        "/contributor-name-types",
+        "/contributor-types",
+        "/coursereserves/departments",
+        "/coursereserves/terms",
+        "/departments",
+        "/electronic-access-relationships",
+        "/feefines",
+        "/finance/funds",
+        "/groups",
+        "/holdings-note-types",
+        "/holdings-sources",
+        "/holdings-types",
+        "/identifier-types",
+        "/ill-policies",
+        "/instance-formats",
+        "/instance-note-types",
+        "/instance-types",
+        "/item-note-types",
+        "/loan-types",
+        "/locations",
+        "/material-types",
+        "/modes-of-issuance",
+        "/orders/acquisition-methods",
+        "/organizations-storage/organization-types",
+        "/owners",
+        "/service-points",
+        "/statistical-codes",
+        "/subject-sources",
+        "/subject-types",
+    }
+)
+MAPPING_RULES_PATH = "/mapping-rules/"
+
+
+class SnapshotCache:
+    """Snapshots of fetched schemas and reference data, shared by the tasks in a folder."""
+
+    def __init__(self, folder: Path, refresh: bool = False):
+        """Create the cache.
+
+        Args:
+            folder (Path): The folder to keep the snapshots in.
+            refresh (bool): Whether to fetch everything again, replacing the snapshots.
+                Each snapshot is still only fetched once during the run.
+        """
+        self.folder = Path(folder)
+        self.refresh = refresh
+        self.refreshed: Set[Path] = set()
+        self.hits = 0
+        self.misses = 0
+
+    def get(
+        self,
+        tenant_id: str,
+        category: str,
+        version: str,
+        key: Any,
+        fetch: Callable[[], Any],
+    ) -> Any:
+        """Get a snapshot, fetching and saving it if there is none.
+
+        Args:
+            tenant_id (str): The tenant the snapshot is fetched for.
+            category (str): The kind of snapshot, like schemas or reference_data.
+            version (str): The version of the module the snapshot comes from.
+            key (Any): What is fetched, as JSON serializable values.
+            fetch (Callable[[], Any]): Fetches the snapshot.
+
+        Returns:
+            Any: The snapshot.
+        """
+        path = self.snapshot_path(tenant_id, category, version, key)
+        if path.is_file() and (not self.refresh or path in self.refreshed):
+            self.hits += 1
+            with open(path, "rb") as snapshot_file:
+                return json.load(snapshot_file)["data"]
+        self.misses += 1
+        data = fetch()
+        self.save(path, key, data)
+        return data
+
+    def snapshot_path(self, tenant_id: str, category: str, version: str, key: Any) -> Path:
+        name = hashlib.sha1(json.dumps(key).encode("utf-8"), usedforsecurity=False).hexdigest()
+        folder = self.folder / safe_name(tenant_id) / category
+        if version:
+            folder = folder / safe_name(version)
+        return folder / f"{name}.json"
+
+    def save(self, path: Path, key: Any, data: Any):
+        try:
+            content = json_serializer.dumps_bytes(
+                {"key": key, "fetched": datetime.now(timezone.utc).isoformat(), "data": data}
+            )
+        except (TypeError, ValueError, RecursionError) as error:
+            logger.warning("Not keeping a snapshot of %s: %s", key, error)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first, so that tasks running at the same time
+        # never read a partly written snapshot
+        file_descriptor, temp_path = tempfile.mkstemp(dir=path.parent, suffix=".tmp")
+        with os.fdopen(file_descriptor, "wb") as temp_file:
+            temp_file.write(content)
+        os.replace(temp_path, path)
+        self.refreshed.add(path)
+
+    def install(self, folio_client: FolioClient):
+        """Make the FOLIO client use the snapshots.
+
+        The client's get_from_github, and its folio_get_all and folio_get_single_object
+        for reference data and mapping rules, are replaced with versions that use the
+        snapshots. This includes the reference data properties of the client, like
+        locations. Other calls are passed on unchanged.
+
+        Args:
+            folio_client (FolioClient): The client to use the snapshots in.
+        """
+        get_from_github = folio_client.get_from_github
+        folio_get_all = folio_client.folio_get_all
+        folio_get_single_object = folio_client.folio_get_single_object
+
+        def cached_get_from_github(owner, repo, filepath: str, ssl_verify=True):
+            return self.get(
+                folio_client.tenant_id,
+                "schemas",
+                module_version(folio_client, repo),
+                [owner, repo, filepath],
+                lambda: get_from_github(owner, repo, filepath, ssl_verify),
+            )
+
+        def cached_folio_get_all(
+            path, key=None, query=None, limit=100, no_cql=False, **kwargs
+        ) -> Iterator[dict]:
+            if path not in REFERENCE_DATA_PATHS or kwargs:
+                return folio_get_all(path, key, query, limit, no_cql, **kwargs)
+            return iter(
+                self.get(
+                    folio_client.tenant_id,
+                    "reference_data",
+                    "",
+                    [path, key, query, limit, no_cql],
+                    lambda: list(folio_get_all(path, key, query, limit, no_cql)),
+                )
+            )
+
+        def cached_folio_get_single_object(path):
+            if not path.startswith(MAPPING_RULES_PATH):
+                return folio_get_single_object(path)
+            return self.get(
+                folio_client.tenant_id,
+                "mapping_rules",
+                module_version(folio_client, "mod-source-record-manager"),
+                [path],
+                lambda: folio_get_single_object(path),
+            )
+
+        folio_client.get_from_github = cached_get_from_github
+        folio_client.folio_get_all = cached_folio_get_all
+        folio_client.folio_get_single_object = cached_folio_get_single_object
+        folio_client.snapshot_cache = self
+        logger.info(
+            "Using the snapshots of schemas and reference data in %s%s",
+            self.folder,
+            ", refreshing them" if self.refresh else "",
+        )
+
+
+def cached(
+    folio_client: FolioClient,
+    category: str,
+    version: Optional[str],
+    key: Any,
+    fetch: Callable[[], Any],
+) -> Any:
+    """Fetch through the snapshot cache of the FOLIO client, if it has one.
+
+    Args:
+        folio_client (FolioClient): The FOLIO client.
+        category (str): The kind of snapshot, like schemas.
+        version (Optional[str]): The version or release tag of the module the snapshot
+            comes from. None for the latest release.
+        key (Any): What is fetched, as JSON serializable values.
+        fetch (Callable[[], Any]): Fetches the snapshot.
+
+    Returns:
+        Any: The snapshot.
+    """
+    cache = getattr(folio_client, "snapshot_cache", None)
+    if not isinstance(cache, SnapshotCache):
+        return fetch()
+    return cache.get(folio_client.tenant_id, category, version or LATEST, key, fetch)
+
+
+def module_version(folio_client: FolioClient, module_name: str) -> str:
+    """The id of the module in the tenant, like mod-users-19.2.0, or "latest".
+
+    Args:
+        folio_client (FolioClient): The FOLIO client.
+        module_name (str): The name of the module, like mod-users.
+
+    Returns:
+        str: The module id, or "latest" if the module is not in the tenant.
+    """
+    version_pattern = re.compile(rf"{re.escape(module_name)}-\d")
+    return next((m for m in folio_client.module_versions if version_pattern.match(m)), LATEST)
+
+
+def safe_name(name: str) -> str:
+    return re.sub(r"[^A-Za-z0-9._-]", "_", name)
@@ -3,6 +3,7 @@ import ast
 import json
 import os
 from pathlib import Path
+from unittest.mock import Mock
 
 import i18n
 import pymarc
@@ -98,6 +99,42 @@ def test_flatten2():
     assert len([a for a in flat if a == "h"]) == 1
 
 
+def test_get_field_paths_matches_flatten():
+    my_dict = {
+        "a": {
+            "b": {"c": "95"},
+            "d": "apa",
+            "e": ["papa", "lapa"],
+            "f": [{"g": "another string"}, {"g": "a string", "empty": []}],
+            "j": [1, 2],
+            "k": False,
+        },
+        "h": [{"g": "another string"}, {"g": "a string"}],
+        "i": ["papa", "lapa"],
+        "l": "",
+    }
+    assert mapper_base.get_field_paths(my_dict) == set(mapper_base.flatten(my_dict))
+
+
+def test_report_folio_mapping_counts_unmapped_schema_properties():
+    mapper = Mock(spec=mapper_base.MapperBase)
+    mapper.mapped_folio_fields = {}
+    mapper.schema_properties = None
+    schema = {"properties": {"id": {}, "notes": {}, "barcode": {}}}
+
+    mapper_base.MapperBase.report_folio_mapping(mapper, {"id": "1", "notes": []}, schema)
+    mapper_base.MapperBase.report_folio_mapping(
+        mapper, {"id": "2", "notes": [{"note": "n"}]}, schema
+    )
+
+    assert mapper.mapped_folio_fields == {
+        "id": [2],
+        "notes": [2],
+        "notes.note": [1],
+        "barcode": [0],
+    }
+
+
 def test_udec():
     path = "./tests/test_data/msplit00000005.mrc"
     with open(path, "rb") as marc_file:
@@ -6,7 +6,11 @@ from folio_uuid.folio_namespaces import FOLIONamespaces
 from folioclient import FolioClient
 
 from src.folio_migration_tools.migration_tasks import batch_poster
-from src.folio_migration_tools.migration_tasks.batch_poster import BatchPoster
+from src.folio_migration_tools.migration_tasks.batch_poster import (
+    AdaptiveBatchSizer,
+    BatchPoster,
+    CheckpointJournal,
+)
 import pytest
 import httpx
 
@@ -73,9 +77,9 @@ async def test_get_with_retry_successful():
 
     # Create an instance of the BatchPoster class
     batch_poster = create_autospec(spec=BatchPoster)
-    batch_poster.folio_client = Mock(spec=FolioClient)
-    batch_poster.folio_client.folio_get_async = AsyncMock(return_value=mock_response_data)
+    batch_poster.get_json = AsyncMock(return_value=mock_response_data)
     batch_poster.get_with_retry = Mock(wraps=BatchPoster.get_with_retry)
+    batch_poster.request_with_retry = MethodType(BatchPoster.request_with_retry, batch_poster)
     batch_poster._semaphore = asyncio.Semaphore(10)
     
     # Define test inputs
@@ -89,10 +93,7 @@ async def test_get_with_retry_successful():
 
     # Assert
     assert response == mock_response_data
-    batch_poster.folio_client.folio_get_async.assert_called_once_with(
-        query_api,
-        query_params=params,
-    )
+    batch_poster.get_json.assert_called_once_with(query_api, params)
 
 
 @pytest.mark.asyncio
@@ -1449,3 +1450,379 @@ async def test_set_version_delegates_to_get_with_retry():
     batch_poster_task.get_with_retry.assert_called_once()
     assert batch[0]["_version"] == 1
     assert batch[1]["_version"] == 2
+
+
+def create_pipelined_batch_poster(tmp_path, records, batch_size, concurrent_batches):
+    results_file = tmp_path / "folio_instances.json"
+    results_file.write_text("".join(f'{{"id": "{r}"}}\n' for r in records))
+    batch_poster = Mock(spec=BatchPoster)
+    batch_poster.task_configuration = BatchPoster.TaskConfiguration(
+        name="Test Task",
+        migration_task_type="BatchPoster",
+        object_type="Instances",
+        files=[{"file_name": results_file.name}],
+        batch_size=batch_size,
+        concurrent_batches=concurrent_batches,
+    )
+    batch_poster.folder_structure = Mock()
+    batch_poster.folder_structure.results_folder = tmp_path
+    batch_poster.batch_size = batch_size
+    batch_poster.processed = 0
+    batch_poster.num_failures = 0
+    batch_poster.failed_batches = 0
+    batch_poster._max_concurrent_requests = 10
+    batch_poster.migration_report = Mock()
+    batch_poster.checkpoint = CheckpointJournal(tmp_path / "checkpoint_test_task.json", False)
+    batch_poster.prefetch_versions = False
+    for method_name in [
+        "post_batches_pipelined",
+        "start_version_prefetch",
+        "read_batches",
+        "post_batch_worker",
+        "record_batch_results",
+        "parse_record_row",
+        "handle_generic_exception",
+        "seek_to_checkpoint",
+        "commit_checkpoint",
+        "write_unposted_rows_to_failed_file",
+    ]:
+        setattr(batch_poster, method_name, MethodType(getattr(BatchPoster, method_name), batch_poster))
+    return batch_poster
+
+
+@pytest.mark.asyncio
+async def test_post_batches_pipelined_records_failures_in_order(tmp_path):
+    from io import StringIO
+
+    from folio_migration_tools.custom_exceptions import TransformationRecordFailedError
+
+    batch_poster = create_pipelined_batch_poster(
+        tmp_path, [f"record{i}" for i in range(7)], batch_size=2, concurrent_batches=3
+    )
+    in_flight_posts = []
+    max_in_flight = 0
+    posted_batches = []
+
+    async def fake_post_batch(batch, failed_recs_file, num_records):
+        nonlocal max_in_flight
+        in_flight_posts.append(batch)
+        max_in_flight = max(max_in_flight, len(in_flight_posts))
+        # Later batches finish first, to make sure results are still recorded in order
+        await asyncio.sleep(0.01 * (4 - len(posted_batches)))
+        in_flight_posts.remove(batch)
+        posted_batches.append(batch)
+        if batch[0]["id"] in ["record2", "record6"]:
+            raise TransformationRecordFailedError("", "HTTP 422", "")
+
+    batch_poster.post_batch = fake_post_batch
+    failed_recs_file = StringIO()
+
+    await batch_poster.post_batches_pipelined(failed_recs_file)
+
+    assert max_in_flight > 1
+    assert len(posted_batches) == 4
+    assert failed_recs_file.getvalue() == (
+        '{"id": "record2"}\n{"id": "record3"}\n{"id": "record6"}\n'
+    )
+    assert batch_poster.failed_batches == 2
+    assert batch_poster.num_failures == 3
+
+
+@pytest.mark.asyncio
+async def test_post_batches_pipelined_halts_on_process_error(tmp_path):
+    from io import StringIO
+
+    from folio_migration_tools.custom_exceptions import TransformationProcessError
+
+    batch_poster = create_pipelined_batch_poster(
+        tmp_path, [f"record{i}" for i in range(6)], batch_size=2, concurrent_batches=2
+    )
+
+    async def fake_post_batch(batch, failed_recs_file, num_records):
+        if batch[0]["id"] == "record0":
+            raise TransformationProcessError("", "HTTP 400. Something is wrong. Quitting")
+
+    batch_poster.post_batch = fake_post_batch
+    failed_recs_file = StringIO()
+
+    with pytest.raises(TransformationProcessError):
+        await batch_poster.post_batches_pipelined(failed_recs_file)
+    batch_poster.write_unposted_rows_to_failed_file(failed_recs_file)
+
+    # The failed batch and every row after the checkpoint end up in the failed file
+    failed_ids = failed_recs_file.getvalue().splitlines()
+    assert failed_ids == [f'{{"id": "record{i}"}}' for i in range(6)]
+    assert batch_poster.num_failures == 6
+    assert batch_poster.checkpoint.get_position("folio_instances.json") == (36, 2)
+
+
+def create_bisecting_batch_poster(bad_ids):
+    import datetime
+
+    task = Mock(spec=BatchPoster)
+    task.task_configuration = BatchPoster.TaskConfiguration(
+        name="Test Task",
+        migration_task_type="BatchPoster",
+        object_type="Instances",
+        files=[],
+        batch_size=8,
+        bisect_failed_batches=True,
+    )
+    task.api_info = batch_poster.get_api_info("Instances")
+    task.query_params = {"upsert": False}
+    task.num_posted = 0
+    task.num_failures = 0
+    task.failed_batches = 0
+    task.batches_bisected = 0
+    task.records_isolated = 0
+    task.batch_sizer = None
+    task.migration_report = Mock()
+    posted_batches = []
+
+    async def fake_do_post(batch):
+        posted_batches.append([r["id"] for r in batch])
+        request = httpx.Request("POST", "https://folio.example/instance-storage/batch/synchronous")
+        if any(r["id"] in bad_ids for r in batch):
+            response = httpx.Response(
+                422, json={"errors": [{"message": "Invalid record"}]}, request=request
+            )
+        else:
+            response = httpx.Response(201, request=request)
+        response.elapsed = datetime.timedelta(seconds=0.1)
+        return response
+
+    task.do_post = fake_do_post
+    for method_name in [
+        "post_batch",
+        "bisect_failed_batch",
+        "handle_generic_exception",
+        "do_post_with_login",
+        "adjust_batch_size",
+        "split_rejected_batch",
+    ]:
+        setattr(task, method_name, MethodType(getattr(BatchPoster, method_name), task))
+    return task, posted_batches
+
+
+@pytest.mark.asyncio
+async def test_post_batch_bisects_rejected_batch():
+    from io import StringIO
+
+    batch_poster_task, posted_batches = create_bisecting_batch_poster({"r2", "r7"})
+    batch = [{"id": f"r{i}"} for i in range(8)]
+    failed_recs_file = StringIO()
+
+    await batch_poster_task.post_batch(batch, failed_recs_file, 8)
+
+    assert failed_recs_file.getvalue() == '{"id": "r2"}\n{"id": "r7"}\n'
+    assert batch_poster_task.num_posted == 6
+    assert batch_poster_task.num_failures == 2
+    assert batch_poster_task.records_isolated == 2
+    # Full batch, then halves, quarters and single records around the bad ones
+    assert len(posted_batches) == 11
+    assert ["r0", "r1"] in posted_batches
+    assert ["r4", "r5"] in posted_batches
+
+
+@pytest.mark.asyncio
+async def test_post_batch_without_bisection_raises_on_422():
+    from io import StringIO
+
+    from folio_migration_tools.custom_exceptions import TransformationRecordFailedError
+
+    batch_poster_task, posted_batches = create_bisecting_batch_poster({"r2"})
+    batch_poster_task.task_configuration.bisect_failed_batches = False
+
+    with pytest.raises(TransformationRecordFailedError):
+        await batch_poster_task.post_batch([{"id": f"r{i}"} for i in range(4)], StringIO(), 4)
+    assert len(posted_batches) == 1
+
+
+def test_checkpoint_journal_commit_and_resume(tmp_path):
+    journal_path = tmp_path / "checkpoint_test_task.json"
+    journal = CheckpointJournal(journal_path, False)
+    assert journal.get_position("folio_instances.json") == (0, 0)
+
+    journal.commit("folio_instances.json", 36, 2, ["record0", "record1"])
+
+    assert not (tmp_path / "checkpoint_test_task.json.tmp").exists()
+    assert CheckpointJournal(journal_path, True).get_position("folio_instances.json") == (36, 2)
+    assert CheckpointJournal(journal_path, False).get_position("folio_instances.json") == (0, 0)
+
+
+@pytest.mark.parametrize("resume", [False, True])
+def test_commit_checkpoint_only_syncs_to_disk_when_resuming(tmp_path, resume):
+    journal_path = tmp_path / "checkpoint_test_task.json"
+    batch_poster_task = Mock(spec=BatchPoster)
+    batch_poster_task.checkpoint = CheckpointJournal(journal_path, resume)
+    failed_recs_path = tmp_path / "failed_records.json"
+
+    with open(failed_recs_path, "w") as failed_recs_file:
+        failed_recs_file.write('{"id": "record0"}\n')
+        with patch.object(batch_poster.os, "fsync") as fsync:
+            BatchPoster.commit_checkpoint(
+                batch_poster_task,
+                "folio_instances.json",
+                18,
+                1,
+                [{"id": "record0"}],
+                failed_recs_file,
+            )
+        assert failed_recs_path.read_text() == '{"id": "record0"}\n'
+
+    assert fsync.call_count == (2 if resume else 0)
+    assert CheckpointJournal(journal_path, True).get_position("folio_instances.json") == (18, 1)
+
+
+@pytest.mark.asyncio
+async def test_post_file_resumes_from_checkpoint(tmp_path):
+    from io import StringIO
+
+    batch_poster = create_pipelined_batch_poster(
+        tmp_path, [f"record{i}" for i in range(5)], batch_size=2, concurrent_batches=1
+    )
+    batch_poster.api_info = {"is_batch": True}
+    batch_poster.post_file = MethodType(BatchPoster.post_file, batch_poster)
+    batch_poster.checkpoint.commit("folio_instances.json", 36, 2, ["record0", "record1"])
+    posted_batches = []
+
+    async def fake_post_batch(batch, failed_recs_file, num_records):
+        posted_batches.append(([r["id"] for r in batch], num_records))
+
+    batch_poster.post_batch = fake_post_batch
+    file_def = batch_poster.task_configuration.files[0]
+
+    await batch_poster.post_file(file_def, StringIO())
+
+    assert posted_batches == [(["record2", "record3"], 4), (["record4"], 5)]
+    assert batch_poster.checkpoint.get_position("folio_instances.json") == (90, 5)
+    assert batch_poster.checkpoint.files["folio_instances.json"]["last_batch_ids"] == [
+        "record4"
+    ]
+
+
+@pytest.mark.asyncio
+async def test_post_batches_pipelined_prefetches_versions_for_next_batch(tmp_path):
+    from io import StringIO
+
+    batch_poster = create_pipelined_batch_poster(
+        tmp_path, [f"record{i}" for i in range(4)], batch_size=2, concurrent_batches=1
+    )
+    batch_poster.prefetch_versions = True
+    batch_poster.api_info = api_info = {
+        "query_endpoint": "/instance-storage/instances",
+        "object_name": "instances",
+    }
+    events = []
+
+    async def fake_set_version(batch, query_api, object_type):
+        assert (query_api, object_type) == tuple(api_info.values())
+        events.append(f"lookup {batch[0]['id']}")
+        for record in batch:
+            record["_version"] = 1
+
+    async def fake_post_batch(batch, failed_recs_file, num_records, set_versions=True):
+        assert not set_versions
+        assert all(r["_version"] == 1 for r in batch)
+        events.append(f"post start {batch[0]['id']}")
+        await asyncio.sleep(0.01)
+        events.append(f"post end {batch[0]['id']}")
+
+    batch_poster.set_version = fake_set_version
+    batch_poster.post_batch = fake_post_batch
+
+    await batch_poster.post_batches_pipelined(StringIO())
+
+    # The lookup for the second batch runs while the first batch is being posted
+    assert events.index("lookup record2") < events.index("post end record0")
+    assert events[-1] == "post end record2"
+
+
+@pytest.mark.asyncio
+async def test_set_version_uses_retrieve_endpoint_for_long_queries():
+    from uuid import uuid4
+
+    task = Mock(spec=BatchPoster)
+    task.task_configuration = BatchPoster.TaskConfiguration(
+        name="Test Task",
+        migration_task_type="BatchPoster",
+        object_type="Instances",
+        files=[],
+        batch_size=200,
+        upsert=True,
+        version_lookup_batch_size=150,
+    )
+    task.api_info = batch_poster.get_api_info("Instances")
+    task.get_with_retry = AsyncMock(return_value={"instances": []})
+    task.retrieve_with_retry = AsyncMock(return_value={"instances": []})
+    task.collect_existing_records_for_upsert = BatchPoster.collect_existing_records_for_upsert
+    task.set_version = MethodType(BatchPoster.set_version, task)
+    batch = [{"id": str(uuid4())} for _ in range(200)]
+
+    await task.set_version(batch, "/instance-storage/instances", "instances")
+
+    # 150 ids are too many for a GET query, the remaining 50 are not
+    task.retrieve_with_retry.assert_awaited_once()
+    url, payload = task.retrieve_with_retry.call_args.args
+    assert url == "/instance-storage/instances/retrieve"
+    assert payload["limit"] == 150
+    assert payload["query"].count(" OR ") == 149
+    task.get_with_retry.assert_awaited_once()
+    assert task.get_with_retry.call_args.kwargs["params"]["query"].count(" OR ") == 49
+
+
+def test_adaptive_batch_sizer_grows_and_shrinks_within_bounds():
+    sizer = AdaptiveBatchSizer(100, 10, 500, target_seconds=10, max_request_bytes=1_000_000)
+
+    # Fast and small responses at most double the size, and never pass the maximum
+    sizer.record_response(100, 1.0, 10_000)
+    assert sizer.size == 200
+    sizer.record_response(200, 1.0, 20_000)
+    sizer.record_response(400, 1.0, 40_000)
+    assert sizer.size == 500
+
+    # Slow responses shrink the size towards the target response time
+    sizer.record_response(500, 25.0, 50_000)
+    assert sizer.size == 200
+
+    # Large requests shrink the size to fit the request size limit with headroom
+    sizer.record_response(200, 1.0, 800_000)
+    assert sizer.size == 200
+    sizer.record_response(200, 1.0, 1_600_000)
+    assert sizer.size == 100
+
+    for expected_size in [50, 25, 12, 10]:
+        sizer.record_rejection(sizer.size)
+        assert sizer.size == expected_size
+    assert (sizer.smallest, sizer.largest, sizer.reductions) == (10, 500, 4)
+
+
+@pytest.mark.asyncio
+async def test_post_batch_splits_batch_rejected_as_too_large():
+    import datetime
+    from io import StringIO
+
+    task, _ = create_bisecting_batch_poster(set())
+    task.task_configuration.adaptive_batch_size = True
+    task.batch_sizer = AdaptiveBatchSizer(8, 1, 100, 10, 1_000_000)
+    posted_sizes = []
+
+    async def fake_do_post(batch):
+        posted_sizes.append(len(batch))
+        request = httpx.Request("POST", "https://folio.example/instance-storage/batch/synchronous")
+        if len(batch) > 2:
+            response = httpx.Response(413, text="Request Entity Too Large", request=request)
+        else:
+            response = httpx.Response(201, request=request)
+        response.elapsed = datetime.timedelta(seconds=0.1)
+        return response
+
+    task.do_post = fake_do_post
+
+    await task.post_batch([{"id": f"r{i}"} for i in range(8)], StringIO(), 8)
+
+    assert posted_sizes == [8, 4, 2, 2, 4, 2, 2]
+    assert task.num_posted == 8
+    assert task.batch_sizer.reductions == 3
+    # After the rejections, the size is learned again from the successful posts
+    assert task.batch_size == task.batch_sizer.size
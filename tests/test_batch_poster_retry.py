@@ -37,12 +37,12 @@ def create_mock_http_error(status_code: int, message: str):
 def create_batch_poster():
     """Helper to create a BatchPoster mock with get_with_retry method for testing."""
     batch_poster = Mock(spec=BatchPoster)
-    batch_poster.folio_client = Mock(spec=FolioClient)
     
     batch_poster._semaphore = asyncio.Semaphore(10)
     
     # Bind the actual get_with_retry method to the mock
     batch_poster.get_with_retry = MethodType(BatchPoster.get_with_retry, batch_poster)
+    batch_poster.request_with_retry = MethodType(BatchPoster.request_with_retry, batch_poster)
     
     return batch_poster
 
@@ -57,7 +57,7 @@ async def test_get_with_retry_connection_error_then_success():
     mock_request = create_mock_request()
     connection_error = FolioConnectionError("Connection failed", request=mock_request)
     
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=[connection_error, mock_response]
     )
     
@@ -66,7 +66,7 @@ async def test_get_with_retry_connection_error_then_success():
     
     # Should succeed on second attempt
     assert result == mock_response
-    assert batch_poster.folio_client.folio_get_async.call_count == 2
+    assert batch_poster.get_json.call_count == 2
     # Should wait 2^0 = 1 second before retry
     mock_sleep.assert_called_once_with(1)
 
@@ -79,14 +79,14 @@ async def test_get_with_retry_connection_error_exhausted():
     # Mock: fail all 3 attempts
     mock_request = create_mock_request()
     connection_error = FolioConnectionError("Connection failed", request=mock_request)
-    batch_poster.folio_client.folio_get_async = AsyncMock(side_effect=connection_error)
+    batch_poster.get_json = AsyncMock(side_effect=connection_error)
     
     with patch('asyncio.sleep', new_callable=AsyncMock) as mock_sleep:
         with pytest.raises(FolioConnectionError, match="Connection failed"):
             await batch_poster.get_with_retry("/test", {"limit": 10})
     
     # Should try 3 times total
-    assert batch_poster.folio_client.folio_get_async.call_count == 3
+    assert batch_poster.get_json.call_count == 3
     # Should sleep twice: 1s (2^0) and 2s (2^1)
     assert mock_sleep.call_count == 2
     assert mock_sleep.call_args_list[0][0][0] == 1  # First retry wait
@@ -102,7 +102,7 @@ async def test_get_with_retry_http_429_rate_limit():
     mock_success = {"instances": [{"id": "1", "_version": 1}]}
     
     # Mock: 429 error first, then success
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=[http_error_429, mock_success]
     )
     
@@ -111,7 +111,7 @@ async def test_get_with_retry_http_429_rate_limit():
     
     # Should succeed on second attempt
     assert result == mock_success
-    assert batch_poster.folio_client.folio_get_async.call_count == 2
+    assert batch_poster.get_json.call_count == 2
     # Should wait 5 seconds for rate limiting
     mock_sleep.assert_called_once_with(5)
 
@@ -125,7 +125,7 @@ async def test_get_with_retry_http_500_server_error():
     mock_success = {"instances": [{"id": "1", "_version": 1}]}
     
     # Mock: 500 error twice, then success
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=[http_error_500, http_error_500, mock_success]
     )
     
@@ -134,7 +134,7 @@ async def test_get_with_retry_http_500_server_error():
     
     # Should succeed on third attempt
     assert result == mock_success
-    assert batch_poster.folio_client.folio_get_async.call_count == 3
+    assert batch_poster.get_json.call_count == 3
     # Should use exponential backoff: 1s (2^0), 2s (2^1)
     assert mock_sleep.call_count == 2
     assert mock_sleep.call_args_list[0][0][0] == 1
@@ -149,7 +149,7 @@ async def test_get_with_retry_http_503_exhausted():
     http_error_503 = create_mock_http_error(503, "Service unavailable")
     
     # Mock: fail all 3 attempts with 503
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=http_error_503
     )
     
@@ -158,7 +158,7 @@ async def test_get_with_retry_http_503_exhausted():
             await batch_poster.get_with_retry("/test", {"limit": 10})
     
     # Should try 3 times total
-    assert batch_poster.folio_client.folio_get_async.call_count == 3
+    assert batch_poster.get_json.call_count == 3
     # Should sleep twice with exponential backoff
     assert mock_sleep.call_count == 2
 
@@ -171,7 +171,7 @@ async def test_get_with_retry_http_404_no_retry():
     http_error_404 = create_mock_http_error(404, "Not found")
     
     # Mock: 404 error (should not retry)
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=http_error_404
     )
     
@@ -180,7 +180,7 @@ async def test_get_with_retry_http_404_no_retry():
             await batch_poster.get_with_retry("/test", {"limit": 10})
     
     # Should only try once (no retries for 4xx except 429)
-    assert batch_poster.folio_client.folio_get_async.call_count == 1
+    assert batch_poster.get_json.call_count == 1
     # Should not sleep at all
     mock_sleep.assert_not_called()
 
@@ -193,7 +193,7 @@ async def test_get_with_retry_http_422_no_retry():
     http_error_422 = create_mock_http_error(422, "Validation error")
     
     # Mock: 422 error (should not retry)
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=http_error_422
     )
     
@@ -202,7 +202,7 @@ async def test_get_with_retry_http_422_no_retry():
             await batch_poster.get_with_retry("/test", {"limit": 10})
     
     # Should only try once
-    assert batch_poster.folio_client.folio_get_async.call_count == 1
+    assert batch_poster.get_json.call_count == 1
     # Should not sleep
     mock_sleep.assert_not_called()
 
@@ -215,7 +215,7 @@ async def test_get_with_retry_http_400_no_retry():
     http_error_400 = create_mock_http_error(400, "Bad request")
     
     # Mock: 400 error (should not retry)
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=http_error_400
     )
     
@@ -224,7 +224,7 @@ async def test_get_with_retry_http_400_no_retry():
             await batch_poster.get_with_retry("/test", {"limit": 10})
     
     # Should only try once
-    assert batch_poster.folio_client.folio_get_async.call_count == 1
+    assert batch_poster.get_json.call_count == 1
     # Should not sleep
     mock_sleep.assert_not_called()
 
@@ -238,7 +238,7 @@ async def test_get_with_retry_http_502_bad_gateway():
     mock_success = {"instances": [{"id": "1", "_version": 1}]}
     
     # Mock: 502 error first, then success
-    batch_poster.folio_client.folio_get_async = AsyncMock(
+    batch_poster.get_json = AsyncMock(
         side_effect=[http_error_502, mock_success]
     )
     
@@ -247,7 +247,7 @@ async def test_get_with_retry_http_502_bad_gateway():
     
     # Should succeed on second attempt
     assert result == mock_success
-    assert batch_poster.folio_client.folio_get_async.call_count == 2
+    assert batch_poster.get_json.call_count == 2
     # Should use exponential backoff (2^0 = 1s)
     mock_sleep.assert_called_once_with(1)
 
@@ -258,18 +258,17 @@ async def test_get_with_retry_params_default_to_empty_dict():
     batch_poster = create_batch_poster()
     
     mock_response = {"instances": []}
-    batch_poster.folio_client.folio_get_async = AsyncMock(return_value=mock_response)
+    batch_poster.get_json = AsyncMock(return_value=mock_response)
     
     result = await batch_poster.get_with_retry("/test")  # No params provided
     
     assert result == mock_response
     # Should be called with empty dict for params
-    batch_poster.folio_client.folio_get_async.assert_called_once_with(
-        "/test", query_params={}
-    )
+    batch_poster.get_json.assert_called_once_with("/test", {})
 
 
-def test_post_extra_data_http_422_duplicate_id():
+@pytest.mark.asyncio
+async def test_post_extra_data_http_422_duplicate_id():
     """Test post_extra_data handles 422 errors with duplicate ID gracefully."""
     from io import StringIO
     
@@ -294,13 +293,13 @@ def test_post_extra_data_http_422_duplicate_id():
     error = FolioHTTPError("Unprocessable Entity", request=mock_request, response=mock_response)
     error.response = mock_response
     
-    batch_poster.folio_client.folio_post.side_effect = error
+    batch_poster.post_json = AsyncMock(side_effect=error)
     
     failed_file = StringIO()
     row = "testObject\t{\"id\": \"123\", \"name\": \"test\"}"
     
     # Call the method
-    batch_poster.post_extra_data(row, 1, failed_file)
+    await batch_poster.post_extra_data(row, 1, failed_file)
     
     # Duplicate ID should increment failures but not write to failed file
     assert batch_poster.num_failures == 1
@@ -308,7 +307,8 @@ def test_post_extra_data_http_422_duplicate_id():
     assert failed_file.getvalue() == ""  # Should not write duplicate IDs to failed file
 
 
-def test_post_extra_data_http_422_other_error():
+@pytest.mark.asyncio
+async def test_post_extra_data_http_422_other_error():
     """Test post_extra_data writes to failed file for non-duplicate 422 errors."""
     from io import StringIO
     
@@ -333,13 +333,13 @@ def test_post_extra_data_http_422_other_error():
     error = FolioHTTPError("Unprocessable Entity", request=mock_request, response=mock_response)
     error.response = mock_response
     
-    batch_poster.folio_client.folio_post.side_effect = error
+    batch_poster.post_json = AsyncMock(side_effect=error)
     
     failed_file = StringIO()
     row = "testObject\t{\"id\": \"123\", \"name\": \"test\"}"
     
     # Call the method
-    batch_poster.post_extra_data(row, 1, failed_file)
+    await batch_poster.post_extra_data(row, 1, failed_file)
     
     # Should increment failures and write to failed file
     assert batch_poster.num_failures == 1
@@ -347,7 +347,8 @@ def test_post_extra_data_http_422_other_error():
     assert failed_file.getvalue() == row
 
 
-def test_post_extra_data_http_500_error():
+@pytest.mark.asyncio
+async def test_post_extra_data_http_500_error():
     """Test post_extra_data handles 500 errors correctly."""
     from io import StringIO
     
@@ -372,15 +373,128 @@ def test_post_extra_data_http_500_error():
     error = FolioHTTPError("Internal Server Error", request=mock_request, response=mock_response)
     error.response = mock_response
     
-    batch_poster.folio_client.folio_post.side_effect = error
+    batch_poster.post_json = AsyncMock(side_effect=error)
     
     failed_file = StringIO()
     row = "testObject\t{\"id\": \"123\", \"name\": \"test\"}"
     
     # Call the method
-    batch_poster.post_extra_data(row, 1, failed_file)
+    await batch_poster.post_extra_data(row, 1, failed_file)
     
     # Should increment failures and write to failed file
     assert batch_poster.num_failures == 1
     assert batch_poster.num_posted == 0
     assert failed_file.getvalue() == row
+
+
+def create_batch_poster_with_http_client(handler):
+    batch_poster = Mock(spec=BatchPoster)
+    batch_poster.http_client = httpx.AsyncClient(
+        base_url="https://test.folio.org", transport=httpx.MockTransport(handler)
+    )
+    for method_name in [
+        "get_http_client",
+        "close_http_client",
+        "get_json",
+        "post_json",
+        "retrieve_json",
+    ]:
+        setattr(batch_poster, method_name, MethodType(getattr(BatchPoster, method_name), batch_poster))
+    return batch_poster
+
+
+@pytest.mark.asyncio
+async def test_get_json_uses_shared_http_client():
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"instances": [{"id": "1"}]})
+
+    batch_poster = create_batch_poster_with_http_client(handler)
+    shared_client = batch_poster.http_client
+
+    result = await batch_poster.get_json("/instance-storage/instances", {"limit": 10})
+    await batch_poster.post_json("/organizations/organizations", '{"id": "1"}')
+
+    assert result == {"instances": [{"id": "1"}]}
+    assert batch_poster.get_http_client() is shared_client
+    assert [r.url.path for r in requests] == [
+        "/instance-storage/instances",
+        "/organizations/organizations",
+    ]
+    await batch_poster.close_http_client()
+    assert shared_client.is_closed
+    assert batch_poster.http_client is None
+
+
+@pytest.mark.asyncio
+async def test_post_json_raises_folio_http_error():
+    def handler(request):
+        return httpx.Response(422, json={"errors": [{"message": "Invalid field value"}]})
+
+    batch_poster = create_batch_poster_with_http_client(handler)
+
+    with pytest.raises(FolioHTTPError) as exc_info:
+        await batch_poster.post_json("/organizations/organizations", '{"id": "1"}')
+
+    assert exc_info.value.response.status_code == 422
+    await batch_poster.close_http_client()
+
+
+@pytest.mark.asyncio
+async def test_retrieve_json_posts_query_in_body():
+    import json
+
+    requests = []
+
+    def handler(request):
+        requests.append(request)
+        return httpx.Response(200, json={"instances": [{"id": "1", "_version": 3}]})
+
+    batch_poster = create_batch_poster_with_http_client(handler)
+    payload = {"query": "id==(1 OR 2)", "limit": 2}
+
+    result = await batch_poster.retrieve_json("/instance-storage/instances/retrieve", payload)
+
+    assert result == {"instances": [{"id": "1", "_version": 3}]}
+    assert requests[0].method == "POST"
+    assert json.loads(requests[0].content) == payload
+    await batch_poster.close_http_client()
+
+
+def test_get_http_client_applies_pool_settings():
+    batch_poster = Mock(spec=BatchPoster)
+    batch_poster.http_client = None
+    batch_poster.task_configuration = BatchPoster.TaskConfiguration(
+        name="Test Task",
+        migration_task_type="BatchPoster",
+        object_type="Instances",
+        files=[],
+        batch_size=100,
+        http_pool_size=5,
+        http_keepalive_connections=3,
+        http_keepalive_expiry=15,
+        use_http2=False,
+    )
+    batch_poster.folio_client = Mock()
+    batch_poster.folio_client.folio_parameters.timeout = httpx.Timeout(30)
+    batch_poster.folio_client.ssl_verify = True
+    batch_poster.folio_client.gateway_url = "https://test.folio.org"
+    batch_poster.folio_client.folio_auth = None
+    batch_poster.folio_client.base_headers = {"content-type": "application/json"}
+    batch_poster.get_http_client = MethodType(BatchPoster.get_http_client, batch_poster)
+
+    with patch("httpx.AsyncClient") as mock_async_client:
+        mock_async_client.return_value.is_closed = False
+        first_client = batch_poster.get_http_client()
+        second_client = batch_poster.get_http_client()
+
+    assert first_client is second_client
+    mock_async_client.assert_called_once()
+    kwargs = mock_async_client.call_args.kwargs
+    assert kwargs["limits"] == httpx.Limits(
+        max_connections=5, max_keepalive_connections=3, keepalive_expiry=15
+    )
+    assert kwargs["http2"] is False
+    assert kwargs["base_url"] == "https://test.folio.org"
@@ -0,0 +1,106 @@
+from io import BytesIO
+from types import SimpleNamespace
+
+import pytest
+from pymarc import Field, MARCReader, Record, Subfield
+from pymarc.exceptions import TruncatedRecord
+from pymarc.field import Indicators
+
+from folio_migration_tools.helper import Helper
+from folio_migration_tools.library_configuration import FileDefinition
+from folio_migration_tools.marc_rules_transformation.buffered_marc_reader import (
+    BufferedMARCReader,
+)
+from folio_migration_tools.marc_rules_transformation.marc_reader_wrapper import (
+    DEFAULT_MARC_RECORD_PREPROCESSORS,
+    MARCReaderWrapper,
+)
+from folio_migration_tools.migration_report import MigrationReport
+
+
+def build_marc8_chunk() -> bytes:
+    """Build a MARC-8 record with a truncated multi-byte character."""
+    record = Record()
+    record.add_field(Field(tag="001", data="marc8"))
+    record.add_field(
+        Field(
+            tag="245",
+            indicators=Indicators(*["1", "0"]),
+            subfields=[Subfield(code="a", value="\x1b$1!0")],
+        )
+    )
+    chunk = bytearray(record.as_marc())
+    chunk[9:10] = b" "
+    return bytes(chunk)
+
+
+def read_all(reader):
+    return [
+        (
+            record.as_marc() if record else None,
+            type(reader.current_exception),
+            reader.current_chunk,
+        )
+        for record in reader
+    ]
+
+
+@pytest.mark.parametrize("buffer_size", [7, 1000, 1 << 20])
+def test_reads_like_pymarc(buffer_size):
+    with open("./tests/test_data/two020a.mrc", "rb") as marc_file:
+        data = marc_file.read() * 3 + b"00100nam a22"
+    pymarc_reader = MARCReader(BytesIO(data), to_unicode=True, permissive=True)
+    pymarc_reader.force_utf8 = True
+    reader = BufferedMARCReader(BytesIO(data), buffer_size=buffer_size)
+
+    records = read_all(reader)
+
+    assert records == read_all(pymarc_reader)
+    assert len(records) == 4
+    assert records[-1][1] is TruncatedRecord
+
+
+def test_marc8_warnings_are_collected_per_record(capsys):
+    chunk = build_marc8_chunk()
+    reader = BufferedMARCReader(BytesIO(chunk * 2), force_utf8=False)
+
+    for record in reader:
+        assert record["001"].value() == "marc8"
+        assert reader.current_warnings.startswith("Multi-byte position 6 exceeds length")
+
+    assert capsys.readouterr().err == ""
+
+
+def test_read_records_logs_warnings_and_counts_records(monkeypatch):
+    reader = BufferedMARCReader(
+        BytesIO(build_marc8_chunk() + b"00050nam a22 garbage\x1d"), force_utf8=False
+    )
+    migration_report = MigrationReport()
+    processor = SimpleNamespace(
+        folder_structure=SimpleNamespace(mapping_files_folder="."),
+        mapper=SimpleNamespace(
+            migration_report=migration_report,
+            task_configuration=SimpleNamespace(
+                marc_record_preprocessors=DEFAULT_MARC_RECORD_PREPROCESSORS,
+                preprocessors_args={},
+            ),
+        ),
+    )
+    processed = []
+    processor.process_record = lambda idx, record, source_file: processed.append(idx)
+    logged_issues = []
+    monkeypatch.setattr(
+        Helper,
+        "log_data_issue",
+        lambda index_or_id, message, legacy_value: logged_issues.append((index_or_id, message)),
+    )
+
+    MARCReaderWrapper.read_records(
+        reader, FileDefinition(file_name="marc8.mrc"), BytesIO(), processor, 10
+    )
+
+    assert processed == [10]
+    assert ("marc8.mrc:10", "MARC-8 decoding warning") in logged_issues
+    statistics = migration_report.counters["GeneralStatistics"]
+    assert statistics["Records in file before parsing"] == 2
+    assert statistics["Records successfully decoded from MARC21"] == 1
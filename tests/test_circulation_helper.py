@@ -3,7 +3,10 @@ from datetime import datetime, timezone
 from unittest.mock import patch, MagicMock
 
 from folio_migration_tools.circulation_helper import CirculationHelper
+from folio_migration_tools.helper import Helper
+from folio_migration_tools.library_configuration import OutputCompression
 from folio_migration_tools.migration_report import MigrationReport
+from folio_migration_tools.record_writer import RecordWriter
 from .test_infrastructure import mocked_classes
 
 
@@ -18,6 +21,22 @@ def test_init():
     assert not any(circ_helper.migration_report.report)
 
 
+def test_load_migrated_item_barcodes_from_compressed_file(tmp_path):
+    with RecordWriter(tmp_path / "folio_items.json", OutputCompression.gzip) as writer:
+        for barcode in ["b1", "b2"]:
+            Helper.write_to_file(writer, {"id": barcode, "barcode": barcode})
+    circ_helper = CirculationHelper(mocked_classes.mocked_folio_client(), "", MigrationReport())
+    item_barcodes = set()
+
+    circ_helper.load_migrated_item_barcodes(
+        item_barcodes,
+        [MagicMock(file_name="folio_items.json")],
+        MagicMock(results_folder=tmp_path),
+    )
+
+    assert item_barcodes == {"b1", "b2"}
+
+
 def test_get_user_by_barcode_already_missing(caplog):
     """Test that get_user_by_barcode logs when user barcode is already in missing set."""
     mocked_folio = mocked_classes.mocked_folio_client()
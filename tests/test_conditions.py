@@ -5,6 +5,7 @@ from folioclient import FolioClient
 from pymarc import Field, Indicators, Subfield
 
 from folio_migration_tools.custom_exceptions import (
+    TransformationFieldMappingError,
     TransformationProcessError,
     TransformationRecordFailedError,
 )
@@ -42,6 +43,34 @@ def test_condition_trim_punctuation():
     assert res4 == "Rockefeller, John D."
 
 
+def test_get_condition_runs_failing_condition_once():
+    mock = Mock(spec=Conditions)
+    mock.condition_cache = {}
+    mock.condition_trim = Mock(side_effect=TransformationFieldMappingError("id", "msg", "data"))
+    for _ in range(2):
+        with pytest.raises(TransformationFieldMappingError):
+            Conditions.get_condition(mock, "trim", "legacy_id", "value", {}, None)
+    assert mock.condition_trim.call_count == 2
+    assert mock.condition_cache == {"trim": mock.condition_trim}
+
+
+def test_get_ref_data_tuple_builds_index_once():
+    mock = Mock(spec=Conditions)
+    mock.ref_data_dicts = {}
+    ref_data = [{"id": "1", "name": "Topical term", "code": "tt"}]
+    assert Conditions.get_ref_data_tuple(mock, ref_data, "subject_types", "Missing", "name") == ()
+    ref_data.append({"id": "2", "name": "Other", "code": "o"})
+    assert Conditions.get_ref_data_tuple(mock, ref_data, "subject_types", "TOPICAL TERM", "name") == (
+        "1",
+        "Topical term",
+    )
+    assert Conditions.get_ref_data_tuple(mock, ref_data, "subject_types", "Other", "name") == ()
+    assert Conditions.get_ref_data_tuple(mock, ref_data, "subject_types", "o", "code") == (
+        "2",
+        "Other",
+    )
+
+
 def test_condition_concat_subfields_by_name():
     mock = Mock(spec=Conditions)
     parameter = {"subfieldsToConcat": ["q"], "subfieldsToStopConcat": ["z"]}
@@ -68,6 +97,9 @@ def test_condition_set_contributor_type_text():
     folio = Mock(spec=FolioClient)
     folio.contributor_types = [{"code": "ed", "name": "editor"}]
     mock.folio = folio
+    mock.contributor_type_names = Conditions.index_contributor_type_names(
+        folio.contributor_types
+    )
     legacy_id = "legacy_id"
     marc_fields = [
         Field(
@@ -0,0 +1,25 @@
+from folio_migration_tools.external_sort import external_sort
+
+
+def test_sorts_in_memory_when_items_fit():
+    items = [("b", 0), ("a", 1), ("b", 2), ("a", 3)]
+
+    assert list(external_sort(items, key=lambda item: item[0])) == [
+        ("a", 1),
+        ("a", 3),
+        ("b", 0),
+        ("b", 2),
+    ]
+
+
+def test_merges_sorted_chunks_from_disk(tmp_path):
+    items = [[str(i % 7), i, {"row": i}] for i in range(100)]
+
+    sorted_items = list(
+        external_sort(
+            items, key=lambda item: (item[0], item[1]), chunk_size=9, temp_folder=tmp_path
+        )
+    )
+
+    assert sorted_items == sorted(items, key=lambda item: (item[0], item[1]))
+    assert not any(tmp_path.iterdir())
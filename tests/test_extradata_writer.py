@@ -93,3 +93,14 @@ def test_flush_keeps_non_empty_file(tmp_path):
 
     assert extradata_file.exists()
     assert extradata_file.stat().st_size > 0
+
+
+def test_write_non_ascii_as_utf_8(tmp_path):
+    """Test that the extradata file is written as UTF-8 whatever the default encoding."""
+    extradata_file = tmp_path / "test.extradata"
+    writer = ExtradataWriter(extradata_file)
+
+    with patch("builtins.open", mock_open()) as mocked_open:
+        writer.write("contacts", {"firstName": "Zoë"}, flush=True)
+
+    mocked_open.assert_called_once_with(extradata_file, "a", encoding="utf-8")
@@ -0,0 +1,244 @@
+import csv
+import gzip
+import io
+from pathlib import Path
+from unittest.mock import Mock
+
+from pymarc import Field, MARCReader, Record, Subfield
+
+from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.file_sharding import (
+    DelimitedFileSharder,
+    EarlierShardValues,
+    MarcFileSharder,
+    append_part,
+    merge_field_counts,
+    remove_part_lines,
+    shard_part_path,
+    transform_in_shards,
+)
+from folio_migration_tools.mapper_base import MapperBase
+from folio_migration_tools.mapping_file_transformation.mapping_file_mapper_base import (
+    MappingFileMapperBase,
+)
+from folio_migration_tools.migration_report import MigrationReport
+
+
+def write_source_file(path: Path, num_records: int) -> Path:
+    lines = ["﻿id,title,note\r\n"]
+    for i in range(num_records):
+        if i % 7 == 3:
+            lines.append(f'{i},"Title {i}","multi\r\nline, ""quoted"" note"\r\n')
+        elif i % 11 == 5:
+            lines.append(f"{i},Title {i},\r\n\r\n")
+        else:
+            lines.append(f"{i},Title {i},note {i}\r\n")
+    path.write_bytes("".join(lines).encode("utf-8"))
+    return path
+
+
+def test_shards_split_on_record_boundaries(tmp_path):
+    source_path = write_source_file(tmp_path / "items.csv", 100)
+    sharder = DelimitedFileSharder(source_path)
+    shards = sharder.scan(8)
+
+    assert len(shards) == 8
+    assert [s.index for s in shards] == list(range(8))
+    assert all(a.end == b.start for a, b in zip(shards, shards[1:], strict=False))
+    assert sharder.fieldnames == ["id", "title", "note"]
+    assert sharder.num_records == 100
+    records = []
+    for shard in shards:
+        shard_records = list(sharder.read(shard))
+        assert int(shard_records[0]["id"]) == shard.first_record_index
+        records.extend(shard_records)
+    with open(source_path, encoding="utf-8-sig") as source_file:
+        assert records == list(csv.DictReader(source_file))
+    assert records[3]["note"] == 'multi\nline, "quoted" note'
+
+
+def test_scan_counts_rows_like_the_sequential_reader(tmp_path):
+    source_path = write_source_file(tmp_path / "items.csv", 30)
+    sharder = DelimitedFileSharder(source_path)
+    sharder.scan(4)
+    with open(source_path, encoding="utf-8-sig") as source_file:
+        total_rows, empty_rows, _ = MappingFileMapperBase._get_delimited_file_reader(
+            source_file, source_path
+        )
+    assert (sharder.total_rows, sharder.empty_rows) == (total_rows, empty_rows)
+
+
+def test_scan_small_file_gives_fewer_shards(tmp_path):
+    source_path = tmp_path / "users.tsv"
+    source_path.write_text("id\tname\n1\tone\n2\ttwo\n", encoding="utf-8")
+    sharder = DelimitedFileSharder(source_path, encoding="utf8")
+    shards = sharder.scan(16)
+
+    assert len(shards) == 2
+    assert [r["name"] for s in shards for r in sharder.read(s)] == ["one", "two"]
+
+
+def test_append_part_filters_records(tmp_path):
+    part_path = tmp_path / "part"
+    part_path.write_text('{"id": "a"}\n{"id": "b"}\n')
+    target = io.StringIO()
+
+    def keep_record(record):
+        record["seen"] = True
+        return record["id"] != "a"
+
+    append_part(target, part_path, keep_record)
+
+    assert target.getvalue() == '{"id": "b", "seen": true}\n'
+    assert not part_path.exists()
+
+
+def test_merge_field_counts():
+    field_counts = {"a": [1, 1], "b": [2]}
+    merge_field_counts(field_counts, {"a": [2, 0], "c": [3]})
+    assert field_counts == {"a": [3, 1], "b": [2], "c": [3]}
+
+
+def test_transform_in_shards_merges_worker_statistics(tmp_path):
+    source_path = write_source_file(tmp_path / "items.csv", 40)
+    sharder = DelimitedFileSharder(source_path)
+    shards = sharder.scan(4)
+    mapper = Mock(spec=MapperBase)
+    mapper.migration_report = MigrationReport()
+    mapper.migration_report.add("GeneralStatistics", "Before", 1)
+    mapper.mapped_folio_fields = {"id": [5]}
+    mapper.mapped_legacy_fields = {}
+    extradata_writer = Mock(spec=ExtradataWriter)
+    extradata_writer.path_to_file = tmp_path / "extradata.txt"
+    results_path = tmp_path / "results.json"
+
+    def transform_shard(shard):
+        with open(shard_part_path(results_path, shard), "w") as part_file:
+            for record in sharder.read(shard):
+                mapper.migration_report.add("GeneralStatistics", "Records")
+                mapper.mapped_folio_fields["id"] = [1]
+                mapper.mapped_legacy_fields["id"] = [1, 1]
+                part_file.write(f"{record['id']}\n")
+        return {"shard": shard.index}
+
+    with open(results_path, "w") as results_file:
+        for shard, result in transform_in_shards(
+            shards, 2, mapper, extradata_writer, transform_shard
+        ):
+            assert result == {"shard": shard.index}
+            append_part(results_file, shard_part_path(results_path, shard))
+
+    assert results_path.read_text().split() == [str(i) for i in range(40)]
+    assert mapper.migration_report.report["GeneralStatistics"]["Before"] == 1
+    assert mapper.migration_report.report["GeneralStatistics"]["Records"] == 40
+    assert mapper.mapped_folio_fields == {"id": [9]}
+    assert mapper.mapped_legacy_fields == {"id": [4, 4]}
+
+
+def test_transform_in_shards_appends_extradata_after_the_caller_is_done(tmp_path):
+    source_path = write_source_file(tmp_path / "items.csv", 20)
+    sharder = DelimitedFileSharder(source_path)
+    shards = sharder.scan(2)
+    mapper = Mock(spec=MapperBase)
+    mapper.migration_report = MigrationReport()
+    mapper.mapped_folio_fields = {}
+    mapper.mapped_legacy_fields = {}
+    extradata_writer = Mock(spec=ExtradataWriter)
+    extradata_writer.path_to_file = tmp_path / "extradata.txt"
+
+    def transform_shard(shard):
+        with open(extradata_writer.path_to_file, "w") as part_file:
+            for record in sharder.read(shard):
+                part_file.write(f"boundwithPart\t{record['id']}\n")
+        return {}
+
+    for shard, _ in transform_in_shards(shards, 2, mapper, extradata_writer, transform_shard):
+        remove_part_lines(shard_part_path(tmp_path / "extradata.txt", shard), {0})
+
+    assert (tmp_path / "extradata.txt").read_text().splitlines() == [
+        f"boundwithPart\t{i}"
+        for i in range(20)
+        if i not in (shards[0].first_record_index, shards[1].first_record_index)
+    ]
+
+
+def test_remove_part_lines_keeps_compression(tmp_path):
+    part_path = tmp_path / "extradata.txt.shard00000"
+    with gzip.open(part_path, "wt") as part_file:
+        part_file.writelines(f"boundwithPart\t{i}\n" for i in range(5))
+
+    remove_part_lines(part_path, {1, 3})
+
+    with gzip.open(part_path, "rt") as part_file:
+        assert part_file.read().splitlines() == [
+            "boundwithPart\t0",
+            "boundwithPart\t2",
+            "boundwithPart\t4",
+        ]
+    assert not part_path.with_name(f"{part_path.name}.tmp").exists()
+
+
+def write_marc_file(path: Path, control_numbers: list) -> Path:
+    with open(path, "wb") as marc_file:
+        for i, control_number in enumerate(control_numbers):
+            record = Record()
+            if control_number:
+                record.add_field(Field(tag="001", data=control_number))
+            record.add_field(
+                Field(
+                    tag="245",
+                    indicators=["0", "0"],
+                    subfields=[Subfield(code="a", value=f"Title {i} " + "x" * (i % 13))],
+                )
+            )
+            marc_file.write(record.as_marc())
+    return path
+
+
+def test_marc_shards_split_on_record_boundaries(tmp_path):
+    marc_path = write_marc_file(tmp_path / "bibs.mrc", [f"cn{i}" for i in range(50)])
+    sharder = MarcFileSharder(marc_path)
+    shards = sharder.scan(6)
+
+    assert len(shards) == 6
+    assert sharder.num_records == 50
+    assert sum(sharder.hrids_needed) == 50
+    control_numbers = []
+    for shard in shards:
+        with sharder.open(shard) as shard_file:
+            shard_records = list(MARCReader(shard_file))
+        assert shard_records[0]["001"].data == f"cn{shard.first_record_index}"
+        control_numbers.extend(r["001"].data for r in shard_records)
+    assert control_numbers == [f"cn{i}" for i in range(50)]
+
+
+def test_marc_scan_counts_hrids_for_preserved_001s(tmp_path):
+    marc_path = write_marc_file(tmp_path / "bibs.mrc", ["a", "b", "", "a", "c", "b", "d", "e"])
+    sharder = MarcFileSharder(marc_path)
+    shards = sharder.scan(2, previous_001s={"e"})
+
+    assert len(shards) == 2
+    assert sum(sharder.hrids_needed) == 1 + 2 + 2 + 2
+    assert shards[1].first_record_index <= 6
+    assert sharder.first_shards_of_001s["a"] == 0
+    assert sharder.first_shards_of_001s["d"] == 1
+    assert set(sharder.first_shards_of_001s) == {"a", "b", "c", "d"}
+    later_shard_values = EarlierShardValues({"e"}, sharder.first_shards_of_001s, 1)
+    assert "a" in later_shard_values
+    assert "e" in later_shard_values
+    assert "d" not in later_shard_values
+    later_shard_values.add("d")
+    assert "d" in later_shard_values
+    assert "a" not in EarlierShardValues(set(), sharder.first_shards_of_001s, 0)
+
+
+def test_marc_scan_puts_unreadable_rest_in_last_shard(tmp_path):
+    marc_path = write_marc_file(tmp_path / "bibs.mrc", [f"cn{i}" for i in range(20)])
+    with open(marc_path, "ab") as marc_file:
+        marc_file.write(b"garbage that is not a MARC record")
+    sharder = MarcFileSharder(marc_path)
+    shards = sharder.scan(4)
+
+    assert sharder.num_records == 20
+    assert shards[-1].end == marc_path.stat().st_size
+    assert sum(sharder.hrids_needed) == 22
@@ -1,3 +1,4 @@
+import json
 import logging
 from unittest.mock import Mock
 
@@ -30,16 +31,14 @@ def test_generate_boundwith_part(caplog):
 
     assert any("boundwithPart\t" in ed for ed in mock_mapper.extradata_writer.cache)
     assert any(
-        '"itemId": "c6792640-a656-527f-84e7-e2524c141f66"' in ed
+        json.loads(ed.split("\t")[1])
+        == {
+            "id": "f5411afb-a2a3-5ce3-9e59-16a67c573bda",
+            "holdingsRecordId": "holding_uuid",
+            "itemId": "c6792640-a656-527f-84e7-e2524c141f66",
+        }
         for ed in mock_mapper.extradata_writer.cache
     )
-    assert any(
-        '"id": "f5411afb-a2a3-5ce3-9e59-16a67c573bda"' in ed
-        for ed in mock_mapper.extradata_writer.cache
-    )
-    assert any(
-        '"holdingsRecordId": "holding_uuid"' in ed for ed in mock_mapper.extradata_writer.cache
-    )
 
 
 def test_merge_holding_in_first_boundwith(caplog):
@@ -4,8 +4,11 @@ from copy import deepcopy
 import pytest
 
 from folio_migration_tools.custom_exceptions import TransformationProcessError
-from folio_migration_tools.holdings_helper import HoldingsHelper
+from folio_migration_tools.helper import Helper
+from folio_migration_tools.holdings_helper import HoldingsHelper, HoldingsMerger
+from folio_migration_tools.library_configuration import OutputCompression
 from folio_migration_tools.migration_report import MigrationReport
+from folio_migration_tools.record_writer import RecordWriter
 
 # flake8: noqa: E501
 
@@ -374,6 +377,28 @@ def test_load_previously_generated_holdings_success(tmp_path, caplog):
     assert result is not None
 
 
+@pytest.mark.parametrize("compression", [OutputCompression.none, OutputCompression.gzip])
+def test_load_previously_generated_holdings_compressed(tmp_path, compression):
+    holdings_file = tmp_path / "folio_holdings.json"
+    with RecordWriter(holdings_file, compression) as writer:
+        for i, location in enumerate(["loc-1", "loc-2", "loc-1"]):
+            Helper.write_to_file(
+                writer,
+                {
+                    "id": str(i),
+                    "instanceId": "inst-1",
+                    "permanentLocationId": location,
+                    "formerIds": [f"legacy-{i}"],
+                },
+            )
+
+    result = HoldingsHelper.load_previously_generated_holdings(
+        holdings_file, ["instanceId", "permanentLocationId"], MigrationReport()
+    )
+
+    assert [h["formerIds"] for h in result.values()] == [["legacy-0", "legacy-2"], ["legacy-1"]]
+
+
 def test_to_key_with_exception(caplog):
     """Test that to_key logs the record when an exception occurs."""
     from unittest.mock import patch
@@ -400,3 +425,39 @@ def test_to_key_with_exception(caplog):
                 HoldingsHelper.to_key(bad_record, ["instanceId"], m)
             except Exception:
                 pass  # Expected to fail
+
+
+def test_holdings_merger_keeps_members_between_merges():
+    merger = HoldingsMerger()
+    note = {"note": "n", "holdingsNoteTypeId": "t", "staffOnly": False}
+    holding = {
+        "formerIds": ["0"],
+        "notes": [note, dict(reversed(note.items()))],
+        "holdingsStatements": [{"statement": "", "note": "", "staffNote": ""}],
+    }
+    for i in range(1, 5000):
+        incoming = {
+            "formerIds": [str(i), "0"],
+            "notes": [note],
+            "holdingsStatements": [{"statement": f"v.{i % 2}", "note": "", "staffNote": ""}],
+        }
+        holding = HoldingsHelper.merge_holding(holding, incoming, merger)
+
+    assert holding["formerIds"] == [str(i) for i in range(5000)]
+    assert holding["notes"] == [note]
+    # Statements are only added when not all of them are in the holding already
+    assert [s["statement"] for s in holding["holdingsStatements"]] == ["v.1", "v.0"]
+    assert holding["discoverySuppress"] is False
+
+
+def test_holdings_merger_rebuilds_members_for_new_records():
+    merger = HoldingsMerger(max_records=1)
+    holding_1 = {"formerIds": ["a"]}
+    holding_2 = {"formerIds": ["b"]}
+    merger.merge(holding_1, {"formerIds": ["c"]})
+    merger.merge(holding_2, {"formerIds": ["c"]})
+    holding_1["formerIds"] = ["d"]
+    merger.merge(holding_1, {"formerIds": ["c", "d"]})
+
+    assert holding_1["formerIds"] == ["d", "c"]
+    assert holding_2["formerIds"] == ["b", "c"]
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+from folio_migration_tools.holdings_helper import HoldingsHelper
+from folio_migration_tools.holdings_merge_store import DiskHoldingsStore
+from folio_migration_tools.migration_report import MigrationReport
+
+
+def test_spills_and_keeps_insertion_order(tmp_path):
+    store = DiskHoldingsStore(tmp_path / "store.sqlite", cache_size=3)
+    for i in range(10):
+        store[f"key_{i}"] = {"id": str(i), "formerIds": [str(i)]}
+    # Changes to a record taken from the store are kept
+    store["key_0"]["formerIds"].append("0b")
+    store["key_5"] = HoldingsHelper.merge_holding(store["key_5"], {"formerIds": ["5b"]})
+    for i in range(6, 10):
+        assert f"key_{i}" in store
+
+    assert len(store.cache) <= 3
+    assert len(store) == 10
+    assert list(store) == [f"key_{i}" for i in range(10)]
+    holdings = list(store.values())
+    assert holdings[0]["formerIds"] == ["0", "0b"]
+    assert holdings[5]["formerIds"] == ["5", "5b"]
+    assert store.get("key_11") is None
+    assert "key_11" not in store
+
+    del store["key_1"]
+    with pytest.raises(KeyError):
+        del store["key_1"]
+    assert len(store) == 9
+
+    store.close()
+    assert not (tmp_path / "store.sqlite").exists()
+
+
+def test_load_previously_generated_holdings_into_store(tmp_path):
+    holdings_file = tmp_path / "holdings.json"
+    holdings_file.write_text(
+        "\n".join(
+            json.dumps(
+                {"id": str(i), "instanceId": "in", "permanentLocationId": loc, "formerIds": [i]}
+            )
+            for i, loc in enumerate(["loc_1", "loc_2", "loc_1"])
+        )
+    )
+    store = DiskHoldingsStore(tmp_path / "store.sqlite", cache_size=1)
+    migration_report = MigrationReport()
+
+    HoldingsHelper.load_previously_generated_holdings(
+        holdings_file,
+        ["instanceId", "permanentLocationId"],
+        migration_report,
+        prev_holdings=store,
+    )
+
+    assert [h["formerIds"] for h in store.values()] == [[0, 2], [1]]
+    assert migration_report.counters["HoldingsMerging"] == {
+        "blurb_id": "HoldingsMerging",
+        "Previously transformed holdings record loaded": 2,
+        "Duplicate key based on current merge criteria. Records merged": 1,
+    }
+    store.close()
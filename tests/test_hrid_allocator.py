@@ -0,0 +1,106 @@
+import json
+import multiprocessing
+from unittest.mock import Mock
+
+from folio_uuid.folio_namespaces import FOLIONamespaces
+from folioclient import FolioClient
+
+from folio_migration_tools.library_configuration import HridHandling
+from folio_migration_tools.marc_rules_transformation.hrid_allocator import HridAllocator
+from folio_migration_tools.marc_rules_transformation.hrid_handler import (
+    HRID_BLOCK_SIZE,
+    HRIDHandler,
+)
+from folio_migration_tools.migration_report import MigrationReport
+
+
+def hrid_settings():
+    return {
+        "instances": {"prefix": "in", "startNumber": 100},
+        "holdings": {"prefix": "ho", "startNumber": 200},
+        "items": {"prefix": "it", "startNumber": 300},
+        "commonRetainLeadingZeroes": False,
+    }
+
+
+def create_handler(folio_client, allocator):
+    hrid_handler = HRIDHandler(folio_client, HridHandling.default, MigrationReport(), False)
+    hrid_handler.allocator = allocator
+    return hrid_handler
+
+
+def reserve_blocks(path, queue):
+    allocator = HridAllocator(path)
+    queue.put([allocator.reserve("instances", 10, 1) for _ in range(25)])
+
+
+def test_concurrent_reservations_are_disjoint(tmp_path):
+    path = tmp_path / "hrid_reservations.json"
+    context = multiprocessing.get_context("fork")
+    queue = context.Queue()
+    processes = [context.Process(target=reserve_blocks, args=(path, queue)) for _ in range(4)]
+    for process in processes:
+        process.start()
+    starts = [start for _ in processes for start in queue.get()]
+    for process in processes:
+        process.join()
+
+    assert sorted(starts) == list(range(1, 1001, 10))
+    assert json.loads(path.read_text()) == {"instances": 1001}
+
+
+def test_blocks_are_persisted_before_use_and_tails_released(tmp_path):
+    path = tmp_path / "hrid_reservations.json"
+    folio_client = Mock(spec=FolioClient)
+    folio_client.folio_get_single_object.side_effect = lambda path: hrid_settings()
+    bibs_handler = create_handler(folio_client, HridAllocator(path))
+    other_handler = create_handler(folio_client, HridAllocator(path))
+
+    assert bibs_handler.get_next_hrid(FOLIONamespaces.instances) == "in100"
+    assert json.loads(path.read_text()) == {"instances": 100 + HRID_BLOCK_SIZE}
+    assert other_handler.get_next_hrid(FOLIONamespaces.instances) == f"in{100 + HRID_BLOCK_SIZE}"
+    assert other_handler.get_next_hrid(FOLIONamespaces.holdings) == "ho200"
+    assert bibs_handler.get_next_hrid(FOLIONamespaces.instances) == "in101"
+
+    # Only the tail of the highest block can be given back
+    bibs_handler.release_unused_hrids()
+    other_handler.release_unused_hrids()
+    assert json.loads(path.read_text()) == {
+        "instances": 101 + HRID_BLOCK_SIZE,
+        "holdings": 201,
+    }
+
+
+def test_store_hrid_settings_only_updates_changed_namespaces(tmp_path):
+    allocator = HridAllocator(tmp_path / "hrid_reservations.json")
+    folio_settings = hrid_settings()
+    folio_client = Mock(spec=FolioClient)
+    folio_client.folio_get_single_object.side_effect = lambda path: json.loads(
+        json.dumps(folio_settings)
+    )
+    hrid_handler = create_handler(folio_client, allocator)
+    for _ in range(3):
+        hrid_handler.get_next_hrid(FOLIONamespaces.instances)
+    # A task running at the same time has reserved HRIDs and updated the holdings
+    allocator.reserve("instances", 5, 100)
+    folio_settings["holdings"]["startNumber"] = 250
+
+    hrid_handler.store_hrid_settings()
+
+    folio_client.folio_put.assert_called_once()
+    stored_settings = folio_client.folio_put.call_args[0][1]
+    assert stored_settings["instances"]["startNumber"] == 105 + HRID_BLOCK_SIZE
+    assert stored_settings["holdings"]["startNumber"] == 250
+    assert stored_settings["items"]["startNumber"] == 300
+
+
+def test_reset_restarts_reservations(tmp_path):
+    allocator = HridAllocator(tmp_path / "hrid_reservations.json")
+    allocator.reserve("holdings", 50, 1)
+    folio_client = Mock(spec=FolioClient)
+    folio_client.folio_get_single_object.side_effect = lambda path: hrid_settings()
+    hrid_handler = create_handler(folio_client, allocator)
+
+    hrid_handler.reset_holdings_hrid_counter()
+
+    assert hrid_handler.get_next_hrid(FOLIONamespaces.holdings) == "ho1"
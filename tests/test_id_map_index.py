@@ -0,0 +1,90 @@
+import json
+import os
+from collections import ChainMap
+from unittest.mock import Mock, patch
+
+import pytest
+
+from folio_migration_tools.custom_exceptions import TransformationProcessError
+from folio_migration_tools.id_map_index import IdMapIndex, index_path, map_column
+from folio_migration_tools.migration_tasks.migration_task_base import MigrationTaskBase
+
+
+def write_id_map(path, entries):
+    with open(path, "w") as id_map_file:
+        for entry in entries:
+            id_map_file.write(f"{json.dumps(entry)}\n")
+    return path
+
+
+def test_lookups_match_loaded_id_map(tmp_path):
+    entries = [[f"bib{i}", f"uuid-{i}", f"in{i:08d}"] for i in range(1000)]
+    entries += [["bib5", "uuid-5-again", "in5"], ["bïb ünïcode", "uuid-u", "inu"]]
+    map_path = write_id_map(tmp_path / "instances_id_map.json", entries)
+    id_map = IdMapIndex(map_path)
+
+    loaded_id_map = MigrationTaskBase.load_id_map(map_path)
+    assert len(id_map) == len(loaded_id_map) == 1001
+    assert id_map["bib5"] == ["bib5", "uuid-5-again", "in5"]
+    assert id_map["bïb ünïcode"][1] == "uuid-u"
+    assert "bib999" in id_map
+    assert "bib1000" not in id_map
+    assert id_map.get("missing") is None
+    assert dict(id_map.items()) == loaded_id_map
+    id_map.close()
+
+
+def test_index_is_reused_and_rebuilt_when_map_changes(tmp_path):
+    map_path = write_id_map(tmp_path / "holdings_id_map.json", [["h1", "uuid-1"]])
+    IdMapIndex(map_path).close()
+    index_mtime = os.stat(index_path(map_path)).st_mtime_ns
+    id_map = IdMapIndex(map_path)
+    assert os.stat(index_path(map_path)).st_mtime_ns == index_mtime
+    id_map.close()
+
+    write_id_map(map_path, [["h1", "uuid-1"], ["h2", "uuid-2"]])
+    id_map = IdMapIndex(map_path)
+    assert id_map["h2"] == ["h2", "uuid-2"]
+    assert len(id_map) == 2
+    id_map.close()
+
+
+def test_empty_and_missing_maps(tmp_path):
+    id_map = IdMapIndex(write_id_map(tmp_path / "empty_id_map.json", []))
+    assert len(id_map) == 0
+    assert not id_map
+    assert "anything" not in id_map
+    id_map.close()
+    with pytest.raises(TransformationProcessError, match="Legacy id map not found"):
+        IdMapIndex(tmp_path / "missing.json")
+
+
+def test_open_id_map_uses_index_when_configured(tmp_path):
+    task = Mock(spec=MigrationTaskBase)
+    task.library_configuration = Mock(memory_mapped_id_maps=True)
+    map_path = write_id_map(tmp_path / "instances_id_map.json", [["b1", "member-1"]])
+    central_id_map = {"b1": ["b1", "central-1"], "b2": ["b2", "central-2"]}
+
+    id_map = MigrationTaskBase.open_id_map(task, map_path, True, central_id_map)
+
+    assert id_map["b1"] == ["b1", "member-1"]
+    assert id_map["b2"] == ["b2", "central-2"]
+    assert index_path(map_path).is_file()
+    with pytest.raises(TransformationProcessError, match="Legacy id map is empty"):
+        MigrationTaskBase.open_id_map(task, write_id_map(tmp_path / "empty.json", []), True)
+
+
+def test_map_column_looks_up_parent_hrids_by_folio_id(tmp_path):
+    entries = [[f"bib{i}", f"uuid-{i}", f"in{i:08d}"] for i in range(100)]
+    map_path = write_id_map(tmp_path / "instances_id_map.json", entries)
+    central_id_map = {"bib100": ["bib100", "uuid-100", "in00000100"]}
+    id_map = ChainMap(IdMapIndex(map_path), central_id_map)
+
+    with patch.object(IdMapIndex, "values", side_effect=AssertionError("Reads the whole map")):
+        parent_hrids = map_column(id_map, 1, 2)
+
+    assert parent_hrids["uuid-42"] == "in00000042"
+    assert parent_hrids["uuid-100"] == "in00000100"
+    assert "bib42" not in parent_hrids
+    assert index_path(map_path, 1).is_file()
+    assert map_column({"bib1": ["bib1", "uuid-1", "in1"]}, 1, 2) == {"uuid-1": "in1"}
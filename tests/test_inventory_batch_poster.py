@@ -1,5 +1,6 @@
 """Tests for InventoryBatchPoster adapter module."""
 
+import gzip
 from types import MethodType
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from pathlib import Path
@@ -10,6 +11,7 @@ from datetime import datetime, timezone
 from folio_uuid.folio_namespaces import FOLIONamespaces
 from folioclient import FolioClient
 
+from folio_migration_tools.custom_exceptions import TransformationProcessError
 from folio_migration_tools.migration_tasks.inventory_batch_poster import InventoryBatchPoster
 from folio_migration_tools.library_configuration import (
     FileDefinition,
@@ -401,6 +403,22 @@ class TestInventoryBatchPosterDoWork:
         with pytest.raises(FileNotFoundError):
             await poster.do_work()
 
+    @pytest.mark.asyncio
+    async def test_do_work_rejects_compressed_files(self, tmp_path):
+        """Test that compressed result files are refused before posting."""
+        with gzip.open(tmp_path / "folio_instances.json", "wt") as results_file:
+            results_file.write('{"id": "1"}\n')
+        poster = Mock(spec=InventoryBatchPoster)
+        poster.task_configuration = Mock()
+        poster.task_configuration.files = [Mock(file_name="folio_instances.json")]
+        poster.folder_structure = Mock()
+        poster.folder_structure.results_folder = tmp_path
+        poster.do_work = MethodType(InventoryBatchPoster.do_work, poster)
+
+        with pytest.raises(TransformationProcessError, match="gzip compressed"):
+            await poster.do_work()
+        poster._create_fdi_config.assert_not_called()
+
 
 class TestInventoryBatchPosterWrapUp:
     """Tests for the wrap_up method."""
@@ -5,7 +5,9 @@ import pytest
 from folio_uuid.folio_namespaces import FOLIONamespaces
 
 from folio_migration_tools.custom_exceptions import TransformationProcessError
-from folio_migration_tools.library_configuration import IlsFlavour
+from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.file_sharding import DelimitedFileSharder
+from folio_migration_tools.library_configuration import FileDefinition, IlsFlavour
 from folio_migration_tools.migration_tasks.items_transformer import ItemsTransformer
 from .test_infrastructure import mocked_classes
 import json
@@ -254,3 +256,54 @@ def test_validate_boundwith_relationships_empty_map(aleph_transformer):
     assert len(aleph_transformer.boundwith_relationship_map) == 0
     # No report calls when map is empty
     aleph_transformer.mapper.migration_report.set.assert_not_called()
+
+
+def test_keep_unique_item_fails_duplicate_ids_and_fixes_duplicate_barcodes(items_transformer):
+    items_transformer.mapper = Mock()
+    items_transformer.mapper.make_barcode_unique.return_value = "b1-unique"
+
+    rows = {"id1": 7, "id2": 8}
+
+    assert not ItemsTransformer.keep_unique_item(
+        items_transformer, {"id1"}, set(), rows, {"id": "id1", "barcode": "b0"}
+    )
+    items_transformer.mapper.handle_transformation_record_failed_error.assert_called_once()
+    assert (
+        items_transformer.mapper.handle_transformation_record_failed_error.call_args.args[0] == 7
+    )
+
+    folio_rec = {"id": "id2", "barcode": " B1 "}
+    assert ItemsTransformer.keep_unique_item(items_transformer, {"id1"}, {"b1"}, rows, folio_rec)
+    assert folio_rec["barcode"] == "b1-unique"
+    items_transformer.mapper.make_barcode_unique.assert_called_once_with("id2", " B1 ")
+
+
+def test_transform_shard_records_rows_and_extradata_of_items(items_transformer, tmp_path):
+    source_path = tmp_path / "items.tsv"
+    source_path.write_text("id\tbarcode\n1\tB1\n2\t\n3\tb3\n4\tb4\n")
+    sharder = DelimitedFileSharder(source_path)
+    shard = sharder.scan(1)[0]
+    items_transformer.folder_structure.created_objects_path = tmp_path / "folio_items.json"
+    items_transformer.extradata_writer = Mock(spec=ExtradataWriter)
+    items_transformer.extradata_writer.records_written = 0
+
+    def process_record(idx, record, file_def, part_file):
+        # Every item but the first is bound with two holdings
+        if idx > 0:
+            items_transformer.extradata_writer.records_written += 2
+        if record["id"] == "3":
+            return None
+        return {"id": f"item-{record['id']}", "barcode": record["barcode"]}
+
+    items_transformer.process_record.side_effect = process_record
+
+    result = ItemsTransformer.transform_shard(
+        items_transformer, FileDefinition(file_name="items.tsv"), sharder, shard
+    )
+
+    assert result == {
+        "records": 4,
+        "ids": {"item-1": 0, "item-2": 1, "item-4": 3},
+        "extradata": {"item-2": (0, 2), "item-4": (4, 6)},
+        "barcodes": ["b1", "b4"],
+    }
@@ -0,0 +1,36 @@
+import json
+
+import pytest
+
+from folio_migration_tools import json_serializer
+
+RECORD = {"id": "1", "title": "Tïtle", "count": 2, "suppressed": False, "notes": [None, 1.5]}
+
+
+@pytest.fixture
+def backend():
+    default = json_serializer.backend
+    yield
+    json_serializer.set_backend(default)
+
+
+@pytest.mark.parametrize("name", ["json", "orjson"])
+def test_dumps_round_trips(backend, name):
+    if name == "orjson":
+        pytest.importorskip("orjson")
+    json_serializer.set_backend(name)
+    assert json.loads(json_serializer.dumps(RECORD)) == RECORD
+    assert json.loads(json_serializer.dumps_bytes(RECORD)) == RECORD
+    assert json.loads(json_serializer.dumps({1: "a"})) == {"1": "a"}
+    assert json.loads(json_serializer.dumps({"big": 2**70})) == {"big": 2**70}
+
+
+def test_json_backend_matches_stdlib(backend):
+    json_serializer.set_backend("json")
+    assert json_serializer.dumps(RECORD) == json.dumps(RECORD)
+    assert json_serializer.dumps_bytes(RECORD) == json.dumps(RECORD).encode("utf-8")
+
+
+def test_unknown_backend(backend):
+    with pytest.raises(ValueError):
+        json_serializer.set_backend("ujson")
@@ -1,6 +1,8 @@
 import asyncio
 import csv
 import json
+import threading
+import time
 from io import StringIO
 from unittest.mock import AsyncMock, Mock, patch
 from zoneinfo import ZoneInfo
@@ -8,6 +10,7 @@ from zoneinfo import ZoneInfo
 import pytest
 from folio_uuid.folio_namespaces import FOLIONamespaces
 
+from folio_migration_tools.custom_exceptions import TransformationRecordFailedError
 from folio_migration_tools.library_configuration import LibraryConfiguration
 from folio_migration_tools.migration_report import MigrationReport
 from folio_migration_tools.migration_tasks.loans_migrator import LoansMigrator
@@ -599,3 +602,91 @@ def test_declare_lost_uses_fallback_service_point_id_without_cast(mock_i18n):
 
         assert result == []
         assert "I001" in m.failed
+
+
+# --- Tests for checkout_loans ---
+
+
+def make_checkout_migrator(max_concurrent_checkouts):
+    m = LoansMigrator.__new__(LoansMigrator)
+    m.task_configuration = Mock(max_concurrent_checkouts=max_concurrent_checkouts)
+    m.migration_report = MigrationReport()
+    m.circulation_helper = Mock(migration_report=m.migration_report)
+    m.failed = {}
+    m.t0 = 0
+    return m
+
+
+@pytest.mark.asyncio
+async def test_checkout_loans_never_overlaps_items_or_patrons():
+    loans = [
+        DummyLegacyLoan(item_barcode="I1", patron_barcode="P1"),
+        DummyLegacyLoan(item_barcode="I2", patron_barcode="P1"),
+        DummyLegacyLoan(item_barcode="I3", patron_barcode="P2", proxy_patron_barcode="P1"),
+        DummyLegacyLoan(item_barcode="I1", patron_barcode="P3"),
+        DummyLegacyLoan(item_barcode="I4", patron_barcode="P4"),
+        DummyLegacyLoan(item_barcode="I5", patron_barcode="P5"),
+        DummyLegacyLoan(item_barcode="I6", patron_barcode="P6"),
+    ]
+    in_flight = []
+    started = []
+    lock = threading.Lock()
+
+    def checkout_single_loan(self, legacy_loan):
+        keys = {legacy_loan.item_barcode, legacy_loan.patron_barcode}
+        keys.discard("")
+        if legacy_loan.proxy_patron_barcode:
+            keys.add(legacy_loan.proxy_patron_barcode)
+        with lock:
+            assert not any(keys & other for other in in_flight)
+            in_flight.append(keys)
+            started.append(legacy_loan.item_barcode)
+            max_in_flight.append(len(in_flight))
+        time.sleep(0.02)
+        with lock:
+            in_flight.remove(keys)
+        self.migration_report.add("Details", legacy_loan.item_barcode)
+        self.circulation_helper.migration_report.add_general_statistics("Checked out")
+
+    max_in_flight = []
+    m = make_checkout_migrator(3)
+    with patch.object(LoansMigrator, "checkout_single_loan", checkout_single_loan):
+        await m.checkout_loans(loans)
+
+    assert max(max_in_flight) == 3
+    # Loans sharing an item or patron are checked out in file order
+    assert started.index("I1") < started.index("I2") < started.index("I3")
+    assert m.migration_report.counters["GeneralStatistics"] == {
+        "blurb_id": "GeneralStatistics",
+        "Processed pre-validated loans": 7,
+        "Checked out": 7,
+    }
+    assert list(m.migration_report.counters["Details"])[1:] == [
+        "I1",
+        "I2",
+        "I3",
+        "I4",
+        "I5",
+        "I6",
+    ]
+
+
+@pytest.mark.asyncio
+async def test_checkout_loans_logs_failures_in_order():
+    loans = [DummyLegacyLoan(item_barcode=f"I{i}", patron_barcode=f"P{i}") for i in range(4)]
+
+    def checkout_single_loan(self, legacy_loan):
+        if legacy_loan.item_barcode == "I0":
+            time.sleep(0.05)
+        if legacy_loan.item_barcode in ("I0", "I2"):
+            self.failed[legacy_loan.item_barcode] = legacy_loan
+            raise TransformationRecordFailedError(legacy_loan.item_barcode, "Failed", "")
+
+    m = make_checkout_migrator(4)
+    with patch.object(LoansMigrator, "checkout_single_loan", checkout_single_loan), patch.object(
+        TransformationRecordFailedError, "log_it", autospec=True
+    ) as log_it:
+        await m.checkout_loans(loans)
+
+    assert [call.args[0].index_or_id for call in log_it.call_args_list] == ["I0", "I2"]
+    assert set(m.failed) == {"I0", "I2"}
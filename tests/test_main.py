@@ -81,6 +81,7 @@ def test_arg_prompts(insecure_inputs, secure_inputs):
         "base_folder_path": "folder_path",
         "folio_password": "okapi_password",
         "report_language": "en",
+        "refresh": False,
         "version": False,
     }
 
@@ -109,6 +110,7 @@ def test_args_positionally(insecure_inputs, secure_inputs):
         "base_folder_path": "folder_path",
         "folio_password": "okapi_password",
         "report_language": "en",
+        "refresh": False,
         "version": False,
     }
 
@@ -134,6 +136,7 @@ def test_args_from_env(insecure_inputs, secure_inputs):
         "base_folder_path": "folder_path",
         "folio_password": "okapi_password",
         "report_language": "fr",
+        "refresh": False,
         "version": False,
     }
 
@@ -170,6 +173,7 @@ def test_args_overriding_env(insecure_inputs, secure_inputs):
         "base_folder_path": "folder_path",
         "folio_password": "okapi_password",
         "report_language": "fr",
+        "refresh": False,
         "version": False,
     }
 
@@ -194,6 +198,7 @@ def test_task_name_arg_exception(insecure_inputs, secure_inputs):
         "base_folder_path": "folder_path",
         "folio_password": "okapi_password",
         "report_language": "fr",
+        "refresh": False,
         "version": False,
     }
 
@@ -3,6 +3,7 @@ import functools
 import io
 import json
 from pathlib import Path
+from types import MethodType
 from unittest.mock import Mock
 
 import pytest
@@ -4835,6 +4836,8 @@ def test_get_prop_same_as_get_legacy_value_mapped_value():
     mock_self.migration_report = MigrationReport()
     mock_self.library_configuration = Mock(spec=LibraryConfiguration)
     mock_self.library_configuration.multi_field_delimiter = "<delimiter>"
+    mock_self.map_entries_by_folio_prop_name = {}
+    mock_self.get_map_entries = MethodType(MappingFileMapperBase.get_map_entries, mock_self)
     res2 = MappingFileMapperBase.get_prop(mock_self, legacy_object, "title", "", "")
     assert res == res2
 
@@ -4862,6 +4865,8 @@ def test_get_prop_concatenated():
     mock_self.migration_report = MigrationReport()
     mock_self.library_configuration = Mock(spec=LibraryConfiguration)
     mock_self.library_configuration.multi_field_delimiter = "<delimiter>"
+    mock_self.map_entries_by_folio_prop_name = {}
+    mock_self.get_map_entries = MethodType(MappingFileMapperBase.get_map_entries, mock_self)
     res2 = MappingFileMapperBase.get_prop(mock_self, legacy_object, "title", "", "")
     assert res2 == "Leif Randt"
 
@@ -6664,3 +6669,68 @@ def test_validate_hardcoded_note_type_values_holdings_note_type_id(mocked_folio_
 
 
 
+
+
+def test_compile_mapping_plan_skips_unmapped_properties(
+    mocked_folio_client: FolioClient, mocked_file_mapper
+):
+    schema = {
+        "$schema": "http://json-schema.org/draft-04/schema#",
+        "description": "A holdings record",
+        "type": "object",
+        "required": ["title"],
+        "properties": {
+            "id": {"type": "string"},
+            "title": {"type": "string"},
+            "subtitle": {"type": "string"},
+            "formerIds": {"type": "array", "items": {"type": "string"}},
+            "notes": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {"note": {"type": "string"}},
+                },
+            },
+            "metadata": {"type": "object", "properties": {"createdDate": {"type": "string"}}},
+        },
+    }
+    fake_holdings_map = {
+        "data": [
+            {
+                "folio_field": "legacyIdentifier",
+                "legacy_field": "id",
+                "value": "",
+                "description": "",
+            },
+            {
+                "folio_field": "title",
+                "legacy_field": "title_",
+                "value": "",
+                "description": "",
+            },
+            {
+                "folio_field": "formerIds[0]",
+                "legacy_field": "id",
+                "value": "",
+                "description": "",
+            },
+        ]
+    }
+    tfm = MappingFileMapperBase(
+        mocked_folio_client,
+        schema,
+        fake_holdings_map,
+        None,
+        FOLIONamespaces.items,
+        mocked_classes.get_mocked_library_config(),
+        mocked_file_mapper.task_configuration,
+    )
+
+    assert [name for name, _ in tfm.mapping_plan] == ["title", "formerIds"]
+
+    compiled_plan = tfm.mapping_plan
+    for record in [{"title_": "first", "id": "1"}, {"title_": "second", "id": "2"}]:
+        folio_rec, _ = tfm.do_map(record, record["id"], FOLIONamespaces.items)
+        assert folio_rec["title"] == record["title_"]
+        assert folio_rec["formerIds"] == [record["id"]]
+    assert tfm.mapping_plan is compiled_plan
@@ -1,4 +1,5 @@
 import io
+import json
 from datetime import datetime, timezone
 from io import BytesIO
 from unittest.mock import Mock, patch
@@ -13,6 +14,7 @@ from folio_migration_tools.custom_exceptions import TransformationRecordFailedEr
 from folio_migration_tools.library_configuration import FileDefinition
 from folio_migration_tools.marc_rules_transformation.marc_file_processor import (
     MarcFileProcessor,
+    MarcShardFileProcessor,
 )
 from folio_migration_tools.marc_rules_transformation.rules_mapper_holdings import (
     RulesMapperHoldings,
@@ -550,3 +552,109 @@ def test_clean_out_empty_logs_keeps_nonempty_transformation_file(tmp_path):
 
     assert transformation_file.exists()
 
+
+
+def test_append_shard_fails_records_with_legacy_ids_from_earlier_shards(tmp_path):
+    mock_mapper = _make_mock_mapper_for_init(tmp_path)
+    mock_mapper.migration_report = MigrationReport()
+    mock_mapper.id_map = {}
+    mock_mapper.library_configuration = Mock(
+        failed_percentage_threshold=20, failed_records_threshold=5000
+    )
+    mock_mapper.parse_record.side_effect = lambda marc_record, file_def, legacy_ids: [
+        {"id": f"folio-{legacy_ids[0]}-{len(legacy_ids)}"}
+    ]
+    mock_mapper.get_id_map_tuple.side_effect = lambda legacy_id, folio_rec, object_type: (
+        legacy_id,
+        folio_rec["id"],
+    )
+    file_def = FileDefinition(file_name="bibs.mrc")
+    part_paths = []
+    for shard_index, shard_legacy_ids in enumerate([[["a"]], [["a"], ["b", "a"]]]):
+        mock_fs = _make_mock_folder_structure(tmp_path / str(shard_index))
+        (tmp_path / str(shard_index)).mkdir()
+        created_path = tmp_path / str(shard_index) / "created.json"
+        manifest_path = tmp_path / str(shard_index) / "created.json.manifest"
+        with open(created_path, "w") as created_file, open(manifest_path, "w") as manifest:
+            processor = MarcShardFileProcessor(
+                mock_mapper, mock_fs, created_file, manifest, set()
+            )
+            mock_mapper.get_legacy_ids.side_effect = shard_legacy_ids
+            for idx in range(len(shard_legacy_ids)):
+                processor.process_record(idx, Record(), file_def)
+            processor.close()
+        mock_mapper.id_map = {}
+        part_paths.append(
+            (manifest_path, created_path, mock_fs.srs_records_path, mock_fs.data_import_marc_path)
+        )
+    with open(tmp_path / "created.json", "w+") as created_file:
+        processor = MarcFileProcessor(mock_mapper, _make_mock_folder_structure(tmp_path), created_file)
+        for shard_part_paths in part_paths:
+            processor.append_shard(*shard_part_paths)
+        processor.failed_records_transformation_file.close()
+
+    created_lines = (tmp_path / "created.json").read_text().splitlines()
+    assert [json.loads(line) for line in created_lines] == [
+        {"id": "folio-a-1"},
+        {"id": "folio-b-2"},
+    ]
+    assert mock_mapper.id_map == {"a": ("a", "folio-a-1"), "b": ("b", "folio-b-2")}
+    assert processor.legacy_ids == {"a", "b"}
+    assert processor.failed_records_count == 1
+    statistics = mock_mapper.migration_report.report["GeneralStatistics"]
+    assert statistics["Duplicate MARC record identifiers "] == 2
+    assert statistics["Inventory records written to disk"] == 2
+    assert not part_paths[1][0].exists()
+
+
+def test_append_shard_keeps_non_ascii_srs_records(tmp_path):
+    mock_mapper = _make_mock_mapper_for_init(tmp_path, create_source_records=True)
+    mock_mapper.task_configuration.files = [FileDefinition(file_name="bibs.mrc")]
+    mock_mapper.migration_report = MigrationReport()
+    mock_mapper.id_map = {}
+    mock_mapper.folio_client = Mock()
+    mock_mapper.library_configuration = Mock(
+        failed_percentage_threshold=20, failed_records_threshold=5000, output_compression=None
+    )
+    mock_mapper.get_legacy_ids.return_value = ["a"]
+    mock_mapper.parse_record.return_value = [{"id": "folio-a"}]
+    mock_mapper.get_id_map_tuple.return_value = ("a", "folio-a")
+
+    def save_source_record(srs_records_file, object_type, folio_client, marc_record, *args):
+        title = marc_record["245"]["a"]
+        srs_records_file.write(json.dumps({"title": title}, ensure_ascii=False) + "\n")
+
+    mock_mapper.save_source_record.side_effect = save_source_record
+    marc_record = Record()
+    marc_record.add_field(
+        Field(
+            tag="245",
+            indicators=["0", "0"],
+            subfields=[Subfield(code="a", value="Šťastný 東京")],
+        )
+    )
+    (tmp_path / "0").mkdir()
+    shard_fs = _make_mock_folder_structure(tmp_path / "0")
+    created_path = tmp_path / "0" / "created.json"
+    manifest_path = tmp_path / "0" / "created.json.manifest"
+    with open(created_path, "w") as created_file, open(manifest_path, "w") as manifest:
+        processor = MarcShardFileProcessor(mock_mapper, shard_fs, created_file, manifest, set())
+        processor.process_record(0, marc_record, FileDefinition(file_name="bibs.mrc"))
+        processor.close()
+    assert json.loads(shard_fs.srs_records_path.read_bytes().decode("utf-8")) == {
+        "title": "Šťastný 東京"
+    }
+
+    mock_mapper.id_map = {}
+    with open(tmp_path / "created.json", "w+") as created_file:
+        processor = MarcFileProcessor(
+            mock_mapper, _make_mock_folder_structure(tmp_path), created_file
+        )
+        processor.append_shard(
+            manifest_path, created_path, shard_fs.srs_records_path, shard_fs.data_import_marc_path
+        )
+        processor.srs_records_file.close()
+        processor.failed_records_transformation_file.close()
+
+    srs_lines = (tmp_path / "srs.json").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line) for line in srs_lines] == [{"title": "Šťastný 東京"}]
@@ -84,6 +84,55 @@ class TestMigrationReport:
         assert "GeneralStatistics" in report.report
         assert report.report["GeneralStatistics"]["Records processed"] == 2
 
+    def test_merge_adds_counters_of_other_report(self):
+        """Test that merge() adds the counters of another report."""
+        report = MigrationReport()
+        report.add("TestSection", "measure_a", 2)
+        other = MigrationReport()
+        other.add("TestSection", "measure_a", 3)
+        other.add("TestSection", "measure_b")
+        other.add("OtherSection", "measure_c", 4)
+
+        report.merge(other.report)
+
+        assert report.report["TestSection"]["measure_a"] == 5
+        assert report.report["TestSection"]["measure_b"] == 1
+        assert report.report["OtherSection"] == {"blurb_id": "OtherSection", "measure_c": 4}
+
+    def test_add_translated_defers_translation(self):
+        """Test that add_translated() counts measures and translates them on read."""
+        report = MigrationReport()
+        with patch("folio_migration_tools.migration_report.i18n.t") as translate:
+            for _ in range(3):
+                report.add_translated("Details", "%{props} were concatenated", props=["a", "b"])
+            translate.assert_not_called()
+        report.add("Details", "['a', 'b'] were concatenated")
+
+        assert report.report["Details"] == {
+            "blurb_id": "Details",
+            "['a', 'b'] were concatenated": 4,
+        }
+
+    def test_merge_adds_untranslated_counters(self):
+        """Test that merge() accepts the untranslated counters of another report."""
+        report = MigrationReport()
+        measure = "Number of Legacy items in %{container}"
+        report.add_translated("GeneralStatistics", measure, container="a.tsv")
+        other = MigrationReport()
+        other.add_translated("GeneralStatistics", measure, container="a.tsv")
+        other.add_translated("GeneralStatistics", measure, 2, container="b.tsv")
+
+        report.merge(other.counters)
+        report.clear()
+        report.merge(other.counters)
+        report.merge(other.counters)
+
+        assert report.report["GeneralStatistics"] == {
+            "blurb_id": "GeneralStatistics",
+            "Number of Legacy items in a.tsv": 2,
+            "Number of Legacy items in b.tsv": 4,
+        }
+
     def test_write_json_report_empty(self):
         """Test that write_json_report writes valid JSON for empty report."""
         report = MigrationReport()
@@ -1,11 +1,24 @@
 import csv
 import io
+import json
 from pathlib import Path
+from types import MethodType
+from unittest.mock import Mock
 
 import pytest
+from folio_uuid.folio_namespaces import FOLIONamespaces
+from pymarc import Field, Record
 
 from folio_migration_tools.custom_exceptions import TransformationProcessError
-from folio_migration_tools.library_configuration import FileDefinition
+from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.folder_structure import FolderStructure
+from folio_migration_tools.library_configuration import FileDefinition, HridHandling
+from folio_migration_tools.marc_rules_transformation.hrid_handler import HRIDHandler
+from folio_migration_tools.marc_rules_transformation.marc_file_processor import (
+    MarcFileProcessor,
+)
+from folio_migration_tools.marc_rules_transformation.rules_mapper_bibs import BibsRulesMapper
+from folio_migration_tools.migration_report import MigrationReport
 from folio_migration_tools.migration_tasks.migration_task_base import MigrationTaskBase
 
 
@@ -118,3 +131,88 @@ def test_load_ref_data_mapping_file():
         MigrationTaskBase.load_ref_data_mapping_file("permanentLocationId", invalid_empty, ["permanentLocationId"])
     ref_data_map = MigrationTaskBase.load_ref_data_mapping_file("permanentLocationId", valid_file, ["permanentLocationId"])
     assert ref_data_map == [{'folio_code': 'STACKS', 'legacy_code': 'stacks'}, {'folio_code': 'VAULT', 'legacy_code': 'vault'}, {'folio_code': 'REF', 'legacy_code': 'ref'}]
+
+
+def test_process_marc_file_in_shards_keeps_file_order_and_unique_hrids(tmp_path):
+    (tmp_path / "source").mkdir()
+    with open(tmp_path / "source" / "bibs.mrc", "wb") as marc_file:
+        for legacy_id in [f"bib{i}" for i in range(30)] + ["bib3"]:
+            record = Record()
+            record.add_field(Field(tag="001", data=legacy_id))
+            marc_file.write(record.as_marc())
+    folder_structure = Mock(spec=FolderStructure)
+    folder_structure.object_type = FOLIONamespaces.instances
+    folder_structure.legacy_records_folder = tmp_path / "source"
+    for attribute in (
+        "created_objects_path",
+        "failed_records_decode_file",
+        "failed_records_transformation_file",
+        "srs_records_path",
+        "data_import_marc_path",
+    ):
+        setattr(folder_structure, attribute, tmp_path / attribute)
+    hrid_handler = Mock(spec=HRIDHandler)
+    hrid_handler.instance_hrid_counter = 100
+    hrid_handler.holdings_hrid_counter = 1
+    hrid_handler.unique_001s = set()
+    mapper = Mock(spec=BibsRulesMapper)
+    mapper.hrid_handler = hrid_handler
+    mapper.migration_report = MigrationReport()
+    mapper.mapped_folio_fields = {}
+    mapper.mapped_legacy_fields = {}
+    mapper.id_map = {}
+    mapper.parsed_records = 0
+    mapper.create_source_records = False
+    mapper.task_configuration = Mock(
+        files=[], marc_record_preprocessors=[], preprocessors_args={}, data_import_marc=False
+    )
+    mapper.library_configuration = Mock(
+        failed_percentage_threshold=20, failed_records_threshold=5000
+    )
+    mapper.get_legacy_ids.side_effect = lambda marc_record, idx: [marc_record["001"].data]
+
+    def parse_record(marc_record, file_def, legacy_ids):
+        mapper.parsed_records += 1
+        hrid = hrid_handler.instance_hrid_counter
+        hrid_handler.instance_hrid_counter += 1
+        return [{"id": legacy_ids[0], "hrid": hrid}]
+
+    mapper.parse_record.side_effect = parse_record
+    mapper.get_id_map_tuple.side_effect = lambda legacy_id, folio_rec, object_type: (
+        legacy_id,
+        folio_rec["id"],
+    )
+    task = Mock(spec=MigrationTaskBase)
+    task.mapper = mapper
+    task.folder_structure = folder_structure
+    task.task_configuration = Mock(
+        worker_processes=2, hrid_handling=HridHandling.default, files=[]
+    )
+    task.extradata_writer = Mock(spec=ExtradataWriter)
+    task.extradata_writer.path_to_file = tmp_path / "extradata"
+    task.transform_marc_shard = MethodType(MigrationTaskBase.transform_marc_shard, task)
+
+    with open(folder_structure.created_objects_path, "w+") as created_records_file:
+        task.processor = MarcFileProcessor(mapper, folder_structure, created_records_file)
+        MigrationTaskBase.process_marc_file_in_shards(task, FileDefinition(file_name="bibs.mrc"))
+        task.processor.failed_records_transformation_file.close()
+
+    with open(folder_structure.created_objects_path) as created_records_file:
+        instances = [json.loads(line) for line in created_records_file]
+    assert [i["id"] for i in instances] == [f"bib{i}" for i in range(30)]
+    assert len({i["hrid"] for i in instances}) == 30
+    assert hrid_handler.instance_hrid_counter == 131
+    assert hrid_handler.holdings_hrid_counter == 1
+    assert list(mapper.id_map) == [f"bib{i}" for i in range(30)]
+    assert task.processor.records_count == 31
+    assert task.processor.failed_records_count == 1
+    assert mapper.parsed_records == 31
+    assert mapper.migration_report.report["GeneralStatistics"][
+        "Inventory records written to disk"
+    ] == 30
+    assert sorted(p.name for p in tmp_path.iterdir()) == [
+        "created_objects_path",
+        "failed_records_decode_file",
+        "failed_records_transformation_file",
+        "source",
+    ]
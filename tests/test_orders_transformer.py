@@ -1,7 +1,9 @@
 import io
+import json
 from pathlib import Path
 from unittest.mock import Mock
 
+from folio_migration_tools.custom_exceptions import TransformationRecordFailedError
 from folio_migration_tools.extradata_writer import ExtradataWriter
 from folio_migration_tools.mapping_file_transformation.order_mapper import (
     CompositeOrderMapper,
@@ -20,6 +22,8 @@ def test_merge_into_orders_with_embedded_pols():
     mocked_orders_transformer.mapper.migration_report = Mock(spec=MigrationReport)
     mocked_orders_transformer.mapper.po_lines_key = "compositePoLines"
     mocked_orders_transformer.current_folio_record = {}
+    mocked_orders_transformer.written_order_ids = set()
+    mocked_orders_transformer.merged_rows = 0
 
     order_objects = [
         {
@@ -87,3 +91,92 @@ def test_merge_into_orders_with_embedded_pols():
             )
 
         assert len(mocked_orders_transformer.current_folio_record["compositePoLines"]) == 2
+
+
+def make_order(order_id, po_line_id, notes):
+    return {
+        "id": order_id,
+        "poNumber": order_id,
+        "notes": notes,
+        "compositePoLines": [{"id": po_line_id}],
+    }
+
+
+def test_merge_compares_a_sample_and_reports_split_orders(monkeypatch):
+    monkeypatch.setattr(
+        "folio_migration_tools.migration_tasks.orders_transformer.DIFF_SAMPLE_INTERVAL", 2
+    )
+    transformer = Mock(spec=OrdersTransformer)
+    transformer.mapper = Mock(spec=CompositeOrderMapper)
+    transformer.mapper.po_lines_key = "compositePoLines"
+    transformer.mapper.migration_report = MigrationReport()
+    transformer.current_folio_record = {}
+    transformer.written_order_ids = set()
+    transformer.merged_rows = 0
+    transformer.write_current_order = lambda: OrdersTransformer.write_current_order(transformer)
+    rows = [make_order("o1", f"l{i}", [f"note {i}"]) for i in range(5)]
+    rows += [make_order("o2", "l5", []), make_order("o1", "l6", [])]
+
+    with io.StringIO() as results_file:
+        transformer.results_file = results_file
+        for row in rows:
+            OrdersTransformer.merge_into_orders_with_embedded_pols(transformer, row)
+        OrdersTransformer.write_current_order(transformer)
+        orders = [
+            json.loads(line.split("\t")[-1]) for line in results_file.getvalue().splitlines()
+        ]
+
+    assert [order["id"] for order in orders] == ["o1", "o2", "o1"]
+    assert [line["id"] for line in orders[0]["compositePoLines"]] == [f"l{i}" for i in range(5)]
+    counters = transformer.mapper.migration_report.counters
+    assert counters["GeneralStatistics"]["Rows merged to create Purchase Orders"] == 4
+    assert counters["GeneralStatistics"]["Rows compared to the order they were merged into"] == 2
+    assert counters["DiffsBetweenOrders"] == {
+        "blurb_id": "DiffsBetweenOrders",
+        "root['notes'][0]": 2,
+    }
+    assert (
+        counters["GeneralStatistics"][
+            "Purchase Orders split over rows that are not next to each other"
+        ]
+        == 1
+    )
+
+
+def test_group_rows_by_order(tmp_path):
+    transformer = Mock(spec=OrdersTransformer)
+    transformer.mapper = Mock(spec=CompositeOrderMapper)
+    transformer.mapper.legacy_id_property_names = ["PO", "SUFFIX"]
+    transformer.folder_structure = Mock(results_folder=tmp_path)
+    rows = [{"PO": "b", "SUFFIX": "1"}, {"PO": "a", "SUFFIX": "1"}, {"PO": "b", "SUFFIX": "1"}]
+
+    grouped = list(OrdersTransformer.group_rows_by_order(transformer, enumerate(rows)))
+
+    assert grouped == [(1, rows[1]), (0, rows[0]), (2, rows[2])]
+
+
+def test_process_single_file_where_every_row_fails(tmp_path):
+    source_file = tmp_path / "orders.tsv"
+    source_file.write_text("PO\nb\n")
+    transformer = Mock(spec=OrdersTransformer)
+    transformer.task_configuration = Mock(group_rows_by_order=False)
+    transformer.mapper = Mock(spec=CompositeOrderMapper)
+    transformer.mapper.migration_report = MigrationReport()
+    transformer.mapper.get_objects.return_value = iter([{"PO": "a"}, {"PO": "b"}])
+    transformer.mapper.do_map.side_effect = TransformationRecordFailedError("row", "No vendor", "")
+    transformer.current_folio_record = {}
+    transformer.written_order_ids = set()
+    transformer.total_records = 0
+    transformer.write_current_order = lambda: OrdersTransformer.write_current_order(transformer)
+
+    with io.StringIO() as results_file:
+        transformer.results_file = results_file
+        OrdersTransformer.process_single_file(transformer, source_file)
+        assert results_file.getvalue() == ""
+
+    assert transformer.mapper.handle_transformation_record_failed_error.call_count == 2
+    assert transformer.total_records == 2
+    assert (
+        "TOTAL Purchase Orders created"
+        not in transformer.mapper.migration_report.counters["GeneralStatistics"]
+    )
@@ -1,3 +1,4 @@
+import json
 import uuid
 from pathlib import Path
 from unittest.mock import Mock
@@ -183,7 +184,10 @@ def test_clean_up_two_addresses_both_empty():
 
 def test_handle_embedded_extradata_objects():
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -228,7 +232,10 @@ def test_handle_embedded_extradata_objects():
 
 def test_create_linked_extradata_object_contacts():
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -276,7 +283,10 @@ def test_create_linked_extradata_object_contacts():
 
 def test_create_linked_extradata_object_interfaces():
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -329,7 +339,10 @@ def test_create_linked_extradata_object_interfaces():
 
 def test_create_linked_extradata_object_credentials():
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -387,11 +400,11 @@ def test_create_linked_extradata_object_credentials():
             credentials.append(credential)
         interfaces.append(interface)
 
-    assert all(
-        f'"interfaceId": "{interface_id}"'
-        in str(mocked_organization_transformer.extradata_writer.cache)
-        for interface_id in credential_interface_ids
-    )
+    written_interface_ids = [
+        json.loads(row.split("\t")[1]).get("interfaceId")
+        for row in mocked_organization_transformer.extradata_writer.cache
+    ]
+    assert all(interface_id in written_interface_ids for interface_id in credential_interface_ids)
 
     assert len(credentials) == 2
 
@@ -401,7 +414,10 @@ def test_create_linked_extradata_object_credentials():
 def test_contact_formatting_and_content():
     # Check that contacts in the extradata writer contain the right information
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -424,13 +440,17 @@ def test_contact_formatting_and_content():
         mocked_organization_transformer, organization["contacts"][0], "contacts"
     )
 
-    assert (
-        'contacts\\t{"firstName": "June", "lastName": "Day", '
-        '"addresses": [{"addressLine1": "MyStreet"}, {"city": "Stockholm"}], '
-        '"phoneNumbers": [{"phoneNumber": "123"}], '
-        '"emailAddresses": [{"value": "andme(at)me.com"}]'
-        in str(mocked_organization_transformer.extradata_writer.cache)
-    )
+    record_type, data = mocked_organization_transformer.extradata_writer.cache[0].split("\t")
+    contact = json.loads(data)
+    contact.pop("id")
+    assert record_type == "contacts"
+    assert contact == {
+        "firstName": "June",
+        "lastName": "Day",
+        "addresses": [{"addressLine1": "MyStreet"}, {"city": "Stockholm"}],
+        "phoneNumbers": [{"phoneNumber": "123"}],
+        "emailAddresses": [{"value": "andme(at)me.com"}],
+    }
 
 
 def test_validate_uri():
@@ -454,7 +474,10 @@ def test_validate_uri():
 
 def test_contact_remove_incomplete_object():
     mocked_organization_transformer = Mock(spec=OrganizationTransformer)
-    mocked_organization_transformer.embedded_extradata_object_cache = set()
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=False
+    )
     mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
     mocked_organization_transformer.extradata_writer.cache = []
     mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
@@ -487,3 +510,88 @@ def test_contact_remove_incomplete_object():
     )
 
     assert len(organization["contacts"]) == 1
+
+
+def mocked_transformer_reusing_extradata_objects():
+    mocked_organization_transformer = Mock(spec=OrganizationTransformer)
+    mocked_organization_transformer.embedded_extradata_object_cache = {}
+    mocked_organization_transformer.task_configuration = Mock(
+        reuse_identical_extradata_objects=True
+    )
+    mocked_organization_transformer.extradata_writer = ExtradataWriter(Path(""))
+    mocked_organization_transformer.extradata_writer.cache = []
+    mocked_organization_transformer.mapper = Mock(spec=OrganizationMapper)
+    mocked_organization_transformer.mapper.migration_report = MigrationReport()
+    mocked_organization_transformer.legacy_id = "org1"
+    mocked_organization_transformer.create_referenced_extradata_object = lambda *args: (
+        OrganizationTransformer.create_referenced_extradata_object(
+            mocked_organization_transformer, *args
+        )
+    )
+    return mocked_organization_transformer
+
+
+def test_create_linked_extradata_object_reuses_identical_objects():
+    mocked_organization_transformer = mocked_transformer_reusing_extradata_objects()
+    organizations = [
+        {
+            "name": f"Vendor {i}",
+            "contacts": [{"firstName": "Jane", "lastName": "Deer"}],
+            "interfaces": [
+                {
+                    "name": "Portal",
+                    "uri": "https://portal.example.com",
+                    "interfaceCredential": {"username": "user", "password": "pass"},  # noqa: S106
+                }
+            ],
+        }
+        for i in range(3)
+    ]
+    for organization in organizations:
+        OrganizationTransformer.handle_embedded_extradata_objects(
+            mocked_organization_transformer, organization
+        )
+
+    assert organizations[0]["contacts"] == organizations[2]["contacts"]
+    assert organizations[0]["interfaces"] == organizations[2]["interfaces"]
+    written_types = [
+        row.split("\t")[0] for row in mocked_organization_transformer.extradata_writer.cache
+    ]
+    assert written_types == ["interfaces", "interfaceCredential", "contacts"]
+    statistics = mocked_organization_transformer.mapper.migration_report.counters[
+        "GeneralStatistics"
+    ]
+    assert statistics["Number of linked contacts reused"] == 2
+    assert statistics["Number of linked interfaces reused"] == 2
+
+
+def test_interfaces_with_different_credentials_are_not_reused():
+    mocked_organization_transformer = mocked_transformer_reusing_extradata_objects()
+    organizations = [
+        {
+            "name": f"Vendor {username}",
+            "interfaces": [
+                {
+                    "name": "Portal",
+                    "uri": "https://portal.example.com",
+                    "interfaceCredential": {"username": username, "password": "pass"},  # noqa: S106
+                }
+            ],
+        }
+        for username in ["alice", "bob", "alice"]
+    ]
+    for organization in organizations:
+        OrganizationTransformer.handle_embedded_extradata_objects(
+            mocked_organization_transformer, organization
+        )
+
+    assert organizations[0]["interfaces"] != organizations[1]["interfaces"]
+    assert organizations[0]["interfaces"] == organizations[2]["interfaces"]
+    written = [row.split("\t") for row in mocked_organization_transformer.extradata_writer.cache]
+    credentials = [json.loads(row[1]) for row in written if row[0] == "interfaceCredential"]
+    assert [row[0] for row in written].count("interfaces") == 2
+    assert [c["username"] for c in credentials] == ["alice", "bob"]
+    assert [c["interfaceId"] for c in credentials] == [
+        organizations[0]["interfaces"][0],
+        organizations[1]["interfaces"][0],
+    ]
@@ -0,0 +1,86 @@
+import gzip
+import json
+
+import pytest
+
+from folio_migration_tools import json_serializer
+from folio_migration_tools.custom_exceptions import TransformationProcessError
+from folio_migration_tools.extradata_writer import ExtradataWriter
+from folio_migration_tools.helper import Helper
+from folio_migration_tools.library_configuration import OutputCompression
+from folio_migration_tools.record_writer import (
+    RecordWriter,
+    file_compression,
+    open_binary_output,
+    open_records,
+    seek_records,
+)
+
+RECORDS = [{"id": str(i), "title": f"Tïtle {i}"} for i in range(2000)]
+
+
+@pytest.mark.parametrize("compression", [OutputCompression.none, OutputCompression.gzip])
+def test_written_records_read_back(tmp_path, compression):
+    path = tmp_path / "folio_items_transform.json"
+    with RecordWriter(path, compression, buffer_size=1000) as writer:
+        for record in RECORDS:
+            Helper.write_to_file(writer, record)
+        assert writer.tell() == sum(len(json_serializer.dumps_bytes(r)) + 1 for r in RECORDS)
+
+    with open_records(path) as records_file:
+        assert [json.loads(line) for line in records_file] == RECORDS
+    with open_records(path, binary=True) as records_file:
+        seek_records(records_file, len(next(iter(records_file))))
+        assert json.loads(records_file.readline()) == RECORDS[1]
+    with open(path, "rb") as raw_file:
+        assert (raw_file.read(2) == b"\x1f\x8b") == (compression == OutputCompression.gzip)
+    assert file_compression(path) == compression
+
+
+def test_appended_gzip_members_read_as_one_file(tmp_path):
+    path = tmp_path / "extradata.json"
+    for record in RECORDS[:3]:
+        with open_binary_output(path, "ab", OutputCompression.gzip) as output:
+            output.write(f"{json.dumps(record)}\n".encode("utf-8"))
+    with open_records(path) as records_file:
+        assert [json.loads(line) for line in records_file] == RECORDS[:3]
+
+
+def test_write_errors_are_raised(tmp_path):
+    writer = RecordWriter(tmp_path / "records.json", buffer_size=1)
+    writer._file.close()
+    with pytest.raises(TransformationProcessError, match="Writing to"):
+        for _ in range(100):
+            writer.write("{}\n")
+        writer.flush()
+    with pytest.raises(TransformationProcessError):
+        writer.close()
+
+
+def test_zstd_output(tmp_path):
+    pytest.importorskip("zstandard")
+    path = tmp_path / "folio_srs_instances.json"
+    with RecordWriter(path, OutputCompression.zstd) as writer:
+        writer.writelines(f"{json.dumps(r)}\n" for r in RECORDS)
+    with open_records(path, binary=True) as records_file:
+        seek_records(records_file, len(f"{json.dumps(RECORDS[0])}\n"))
+        assert [json.loads(line) for line in records_file] == RECORDS[1:]
+
+
+def test_extradata_writer_compresses(tmp_path):
+    ExtradataWriter._ExtradataWriter__instance = None
+    ExtradataWriter._ExtradataWriter__inited = False
+    path = tmp_path / "extradata_organizations.extradata"
+    writer = ExtradataWriter(path)
+    writer.compression = OutputCompression.gzip
+    writer.write("interfaces", {"id": "1"}, flush=True)
+    writer.write("contacts", {"id": "2"})
+    writer.flush()
+    ExtradataWriter._ExtradataWriter__instance = None
+    ExtradataWriter._ExtradataWriter__inited = False
+
+    with gzip.open(path, "rt") as extradata_file:
+        assert extradata_file.read() == (
+            f"interfaces\t{json_serializer.dumps({'id': '1'})}\n"
+            f"contacts\t{json_serializer.dumps({'id': '2'})}\n"
+        )
@@ -3,6 +3,7 @@ from unittest.mock import Mock
 import pytest
 
 from folio_migration_tools.custom_exceptions import TransformationProcessError
+from folio_migration_tools.mapping_file_transformation import ref_data_mapping
 from folio_migration_tools.mapping_file_transformation.ref_data_mapping import (
     RefDataMapping,
 )
@@ -24,9 +25,10 @@ def test_get_hybrid_mapping():
     ]
     legacy_object = {"location": "l_1", "loan_type": "lt_1", "material_type": "mt_1"}
     mock = Mock(spec=RefDataMapping)
+    mock.regular_mappings = []
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res == mappings[1]
 
@@ -39,9 +41,10 @@ def test_get_hybrid_mapping2():
     ]
     legacy_object = {"location": "l_2", "loan_type": "apa", "material_type": "papa"}
     mock = Mock(spec=RefDataMapping)
+    mock.regular_mappings = []
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res == mappings[0]
 
@@ -54,9 +57,10 @@ def test_get_hybrid_mapping3_4():
     ]
     legacy_object = {"location": "l_1", "loan_type": "lt_1", "material_type": "papa"}
     mock = Mock(spec=RefDataMapping)
+    mock.regular_mappings = []
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res == mappings[1]
 
@@ -69,9 +73,10 @@ def test_get_hybrid_mapping3_5():
     ]
     legacy_object = {"location": "l_1", "loan_type": "lt_44", "material_type": "papa"}
     mock = Mock(spec=RefDataMapping)
+    mock.regular_mappings = []
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res == mappings[2]
 
@@ -89,9 +94,10 @@ def test_get_hybrid_mapping_none():
         "material_type": "papapp",
     }
     mock = Mock(spec=RefDataMapping)
+    mock.regular_mappings = []
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res is None
 
@@ -105,8 +111,8 @@ def test_get_hybrid_mapping3():
     mock = Mock(spec=RefDataMapping)
     mock.regular_mappings = mappings
     mock.hybrid_mappings = [{"location": "sprad", "loan_type": "* ", "material_type": "*"}]
-    mock.cache = {}
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res is None
 
@@ -120,8 +126,9 @@ def test_normal_refdata_mapping_strip():
     legacy_object = {"location": "l_1 ", "loan_type": "lt1", "material_type": "mt2 "}
     mock = Mock(spec=RefDataMapping)
     mock.regular_mappings = mappings
-    mock.cache = {}
+    mock.hybrid_mappings = []
     mock.mapped_legacy_keys = ["location", "loan_type", "material_type"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_ref_data_mapping(mock, legacy_object)
     assert res == mappings[2]
 
@@ -160,8 +167,8 @@ def test_mapping_for_multiple_fields():
         },
     ]
     mock.hybrid_mappings = mappings
-    mock.cache = {}
     mock.mapped_legacy_keys = ["email1_categories", "email2_categories"]
+    RefDataMapping.index_mappings(mock)
     res = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
     assert res == mappings[1]
 
@@ -228,14 +235,15 @@ def test_multiple_emails_array_objects_with_different_ref_data_mappings():
 
     mock = Mock(spec=RefDataMapping)
 
+    mock.regular_mappings = []
     mock.hybrid_mappings = mapping_a
-    mock.cache = {}
     mock.mapped_legacy_keys = ["email1_categories", "email2_categories"]
+    RefDataMapping.index_mappings(mock)
     res_1 = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
 
     mock.hybrid_mappings = mapping_b
-    mock.cache = {}
     mock.mapped_legacy_keys = ["email1_categories", "email2_categories"]
+    RefDataMapping.index_mappings(mock)
     res_2 = RefDataMapping.get_hybrid_mapping(mock, legacy_object)
 
     assert res_1 == res_2
@@ -262,3 +270,47 @@ def test_setup_mappings_exception_logging(caplog):
     with caplog.at_level(logging.ERROR):
         with pytest.raises(TransformationProcessError):
             RefDataMapping.setup_mappings(mock)
+
+
+def test_indexed_lookups_match_first_best_row():
+    mock = Mock(spec=RefDataMapping)
+    mock.mapped_legacy_keys = ["location", "loan_type"]
+    mock.regular_mappings = [
+        {"location": "l_1", "loan_type": "lt_1", "folio_name": "first"},
+        {"location": "l_1", "loan_type": "lt_1", "folio_name": "duplicate"},
+    ]
+    mock.hybrid_mappings = [
+        {"location": "*", "loan_type": "lt_1", "folio_name": "any location"},
+        {"location": "l_1", "loan_type": "*", "folio_name": "any loan type"},
+        {"location": "l_1", "loan_type": "*", "folio_name": "duplicate"},
+    ]
+    RefDataMapping.index_mappings(mock)
+
+    def lookup(location, loan_type):
+        legacy_object = {"location": location, "loan_type": loan_type}
+        mapping = RefDataMapping.get_ref_data_mapping(
+            mock, legacy_object
+        ) or RefDataMapping.get_hybrid_mapping(mock, legacy_object)
+        return mapping["folio_name"] if mapping else None
+
+    assert lookup(" l_1", "lt_1 ") == "first"
+    # Equally specific matches: the first row in the map wins
+    assert lookup("l_1", "lt_2") == "any loan type"
+    assert lookup("l_2", "lt_1") == "any location"
+    # A legacy value of "*" matches a wildcard exactly, which outscores the wildcard
+    assert lookup("*", "lt_1") == "any location"
+    assert lookup("l_2", "lt_2") is None
+    with pytest.raises(KeyError):
+        RefDataMapping.get_ref_data_mapping(mock, {"location": "l_1"})
+
+
+def test_hybrid_mapping_cache_is_bounded(monkeypatch):
+    monkeypatch.setattr(ref_data_mapping, "HYBRID_MAPPING_CACHE_SIZE", 2)
+    mock = Mock(spec=RefDataMapping)
+    mock.mapped_legacy_keys = ["location", "loan_type"]
+    mock.regular_mappings = []
+    mock.hybrid_mappings = [{"location": "l_1", "loan_type": "*"}]
+    RefDataMapping.index_mappings(mock)
+    for loan_type in ["a", "b", "c"]:
+        RefDataMapping.get_hybrid_mapping(mock, {"location": "l_1", "loan_type": loan_type})
+    assert list(mock.hybrid_mapping_cache) == [("l_1", "b"), ("l_1", "c")]
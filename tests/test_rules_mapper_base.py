@@ -20,6 +20,7 @@ from folio_migration_tools.library_configuration import FolioRelease, HridHandli
 from folio_migration_tools.marc_rules_transformation.marc_reader_wrapper import (
     DEFAULT_MARC_RECORD_PREPROCESSORS,
 )
+from folio_migration_tools.marc_rules_transformation.compiled_mapping_rules import CompiledMapping
 from folio_migration_tools.marc_rules_transformation.conditions import Conditions
 from folio_migration_tools.marc_rules_transformation.rules_mapper_base import (
     RulesMapperBase,
@@ -250,8 +251,12 @@ def test_get_srs_string_bib():
                 True,
                 FOLIONamespaces.instances,
             )
-            assert '"recordType": "MARC_BIB"' in srs_record_string
-            assert json.dumps(id_holder) in srs_record_string
+            srs_record = json.loads(srs_record_string)
+            assert srs_record["recordType"] == "MARC_BIB"
+            assert srs_record["externalIdsHolder"] == id_holder
+            assert json.loads(srs_record["rawRecord"]["content"]) == record1.as_dict()
+            assert srs_record["parsedRecord"]["content"] == record1.as_dict()
+            assert srs_record["leaderRecordStatus"] == str(record1.leader)[5]
             assert "snapshotId" not in record
 
 
@@ -326,7 +331,7 @@ def test_save_source_record(caplog, folio_record, marc_record, mapper_base):
     )
 
     assert len(srs_records) == 1
-    assert srs_records[0].startswith('{"id": "')
+    assert json.loads(srs_records[0])["id"]
     assert srs_records[0].endswith('"}\n')
 
 
@@ -572,3 +577,80 @@ def test_map_field_according_to_mapping_exception_logging(mapper_base, caplog):
 
     # Restore
     mapper.handle_entity_mapping = original_method
+
+
+schema_compiled_rules = {
+    "properties": {
+        "title": {"type": "string"},
+        "statisticalCodeIds": {"type": "array", "items": {"type": "string"}},
+        "series": {"type": "array", "items": {"type": "string"}},
+        "identifiers": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {"value": {"type": "string"}, "identifierTypeId": {"type": "string"}},
+            },
+        },
+    }
+}
+
+rules_compiled = {
+    "245": [
+        {
+            "rules": [{"conditions": [{"type": "trim_period, trim"}]}],
+            "target": "title",
+            "subfield": ["a", "b"],
+            "subFieldDelimiter": [{"value": " : ", "subfields": ["a", "b"]}],
+            "applyRulesOnConcatenatedData": True,
+        },
+        {"rules": [{"value": "code-1"}], "target": "statisticalCodeIds", "subfield": []},
+    ],
+    "490": [
+        {
+            "rules": [{"conditions": [{"type": "char_select", "parameter": {"from": 0, "to": 4}}]}],
+            "target": "series",
+            "subfield": ["a"],
+        }
+    ],
+    "024": [
+        {
+            "rules": [{"conditions": [{"type": "remove_ending_punc, trim"}]}],
+            "target": "identifiers.value",
+            "subfield": ["a"],
+        },
+    ],
+}
+
+
+def test_compiled_mapping_rules(mapper_base):
+    mapper = mapper_base
+    mapper.task_configuration = Mock(migration_task_type="HoldingsMarcTransformer")
+    mapper.schema = schema_compiled_rules
+    mapper.mappings = json.loads(json.dumps(rules_compiled))
+    mapper.compile_mapping_rules()
+    title_mapping = mapper.compiled_mapping(mapper.mappings["245"][0])
+    assert [c[0] for c in title_mapping.condition_functions] == ["trim_period", "trim"]
+    assert title_mapping.custom_delimiters == [(" : ", ["a", "b"])]
+    assert CompiledMapping({"rules": [{"value": "false"}]}).values_to_add == [False]
+
+    folio_record: dict = {}
+    fields = [
+        Field(tag="245", indicators=["0", "0"], subfields=[Subfield("a", "Title"), Subfield("b", "sub.")]),
+        Field(tag="490", indicators=["0", " "], subfields=[Subfield("a", "Series 1")]),
+        Field(tag="024", indicators=["0", " "], subfields=[Subfield("a", " 12345; ")]),
+        Field(tag="024", indicators=["0", " "], subfields=[Subfield("a", "67890")]),
+    ]
+    for marc_field in fields:
+        mapper.process_marc_field(folio_record, marc_field, set(), ["legacy_id"])
+    assert folio_record == {
+        "title": "Title : sub",
+        "statisticalCodeIds": ["code-1"],
+        "series": ["Seri"],
+        "identifiers": [{"value": "12345"}, {"value": "67890"}],
+    }
+
+    # Rules replaced after compilation are compiled when first used
+    mapper.mappings["490"] = [{"target": "series", "subfield": ["a"]}]
+    folio_record = {}
+    mapper.process_marc_field(folio_record, fields[1], set(), ["legacy_id"])
+    assert folio_record == {"series": ["Series 1"]}
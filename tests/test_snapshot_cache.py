@@ -0,0 +1,86 @@
+from unittest.mock import Mock
+
+from folioclient import FolioClient
+
+from folio_migration_tools import snapshot_cache
+from folio_migration_tools.snapshot_cache import SnapshotCache
+
+
+def mocked_folio_client():
+    folio_client = Mock(spec=FolioClient)
+    folio_client.tenant_id = "test_tenant"
+    folio_client.module_versions = ["mod-users-19.2.0", "mod-source-record-manager-3.8.0"]
+    folio_client.get_from_github.return_value = {"type": "object"}
+    folio_client.folio_get_all.side_effect = lambda path, *args, **kwargs: iter([{"path": path}])
+    folio_client.folio_get_single_object.return_value = {"001": []}
+    return folio_client
+
+
+def test_snapshots_are_shared_and_refreshed(tmp_path):
+    fetch = Mock(return_value={"id": "1"})
+
+    for _ in range(2):
+        cache = SnapshotCache(tmp_path)
+        assert cache.get("tenant", "schemas", "v1", ["a"], fetch) == {"id": "1"}
+    assert fetch.call_count == 1
+    assert cache.hits == 1
+
+    SnapshotCache(tmp_path).get("tenant", "schemas", "v2", ["a"], fetch)
+    SnapshotCache(tmp_path).get("other_tenant", "schemas", "v1", ["a"], fetch)
+    assert fetch.call_count == 3
+
+    fetch.return_value = {"id": "2"}
+    cache = SnapshotCache(tmp_path, refresh=True)
+    assert cache.get("tenant", "schemas", "v1", ["a"], fetch) == {"id": "2"}
+    assert cache.get("tenant", "schemas", "v1", ["a"], fetch) == {"id": "2"}
+    assert fetch.call_count == 4
+    assert SnapshotCache(tmp_path).get("tenant", "schemas", "v1", ["a"], fetch) == {"id": "2"}
+
+
+def test_install_caches_schemas_rules_and_reference_data(tmp_path):
+    folio_client = mocked_folio_client()
+    get_from_github = folio_client.get_from_github
+    folio_get_all = folio_client.folio_get_all
+    folio_get_single_object = folio_client.folio_get_single_object
+
+    for _ in range(2):
+        SnapshotCache(tmp_path).install(folio_client)
+        assert folio_client.get_from_github("folio-org", "mod-users", "/ramls/userdata.json") == {
+            "type": "object"
+        }
+        assert list(folio_client.folio_get_all("/locations", "locations", "cql.allRecords=1")) == [
+            {"path": "/locations"}
+        ]
+        assert list(folio_client.folio_get_all("/users", "users", "barcode==1")) == [
+            {"path": "/users"}
+        ]
+        assert folio_client.folio_get_single_object("/mapping-rules/marc-bib") == {"001": []}
+        folio_client.folio_get_single_object("/hrid-settings-storage/hrid-settings")
+
+    assert get_from_github.call_count == 1
+    assert [c.args[0] for c in folio_get_all.call_args_list] == ["/locations", "/users", "/users"]
+    assert folio_get_single_object.call_count == 3
+    assert (tmp_path / "test_tenant" / "schemas" / "mod-users-19.2.0").is_dir()
+    assert (
+        tmp_path / "test_tenant" / "mapping_rules" / "mod-source-record-manager-3.8.0"
+    ).is_dir()
+
+    # An upgraded module is fetched again
+    folio_client.module_versions = ["mod-users-19.3.0"]
+    folio_client.get_from_github("folio-org", "mod-users", "/ramls/userdata.json")
+    assert get_from_github.call_count == 2
+
+
+def test_cached_without_snapshot_cache_fetches(tmp_path):
+    fetch = Mock(return_value={"id": "1"})
+    folio_client = mocked_folio_client()
+
+    snapshot_cache.cached(folio_client, "schemas", None, ["a"], fetch)
+    snapshot_cache.cached(folio_client, "schemas", None, ["a"], fetch)
+    assert fetch.call_count == 2
+
+    SnapshotCache(tmp_path).install(folio_client)
+    snapshot_cache.cached(folio_client, "schemas", None, ["a"], fetch)
+    snapshot_cache.cached(folio_client, "schemas", None, ["a"], fetch)
+    assert fetch.call_count == 3
+    assert (tmp_path / "test_tenant" / "schemas" / "latest").is_dir()
@@ -1,5 +1,6 @@
 """Tests for UserImporterTask adapter module."""
 
+import gzip
 from types import MethodType
 from unittest.mock import Mock, AsyncMock, patch, MagicMock
 from pathlib import Path
@@ -10,6 +11,7 @@ from datetime import datetime, timezone
 from folio_uuid.folio_namespaces import FOLIONamespaces
 from folioclient import FolioClient
 
+from folio_migration_tools.custom_exceptions import TransformationProcessError
 from folio_migration_tools.migration_tasks.user_importer import UserImportTask
 from folio_migration_tools.library_configuration import (
     FileDefinition,
@@ -399,6 +401,24 @@ class TestUserImporterTaskDoWork:
         with pytest.raises(FileNotFoundError):
             await importer.do_work()
 
+    @pytest.mark.asyncio
+    async def test_do_work_rejects_compressed_files(self, tmp_path):
+        """Test that compressed result files are refused before importing."""
+        with gzip.open(tmp_path / "folio_users.json", "wt") as results_file:
+            results_file.write('{"username": "user"}\n')
+        importer = Mock(spec=UserImportTask)
+        importer.task_configuration = Mock()
+        importer.task_configuration.files = [Mock(file_name="folio_users.json")]
+        importer.folder_structure = Mock()
+        importer.folder_structure.results_folder = tmp_path
+        importer.files_processed = []
+        importer.total_records = 0
+        importer.do_work = MethodType(UserImportTask.do_work, importer)
+
+        with pytest.raises(TransformationProcessError, match="gzip compressed"):
+            await importer.do_work()
+        importer._create_fdi_config.assert_not_called()
+
 
 class TestUserImporterTaskWrapUp:
     """Tests for the wrap_up method."""